@@ -11,7 +11,7 @@ import hashlib
 import secrets
 import time
 from datetime import datetime
-from supabase_helpers import get_supabase_client
+from api.database import get_db
 
 # API Key header
 API_KEY_HEADER = APIKeyHeader(name="X-API-Key", auto_error=False)
@@ -87,10 +87,10 @@ async def validate_api_key(
     key_hash = hash_api_key(api_key)
 
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Look up the API key in the database
-        result = supabase.table('divv_api_keys').select('*').eq('key_hash', key_hash).execute()
+        result = await db.table('divv_api_keys').select('*').eq('key_hash', key_hash).execute()
 
         if not result.data:
             raise HTTPException(
@@ -136,7 +136,7 @@ async def validate_api_key(
                 )
 
         # Update last used timestamp
-        supabase.table('divv_api_keys').update({
+        await db.table('divv_api_keys').update({
             'last_used_at': datetime.utcnow().isoformat(),
             'request_count': key_data.get('request_count', 0) + 1
         }).eq('id', key_data['id']).execute()
@@ -30,6 +30,28 @@ class Settings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    SUPABASE_SERVICE_ROLE_KEY: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+
+    # Async PostgREST connection pool (api/database.py), per worker
+    DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", "200"))
+    DB_MAX_KEEPALIVE: int = int(os.getenv("DB_MAX_KEEPALIVE", "50"))
+    DB_TIMEOUT: float = float(os.getenv("DB_TIMEOUT", "30"))
+
+    # Buffered audit log writer (api/middleware/audit_logger.py)
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "500"))  # Rows per multi-row insert
+    AUDIT_FLUSH_INTERVAL: float = float(os.getenv("AUDIT_FLUSH_INTERVAL", "2.0"))  # Max seconds a row waits
+    AUDIT_BUFFER_SIZE: int = int(os.getenv("AUDIT_BUFFER_SIZE", "50000"))  # Ring bound; oldest rows spill past it
+    AUDIT_SPILL_PATH: str = os.getenv("AUDIT_SPILL_PATH", "logs/audit_spill.jsonl")  # Used while the DB is unreachable
+    AUDIT_REJECTED_PATH: str = os.getenv("AUDIT_REJECTED_PATH", "logs/audit_rejected.jsonl")  # Rows the DB refuses (4xx)
+
+    # API key usage counters (api/middleware/usage_counters.py)
+    USAGE_COUNTERS_BACKEND: str = os.getenv("USAGE_COUNTERS_BACKEND", "auto")  # auto (Redis if reachable) | memory
+    USAGE_SYNC_INTERVAL: float = float(os.getenv("USAGE_SYNC_INTERVAL", "10"))  # Seconds between DB reconciliations
+    USAGE_REDIS_RETRY_INTERVAL: float = float(os.getenv("USAGE_REDIS_RETRY_INTERVAL", "5"))  # Reconnect probe interval after a Redis error
+
+    # Symbol access index for tier coverage checks (api/middleware/tier_enforcer.py)
+    TIER_ACCESS_REFRESH_SECONDS: float = float(os.getenv("TIER_ACCESS_REFRESH_SECONDS", "300"))
+    TIER_ACCESS_RETRY_SECONDS: float = float(os.getenv("TIER_ACCESS_RETRY_SECONDS", "5"))  # First backoff after a failed load
 
     # Google OAuth
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
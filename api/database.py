@@ -0,0 +1,388 @@
+"""
+Async Data Access Layer
+
+Non-blocking PostgREST client for the API. Queries are built with the same
+fluent interface as supabase-py (table().select().eq()...) but execute()
+is awaitable and runs on a pooled httpx.AsyncClient, so a slow query only
+suspends its own handler instead of blocking the worker's event loop.
+
+Usage:
+    from api.database import get_db
+
+    db = get_db()
+    result = await db.table('raw_stocks').select('*').eq('symbol', 'AAPL').execute()
+    rows = result.data
+
+One client (and connection pool) is created per key on first use and
+closed on application shutdown via close_databases().
+"""
+
+import asyncio
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import httpx
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Values inside in.() / or=() lists that must be quoted for PostgREST
+_RESERVED = re.compile(r'[,.:()"\s]')
+
+
+class DatabaseError(Exception):
+    """PostgREST request failed (carries the PostgREST error code and message)."""
+
+    def __init__(self, message: str, code: Optional[str] = None, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.status_code = status_code
+
+
+class QueryResult:
+    """Query response: rows in data, total row count when count='exact' was requested."""
+
+    __slots__ = ('data', 'count')
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _format_value(value: Any) -> str:
+    """Render a filter value the way PostgREST expects."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _format_list(values: Iterable[Any]) -> str:
+    """Render an in.() list, quoting values that contain reserved characters."""
+    items = []
+    for value in values:
+        text = _format_value(value)
+        if _RESERVED.search(text):
+            text = '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+        items.append(text)
+    return f"({','.join(items)})"
+
+
+class _NotFilter:
+    """Negates the next filter: query.not_.is_('col', 'null')."""
+
+    def __init__(self, query: 'AsyncQuery'):
+        self._query = query
+
+    def __getattr__(self, name: str):
+        method = getattr(self._query, name)
+
+        def negated(*args, **kwargs):
+            self._query._negate = True
+            return method(*args, **kwargs)
+        return negated
+
+
+class AsyncQuery:
+    """
+    Fluent PostgREST request builder; await execute() to run it.
+
+    Supports the subset of supabase-py used by the API: select (with
+    count='exact'), insert, upsert, update, delete, filters (eq, neq, gt,
+    gte, lt, lte, like, ilike, is_, in_, or_, not_), order, limit, range
+    and single.
+    """
+
+    def __init__(self, db: 'AsyncDatabase', table: str):
+        self._db = db
+        self._table = table
+        self._method = 'GET'
+        self._params: List[Tuple[str, str]] = []
+        self._order: List[str] = []
+        self._headers: Dict[str, str] = {}
+        self._body: Any = None
+        self._count = False
+        self._single = False
+        self._negate = False
+
+    # Operations
+
+    def select(self, columns: str = '*', count: Optional[str] = None) -> 'AsyncQuery':
+        """Select columns (count='exact' also returns the total row count)."""
+        self._method = 'GET'
+        self._params.append(('select', ','.join(c.strip() for c in columns.split(','))))
+        if count:
+            self._count = True
+            self._headers['Prefer'] = f'count={count}'
+        return self
+
+    def insert(self, rows: Union[Dict, List[Dict]], returning: str = 'representation') -> 'AsyncQuery':
+        """Insert one or more rows (returning='minimal' skips echoing them back)."""
+        self._method = 'POST'
+        self._body = rows
+        self._headers['Prefer'] = f'return={returning}'
+        return self
+
+    def upsert(self, rows: Union[Dict, List[Dict]], on_conflict: Optional[str] = None) -> 'AsyncQuery':
+        """Insert or merge rows on the primary key (or on_conflict columns)."""
+        self._method = 'POST'
+        self._body = rows
+        self._headers['Prefer'] = 'return=representation,resolution=merge-duplicates'
+        if on_conflict:
+            self._params.append(('on_conflict', on_conflict))
+        return self
+
+    def update(self, values: Dict[str, Any]) -> 'AsyncQuery':
+        """Update rows matching the filters."""
+        self._method = 'PATCH'
+        self._body = values
+        self._headers['Prefer'] = 'return=representation'
+        return self
+
+    def delete(self) -> 'AsyncQuery':
+        """Delete rows matching the filters."""
+        self._method = 'DELETE'
+        self._headers['Prefer'] = 'return=representation'
+        return self
+
+    # Filters
+
+    @property
+    def not_(self) -> _NotFilter:
+        """Negate the next filter."""
+        return _NotFilter(self)
+
+    def _filter(self, column: str, operator: str, value: str) -> 'AsyncQuery':
+        prefix = 'not.' if self._negate else ''
+        self._negate = False
+        self._params.append((column, f'{prefix}{operator}.{value}'))
+        return self
+
+    def eq(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'eq', _format_value(value))
+
+    def neq(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'neq', _format_value(value))
+
+    def gt(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'gt', _format_value(value))
+
+    def gte(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'gte', _format_value(value))
+
+    def lt(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'lt', _format_value(value))
+
+    def lte(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'lte', _format_value(value))
+
+    def like(self, column: str, pattern: str) -> 'AsyncQuery':
+        return self._filter(column, 'like', pattern)
+
+    def ilike(self, column: str, pattern: str) -> 'AsyncQuery':
+        return self._filter(column, 'ilike', pattern)
+
+    def is_(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'is', _format_value(value))
+
+    def in_(self, column: str, values: Iterable[Any]) -> 'AsyncQuery':
+        return self._filter(column, 'in', _format_list(values))
+
+    def or_(self, filters: str) -> 'AsyncQuery':
+        """Match any of a PostgREST filter list, e.g. 'a.eq.1,b.is.null'."""
+        prefix = 'not.' if self._negate else ''
+        self._negate = False
+        self._params.append((f'{prefix}or', f'({filters})'))
+        return self
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None) -> 'AsyncQuery':
+        """Add a sort key (later calls are secondary keys)."""
+        key = f"{column}.{'desc' if desc else 'asc'}"
+        if nullsfirst is not None:
+            key += '.nullsfirst' if nullsfirst else '.nullslast'
+        self._order.append(key)
+        return self
+
+    def limit(self, count: int) -> 'AsyncQuery':
+        self._params.append(('limit', str(count)))
+        return self
+
+    def range(self, start: int, end: int) -> 'AsyncQuery':
+        """Rows start..end inclusive."""
+        self._params.append(('offset', str(start)))
+        self._params.append(('limit', str(end - start + 1)))
+        return self
+
+    def single(self) -> 'AsyncQuery':
+        """Return exactly one row as a dict (error if zero or several match)."""
+        self._single = True
+        self._headers['Accept'] = 'application/vnd.pgrst.object+json'
+        return self
+
+    async def execute(self) -> QueryResult:
+        """
+        Run the request on the pooled client.
+
+        Returns:
+            QueryResult with data (list of rows, or a dict after single())
+            and count (when count='exact' was requested)
+
+        Raises:
+            DatabaseError: PostgREST returned an error
+        """
+        params = list(self._params)
+        if self._order:
+            params.append(('order', ','.join(self._order)))
+        return await self._db.request(
+            self._method, f'/rest/v1/{self._table}', params=params,
+            headers=self._headers, json=self._body, count=self._count
+        )
+
+
+class AsyncDatabase:
+    """Pooled async PostgREST client for one key (anon or service role)."""
+
+    def __init__(self, url: str, key: str, max_connections: int = None,
+                 max_keepalive: int = None, timeout: float = None):
+        """
+        Initialize the client (the connection pool is created on first use).
+
+        Args:
+            url: Supabase/PostgREST base URL
+            key: API key sent as apikey and bearer token
+            max_connections: Pool size (default: settings.DB_MAX_CONNECTIONS)
+            max_keepalive: Idle connections kept open (default: settings.DB_MAX_KEEPALIVE)
+            timeout: Request timeout in seconds (default: settings.DB_TIMEOUT)
+        """
+        if not url or not key:
+            raise DatabaseError("Supabase credentials not configured")
+        self.url = url.rstrip('/')
+        self.key = key
+        self.max_connections = max_connections or settings.DB_MAX_CONNECTIONS
+        self.max_keepalive = max_keepalive or settings.DB_MAX_KEEPALIVE
+        self.timeout = timeout or settings.DB_TIMEOUT
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.url,
+                headers={'apikey': self.key, 'Authorization': f'Bearer {self.key}'},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive
+                ),
+                timeout=self.timeout
+            )
+        return self._client
+
+    def table(self, name: str) -> AsyncQuery:
+        """Start a query on a table or view."""
+        return AsyncQuery(self, name)
+
+    async def rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> QueryResult:
+        """Call a Postgres function."""
+        return await self.request('POST', f'/rest/v1/rpc/{function}', json=params or {})
+
+    async def request(self, method: str, path: str, params: Optional[List[Tuple[str, str]]] = None,
+                      headers: Optional[Dict[str, str]] = None, json: Any = None,
+                      count: bool = False) -> QueryResult:
+        """
+        Send one PostgREST request.
+
+        Raises:
+            DatabaseError: Non-2xx response
+        """
+        response = await self._get_client().request(method, path, params=params, headers=headers, json=json)
+
+        if response.status_code >= 400:
+            try:
+                error = response.json()
+            except ValueError:
+                error = {'message': response.text[:200]}
+            raise DatabaseError(
+                error.get('message') or f"HTTP {response.status_code}",
+                code=error.get('code'), status_code=response.status_code
+            )
+
+        data = response.json() if response.content else None
+        total = None
+        if count:
+            content_range = response.headers.get('content-range', '')
+            _, _, total_text = content_range.partition('/')
+            total = int(total_text) if total_text.isdigit() else None
+        return QueryResult(data if data is not None else [], total)
+
+    async def aclose(self):
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_databases: Dict[str, AsyncDatabase] = {}
+
+
+def get_db() -> AsyncDatabase:
+    """Shared client using the anon key (reads)."""
+    if 'anon' not in _databases:
+        _databases['anon'] = AsyncDatabase(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    return _databases['anon']
+
+
+def get_admin_db() -> AsyncDatabase:
+    """Shared client using the service role key (writes that bypass RLS)."""
+    if 'admin' not in _databases:
+        _databases['admin'] = AsyncDatabase(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+    return _databases['admin']
+
+
+async def close_databases():
+    """Close all connection pools (application shutdown)."""
+    clients = list(_databases.values())
+    _databases.clear()
+    await asyncio.gather(*(db.aclose() for db in clients), return_exceptions=True)
+
+
+# Repository helpers shared by the routers
+
+async def fetch_stock(symbol: str, **filters: Any) -> Optional[Dict[str, Any]]:
+    """
+    One raw_stocks row by symbol.
+
+    Args:
+        symbol: Symbol (case-insensitive)
+        **filters: Extra equality filters, e.g. type='etf'
+
+    Returns:
+        Row dict or None if not found
+    """
+    query = get_db().table('raw_stocks').select('*').eq('symbol', symbol.upper())
+    for column, value in filters.items():
+        query = query.eq(column, value)
+    result = await query.execute()
+    return result.data[0] if result.data else None
+
+
+async def fetch_dividend_history(symbol: str, limit: int, columns: str = 'ex_date, amount') -> List[Dict[str, Any]]:
+    """Latest dividends for a symbol, newest first."""
+    result = await get_db().table('raw_dividends')\
+        .select(columns)\
+        .eq('symbol', symbol.upper())\
+        .order('ex_date', desc=True)\
+        .limit(limit)\
+        .execute()
+    return result.data or []
+
+
+__all__ = [
+    'AsyncDatabase', 'AsyncQuery', 'QueryResult', 'DatabaseError',
+    'get_db', 'get_admin_db', 'close_databases',
+    'fetch_stock', 'fetch_dividend_history'
+]
@@ -12,7 +12,7 @@ import hashlib
 import logging
 from datetime import datetime, timezone
 
-from supabase_helpers import get_supabase_client
+from api.database import get_db
 
 logger = logging.getLogger(__name__)
 
@@ -70,10 +70,10 @@ async def require_api_key(request: Request) -> Dict[str, Any]:
     api_key_hash = _hash_api_key(api_key)
 
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Look up API key in database
-        result = supabase.table('divv_api_keys').select(
+        result = await db.table('divv_api_keys').select(
             'id, user_id, tier, key_name, is_active, expires_at'
         ).eq('key_hash', api_key_hash).execute()
 
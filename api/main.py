@@ -18,9 +18,12 @@ from typing import Dict, Any
 from api.routers import stocks, dividends, screeners, etfs, analytics, search, api_keys, auth, bulk
 # Note: Rate limiting is now handled by tier_enforcer middleware, not separate rate limiters
 from api.config import settings
+from api.database import get_db, close_databases
 from api.middleware.request_id import RequestIDMiddleware
 from api.middleware.health_rate_limit import health_limiter
-from api.middleware.audit_logger import AuditLoggingMiddleware
+from api.middleware.audit_logger import AuditLoggingMiddleware, audit_buffer
+from api.middleware.usage_counters import usage_counters
+from api.middleware.tier_enforcer import symbol_access_index
 
 # Configure logging
 logging.basicConfig(
@@ -174,11 +177,8 @@ async def health_check(request: Request) -> Dict[str, Any]:
         )
 
     try:
-        from supabase_helpers import get_supabase_client
-
         # Test database connection
-        supabase = get_supabase_client()
-        result = supabase.table('raw_stocks').select('symbol', count='exact').limit(1).execute()
+        await get_db().table('raw_stocks').select('symbol').limit(1).execute()
 
         return {
             "status": "healthy",
@@ -264,20 +264,24 @@ async def startup_event():
 
     # Test database connection
     try:
-        from supabase_helpers import get_supabase_client
-        supabase = get_supabase_client()
-        result = supabase.table('raw_stocks').select('symbol', count='exact').limit(1).execute()
+        result = await get_db().table('raw_stocks').select('symbol', count='exact').limit(1).execute()
         logger.info(f"Database connected: {result.count:,} symbols available")
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         raise
 
+    # Warm the symbol access index so the first bulk request doesn't pay for it
+    await symbol_access_index.refresh()
+
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup resources on shutdown."""
     logger.info("Dividend API shutting down...")
+    await audit_buffer.close()
+    await usage_counters.close()
+    await close_databases()
 
 
 if __name__ == "__main__":
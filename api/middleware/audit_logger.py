@@ -3,20 +3,339 @@ Audit Logging Middleware
 
 Logs all API access to audit_api_access table for security audit trails.
 Tracks which API key accessed which endpoint, when, and with what result.
+
+Records are not written per request: the middleware appends them to an
+in-process AuditBuffer (a bounded ring), and a background task flushes
+the buffer as multi-row inserts when it reaches AUDIT_BATCH_SIZE rows or
+every AUDIT_FLUSH_INTERVAL seconds. Batches that cannot be written are
+spilled to AUDIT_SPILL_PATH (JSONL) and replayed once the database is
+reachable again; the buffer is flushed on application shutdown.
+
+A batch the database rejects (4xx) is bisected until the offending rows
+are isolated; those rows go to AUDIT_REJECTED_PATH instead of the spill
+file, so one bad row cannot keep a whole batch replaying forever.
 """
 
+import json
 import logging
+import os
+import shutil
 import time
+from collections import deque
+from datetime import datetime, timezone
 from fastapi import Request
 from fastapi.responses import Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, List, Optional
 import asyncio
 
-from supabase_helpers import get_supabase_admin_client
+from api.config import settings
+from api.database import DatabaseError, get_admin_db
 
 logger = logging.getLogger(__name__)
 
+AUDIT_TABLE = "audit_api_access"
+
+# 4xx responses that say nothing about the rows themselves (auth, throttling)
+TRANSIENT_STATUS_CODES = {401, 403, 408, 429}
+
+
+class AuditBuffer:
+    """
+    Bounded in-process buffer of audit records with batched, async flushing.
+
+    Nothing here blocks the event loop: add() only touches memory, and all
+    file I/O (spill, replay, rejected rows) runs in a worker thread.
+
+    Usage:
+        audit_buffer.add(record)     # O(1), no network or disk I/O
+        ...
+        await audit_buffer.close()   # Final flush on shutdown
+    """
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None,
+                 max_size: int = None, spill_path: str = None, rejected_path: str = None):
+        """
+        Initialize buffer.
+
+        Args:
+            batch_size: Rows per insert; reaching it triggers a flush
+            flush_interval: Max seconds a record waits before being flushed
+            max_size: Ring bound; past it the oldest records are spilled to disk
+            spill_path: JSONL file for records that could not be written
+            rejected_path: JSONL file for records the database refused
+        """
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.AUDIT_FLUSH_INTERVAL
+        self.max_size = max_size or settings.AUDIT_BUFFER_SIZE
+        self.spill_path = spill_path or settings.AUDIT_SPILL_PATH
+        self.rejected_path = rejected_path or settings.AUDIT_REJECTED_PATH
+
+        self._records: deque = deque()
+        self._overflow: List[Dict[str, Any]] = []  # Pushed out of the full ring, spilled by the flush task
+        self._rejected: List[Dict[str, Any]] = []  # Refused rows waiting to be written to rejected_path
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        self.stats = {
+            'buffered': 0,
+            'written': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'rejected': 0
+        }
+
+    def add(self, record: Dict[str, Any]):
+        """
+        Buffer one audit record (called on the event loop).
+
+        Starts the flush task on first use. If the ring is full the oldest
+        record moves to the overflow list, which the flush task spills to
+        disk in bulk, rather than being dropped.
+
+        Args:
+            record: audit_api_access row
+        """
+        self._ensure_started()
+        if len(self._records) >= self.max_size:
+            self._overflow.append(self._records.popleft())
+            self._wakeup.set()
+        self._records.append(record)
+        self.stats['buffered'] += 1
+
+        if len(self._records) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._closing = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        """Flush on size or age until close() is called."""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            # A successful write means the database is reachable again:
+            # replay whatever was spilled while it was not
+            if await self.flush() and self._has_spill():
+                await self.replay_spill()
+
+    async def flush(self) -> int:
+        """
+        Write all buffered records in batches.
+
+        Returns:
+            Number of records written (overflow and unwritten batches are
+            spilled to disk, rejected rows go to the rejected file)
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        written_before = self.stats['written']
+        async with self._flush_lock:
+            # Overflowed records are the oldest: spill them ahead of the rest
+            unwritten, self._overflow = self._overflow, []
+            batch = []
+            try:
+                while self._records:
+                    batch = [self._records.popleft() for _ in range(min(self.batch_size, len(self._records)))]
+                    unwritten.extend(await self._write(batch))
+                    batch = []
+            except BaseException:
+                # Cancelled mid-insert: put the taken rows back for the next
+                # flush (a partly bisected batch may be written twice)
+                self._records.extendleft(reversed(batch))
+                self._overflow[:0] = unwritten
+                raise
+            if unwritten:
+                await asyncio.to_thread(self._spill, unwritten)
+            await self._write_rejected()
+        return self.stats['written'] - written_before
+
+    @staticmethod
+    def _is_rejection(error: Exception) -> bool:
+        """True if the database refused the rows themselves (retrying cannot help)."""
+        status = getattr(error, 'status_code', None)
+        return (isinstance(error, DatabaseError) and status is not None
+                and 400 <= status < 500 and status not in TRANSIENT_STATUS_CODES)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Multi-row insert, bisecting the batch when the database rejects it.
+
+        Args:
+            batch: audit_api_access rows
+
+        Returns:
+            Rows not written because the database is unreachable or failing
+            (empty when every row was either written or rejected)
+        """
+        try:
+            await get_admin_db().table(AUDIT_TABLE).insert(batch, returning='minimal').execute()
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+            return []
+        except Exception as e:
+            if not self._is_rejection(e):
+                self.stats['failed_batches'] += 1
+                logger.warning(f"⚠️  Audit batch of {len(batch)} rows not written: {e}")
+                return batch
+            if len(batch) == 1:
+                self._reject(batch[0], e)
+                return []
+
+        middle = len(batch) // 2
+        unwritten = await self._write(batch[:middle])
+        if unwritten:
+            return unwritten + batch[middle:]
+        return await self._write(batch[middle:])
+
+    def _reject(self, record: Dict[str, Any], error: DatabaseError):
+        """Queue a row the database refused for the rejected file (never replayed)."""
+        self.stats['rejected'] += 1
+        logger.warning(f"⚠️  Audit record rejected ({error.status_code} {error.code}): {error.message}")
+        self._rejected.append({
+            'error': error.message,
+            'code': error.code,
+            'status_code': error.status_code,
+            'record': record
+        })
+
+    async def _write_rejected(self):
+        """Append queued rejected rows to the rejected file (in a worker thread)."""
+        if self._rejected:
+            entries, self._rejected = self._rejected, []
+            await asyncio.to_thread(self._append_jsonl, self.rejected_path, entries, 'rejected')
+
+    def _spill(self, records: List[Dict[str, Any]]):
+        """Append records to the spill file (blocking; run in a worker thread)."""
+        if self._append_jsonl(self.spill_path, records, 'spilled'):
+            self.stats['spilled'] += len(records)
+
+    @staticmethod
+    def _append_jsonl(path: str, entries: List[Dict[str, Any]], kind: str) -> bool:
+        """Append entries as JSON lines; False if the file could not be written."""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'a') as f:
+                f.writelines(json.dumps(entry, default=str) + '\n' for entry in entries)
+            return True
+        except OSError as e:
+            logger.error(f"❌ Could not write {len(entries)} {kind} audit records to {path}: {e}")
+            return False
+
+    @property
+    def _replay_path(self) -> str:
+        return f"{self.spill_path}.replay"
+
+    def _has_spill(self) -> bool:
+        """True if spilled records wait for replay (including an interrupted replay)."""
+        return os.path.exists(self.spill_path) or os.path.exists(self._replay_path)
+
+    def _take_spill(self, replay_path: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Move the spill file aside and read it (blocking; run in a worker thread).
+
+        Records spilled while the replay runs go to a fresh spill file. A
+        replay file left by an interrupted replay is kept: the spill file is
+        appended to it rather than replacing it.
+
+        Returns:
+            Spilled records, or None if the file could not be read
+        """
+        try:
+            if not os.path.exists(replay_path):
+                os.replace(self.spill_path, replay_path)
+            elif os.path.exists(self.spill_path):
+                with open(self.spill_path) as src, open(replay_path, 'r+') as dst:
+                    # Start on a fresh line in case the interrupted write was torn
+                    dst.seek(0, os.SEEK_END)
+                    if dst.tell():
+                        dst.seek(dst.tell() - 1)
+                        if dst.read(1) != '\n':
+                            dst.write('\n')
+                    shutil.copyfileobj(src, dst)
+                os.remove(self.spill_path)
+            with open(replay_path) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Could not read audit spill file {self.spill_path}: {e}")
+            return None
+
+    async def replay_spill(self) -> bool:
+        """
+        Insert spilled records and remove the spill file.
+
+        Returns:
+            True if the spill file is gone (replayed or absent)
+        """
+        if not self._has_spill():
+            return True
+
+        replay_path = self._replay_path
+        records = await asyncio.to_thread(self._take_spill, replay_path)
+        if records is None:
+            return False
+
+        replayed = True
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            unwritten = await self._write(batch)
+            if unwritten:
+                # Still failing: put the unwritten remainder back
+                await asyncio.to_thread(self._spill, unwritten + records[start + len(batch):])
+                replayed = False
+                break
+            self.stats['replayed'] += len(batch)
+
+        await asyncio.to_thread(os.remove, replay_path)
+        await self._write_rejected()
+        if replayed:
+            logger.info(f"✅ Replayed {len(records)} spilled audit records")
+        return replayed
+
+    async def close(self):
+        """Stop the flush task and write everything still buffered."""
+        if self._task is not None:
+            # Let the task finish its current flush instead of cancelling it
+            # mid-insert, which would drop the batch in flight
+            self._closing = True
+            self._wakeup.set()
+            try:
+                await self._task
+            except Exception as e:
+                logger.error(f"❌ Audit flush task failed: {e}")
+            self._task = None
+        written = await self.flush()
+        if written:
+            await self.replay_spill()
+        logger.info(
+            f"📝 Audit buffer closed: {self.stats['written']:,} written, "
+            f"{self.stats['spilled']:,} spilled to {self.spill_path}, "
+            f"{self.stats['rejected']:,} rejected"
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        """Buffer statistics (including records currently pending)."""
+        return {**self.stats, 'pending': len(self._records) + len(self._overflow)}
+
+
+# Process-wide buffer shared by the middleware and AuditLogger
+audit_buffer = AuditBuffer()
+
 
 class AuditLoggingMiddleware(BaseHTTPMiddleware):
     """
@@ -62,14 +381,8 @@ class AuditLoggingMiddleware(BaseHTTPMiddleware):
         # Calculate response time
         response_time_ms = int((time.time() - start_time) * 1000)
 
-        # Log to audit table in background (don't block response)
-        # Use asyncio.create_task to run in background without awaiting
-        try:
-            asyncio.create_task(
-                self._log_to_audit(request, response, response_time_ms)
-            )
-        except Exception as e:
-            logger.error(f"Error creating audit log task: {e}")
+        # Buffer the audit record (written in batches by the flush task)
+        self._log_to_audit(request, response, response_time_ms)
 
         return response
 
@@ -82,16 +395,16 @@ class AuditLoggingMiddleware(BaseHTTPMiddleware):
                 return True
         return False
 
-    async def _log_to_audit(
+    def _log_to_audit(
         self,
         request: Request,
         response: Response,
         response_time_ms: int
     ) -> None:
         """
-        Log request to audit table.
+        Queue the request's audit record on the shared buffer.
 
-        This runs in background and doesn't block the response.
+        No I/O happens here; the buffer's flush task writes it later.
         """
         try:
             # Extract auth info from request state (set by require_api_key dependency)
@@ -128,14 +441,13 @@ class AuditLoggingMiddleware(BaseHTTPMiddleware):
                 "ip_address": client_ip,
                 "user_agent": user_agent,
                 "response_time_ms": response_time_ms,
+                "request_time": datetime.now(timezone.utc).isoformat(),
             }
 
-            # Insert to database
-            supabase = get_supabase_admin_client()
-            result = supabase.table("audit_api_access").insert([audit_record]).execute()
+            audit_buffer.add(audit_record)
 
             logger.debug(
-                f"Audit logged: user={user_id[:8]}..., "
+                f"Audit queued: user={user_id[:8]}..., "
                 f"endpoint={endpoint}, status={status_code}, "
                 f"time={response_time_ms}ms"
             )
@@ -163,7 +475,7 @@ class AuditLogger:
         response_time_ms: Optional[int] = None,
     ) -> bool:
         """
-        Manually log API access to audit table.
+        Manually log API access to audit table (via the shared buffer).
 
         Args:
             user_id: User ID
@@ -176,7 +488,7 @@ class AuditLogger:
             response_time_ms: Response time in milliseconds
 
         Returns:
-            True if logged successfully, False otherwise
+            True if the record was queued, False otherwise
         """
         try:
             audit_record = {
@@ -188,12 +500,12 @@ class AuditLogger:
                 "ip_address": ip_address or "unknown",
                 "user_agent": user_agent or "unknown",
                 "response_time_ms": response_time_ms or 0,
+                "request_time": datetime.now(timezone.utc).isoformat(),
             }
 
-            supabase = get_supabase_admin_client()
-            result = supabase.table("audit_api_access").insert([audit_record]).execute()
+            audit_buffer.add(audit_record)
 
-            logger.info(f"Audit logged: {user_id[:8]}... accessed {endpoint}")
+            logger.info(f"Audit queued: {user_id[:8]}... accessed {endpoint}")
             return True
 
         except Exception as e:
@@ -218,16 +530,15 @@ class AuditLogger:
             List of audit log records
         """
         try:
-            from datetime import datetime, timedelta, timezone
+            from datetime import timedelta
 
             # Calculate date threshold
             threshold_date = (
                 datetime.now(timezone.utc) - timedelta(days=days)
             ).isoformat()
 
-            supabase = get_supabase_admin_client()
-            result = (
-                supabase.table("audit_api_access")
+            result = await (
+                get_admin_db().table(AUDIT_TABLE)
                 .select("*")
                 .eq("user_id", user_id)
                 .gte("request_time", threshold_date)
@@ -258,18 +569,16 @@ class AuditLogger:
             List of suspicious IPs and their failure counts
         """
         try:
-            from datetime import datetime, timedelta, timezone
+            from datetime import timedelta
 
             # Calculate time threshold
             threshold_time = (
                 datetime.now(timezone.utc) - timedelta(hours=hours)
             ).isoformat()
 
-            supabase = get_supabase_admin_client()
-
             # Query for failed requests
-            result = (
-                supabase.table("audit_api_access")
+            result = await (
+                get_admin_db().table(AUDIT_TABLE)
                 .select("ip_address, status_code")
                 .gte("request_time", threshold_time)
                 .gte("status_code", 400)
@@ -1,12 +1,16 @@
 """
 Rate Limiting Middleware
 Implements monthly + per-minute rate limiting with burst support
+
+Usage is counted in atomic in-memory/Redis counters (usage_counters.py)
+and reconciled to divv_api_keys in batched background syncs; the request
+path only reads key info and tier limits (both TTL-cached).
 """
 
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 from typing import Optional, Dict, Tuple
 import time
 import logging
@@ -14,11 +18,10 @@ import hashlib
 from dateutil import parser
 from cachetools import TTLCache
 
-from supabase_helpers import get_supabase_client, get_supabase_admin_client
+from api.database import get_db
+from api.middleware.usage_counters import usage_counters, MONTHLY_EXCEEDED, MINUTE_EXCEEDED
 
 logger = logging.getLogger(__name__)
-supabase = get_supabase_client()  # For reading data
-supabase_admin = get_supabase_admin_client()  # For admin operations (rate limiting)
 
 # API key cache: 1-minute TTL, max 10,000 keys
 # This reduces database queries by 95%+ for repeat requests
@@ -186,27 +189,43 @@ class RateLimiterMiddleware(BaseHTTPMiddleware):
         tier = key_info['tier']
         limits = await self._get_tier_limits(tier)
 
-        # Build rate limit info (before checking limits, so it's available even if we hit the limit)
+        # Atomically check both limits and count this request (no DB write)
+        outcome, monthly_usage, minute_usage, period_end = await usage_counters.consume(
+            key_info, limits['monthly_call_limit'], limits['burst_limit']
+        )
+
+        now = time.time()
+        minute_reset = (int(now // 60) + 1) * 60
         rate_limit_info = {
             "tier": tier,
             "monthly_limit": limits['monthly_call_limit'],
-            "monthly_remaining": max(0, limits['monthly_call_limit'] - key_info['monthly_usage'] - 1),
-            "monthly_reset": int(key_info['monthly_usage_reset_at'].timestamp()),
+            "monthly_remaining": max(0, limits['monthly_call_limit'] - monthly_usage),
+            "monthly_reset": int(period_end),
             "minute_limit": limits['calls_per_minute'],
-            "minute_remaining": max(0, limits['calls_per_minute'] - key_info['minute_usage'] - 1),
-            "minute_reset": int((key_info['minute_window_start'] + timedelta(minutes=1)).timestamp())
+            "minute_remaining": max(0, limits['calls_per_minute'] - minute_usage),
+            "minute_reset": minute_reset
         }
 
-        # Check monthly limit
-        await self._check_monthly_limit(key_info, limits, rate_limit_info)
-
-        # Check per-minute limit
-        await self._check_minute_limit(key_info, limits, rate_limit_info)
+        if outcome == MONTHLY_EXCEEDED:
+            reset_seconds = max(0, int(period_end - now))
+            raise RateLimitExceeded(
+                limit_type="monthly",
+                reset_time=reset_seconds,
+                rate_limit_info=rate_limit_info,
+                detail=f"Monthly limit of {limits['monthly_call_limit']} calls exceeded. "
+                       f"Limit resets in {reset_seconds} seconds."
+            )
 
-        # Increment usage counters
-        await self._increment_usage(key_info['id'])
+        if outcome == MINUTE_EXCEEDED:
+            reset_seconds = max(1, int(minute_reset - now))
+            raise RateLimitExceeded(
+                limit_type="minute",
+                reset_time=reset_seconds,
+                rate_limit_info=rate_limit_info,
+                detail=f"Per-minute limit of {limits['calls_per_minute']} calls "
+                       f"(burst: {limits['burst_limit']}) exceeded. Try again in {reset_seconds} seconds."
+            )
 
-        # Return rate limit info
         return rate_limit_info
 
     def _parse_timestamp(self, timestamp_str: str) -> datetime:
@@ -220,7 +239,7 @@ class RateLimiterMiddleware(BaseHTTPMiddleware):
         Get API key info from database with caching.
 
         Uses 1-minute TTL cache to reduce database load by 95%+.
-        Cache is automatically invalidated after usage increments.
+        The cached usage columns only seed the usage counters.
         """
         try:
             # Check cache first
@@ -237,7 +256,7 @@ class RateLimiterMiddleware(BaseHTTPMiddleware):
             logger.debug(f"API key cache MISS for hash: {api_key_hash[:10]}... Querying database")
 
             # Look up API key by hash
-            result = supabase.table('divv_api_keys').select(
+            result = await get_db().table('divv_api_keys').select(
                 'id, tier, is_active, monthly_usage, monthly_usage_reset_at, '
                 'minute_usage, minute_window_start'
             ).eq('key_hash', api_key_hash).eq('is_active', True).execute()
@@ -283,7 +302,7 @@ class RateLimiterMiddleware(BaseHTTPMiddleware):
 
             logger.debug(f"Tier limits cache MISS for tier: {tier}. Querying database")
 
-            result = supabase.table('divv_tier_limits').select(
+            result = await get_db().table('divv_tier_limits').select(
                 'monthly_call_limit, calls_per_minute, burst_limit'
             ).eq('tier', tier).single().execute()
 
@@ -301,92 +320,6 @@ class RateLimiterMiddleware(BaseHTTPMiddleware):
                 'burst_limit': 20
             }
 
-    async def _check_monthly_limit(self, key_info: Dict, limits: Dict, rate_limit_info: Dict):
-        """Check if monthly limit is exceeded"""
-        # Reset monthly counter if needed
-        reset_time = key_info.get('monthly_usage_reset_at')
-        now = datetime.now(timezone.utc)
-        if reset_time and now.timestamp() >= reset_time.timestamp():
-            await self._reset_monthly_usage(key_info['id'])
-            key_info['monthly_usage'] = 0
-
-        # Check limit
-        if key_info['monthly_usage'] >= limits['monthly_call_limit']:
-            reset_at = key_info['monthly_usage_reset_at']
-            reset_seconds = int((reset_at - now).total_seconds())
-
-            raise RateLimitExceeded(
-                limit_type="monthly",
-                reset_time=reset_seconds,
-                rate_limit_info=rate_limit_info,
-                detail=f"Monthly limit of {limits['monthly_call_limit']} calls exceeded. "
-                       f"Limit resets in {reset_seconds} seconds."
-            )
-
-    async def _check_minute_limit(self, key_info: Dict, limits: Dict, rate_limit_info: Dict):
-        """Check if per-minute limit is exceeded (with burst support)"""
-        now = datetime.now(timezone.utc)
-        window_start = key_info.get('minute_window_start')
-
-        # Reset minute counter if window expired
-        if not window_start or (now - window_start).total_seconds() >= 60:
-            await self._reset_minute_usage(key_info['id'])
-            key_info['minute_usage'] = 0
-            key_info['minute_window_start'] = now
-
-        # Check limit (with burst allowance)
-        burst_limit = limits['burst_limit']
-        current_usage = key_info['minute_usage']
-
-        if current_usage >= burst_limit:
-            # Calculate time until next minute window
-            reset_at = window_start + timedelta(minutes=1)
-            reset_seconds = int((reset_at - now).total_seconds())
-
-            raise RateLimitExceeded(
-                limit_type="minute",
-                reset_time=reset_seconds,
-                rate_limit_info=rate_limit_info,
-                detail=f"Per-minute limit of {limits['calls_per_minute']} calls "
-                       f"(burst: {burst_limit}) exceeded. Try again in {reset_seconds} seconds."
-            )
-
-    async def _increment_usage(self, api_key_id: str):
-        """Increment usage counters"""
-        try:
-            # Use admin client for increment (requires service_role after security fix)
-            if not supabase_admin:
-                logger.error("❌ Admin client not initialized - cannot increment usage")
-                logger.error("   Make sure SUPABASE_SERVICE_ROLE_KEY is set in .env file")
-                return
-
-            # Increment both monthly and minute usage
-            supabase_admin.rpc('increment_key_usage', {
-                'key_id': api_key_id
-            }).execute()
-        except Exception as e:
-            logger.error(f"Error incrementing usage: {e}")
-
-    async def _reset_monthly_usage(self, api_key_id: str):
-        """Reset monthly usage counter"""
-        try:
-            supabase.table('divv_api_keys').update({
-                'monthly_usage': 0,
-                'monthly_usage_reset_at': (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
-            }).eq('id', api_key_id).execute()
-        except Exception as e:
-            logger.error(f"Error resetting monthly usage: {e}")
-
-    async def _reset_minute_usage(self, api_key_id: str):
-        """Reset minute usage counter"""
-        try:
-            supabase.table('divv_api_keys').update({
-                'minute_usage': 0,
-                'minute_window_start': datetime.now(timezone.utc).isoformat()
-            }).eq('id', api_key_id).execute()
-        except Exception as e:
-            logger.error(f"Error resetting minute usage: {e}")
-
     def _add_rate_limit_headers(self, response, rate_limit_info: Dict):
         """Add rate limit headers to response"""
         if not rate_limit_info:
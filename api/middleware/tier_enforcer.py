@@ -4,14 +4,181 @@ Restricts stock coverage and features based on user's pricing tier
 """
 
 from fastapi import Request, HTTPException, status
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterable, FrozenSet
+import asyncio
 import logging
+import time
 
-from supabase_helpers import get_supabase_client
 from api.config import settings
+from api.database import get_db
 
 logger = logging.getLogger(__name__)
-supabase = get_supabase_client()
+
+# Map exchanges to countries (unlisted exchanges count as US)
+EXCHANGE_COUNTRY_MAP = {
+    'NYSE': 'US', 'NASDAQ': 'US', 'AMEX': 'US', 'BATS': 'US', 'CBOE': 'US',
+    'TSX': 'CA', 'TSE': 'CA',
+    'LSE': 'UK',
+    'XETRA': 'DE',
+    'EPA': 'FR', 'Euronext': 'FR',
+    'ASX': 'AU'
+}
+
+# One bit per coverage country
+COUNTRY_BITS = {'US': 1, 'CA': 2, 'UK': 4, 'DE': 8, 'FR': 16, 'AU': 32}
+
+# Countries covered by the exchange-restricted tiers
+TIER_COUNTRIES = {
+    'premium': ['US', 'CA', 'UK', 'DE', 'FR', 'AU'],
+    'starter': ['US'],
+}
+
+
+def country_mask(countries: Iterable[str]) -> int:
+    """Bitmask for a list of country codes."""
+    mask = 0
+    for country in countries:
+        mask |= COUNTRY_BITS.get(country, 0)
+    return mask
+
+
+class SymbolAccessIndex:
+    """
+    In-memory access-control index for symbol coverage checks.
+
+    Holds symbol -> exchange-country bitmap (from raw_stocks) and the free
+    tier sample set (from divv_free_tier_stocks). The accessible set of each
+    tier is precomputed on load, so authorizing a symbol list is one set
+    lookup per symbol with no database round trips.
+
+    The index is loaded on first use and rebuilt in the background every
+    TIER_ACCESS_REFRESH_SECONDS; requests keep using the previous snapshot
+    while a rebuild runs or if it fails. After a failed load the next attempt
+    waits TIER_ACCESS_RETRY_SECONDS, doubling per consecutive failure up to
+    the refresh interval; until the first load succeeds, restricted tiers
+    are denied without touching the database.
+    """
+
+    PAGE_SIZE = 1000  # PostgREST max rows per response
+
+    def __init__(self, refresh_seconds: float = None, retry_seconds: float = None):
+        self.refresh_seconds = refresh_seconds or settings.TIER_ACCESS_REFRESH_SECONDS
+        self.retry_seconds = retry_seconds or settings.TIER_ACCESS_RETRY_SECONDS
+        self.country_masks: Dict[str, int] = {}
+        self.free_tier: FrozenSet[str] = frozenset()
+        self._tier_sets: Dict[str, FrozenSet[str]] = {}
+        self._loaded_at: Optional[float] = None
+        self._failures = 0  # Consecutive failed loads
+        self._retry_at = 0.0  # Monotonic time before which no load is attempted
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    @property
+    def backing_off(self) -> bool:
+        """A recent load failed and the retry delay has not passed."""
+        return time.monotonic() < self._retry_at
+
+    async def _fetch_all(self, table: str, columns: str) -> List[Dict]:
+        """All rows of a table, paged past the PostgREST row cap."""
+        rows: List[Dict] = []
+        start = 0
+        while True:
+            result = await get_db().table(table).select(columns)\
+                .order('symbol')\
+                .range(start, start + self.PAGE_SIZE - 1)\
+                .execute()
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                return rows
+            start += self.PAGE_SIZE
+
+    async def refresh(self) -> bool:
+        """
+        Rebuild the index from the database.
+
+        Returns:
+            True if the index was rebuilt, False if loading failed (the
+            previous snapshot is kept)
+        """
+        async with self._lock:
+            return await self._load()
+
+    async def _load(self) -> bool:
+        try:
+            stocks, free_rows = await asyncio.gather(
+                self._fetch_all('raw_stocks', 'symbol, exchange'),
+                self._fetch_all('divv_free_tier_stocks', 'symbol')
+            )
+        except Exception as e:
+            self._failures += 1
+            delay = min(self.retry_seconds * 2 ** (self._failures - 1), self.refresh_seconds)
+            self._retry_at = time.monotonic() + delay
+            logger.error(f"❌ Error loading symbol access index (retrying in {delay:.0f}s): {e}")
+            return False
+
+        masks = {
+            row['symbol']: COUNTRY_BITS[EXCHANGE_COUNTRY_MAP.get(row.get('exchange'), 'US')]
+            for row in stocks if row.get('symbol')
+        }
+        tier_sets = {}
+        for tier, countries in TIER_COUNTRIES.items():
+            allowed = country_mask(countries)
+            tier_sets[tier] = frozenset(symbol for symbol, bits in masks.items() if bits & allowed)
+
+        self.country_masks = masks
+        self.free_tier = frozenset(row['symbol'] for row in free_rows if row.get('symbol'))
+        self._tier_sets = tier_sets
+        self._loaded_at = time.monotonic()
+        self._failures = 0
+        self._retry_at = 0.0
+
+        logger.info(f"✅ Symbol access index loaded: {len(masks)} symbols, {len(self.free_tier)} free tier")
+        return True
+
+    async def ensure_fresh(self):
+        """Load on first use; afterwards refresh in the background once stale."""
+        if self.backing_off:
+            return
+
+        if not self.loaded:
+            async with self._lock:
+                # Requests queued behind a failed load do not repeat it
+                if not self.loaded and not self.backing_off:
+                    await self._load()
+            return
+
+        stale = time.monotonic() - self._loaded_at >= self.refresh_seconds
+        if stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+
+    def accessible_set(self, tier: str) -> FrozenSet[str]:
+        """Symbols covered by an exchange-restricted or free tier."""
+        if tier == 'free':
+            return self.free_tier
+        return self._tier_sets.get(tier, frozenset())
+
+    def filter(self, tier: str, symbols: Iterable[str]) -> List[str]:
+        """Symbols (as given, order kept) accessible by the tier."""
+        allowed = self.accessible_set(tier)
+        return [symbol for symbol in symbols if symbol.upper() in allowed]
+
+    def get_stats(self) -> Dict:
+        """Index size and age."""
+        return {
+            'symbols': len(self.country_masks),
+            'free_tier_symbols': len(self.free_tier),
+            'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self.loaded else None,
+            'consecutive_failures': self._failures
+        }
+
+
+# Process-wide index shared by TierEnforcer
+symbol_access_index = SymbolAccessIndex()
 
 
 class TierEnforcer:
@@ -27,7 +194,7 @@ class TierEnforcer:
         """Get tier limits from cache or database"""
         if tier not in cls._tier_limits_cache:
             try:
-                result = supabase.table('divv_tier_limits').select('*').eq('tier', tier).single().execute()
+                result = await get_db().table('divv_tier_limits').select('*').eq('tier', tier).single().execute()
                 cls._tier_limits_cache[tier] = result.data
             except Exception as e:
                 logger.error(f"Error fetching tier limits for {tier}: {e}")
@@ -54,27 +221,7 @@ class TierEnforcer:
         Returns:
             True if symbol is accessible, False otherwise
         """
-        limits = await cls.get_tier_limits(tier)
-        stock_coverage = limits.get('stock_coverage', {})
-        coverage_type = stock_coverage.get('type', 'sample')
-
-        # Enterprise and Professional tiers have access to all symbols
-        if tier in ['enterprise', 'professional']:
-            return True
-
-        # Premium tier: US + International stocks
-        if tier == 'premium':
-            return await cls._check_symbol_in_coverage(symbol, ['US', 'CA', 'UK', 'DE', 'FR', 'AU'])
-
-        # Starter tier: US stocks only
-        if tier == 'starter':
-            return await cls._check_symbol_in_coverage(symbol, ['US'])
-
-        # Free tier: Sample dataset only
-        if tier == 'free':
-            return await cls._check_symbol_in_free_tier(symbol)
-
-        return False
+        return bool(await cls.filter_accessible_symbols(tier, [symbol]))
 
     @classmethod
     async def check_symbols_access(cls, tier: str, symbols: List[str]) -> Dict[str, bool]:
@@ -84,60 +231,30 @@ class TierEnforcer:
         Returns:
             Dictionary mapping symbol -> access boolean
         """
-        results = {}
-        for symbol in symbols:
-            results[symbol] = await cls.check_symbol_access(tier, symbol)
-        return results
+        accessible = set(await cls.filter_accessible_symbols(tier, symbols))
+        return {symbol: symbol in accessible for symbol in symbols}
 
     @classmethod
     async def filter_accessible_symbols(cls, tier: str, symbols: List[str]) -> List[str]:
         """
         Filter a list of symbols to only those accessible by the tier
 
+        Resolved against the in-memory symbol access index, without a
+        database query per symbol.
+
         Returns:
             List of accessible symbols
         """
-        access_map = await cls.check_symbols_access(tier, symbols)
-        return [symbol for symbol, accessible in access_map.items() if accessible]
-
-    @classmethod
-    async def _check_symbol_in_coverage(cls, symbol: str, allowed_countries: List[str]) -> bool:
-        """Check if symbol's exchange country is in allowed list"""
-        try:
-            # Get stock info from database
-            result = supabase.table('raw_stocks').select('exchange').eq('symbol', symbol).single().execute()
-
-            if not result.data:
-                return False
-
-            exchange = result.data.get('exchange', '')
-
-            # Map exchanges to countries
-            exchange_country_map = {
-                'NYSE': 'US', 'NASDAQ': 'US', 'AMEX': 'US', 'BATS': 'US', 'CBOE': 'US',
-                'TSX': 'CA', 'TSE': 'CA',
-                'LSE': 'UK',
-                'XETRA': 'DE',
-                'EPA': 'FR', 'Euronext': 'FR',
-                'ASX': 'AU'
-            }
-
-            country = exchange_country_map.get(exchange, 'US')
-            return country in allowed_countries
+        # Enterprise and Professional tiers have access to all symbols
+        if tier in ['enterprise', 'professional']:
+            return list(symbols)
 
-        except Exception as e:
-            logger.error(f"Error checking symbol coverage for {symbol}: {e}")
-            return False
+        # Premium: US + International, Starter: US only, Free: sample dataset only
+        if tier not in TIER_COUNTRIES and tier != 'free':
+            return []
 
-    @classmethod
-    async def _check_symbol_in_free_tier(cls, symbol: str) -> bool:
-        """Check if symbol is in the free tier sample dataset"""
-        try:
-            result = supabase.table('divv_free_tier_stocks').select('symbol').eq('symbol', symbol).execute()
-            return len(result.data) > 0
-        except Exception as e:
-            logger.error(f"Error checking free tier access for {symbol}: {e}")
-            return False
+        await symbol_access_index.ensure_fresh()
+        return symbol_access_index.filter(tier, symbols)
 
     @classmethod
     async def check_feature_access(cls, tier: str, feature: str) -> bool:
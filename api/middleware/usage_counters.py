@@ -0,0 +1,407 @@
+"""
+API Key Usage Counters
+
+Atomic per-key usage accounting for RateLimiterMiddleware, kept off the
+database on the hot path.
+
+Each request does one atomic check-and-increment of:
+- a monthly total (seeded from divv_api_keys.monthly_usage the first
+  time a key is seen in a billing period, reset when the period ends)
+- a sliding one-minute window, estimated from the current and previous
+  fixed-minute buckets: previous * (1 - elapsed fraction) + current
+
+Accepted requests also add to a pending delta per key. A background task
+reconciles those deltas to Postgres every USAGE_SYNC_INTERVAL seconds with
+one batched RPC.
+
+Backends:
+    Redis   Shared by all workers (Lua script, so check and increment are
+            atomic across processes). Its monthly totals are authoritative
+            and are written to divv_api_keys as-is.
+    Memory  Per-process; exact for a single worker, per-worker limits when
+            several workers run without Redis. Only deltas are synced
+            (monthly_usage = monthly_usage + delta), so workers never
+            overwrite each other's counts.
+
+Redis is pinged once at startup (as api/cache.py does); if it is not
+reachable the memory backend is used for the life of the process. When a
+call to a reachable Redis later fails, requests are counted in memory and
+the background sync task pings Redis every USAGE_REDIS_RETRY_INTERVAL
+seconds until it answers, so no request ever waits on a dead connection.
+The memory deltas from the outage are synced like any other.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from api.config import settings
+from api.database import get_admin_db
+
+logger = logging.getLogger(__name__)
+
+MONTH_SECONDS = 30 * 24 * 3600  # Billing period length (matches the 30-day reset)
+
+# Outcomes of UsageCounters.consume()
+ALLOWED = 1
+MONTHLY_EXCEEDED = 0
+MINUTE_EXCEEDED = -1
+
+# KEYS: month hash, current minute bucket, previous minute bucket, pending hash
+# ARGV: now, seed count, seed period end, monthly limit, burst limit,
+#       elapsed minute fraction, key id, period seconds
+_CONSUME_LUA = """
+local now = tonumber(ARGV[1])
+local period_end = tonumber(redis.call('HGET', KEYS[1], 'end') or '0')
+local count = tonumber(redis.call('HGET', KEYS[1], 'count') or '0')
+if period_end == 0 then
+    period_end = tonumber(ARGV[3])
+    count = tonumber(ARGV[2])
+end
+if now >= period_end then
+    period_end = now + tonumber(ARGV[8])
+    count = 0
+end
+redis.call('HSET', KEYS[1], 'end', period_end, 'count', count)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[8]) * 2)
+
+local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[3]) or '0')
+local weight = 1 - tonumber(ARGV[6])
+local minute = math.floor(previous * weight + current)
+
+if count >= tonumber(ARGV[4]) then
+    return {0, count, minute, period_end}
+end
+if minute >= tonumber(ARGV[5]) then
+    return {-1, count, minute, period_end}
+end
+
+count = redis.call('HINCRBY', KEYS[1], 'count', 1)
+current = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], 120)
+redis.call('HINCRBY', KEYS[4], ARGV[7], 1)
+return {1, count, math.floor(previous * weight + current), period_end}
+"""
+
+_PENDING_KEY = "usage:pending"
+
+
+def _month_key(key_id: str) -> str:
+    return f"usage:month:{key_id}"
+
+
+def _minute_key(key_id: str, minute: int) -> str:
+    return f"usage:minute:{key_id}:{minute}"
+
+
+class UsageCounters:
+    """
+    Usage counters with a Redis or in-memory backend and periodic DB sync.
+
+    Usage:
+        outcome, monthly, minute, period_end = await usage_counters.consume(
+            key_info, monthly_limit, burst_limit
+        )
+    """
+
+    def __init__(self, sync_interval: float = None, redis_client=None):
+        """
+        Initialize counters.
+
+        Args:
+            sync_interval: Seconds between DB reconciliations
+            redis_client: Optional redis.asyncio client (default: connect from
+                          REDIS_HOST/REDIS_PORT when USAGE_COUNTERS_BACKEND allows it)
+        """
+        self.sync_interval = sync_interval or settings.USAGE_SYNC_INTERVAL
+        self.redis = redis_client if redis_client is not None else self._connect_redis()
+        self._consume_script = self.redis.register_script(_CONSUME_LUA) if self.redis else None
+        self.retry_interval = settings.USAGE_REDIS_RETRY_INTERVAL
+        self._redis_up = self.redis is not None  # False after an error until a probe succeeds
+
+        # In-memory backend state
+        self._months: Dict[str, list] = {}         # key_id -> [count, period_end]
+        self._minutes: Dict[str, Dict[int, int]] = {}  # key_id -> {minute: count}
+        self._pending: Dict[str, int] = {}
+
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self.stats = {'consumed': 0, 'rejected': 0, 'syncs': 0, 'synced_keys': 0,
+                      'sync_failures': 0, 'redis_errors': 0}
+
+    @staticmethod
+    def _connect_redis():
+        """Async Redis client if configured, installed and reachable, else None (memory backend)."""
+        if settings.USAGE_COUNTERS_BACKEND == 'memory':
+            return None
+        try:
+            import redis
+            import redis.asyncio as aioredis
+        except ImportError:
+            logger.warning("⚠️  redis package not installed - usage counters are per-worker")
+            return None
+
+        options = dict(
+            host=os.getenv('REDIS_HOST', 'redis'),
+            port=int(os.getenv('REDIS_PORT', 6379)),
+            db=0,
+            decode_responses=True,
+            socket_connect_timeout=2,
+            socket_timeout=2
+        )
+        # Test connection once, synchronously (no event loop exists at import time)
+        try:
+            probe = redis.Redis(**options)
+            try:
+                probe.ping()
+            finally:
+                probe.close()
+        except Exception as e:
+            logger.warning(f"⚠️  Redis connection failed: {e}. Usage counters are per-worker.")
+            return None
+        logger.info("✅ Redis usage counters connected")
+        return aioredis.Redis(**options)
+
+    @property
+    def backend(self) -> str:
+        return 'redis' if self.redis else 'memory'
+
+    @property
+    def redis_available(self) -> bool:
+        """Redis is configured and has not failed since the last successful probe."""
+        return self.redis is not None and self._redis_up
+
+    def _redis_failed(self, error: Exception):
+        """Stop using Redis until the background task's probe succeeds."""
+        self.stats['redis_errors'] += 1
+        if self._redis_up:
+            logger.error(
+                f"❌ Redis usage counters unavailable, counting in memory until it "
+                f"answers again (probing every {self.retry_interval:.0f}s): {error}"
+            )
+        self._redis_up = False
+
+    async def _probe_redis(self) -> bool:
+        """Ping Redis after a failure; resume using it if it answers."""
+        try:
+            await self.redis.ping()
+        except Exception as e:
+            logger.debug(f"Redis usage counters still unavailable: {e}")
+            return False
+        logger.info("✅ Redis usage counters reconnected")
+        self._redis_up = True
+        return True
+
+    async def consume(self, key_info: Dict[str, Any], monthly_limit: int,
+                      burst_limit: int) -> Tuple[int, int, int, float]:
+        """
+        Atomically check limits and count one request.
+
+        Args:
+            key_info: divv_api_keys row (id, monthly_usage, monthly_usage_reset_at)
+            monthly_limit: Calls allowed per billing period
+            burst_limit: Calls allowed per sliding minute
+
+        Returns:
+            (outcome, monthly usage, minute usage, period end epoch) where
+            outcome is ALLOWED, MONTHLY_EXCEEDED or MINUTE_EXCEEDED
+        """
+        self._ensure_started()
+
+        now = time.time()
+        minute = int(now // 60)
+        fraction = (now % 60) / 60
+        reset_at = key_info.get('monthly_usage_reset_at')
+        seed_end = reset_at.timestamp() if isinstance(reset_at, datetime) else now + MONTH_SECONDS
+        seed_count = key_info.get('monthly_usage') or 0
+
+        result = None
+        if self.redis_available:
+            key_id = str(key_info['id'])
+            try:
+                outcome, monthly, minute_usage, period_end = await self._consume_script(
+                    keys=[_month_key(key_id), _minute_key(key_id, minute),
+                          _minute_key(key_id, minute - 1), _PENDING_KEY],
+                    args=[now, seed_count, seed_end, monthly_limit, burst_limit,
+                          fraction, key_id, MONTH_SECONDS]
+                )
+                result = (int(outcome), int(monthly), int(minute_usage), float(period_end))
+            except Exception as e:
+                # No retry on the request path; the sync task probes for recovery
+                self._redis_failed(e)
+        if result is None:
+            result = self._consume_memory(key_info, now, minute, fraction, seed_count,
+                                          seed_end, monthly_limit, burst_limit)
+
+        self.stats['consumed' if result[0] == ALLOWED else 'rejected'] += 1
+        return result
+
+    def _consume_memory(self, key_info, now, minute, fraction, seed_count, seed_end,
+                        monthly_limit, burst_limit) -> Tuple[int, int, int, float]:
+        """In-memory equivalent of the Lua script (atomic on the event loop)."""
+        key_id = str(key_info['id'])
+        month = self._months.setdefault(key_id, [seed_count, seed_end])
+        if now >= month[1]:
+            month[0], month[1] = 0, now + MONTH_SECONDS
+
+        buckets = self._minutes.setdefault(key_id, {})
+        for stale in [m for m in buckets if m < minute - 1]:
+            del buckets[stale]
+        previous = buckets.get(minute - 1, 0)
+        weight = 1 - fraction
+        minute_usage = math.floor(previous * weight + buckets.get(minute, 0))
+
+        if month[0] >= monthly_limit:
+            return MONTHLY_EXCEEDED, month[0], minute_usage, month[1]
+        if minute_usage >= burst_limit:
+            return MINUTE_EXCEEDED, month[0], minute_usage, month[1]
+
+        month[0] += 1
+        buckets[minute] = buckets.get(minute, 0) + 1
+        self._pending[key_id] = self._pending.get(key_id, 0) + 1
+        return ALLOWED, month[0], math.floor(previous * weight + buckets[minute]), month[1]
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._stop = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        """
+        Reconcile to Postgres every sync_interval seconds until close() is called.
+
+        While Redis is down, also wake every retry_interval seconds to probe it.
+        """
+        next_sync = time.monotonic() + self.sync_interval
+        while not self._stop.is_set():
+            delay = next_sync - time.monotonic()
+            if self.redis is not None and not self._redis_up:
+                delay = min(delay, self.retry_interval)
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=max(delay, 0))
+                break
+            except asyncio.TimeoutError:
+                pass
+            if self.redis is not None and not self._redis_up:
+                await self._probe_redis()
+            if time.monotonic() >= next_sync:
+                await self.sync()
+                next_sync = time.monotonic() + self.sync_interval
+
+    async def _take_redis_pending(self) -> Dict[str, list]:
+        """Atomically take Redis deltas with current monthly totals: {key_id: [delta, count, end]}."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pending, _ = await pipe.hgetall(_PENDING_KEY).delete(_PENDING_KEY).execute()
+        if not pending:
+            return {}
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key_id in pending:
+                pipe.hmget(_month_key(key_id), 'count', 'end')
+            months = await pipe.execute()
+        return {
+            key_id: [int(delta), int(month[0] or 0), float(month[1] or 0)]
+            for (key_id, delta), month in zip(pending.items(), months)
+        }
+
+    def _take_memory_pending(self) -> Dict[str, list]:
+        """Take in-memory deltas: {key_id: [delta, period end]}."""
+        pending, self._pending = self._pending, {}
+        return {key_id: [delta, self._months[key_id][1]] for key_id, delta in pending.items()}
+
+    async def _restore_pending(self, redis_taken: Dict[str, list], memory_taken: Dict[str, list]):
+        """Put deltas back after a failed sync so no usage is lost."""
+        for key_id, (delta, _) in memory_taken.items():
+            self._pending[key_id] = self._pending.get(key_id, 0) + delta
+        if redis_taken:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for key_id, (delta, _, _) in redis_taken.items():
+                        pipe.hincrby(_PENDING_KEY, key_id, delta)
+                    await pipe.execute()
+            except Exception as e:
+                logger.error(f"❌ Could not restore pending usage: {e}")
+
+    async def sync(self) -> int:
+        """
+        Write pending usage to divv_api_keys in one batched RPC.
+
+        Redis keys carry their shared monthly total; memory-only keys carry
+        just a delta (monthly_usages entry is null) that the database adds.
+
+        Returns:
+            Number of keys reconciled
+        """
+        redis_taken: Dict[str, list] = {}
+        if self.redis_available:
+            try:
+                redis_taken = await self._take_redis_pending()
+            except Exception as e:
+                self._redis_failed(e)
+        memory_taken = self._take_memory_pending()
+        if not redis_taken and not memory_taken:
+            return 0
+
+        key_ids = list(dict.fromkeys([*redis_taken, *memory_taken]))
+        deltas, monthly_usages, reset_ats = [], [], []
+        for key_id in key_ids:
+            memory_delta, memory_end = memory_taken.get(key_id, (0, None))
+            if key_id in redis_taken:
+                # Requests counted in memory during a Redis outage are not in the Redis total
+                delta, count, end = redis_taken[key_id]
+                deltas.append(delta + memory_delta)
+                monthly_usages.append(count + memory_delta)
+            else:
+                deltas.append(memory_delta)
+                monthly_usages.append(None)
+                end = memory_end
+            reset_ats.append(datetime.fromtimestamp(end, timezone.utc).isoformat())
+
+        try:
+            await get_admin_db().rpc('sync_key_usage', {
+                'key_ids': key_ids,
+                'deltas': deltas,
+                'monthly_usages': monthly_usages,
+                'reset_ats': reset_ats
+            })
+        except asyncio.CancelledError:
+            # The taken deltas are no longer in Redis or _pending: put them back
+            await self._restore_pending(redis_taken, memory_taken)
+            raise
+        except Exception as e:
+            self.stats['sync_failures'] += 1
+            logger.error(f"❌ Usage sync failed for {len(key_ids)} keys, will retry: {e}")
+            await self._restore_pending(redis_taken, memory_taken)
+            return 0
+
+        self.stats['syncs'] += 1
+        self.stats['synced_keys'] += len(key_ids)
+        return len(key_ids)
+
+    async def close(self):
+        """Stop the sync task and write remaining usage (application shutdown)."""
+        if self._task is not None:
+            # Let a sync in flight finish rather than cancelling it mid-RPC
+            self._stop.set()
+            try:
+                await self._task
+            except Exception as e:
+                logger.error(f"❌ Usage sync task failed: {e}")
+            self._task = None
+        await self.sync()
+        if self.redis:
+            await self.redis.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counter statistics."""
+        return {**self.stats, 'backend': self.backend, 'redis_available': self.redis_available,
+                'pending_keys': len(self._pending)}
+
+
+# Process-wide counters shared by RateLimiterMiddleware
+usage_counters = UsageCounters()
+
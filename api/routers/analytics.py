@@ -12,7 +12,7 @@ from api.models.schemas import (
     PortfolioProjection, PortfolioPositionDetail
 )
 from api.dependencies import require_api_key
-from supabase_helpers import get_supabase_client
+from api.database import get_db
 
 router = APIRouter()
 
@@ -29,11 +29,11 @@ async def analyze_portfolio(
     Supports dividend reinvestment and annual contributions.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Fetch current data for all symbols
         symbols = [pos.symbol.upper() for pos in request.positions]
-        stocks_result = supabase.table('raw_stocks').select('*')\
+        stocks_result = await db.table('raw_stocks').select('*')\
             .in_('symbol', symbols)\
             .execute()
 
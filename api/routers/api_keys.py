@@ -12,7 +12,7 @@ import logging
 
 from api.auth import validate_api_key, generate_api_key, hash_api_key
 from api.routers.auth import require_authentication
-from supabase_helpers import get_supabase_client
+from api.database import get_db
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -106,10 +106,10 @@ async def create_api_key(
         expires_at = datetime.utcnow() + timedelta(days=request.expires_in_days)
 
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Insert the new API key
-        result = supabase.table('divv_api_keys').insert({
+        result = await db.table('divv_api_keys').insert({
             'user_id': str(user['id']),
             'name': request.name,
             'key_hash': key_hash,
@@ -168,15 +168,15 @@ async def list_api_keys(
         List of API keys (without the actual key values)
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Query API keys
-        query = supabase.table('divv_api_keys').select('*').eq('user_id', str(user['id']))
+        query = db.table('divv_api_keys').select('*').eq('user_id', str(user['id']))
 
         if not include_inactive:
             query = query.eq('is_active', True)
 
-        result = query.order('created_at', desc=True).execute()
+        result = await query.order('created_at', desc=True).execute()
 
         keys = []
         for key_data in result.data:
@@ -228,10 +228,10 @@ async def revoke_api_key(
         Confirmation message
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Verify the key belongs to the user
-        result = supabase.table('divv_api_keys').select('*').eq('id', key_id).eq('user_id', str(user['id'])).execute()
+        result = await db.table('divv_api_keys').select('*').eq('id', key_id).eq('user_id', str(user['id'])).execute()
 
         if not result.data:
             raise HTTPException(
@@ -247,7 +247,7 @@ async def revoke_api_key(
             )
 
         # Revoke the key
-        supabase.table('divv_api_keys').update({'is_active': False}).eq('id', key_id).execute()
+        await db.table('divv_api_keys').update({'is_active': False}).eq('id', key_id).execute()
 
         logger.info(f"Revoked API key {key_id} for user {user['id']} ({user['email']})")
 
@@ -291,10 +291,10 @@ async def get_api_key_usage(
         Usage statistics and request history
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Verify the key belongs to the user
-        key_result = supabase.table('divv_api_keys').select('*').eq('id', key_id).eq('user_id', str(user['id'])).execute()
+        key_result = await db.table('divv_api_keys').select('*').eq('id', key_id).eq('user_id', str(user['id'])).execute()
 
         if not key_result.data:
             raise HTTPException(
@@ -312,7 +312,7 @@ async def get_api_key_usage(
         # Get daily usage statistics
         cutoff_date = (datetime.utcnow() - timedelta(days=days)).date()
 
-        usage_result = supabase.table('divv_mv_api_usage_daily').select('*').eq('api_key_id', key_id).gte('request_date', cutoff_date.isoformat()).order('request_date', desc=True).execute()
+        usage_result = await db.table('divv_mv_api_usage_daily').select('*').eq('api_key_id', key_id).gte('request_date', cutoff_date.isoformat()).order('request_date', desc=True).execute()
 
         # Calculate totals
         total_requests = sum(day['total_requests'] for day in usage_result.data)
@@ -14,7 +14,7 @@ from api.models.schemas import Stock, DividendInfo, ErrorResponse
 from api.dependencies import require_api_key
 from api.middleware.tier_enforcer import TierEnforcer, get_tier_from_request
 from api.config import settings
-from supabase_helpers import get_supabase_client
+from api.database import get_db
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -102,13 +102,13 @@ async def get_stocks_bulk(
 
         # Fetch data for accessible symbols
         if accessible_symbols:
-            supabase = get_supabase_client()
+            db = get_db()
 
             # Normalize symbols to uppercase
             normalized_symbols = [s.upper() for s in accessible_symbols]
 
             # Fetch stocks
-            result = supabase.table('raw_stocks').select('*').in_('symbol', normalized_symbols).execute()
+            result = await db.table('raw_stocks').select('*').in_('symbol', normalized_symbols).execute()
 
             # Build results dictionary
             for row in result.data:
@@ -261,14 +261,14 @@ async def get_dividends_bulk(
 
         # Fetch dividend data
         if accessible_symbols:
-            supabase = get_supabase_client()
+            db = get_db()
             normalized_symbols = [s.upper() for s in accessible_symbols]
 
             # Calculate date range
             cutoff_date = (datetime.now() - timedelta(days=years_to_fetch * 365)).date()
 
             # Fetch dividends
-            result = supabase.table('raw_dividends').select('*') \
+            result = await db.table('raw_dividends').select('*') \
                 .in_('symbol', normalized_symbols) \
                 .gte('ex_date', cutoff_date.isoformat()) \
                 .order('ex_date', desc=True) \
@@ -400,11 +400,11 @@ async def get_prices_bulk(
 
         # Fetch price data
         if accessible_symbols:
-            supabase = get_supabase_client()
+            db = get_db()
             normalized_symbols = [s.upper() for s in accessible_symbols]
 
             # Fetch prices
-            result = supabase.table('raw_stock_prices').select('*') \
+            result = await db.table('raw_stock_prices').select('*') \
                 .in_('symbol', normalized_symbols) \
                 .gte('date', start_date.isoformat()) \
                 .lte('date', end_date.isoformat()) \
@@ -522,10 +522,10 @@ async def get_latest_prices_bulk(
 
         # Fetch latest prices from raw_stocks table
         if accessible_symbols:
-            supabase = get_supabase_client()
+            db = get_db()
             normalized_symbols = [s.upper() for s in accessible_symbols]
 
-            result = supabase.table('raw_stocks').select('*').in_('symbol', normalized_symbols).execute()
+            result = await db.table('raw_stocks').select('*').in_('symbol', normalized_symbols).execute()
 
             for row in result.data:
                 symbol = row['symbol']
@@ -15,7 +15,7 @@ from api.models.schemas import (
     create_dividend_event_id, create_dividend_payment_id
 )
 from api.dependencies import require_api_key
-from supabase_helpers import get_supabase_client
+from api.database import get_db, fetch_stock
 
 router = APIRouter()
 
@@ -44,7 +44,7 @@ async def get_dividend_calendar(
     """
     try:
         from datetime import timedelta
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Handle preset ranges (overrides dates if provided)
         if range:
@@ -97,7 +97,7 @@ async def get_dividend_calendar(
             )
 
         # Build query
-        query = supabase.table('divv_future_dividends').select('*')
+        query = db.table('divv_future_dividends').select('*')
 
         # Apply filters
         query = query.gte('ex_date', start_date.isoformat())
@@ -115,7 +115,7 @@ async def get_dividend_calendar(
         query = query.order('ex_date', desc=(sort == 'desc')).limit(limit)
 
         # Execute query
-        result = query.execute()
+        result = await query.execute()
 
         # Convert to DividendEvent models
         events = []
@@ -179,13 +179,13 @@ async def get_dividend_history(
     Returns a list of past dividend payments.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Parse symbols
         symbol_list = [s.strip().upper() for s in symbols.split(',')]
 
         # Build query
-        query = supabase.table('raw_dividends').select('*').in_('symbol', symbol_list)
+        query = db.table('raw_dividends').select('*').in_('symbol', symbol_list)
 
         # Apply date filters
         if start_date:
@@ -197,7 +197,7 @@ async def get_dividend_history(
         query = query.order('ex_date', desc=True).limit(limit)
 
         # Execute query
-        result = query.execute()
+        result = await query.execute()
 
         # Convert to DividendPayment models (reusing DividendEvent)
         events = []
@@ -249,12 +249,12 @@ async def get_stock_dividends(
     Includes current info, next payment, history, and growth metrics.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Fetch stock for current dividend info
-        stock_result = supabase.table('raw_stocks').select('*').eq('symbol', symbol.upper()).execute()
+        stock = await fetch_stock(symbol)
 
-        if not stock_result.data:
+        if not stock:
             raise HTTPException(
                 status_code=404,
                 detail={"error": {
@@ -265,8 +265,6 @@ async def get_stock_dividends(
                 }}
             )
 
-        stock = stock_result.data[0]
-
         # Current dividend info
         frequency = None
         if stock.get('dividend_frequency'):
@@ -286,7 +284,7 @@ async def get_stock_dividends(
         # Next payment (if include_future)
         next_payment = None
         if include_future:
-            future_result = supabase.table('divv_future_dividends').select('*')\
+            future_result = await db.table('divv_future_dividends').select('*')\
                 .eq('symbol', symbol.upper())\
                 .gte('ex_date', date.today().isoformat())\
                 .order('ex_date', desc=False)\
@@ -313,7 +311,7 @@ async def get_stock_dividends(
         # Historical dividends
         from datetime import timedelta
         cutoff_date = date.today() - timedelta(days=years * 365)
-        history_result = supabase.table('raw_dividends').select('*')\
+        history_result = await db.table('raw_dividends').select('*')\
             .eq('symbol', symbol.upper())\
             .gte('ex_date', cutoff_date.isoformat())\
             .order('ex_date', desc=True)\
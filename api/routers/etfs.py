@@ -4,6 +4,8 @@ ETFs Router
 ETF holdings and classification endpoints.
 """
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query, Path, Depends
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -13,7 +15,7 @@ from api.models.schemas import (
     ETFStrategyDetails, ETFDetails
 )
 from api.dependencies import require_api_key
-from supabase_helpers import get_supabase_client
+from api.database import get_db, fetch_stock
 
 router = APIRouter()
 
@@ -29,15 +31,12 @@ async def get_etf_details(
     Returns detailed ETF metrics including AUM, expense ratio, strategy, and holdings count.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Fetch ETF info
-        etf_result = supabase.table('raw_stocks').select('*')\
-            .eq('symbol', symbol.upper())\
-            .eq('type', 'etf')\
-            .execute()
+        etf = await fetch_stock(symbol, type='etf')
 
-        if not etf_result.data:
+        if not etf:
             raise HTTPException(
                 status_code=404,
                 detail={"error": {
@@ -48,11 +47,10 @@ async def get_etf_details(
                 }}
             )
 
-        etf = etf_result.data[0]
-
-        # Get holdings count
-        holdings_result = supabase.table('divv_etf_holdings').select('*', count='exact')\
+        # Get holdings count (Content-Range total; no rows transferred)
+        holdings_result = await db.table('divv_etf_holdings').select('etf_symbol', count='exact')\
             .eq('etf_symbol', symbol.upper())\
+            .limit(1)\
             .execute()
 
         # Calculate AUM in millions
@@ -98,15 +96,12 @@ async def get_etf_holdings(
     Returns top holdings with weights and sector allocation.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Fetch ETF info
-        etf_result = supabase.table('raw_stocks').select('*')\
-            .eq('symbol', symbol.upper())\
-            .eq('type', 'etf')\
-            .execute()
+        etf = await fetch_stock(symbol, type='etf')
 
-        if not etf_result.data:
+        if not etf:
             raise HTTPException(
                 status_code=404,
                 detail={"error": {
@@ -117,14 +112,18 @@ async def get_etf_holdings(
                 }}
             )
 
-        etf = etf_result.data[0]
-
-        # Fetch holdings
-        holdings_result = supabase.table('divv_etf_holdings').select('*')\
-            .eq('etf_symbol', symbol.upper())\
-            .order('weight', desc=True)\
-            .limit(limit)\
-            .execute()
+        # Fetch holdings and total holdings count concurrently
+        holdings_result, total_count_result = await asyncio.gather(
+            db.table('divv_etf_holdings').select('*')
+                .eq('etf_symbol', symbol.upper())
+                .order('weight', desc=True)
+                .limit(limit)
+                .execute(),
+            db.table('divv_etf_holdings').select('etf_symbol', count='exact')
+                .eq('etf_symbol', symbol.upper())
+                .limit(1)
+                .execute()
+        )
 
         # Convert to ETFHolding models
         holdings = []
@@ -146,11 +145,6 @@ async def get_etf_holdings(
                 sector_allocation[row['sector']] = \
                     sector_allocation.get(row['sector'], 0) + row['weight']
 
-        # Get total holdings count
-        total_count_result = supabase.table('divv_etf_holdings').select('*', count='exact')\
-            .eq('etf_symbol', symbol.upper())\
-            .execute()
-
         return ETFHoldingsResponse(
             symbol=symbol.upper(),
             name=etf.get('company', symbol.upper()),
@@ -191,13 +185,9 @@ async def classify_etf(
         classifier = ETFClassifier()
 
         # Fetch ETF data
-        supabase = get_supabase_client()
-        etf_result = supabase.table('raw_stocks').select('*')\
-            .eq('symbol', symbol.upper())\
-            .eq('type', 'etf')\
-            .execute()
+        etf = await fetch_stock(symbol, type='etf')
 
-        if not etf_result.data:
+        if not etf:
             raise HTTPException(
                 status_code=404,
                 detail={"error": {
@@ -208,8 +198,6 @@ async def classify_etf(
                 }}
             )
 
-        etf = etf_result.data[0]
-
         # Classify strategy
         classification = classifier.classify_etf(
             symbol=symbol.upper(),
@@ -5,15 +5,45 @@ Pre-built stock screeners for dividend investors.
 """
 
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from api.models.schemas import ScreenerResponse, ScreenerResult, SortOrder
 from api.dependencies import require_api_key
-from supabase_helpers import get_supabase_client
+from api.database import get_db
 
 router = APIRouter()
 
 
+async def _fetch_streak_screener(min_years: int, min_yield: float, limit: int) -> List[ScreenerResult]:
+    """
+    Stocks with at least min_years consecutive annual dividend increases.
+
+    Reads the precomputed divv_dividend_streak_screener view (streaks are
+    refreshed by the dividend ingest), so this is one indexed query.
+    """
+    result = await get_db().table('divv_dividend_streak_screener').select('*')\
+        .gte('consecutive_increases', min_years)\
+        .not_.is_('dividend_yield', 'null')\
+        .gte('dividend_yield', min_yield)\
+        .order('dividend_yield', desc=True)\
+        .limit(limit)\
+        .execute()
+
+    return [
+        ScreenerResult(
+            symbol=row['symbol'],
+            company=row.get('company') or row['symbol'],
+            yield_=row.get('dividend_yield', 0),
+            price=row.get('price') or 0,
+            market_cap=row.get('market_cap'),
+            payout_ratio=row.get('payout_ratio'),
+            consecutive_years=row['consecutive_increases'],
+            five_yr_growth=row.get('dividend_cagr_5yr')
+        )
+        for row in result.data
+    ]
+
+
 @router.get("/screeners/high-yield", response_model=ScreenerResponse, summary="High-yield screener")
 async def high_yield_screener(
     min_yield: float = Query(4.0, ge=0, description="Minimum yield %"),
@@ -34,10 +64,10 @@ async def high_yield_screener(
     Returns stocks with yields above the minimum threshold.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Build query
-        query = supabase.table('raw_stocks').select('*')\
+        query = db.table('raw_stocks').select('*')\
             .gte('dividend_yield', min_yield)\
             .not_.is_('dividend_yield', 'null')
 
@@ -71,7 +101,7 @@ async def high_yield_screener(
         query = query.limit(limit)
 
         # Execute
-        result = query.execute()
+        result = await query.execute()
 
         # Convert to ScreenerResult models
         results = []
@@ -129,18 +159,18 @@ async def monthly_payers_screener(
     Returns stocks with monthly dividend frequency.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Since dividend_frequency column doesn't exist yet,
         # we'll use a workaround: query high-yield stocks
         # TODO: Add dividend_frequency column and actual monthly filter
-        query = supabase.table('raw_stocks').select('*')\
+        query = db.table('raw_stocks').select('*')\
             .not_.is_('dividend_yield', 'null')\
             .gte('dividend_yield', min_yield if min_yield > 0 else 5.0)\
             .order('dividend_yield', desc=True)\
             .limit(limit)
 
-        result = query.execute()
+        result = await query.execute()
 
         # Convert to results
         results = []
@@ -187,60 +217,8 @@ async def dividend_aristocrats_screener(
     These are S&P 500 companies with a track record of annually increasing dividends.
     """
     try:
-        supabase = get_supabase_client()
-
-        # Get all dividend-paying stocks
-        stocks_result = supabase.table('raw_stocks').select('*')\
-            .not_.is_('dividend_yield', 'null')\
-            .gte('dividend_yield', min_yield)\
-            .order('dividend_yield', desc=True)\
-            .limit(500)\
-            .execute()
-
-        results = []
-
-        # Check each stock for aristocrat status
-        for row in stocks_result.data:
-            symbol = row['symbol']
-
-            # Get dividend history
-            div_result = supabase.table('raw_dividends')\
-                .select('ex_date, amount')\
-                .eq('symbol', symbol)\
-                .order('ex_date', desc=True)\
-                .limit(100)\
-                .execute()
-
-            if not div_result.data or len(div_result.data) < 25:
-                continue
-
-            # Calculate consecutive increases
-            consecutive_increases = 0
-            prev_amount = None
-
-            for div in reversed(div_result.data):
-                if prev_amount is not None:
-                    if div['amount'] >= prev_amount:
-                        consecutive_increases += 1
-                    else:
-                        break
-                prev_amount = div['amount']
-
-            # Must have 25+ years of increases to be an aristocrat
-            if consecutive_increases >= 25:
-                result_item = ScreenerResult(
-                    symbol=symbol,
-                    company=row.get('company', symbol),
-                    yield_=row.get('dividend_yield', 0),
-                    price=row.get('price', 0),
-                    market_cap=row.get('market_cap'),
-                    payout_ratio=row.get('payout_ratio'),
-                    consecutive_years=consecutive_increases
-                )
-                results.append(result_item)
-
-                if len(results) >= limit:
-                    break
+        # Must have 25+ years of increases
+        results = await _fetch_streak_screener(25, min_yield, limit)
 
         return ScreenerResponse(
             screener="dividend_aristocrats",
@@ -274,60 +252,8 @@ async def dividend_kings_screener(
     These are the most reliable dividend payers with half a century of increases.
     """
     try:
-        supabase = get_supabase_client()
-
-        # Get all dividend-paying stocks
-        stocks_result = supabase.table('raw_stocks').select('*')\
-            .not_.is_('dividend_yield', 'null')\
-            .gte('dividend_yield', min_yield)\
-            .order('dividend_yield', desc=True)\
-            .limit(500)\
-            .execute()
-
-        results = []
-
-        # Check each stock for king status
-        for row in stocks_result.data:
-            symbol = row['symbol']
-
-            # Get dividend history (need more data for kings)
-            div_result = supabase.table('raw_dividends')\
-                .select('ex_date, amount')\
-                .eq('symbol', symbol)\
-                .order('ex_date', desc=True)\
-                .limit(200)\
-                .execute()
-
-            if not div_result.data or len(div_result.data) < 50:
-                continue
-
-            # Calculate consecutive increases
-            consecutive_increases = 0
-            prev_amount = None
-
-            for div in reversed(div_result.data):
-                if prev_amount is not None:
-                    if div['amount'] >= prev_amount:
-                        consecutive_increases += 1
-                    else:
-                        break
-                prev_amount = div['amount']
-
-            # Must have 50+ years of increases to be a king
-            if consecutive_increases >= 50:
-                result_item = ScreenerResult(
-                    symbol=symbol,
-                    company=row.get('company', symbol),
-                    yield_=row.get('dividend_yield', 0),
-                    price=row.get('price', 0),
-                    market_cap=row.get('market_cap'),
-                    payout_ratio=row.get('payout_ratio'),
-                    consecutive_years=consecutive_increases
-                )
-                results.append(result_item)
-
-                if len(results) >= limit:
-                    break
+        # Must have 50+ years of increases
+        results = await _fetch_streak_screener(50, min_yield, limit)
 
         return ScreenerResponse(
             screener="dividend_kings",
@@ -362,10 +288,10 @@ async def high_growth_dividends_screener(
     Focuses on companies that are consistently growing their dividends.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Get stocks with dividend growth data
-        query = supabase.table('raw_stocks').select('*')\
+        query = db.table('raw_stocks').select('*')\
             .not_.is_('dividend_yield', 'null')\
             .gte('dividend_yield', min_yield)\
             .not_.is_('dividend_growth_5yr', 'null')\
@@ -373,7 +299,7 @@ async def high_growth_dividends_screener(
             .order('dividend_growth_5yr', desc=True)\
             .limit(limit)
 
-        result = query.execute()
+        result = await query.execute()
 
         # Convert to ScreenerResult models
         results = []
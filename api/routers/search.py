@@ -9,7 +9,7 @@ from typing import Optional, Dict, Any
 
 from api.models.schemas import SearchResponse, SearchResult, StockType
 from api.dependencies import require_api_key
-from supabase_helpers import get_supabase_client
+from api.database import get_db
 
 router = APIRouter()
 
@@ -27,14 +27,14 @@ async def search_stocks(
     Uses fuzzy matching to find relevant results.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         query_upper = q.upper()
         query_pattern = f"%{q.upper()}%"
 
         # Use database-level ILIKE search for better performance
         # Search in symbol, company, and sector
-        query = supabase.table('raw_stocks').select('*')
+        query = db.table('raw_stocks').select('*')
 
         # Apply ILIKE search on symbol, company, or sector
         # Note: Supabase/PostgREST uses "ilike" operator
@@ -45,7 +45,7 @@ async def search_stocks(
             query = query.eq('type', type.value)
 
         # Limit results
-        result = query.limit(limit * 2).execute()
+        result = await query.limit(limit * 2).execute()
 
         # Score and sort results
         scored_results = []
@@ -6,6 +6,7 @@ Endpoints for stock and ETF information.
 
 from fastapi import APIRouter, HTTPException, Query, Path, Depends
 from typing import Optional, List, Dict, Any
+import asyncio
 import base64
 import json
 
@@ -16,7 +17,7 @@ from api.models.schemas import (
     StockSplit, SplitHistoryResponse
 )
 from api.dependencies import require_api_key
-from supabase_helpers import get_supabase_client
+from api.database import get_db, fetch_stock, fetch_dividend_history
 
 router = APIRouter()
 
@@ -52,10 +53,10 @@ async def list_stocks(
     Returns a paginated list of stocks matching the specified criteria.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Build query
-        query = supabase.table('raw_stocks').select('*')
+        query = db.table('raw_stocks').select('*')
 
         # Apply filters
         if exchange:
@@ -88,7 +89,7 @@ async def list_stocks(
         query = query.order('symbol', desc=False).limit(limit + 1)
 
         # Execute query
-        result = query.execute()
+        result = await query.execute()
 
         # Check if there are more results
         has_more = len(result.data) > limit
@@ -145,12 +146,10 @@ async def get_stock(
     Supports expansion of related data via the expand parameter.
     """
     try:
-        supabase = get_supabase_client()
-
         # Fetch stock
-        result = supabase.table('raw_stocks').select('*').eq('symbol', symbol.upper()).execute()
+        row = await fetch_stock(symbol)
 
-        if not result.data:
+        if not row:
             raise HTTPException(
                 status_code=404,
                 detail={"error": {
@@ -161,8 +160,6 @@ async def get_stock(
                 }}
             )
 
-        row = result.data[0]
-
         # Parse expand parameter
         expand_fields = set()
         if expand:
@@ -256,12 +253,10 @@ async def get_stock_fundamentals(
     Returns company fundamentals including market cap, P/E ratio, sector info, etc.
     """
     try:
-        supabase = get_supabase_client()
-
         # Fetch stock
-        result = supabase.table('raw_stocks').select('*').eq('symbol', symbol.upper()).execute()
+        row = await fetch_stock(symbol)
 
-        if not result.data:
+        if not row:
             raise HTTPException(
                 status_code=404,
                 detail={"error": {
@@ -272,8 +267,6 @@ async def get_stock_fundamentals(
                 }}
             )
 
-        row = result.data[0]
-
         return Fundamentals(
             symbol=row['symbol'],
             market_cap=row.get('market_cap'),
@@ -311,12 +304,13 @@ async def get_dividend_metrics(
     including Dividend Aristocrat/King status.
     """
     try:
-        supabase = get_supabase_client()
-
-        # Fetch stock
-        result = supabase.table('raw_stocks').select('*').eq('symbol', symbol.upper()).execute()
+        # Fetch stock and dividend history concurrently
+        row, dividends = await asyncio.gather(
+            fetch_stock(symbol),
+            fetch_dividend_history(symbol, limit=200)
+        )
 
-        if not result.data:
+        if not row:
             raise HTTPException(
                 status_code=404,
                 detail={"error": {
@@ -327,23 +321,14 @@ async def get_dividend_metrics(
                 }}
             )
 
-        row = result.data[0]
-
         # Calculate consecutive increases from dividend history
-        div_result = supabase.table('raw_dividends')\
-            .select('ex_date, amount')\
-            .eq('symbol', symbol.upper())\
-            .order('ex_date', desc=True)\
-            .limit(200)\
-            .execute()
-
         consecutive_increases = 0
-        consecutive_payments = len(div_result.data) if div_result.data else 0
+        consecutive_payments = len(dividends)
 
         # Simple consecutive increase calculation
-        if div_result.data and len(div_result.data) >= 2:
+        if len(dividends) >= 2:
             prev_amount = None
-            for div in reversed(div_result.data):
+            for div in reversed(dividends):
                 if prev_amount is not None:
                     if div['amount'] >= prev_amount:
                         consecutive_increases += 1
@@ -401,10 +386,10 @@ async def get_stock_splits(
     Returns all stock splits with split ratios and dates.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
 
         # Fetch splits
-        result = supabase.table('divv_stock_splits').select('*')\
+        result = await db.table('divv_stock_splits').select('*')\
             .eq('symbol', symbol.upper())\
             .order('date', desc=True)\
             .limit(limit)\
@@ -459,12 +444,10 @@ async def get_stock_quote(
     Plus additional dividend data that GOOGLEFINANCE doesn't provide.
     """
     try:
-        supabase = get_supabase_client()
-
         # Fetch stock with all fundamental data
-        result = supabase.table('raw_stocks').select('*').eq('symbol', symbol.upper()).execute()
+        row = await fetch_stock(symbol)
 
-        if not result.data:
+        if not row:
             raise HTTPException(
                 status_code=404,
                 detail={"error": {
@@ -475,8 +458,6 @@ async def get_stock_quote(
                 }}
             )
 
-        row = result.data[0]
-
         # Build comprehensive quote
         return StockQuote(
             symbol=row['symbol'],
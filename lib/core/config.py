@@ -32,10 +32,52 @@ class APIConfig:
     ALPHA_VANTAGE_CONCURRENT_REQUESTS = 6  # Increased from 2 to 6 (3x boost)
     YAHOO_CONCURRENT_REQUESTS = 3  # Conservative to avoid rate limiting (Yahoo is free tier)
 
+    # Request budgets (token bucket pacing, shared by all clients of a provider)
+    FMP_REQUESTS_PER_MINUTE = 750  # Professional plan quota
+    FMP_BURST = 50
+    FMP_ENDPOINT_WEIGHTS = {}  # {url path fragment: token cost} for endpoints FMP bills as >1 call
+    ALPHA_VANTAGE_REQUESTS_PER_MINUTE = 75  # Premium plan quota
+    ALPHA_VANTAGE_BURST = 5
+    ALPHA_VANTAGE_REQUESTS_PER_DAY = None  # Set to 25 on the free plan
+    YAHOO_REQUESTS_PER_MINUTE = 100  # Unpublished; conservative to avoid throttling
+    YAHOO_BURST = 5
+
     # Request Timeouts
     REQUEST_TIMEOUT = 30  # seconds
     MAX_RETRIES = 3
 
+    # Shared HTTP connection pool (async engine used by all data source clients)
+    HTTP_MAX_CONNECTIONS = 500  # Open connections across all providers
+    HTTP_MAX_KEEPALIVE = 200    # Idle keep-alive connections kept for reuse
+
+    # On-disk HTTP response cache (lib/data_sources/response_cache.py)
+    # On by default: provider responses are reused for their TTL below instead of
+    # being re-requested. Empty and error payloads are never cached. Set
+    # HTTP_CACHE_MODE=off to always hit the network.
+    # Daily price endpoints have TTL 0: a response cached intraday must not be
+    # served after the close, so they are always revalidated (If-None-Match /
+    # If-Modified-Since) and only reused when the provider answers 304.
+    HTTP_CACHE_MODE = os.getenv('HTTP_CACHE_MODE', 'on')  # on | off | replay (cache only, no network)
+    HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', '.cache/http')
+    HTTP_CACHE_MAX_MB = int(os.getenv('HTTP_CACHE_MAX_MB', '2048'))  # LRU-evicted above this
+    HTTP_CACHE_DEFAULT_TTL = 3600  # seconds, for URLs matching no entry below
+    HTTP_CACHE_TTLS = {  # {URL fragment: seconds}; first match wins
+        '/api/v3/quote/': 300,
+        'REALTIME_OPTIONS': 300,
+        'batch-request-end-of-day': 0,
+        'historical-price-full': 0,
+        'function=TIME_SERIES_DAILY_ADJUSTED': 0,
+        'stock_dividend_calendar': 6 * 3600,
+        '/api/v3/profile/': 24 * 3600,
+        'etf/info': 24 * 3600,
+        'etf/holdings': 24 * 3600,
+        'available-traded/list': 24 * 3600,
+        'etf/list': 24 * 3600,
+        'stock-screener': 24 * 3600,
+        'function=OVERVIEW': 24 * 3600,
+        'function=LISTING_STATUS': 24 * 3600,
+    }
+
     @classmethod
     def validate(cls):
         """Validate that required API keys are present."""
@@ -54,11 +96,26 @@ class DatabaseConfig:
     SUPABASE_KEY = os.getenv('SUPABASE_KEY')
     SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
 
+    # Direct Postgres access (bulk loads, raw SQL, analytics)
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    PG_HOST = os.getenv('DB_HOST', 'localhost')
+    PG_PORT = os.getenv('DB_PORT', '5434')
+    PG_DATABASE = os.getenv('DB_NAME', 'postgres')
+    PG_USER = os.getenv('DB_USER', 'postgres')
+    PG_PASSWORD = os.getenv('DB_PASSWORD', os.getenv('PGPASSWORD', 'postgres'))
+    # Direct access is opt-in: the defaults above only fill gaps in DB_* settings
+    PG_CONFIGURED = any(os.getenv(var) for var in ('DB_HOST', 'DB_PORT', 'DB_NAME', 'DB_USER', 'DB_PASSWORD'))
+    PG_POOL_MIN_CONNECTIONS = 1
+    PG_POOL_MAX_CONNECTIONS = 8
+    PG_POOL_HEALTH_CHECK_INTERVAL = 30  # Idle seconds before a connection is re-verified
+    PG_POOL_CHECKOUT_TIMEOUT = 30       # Seconds to wait for a free connection
+    PG_CONNECT_TIMEOUT = 5
+
     # Table Names
     TABLE_STOCKS = "raw_stocks"
     TABLE_STOCK_PRICES = "raw_stock_prices"
     TABLE_DIVIDEND_HISTORY = "raw_dividends"
-    TABLE_DIVIDEND_CALENDAR = "raw_future_dividends"
+    TABLE_DIVIDEND_CALENDAR = "divv_future_dividends"  # Renamed from raw_future_dividends
     TABLE_EXCLUDED_SYMBOLS = "raw_stocks_excluded"
     TABLE_STOCK_SPLITS = "raw_stock_splits"
 
@@ -71,6 +128,32 @@ class DatabaseConfig:
     AGGRESSIVE_BATCH_SIZE = 2000  # Batch writes even more aggressively
     REDUCE_LOGGING = True  # Reduce per-symbol logging for less I/O
 
+    # Writer pipeline (bounded queues between fetch workers and DB writes)
+    WRITER_WORKERS_PER_TABLE = 3  # Concurrent upserts per table
+    WRITER_FLUSH_INTERVAL = 5     # Seconds before a partial batch is flushed
+    WRITER_QUEUE_BATCHES = 2      # Queue bound = batch size x workers x this
+    WRITER_MAX_RETRIES = 3        # Retries (exponential backoff) before dead-lettering
+    DEAD_LETTER_DIR = os.getenv('DEAD_LETTER_DIR', 'logs/dead_letter')
+
+    # Dividend streaks (recomputed for symbols touched by each dividend ingest)
+    STREAK_REFRESH_BATCH = 500  # Symbols per refresh_dividend_streaks() call
+
+    @classmethod
+    def get_postgres_dsn(cls):
+        """
+        Get the libpq connection string (DATABASE_URL, else DB_* settings).
+
+        Returns:
+            DSN string, or None when neither DATABASE_URL nor any DB_*
+            variable is set (callers use the Supabase REST path instead)
+        """
+        if cls.DATABASE_URL:
+            return cls.DATABASE_URL
+        if not cls.PG_CONFIGURED:
+            return None
+        return (f"host={cls.PG_HOST} port={cls.PG_PORT} dbname={cls.PG_DATABASE} "
+                f"user={cls.PG_USER} password={cls.PG_PASSWORD}")
+
     @classmethod
     def validate(cls):
         """Validate database configuration."""
@@ -163,10 +246,17 @@ class DataFetchConfig:
     USE_HYBRID_DIVIDENDS = True  # Enable hybrid dividend fetching
     USE_HYBRID_PRICES = False    # Keep FMP primary for prices (excellent coverage)
     FALLBACK_TO_YAHOO = True     # Enable Yahoo Finance fallback
+    YAHOO_BATCH_SIZE = 100       # Tickers per multi-ticker yf.download() call
+    YAHOO_AUM_REFRESH_HOURS = 24  # AUM (ticker.info) is refreshed at most this often per symbol
 
     # Batch EOD Optimization (Professional/Enterprise plans only)
     USE_BATCH_EOD = True         # Use batch EOD API for recent data (30 days)
     BATCH_EOD_DAYS = 30          # Number of recent days to fetch via batch EOD
+    BATCH_EOD_CONCURRENCY = 8    # Batch EOD days fetched concurrently during backfill
+    BACKFILL_WRITE_ROWS = 50000  # Rows per multi-symbol upsert when writing backfilled days
+    BATCH_QUOTE_CHUNK_SIZE = 500  # Symbols per batch quote call (FMP URL length limit)
+    PIPELINE_BATCH_QUOTES = True  # Stream each quote chunk into DB writes while later chunks are in flight
+    BATCH_QUOTE_WORKERS = 8       # Concurrent batch quote fetches (still bounded by the FMP rate limiter)
     FILTER_DIVIDEND_SYMBOLS = True  # Only fetch dividends for known dividend-paying symbols
     USE_BATCH_QUOTE_FILTER = True  # Use batch quote to skip symbols with no price change
     CACHE_COMPANY_DATA = True     # Cache company data with 90-day refresh cycle
@@ -208,6 +298,10 @@ class LoggingConfig:
     # Log Format
     LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 
+    # Live Metrics (Prometheus text format at http://METRICS_HOST:METRICS_PORT/metrics; 0 disables)
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
     @classmethod
     def configure_logging(cls, log_file=None, level=None):
         """Configure application logging."""
@@ -285,6 +379,24 @@ class ProcessingConfig:
     MAX_CONSECUTIVE_FAILURES = 10
     CONTINUE_ON_ERROR = True
 
+    # Resumable Runs (append-only checkpoint journals)
+    CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', '.checkpoints')
+    CHECKPOINT_FSYNC_EVERY = 100  # Journal entries between fsyncs (appends survive a killed process regardless)
+
+    # Symbol Prioritization (local raw_stocks metadata snapshot: volume, market cap, exchange)
+    PRIORITY_SNAPSHOT_PATH = os.getenv('PRIORITY_SNAPSHOT_PATH', '.cache/symbol_metadata.npz')
+    PRIORITY_SNAPSHOT_HOURS = 24  # Refresh the snapshot from the database after this many hours
+
+    # Ingest Scheduler (update.py --mode schedule)
+    SCHEDULER_EOD_READY_TIME = '18:00'        # Market time after which EOD data for the session is available
+    SCHEDULER_TIER_SIZES = (1000, 4000)       # Symbols in priority tiers 1 and 2; the rest is tier 3
+    SCHEDULER_TIER_DELAY_HOURS = (0, 2, 4)    # Hours after EOD ready before each tier becomes eligible
+    SCHEDULER_WAVE_SIZE = 500                 # Symbols per wave
+    SCHEDULER_CALLS_PER_SYMBOL = 2            # Price + dividend request per symbol
+    SCHEDULER_CALLS_PER_MINUTE = int(os.getenv('SCHEDULER_CALLS_PER_MINUTE', '600'))  # Wave pacing (FMP allows 750)
+    SCHEDULER_DAILY_CALL_BUDGET = int(os.getenv('SCHEDULER_DAILY_CALL_BUDGET', '0'))  # 0 = unlimited
+    SCHEDULER_POLL_MINUTES = 30               # Daemon wake-up interval
+
 
 class Config:
     """
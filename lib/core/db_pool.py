@@ -0,0 +1,301 @@
+"""
+Postgres Connection Pool
+
+Shared, thread-safe pool of direct psycopg2 connections for queries that
+go around PostgREST (bulk COPY loads, raw SQL, nightly analytics).
+
+Connections are opened once and reused across calls, so hot loops no
+longer pay a TCP + auth handshake per query. Checkout blocks while the
+pool is at capacity, idle connections are health-checked before reuse,
+and frequently run statements can be prepared server-side once per
+connection.
+"""
+
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from lib.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    from psycopg2.extensions import connection as _PgConnection
+    from psycopg2.pool import ThreadedConnectionPool
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+    _PgConnection = object
+
+_PLACEHOLDER_RE = re.compile(r'%%|%s')
+_PREPARED_NAME_RE = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection becomes free within the checkout timeout."""
+    pass
+
+
+class PooledConnection(_PgConnection):
+    """psycopg2 connection that remembers its prepared statements and last use."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.last_used = time.monotonic()
+
+
+class PostgresPool:
+    """
+    Bounded, health-checked psycopg2 connection pool.
+
+    Usage:
+        pool = PostgresPool.get_instance()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                pool.execute(cursor, "SELECT * FROM raw_stocks WHERE symbol = %s",
+                             ('AAPL',), prepare='stock_by_symbol')
+                row = cursor.fetchone()
+
+        rows = pool.query("SELECT symbol FROM raw_stocks LIMIT %s", (10,))
+    """
+
+    _instance: Optional['PostgresPool'] = None
+    _instance_lock = threading.Lock()
+    _unavailable = False
+
+    def __init__(self, dsn: Optional[str] = None, minconn: int = None, maxconn: int = None,
+                 health_check_interval: float = None, checkout_timeout: float = None):
+        """
+        Initialize pool and open the minimum number of connections.
+
+        Args:
+            dsn: libpq connection string (default: from DatabaseConfig)
+            minconn: Connections kept open
+            maxconn: Maximum concurrent connections
+            health_check_interval: Idle seconds after which a connection is
+                                   verified with SELECT 1 before reuse
+            checkout_timeout: Seconds to wait for a free connection
+
+        Raises:
+            ImportError: If psycopg2 is not installed
+            ValueError: If no DSN is given and none is configured
+            psycopg2.OperationalError: If the database is unreachable
+        """
+        if not PSYCOPG2_AVAILABLE:
+            raise ImportError("psycopg2 is required for direct Postgres access. Install with: pip install psycopg2-binary")
+
+        self.dsn = dsn or Config.DATABASE.get_postgres_dsn()
+        if not self.dsn:
+            raise ValueError("Postgres is not configured (set DATABASE_URL or DB_HOST/DB_* variables)")
+        self.minconn = minconn or Config.DATABASE.PG_POOL_MIN_CONNECTIONS
+        self.maxconn = maxconn or Config.DATABASE.PG_POOL_MAX_CONNECTIONS
+        self.health_check_interval = (health_check_interval if health_check_interval is not None
+                                      else Config.DATABASE.PG_POOL_HEALTH_CHECK_INTERVAL)
+        self.checkout_timeout = checkout_timeout or Config.DATABASE.PG_POOL_CHECKOUT_TIMEOUT
+
+        self._pool = ThreadedConnectionPool(
+            self.minconn, self.maxconn, self.dsn,
+            connection_factory=PooledConnection,
+            connect_timeout=Config.DATABASE.PG_CONNECT_TIMEOUT
+        )
+        # ThreadedConnectionPool raises instead of waiting when exhausted
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+
+        self.stats = {
+            'checkouts': 0,
+            'health_checks': 0,
+            'reconnects': 0,
+            'prepared': 0
+        }
+        self._stats_lock = threading.Lock()
+
+        logger.info(f"✅ Postgres pool initialized ({self.minconn}-{self.maxconn} connections)")
+
+    @classmethod
+    def get_instance(cls) -> Optional['PostgresPool']:
+        """
+        Get the shared pool, creating it on first use.
+
+        Returns:
+            PostgresPool, or None if Postgres is not configured, psycopg2 is
+            missing or the database is unreachable (not retried until reset())
+        """
+        if cls._instance is None and not cls._unavailable:
+            with cls._instance_lock:
+                if cls._instance is None and not cls._unavailable:
+                    if not Config.DATABASE.get_postgres_dsn():
+                        logger.info("ℹ️  Direct Postgres access not configured - using Supabase REST")
+                        cls._unavailable = True
+                        return None
+                    try:
+                        cls._instance = cls()
+                    except Exception as e:
+                        logger.warning(f"⚠️  Direct Postgres access unavailable: {e}")
+                        cls._unavailable = True
+        return cls._instance
+
+    @classmethod
+    def reset(cls):
+        """Close the shared pool and allow it to be recreated."""
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.close()
+                cls._instance = None
+            cls._unavailable = False
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        """Check a connection before handing it out."""
+        if conn.closed:
+            return False
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+
+        self._count('health_checks')
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """
+        Check out a connection for the duration of a with-block.
+
+        Commits on normal exit and rolls back on exception. Broken
+        connections are discarded instead of returned to the pool.
+
+        Raises:
+            PoolExhausted: If no connection frees up within checkout_timeout
+        """
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolExhausted(f"No Postgres connection available after {self.checkout_timeout}s")
+
+        conn = None
+        try:
+            conn = self._pool.getconn()
+            while not self._is_healthy(conn):
+                self._count('reconnects')
+                self._pool.putconn(conn, close=True)
+                conn = None
+                conn = self._pool.getconn()
+
+            self._count('checkouts')
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+        finally:
+            if conn is not None:
+                conn.last_used = time.monotonic()
+                self._pool.putconn(conn, close=bool(conn.closed))
+            self._slots.release()
+
+    def execute(self, cursor, query: str, params: Optional[Sequence] = None,
+                prepare: Optional[str] = None):
+        """
+        Execute a statement, optionally as a server-side prepared statement.
+
+        With prepare, the statement is parsed and planned once per
+        connection (PREPARE) and later calls only send parameters
+        (EXECUTE). Only positional %s placeholders are supported, and they
+        must not appear inside string literals.
+
+        Args:
+            cursor: Cursor from a pooled connection
+            query: SQL with %s placeholders
+            params: Positional parameters
+            prepare: Statement name (lowercase identifier), or None to execute directly
+        """
+        statement, args = self.statement(cursor, query, params, prepare)
+        cursor.execute(statement, args)
+
+    def statement(self, cursor, query: str, params: Optional[Sequence] = None,
+                  prepare: Optional[str] = None) -> Tuple[str, Optional[Sequence]]:
+        """
+        SQL and parameters to execute for a query, preparing it first if needed.
+
+        Lets the caller run the statement on another cursor of the same
+        connection (e.g. a named server-side cursor, which cannot PREPARE).
+
+        Args:
+            cursor: Client-side cursor used for PREPARE
+            query: SQL with %s placeholders
+            params: Positional parameters
+            prepare: Statement name, or None for the query itself
+
+        Returns:
+            (statement, parameters)
+        """
+        if not prepare:
+            return query, params
+
+        if not _PREPARED_NAME_RE.match(prepare):
+            raise ValueError(f"Invalid prepared statement name: {prepare}")
+        if isinstance(params, dict):
+            raise ValueError("Prepared statements require positional parameters")
+
+        conn = cursor.connection
+        if prepare not in conn.prepared:
+            counter = iter(range(1, 1000))
+            numbered = _PLACEHOLDER_RE.sub(
+                lambda m: '%' if m.group(0) == '%%' else f'${next(counter)}', query
+            )
+            cursor.execute(f"PREPARE {prepare} AS {numbered}")
+            conn.prepared.add(prepare)
+            self._count('prepared')
+
+        if params:
+            placeholders = ', '.join(['%s'] * len(params))
+            return f"EXECUTE {prepare} ({placeholders})", params
+        return f"EXECUTE {prepare}", None
+
+    def query(self, query: str, params: Optional[Sequence] = None,
+              prepare: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Run a statement on a pooled connection and return rows as dictionaries.
+
+        Args:
+            query: SQL with %s placeholders
+            params: Query parameters
+            prepare: Optional prepared statement name
+
+        Returns:
+            List of row dictionaries (empty for statements without results)
+        """
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                self.execute(cursor, query, params, prepare=prepare)
+                if cursor.description is None:
+                    return []
+                columns = [col.name for col in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        """Close all pooled connections."""
+        try:
+            self._pool.closeall()
+        except Exception as e:
+            logger.debug(f"Postgres pool close error: {e}")
+
+
+def get_pool() -> Optional[PostgresPool]:
+    """Get the shared Postgres pool, or None if direct access is unavailable."""
+    return PostgresPool.get_instance()
+
+
+__all__ = ['PostgresPool', 'PooledConnection', 'PoolExhausted', 'get_pool']
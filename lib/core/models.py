@@ -58,7 +58,7 @@ class StockSymbol:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class StockPrice:
     """Represents a stock price record."""
 
@@ -119,7 +119,7 @@ class StockPrice:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Dividend:
     """Represents a dividend payment record."""
 
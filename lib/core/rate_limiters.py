@@ -3,53 +3,365 @@ Rate Limiting Module
 
 Provides thread-safe rate limiting for API calls to prevent hitting
 rate limits on external services (FMP, Alpha Vantage, Yahoo Finance).
+
+Two limits are combined per provider:
+- A token bucket that paces requests to the provider's per-minute (and
+  optional per-day) budget
+- A semaphore that caps the number of requests in flight
 """
 
+import asyncio
 import logging
 import time
-from threading import Semaphore
+from collections import deque
+from datetime import date
+from threading import Lock, Semaphore
 from contextlib import contextmanager
-from typing import Optional
+from typing import Optional, Dict, Any
+
+from lib.core.config import Config
+from lib.utils.performance_monitor import record_rate_limit_wait
 
 logger = logging.getLogger(__name__)
 
 
+class RateBudgetExhausted(Exception):
+    """Raised when a provider's daily request budget has been used up."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that paces requests to a per-minute budget.
+
+    Tokens refill continuously at rate_per_minute / 60 per second, up to
+    `burst`. Callers reserve tokens up front; when the bucket is empty the
+    reservation goes into debt and the caller sleeps until it is repaid, so
+    waiting callers are served in arrival order and the provider sees a
+    steady request rate instead of bursts followed by 429s.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None,
+                 name: str = "API", daily_limit: Optional[int] = None,
+                 endpoint_weights: Optional[Dict[str, float]] = None):
+        """
+        Initialize token bucket.
+
+        Args:
+            rate_per_minute: Sustained request budget per minute
+            burst: Maximum tokens that can accumulate (default: one second of budget)
+            name: Name of the API for logging purposes
+            daily_limit: Optional maximum requests per calendar day
+            endpoint_weights: Optional {url path fragment: token cost} overrides
+        """
+        self.name = name
+        self.rate_per_minute = rate_per_minute
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst or max(1, int(self.rate_per_second))
+        self.daily_limit = daily_limit
+        self.endpoint_weights = endpoint_weights or {}
+
+        self._lock = Lock()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+
+        # Usage accounting
+        self._recent = deque()  # (scheduled_time, weight) within the trailing minute
+        self._day = date.today()
+        self._day_consumed = 0.0
+        self._total_consumed = 0.0
+        self._total_wait = 0.0
+        self._throttled = 0
+
+    def weight_for(self, endpoint: Optional[str]) -> float:
+        """
+        Get the token cost of a request to an endpoint.
+
+        Args:
+            endpoint: URL or URL path of the request
+
+        Returns:
+            Token cost (1.0 unless overridden in endpoint_weights)
+        """
+        if endpoint and self.endpoint_weights:
+            for fragment, weight in self.endpoint_weights.items():
+                if fragment in endpoint:
+                    return weight
+        return 1.0
+
+    def _refill(self, now: float):
+        """Add tokens accrued since the last refill (caller holds the lock)."""
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate_per_second)
+            self._last_refill = now
+
+    def reserve(self, weight: float = 1.0) -> Optional[float]:
+        """
+        Reserve tokens for one request.
+
+        Args:
+            weight: Token cost of the request
+
+        Returns:
+            Seconds the caller must wait before sending, or None if the
+            daily budget is exhausted
+        """
+        with self._lock:
+            now = time.monotonic()
+
+            today = date.today()
+            if today != self._day:
+                self._day = today
+                self._day_consumed = 0.0
+
+            if self.daily_limit is not None and self._day_consumed + weight > self.daily_limit:
+                return None
+
+            self._refill(now)
+            self._tokens -= weight
+            wait = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+
+            self._day_consumed += weight
+            self._total_consumed += weight
+            self._recent.append((now + wait, weight))
+            if wait > 0:
+                self._total_wait += wait
+                self._throttled += 1
+
+            return wait
+
+    def acquire(self, weight: float = 1.0) -> bool:
+        """
+        Block until a request of the given weight may be sent.
+
+        Returns:
+            True when the request may proceed, False if the daily budget is exhausted
+        """
+        wait = self.reserve(weight)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def refund(self, weight: float = 1.0):
+        """
+        Return a reservation whose request will not be sent (e.g. the waiting
+        caller was cancelled), so it does not hold back later callers.
+
+        Args:
+            weight: Token cost that was reserved
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self.burst, self._tokens + weight)
+            self._day_consumed = max(0.0, self._day_consumed - weight)
+            self._total_consumed -= weight
+
+            # Drop the latest still-pending reservation of this weight
+            for i in range(len(self._recent) - 1, -1, -1):
+                scheduled, reserved = self._recent[i]
+                if scheduled <= now:
+                    break
+                if reserved == weight:
+                    del self._recent[i]
+                    break
+
+    async def acquire_async(self, weight: float = 1.0) -> bool:
+        """Coroutine version of acquire() that sleeps without blocking the event loop."""
+        wait = self.reserve(weight)
+        if wait is None:
+            return False
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.refund(weight)
+                raise
+        return True
+
+    def penalize(self, seconds: float):
+        """
+        Pause new reservations for roughly `seconds` (e.g. after a 429).
+
+        Args:
+            seconds: How long the provider should be left alone
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate_per_second
+
+    def get_usage(self) -> Dict[str, Any]:
+        """
+        Report how much of the request budget is being used.
+
+        Returns:
+            Dictionary with trailing-minute usage, utilization and wait statistics
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            while self._recent and self._recent[0][0] < now - 60:
+                self._recent.popleft()
+            last_minute = sum(weight for scheduled, weight in self._recent if scheduled <= now)
+
+            return {
+                'budget_per_minute': self.rate_per_minute,
+                'requests_last_minute': last_minute,
+                'utilization_pct': (last_minute / self.rate_per_minute) * 100 if self.rate_per_minute else 0.0,
+                'tokens_available': max(0.0, self._tokens),
+                'burst': self.burst,
+                'total_requests': self._total_consumed,
+                'throttled_requests': self._throttled,
+                'total_wait_seconds': self._total_wait,
+                'daily_used': self._day_consumed,
+                'daily_limit': self.daily_limit
+            }
+
+
 class RateLimiter:
     """
     Thread-safe rate limiter using semaphores.
 
-    Limits the number of concurrent requests to an API.
+    Limits the number of concurrent requests to an API and, when a token
+    bucket is attached, paces them to the API's requests-per-minute budget.
     """
 
-    def __init__(self, max_concurrent: int, name: str = "API"):
+    def __init__(self, max_concurrent: int, name: str = "API",
+                 bucket: Optional[TokenBucket] = None):
         """
         Initialize rate limiter.
 
         Args:
             max_concurrent: Maximum number of concurrent requests allowed
             name: Name of the API for logging purposes
+            bucket: Optional token bucket enforcing a request rate budget
         """
         self.semaphore = Semaphore(max_concurrent)
         self.max_concurrent = max_concurrent
         self.name = name
+        self.bucket = bucket
         self._acquired_count = 0
 
-    def acquire(self, timeout: Optional[float] = None):
+        # Coroutines waiting for a slot: (loop, future), woken by release()
+        self._async_waiters = deque()
+        self._waiters_lock = Lock()
+
+    def weight_for(self, endpoint: Optional[str]) -> float:
+        """Get the token cost of a request to an endpoint (1.0 without a bucket)."""
+        return self.bucket.weight_for(endpoint) if self.bucket else 1.0
+
+    def acquire(self, timeout: Optional[float] = None, weight: float = 1.0):
         """
         Acquire the rate limiter (blocks until available).
 
         Args:
             timeout: Optional timeout in seconds
+            weight: Token cost of the request (for the rate budget)
+
+        Returns:
+            True if acquired, False on timeout or exhausted daily budget
+        """
+        start = time.perf_counter()
+        # Concurrency slot first: a timeout here must not have spent rate tokens
+        if not self.semaphore.acquire(timeout=timeout):
+            record_rate_limit_wait(self.name, time.perf_counter() - start)
+            return False
+
+        if self.bucket is not None and not self.bucket.acquire(weight):
+            self._release_slot()
+            logger.warning(f"[{self.name}] Daily request budget exhausted")
+            return False
+
+        record_rate_limit_wait(self.name, time.perf_counter() - start)
+        self._acquired_count += 1
+        logger.debug(f"[{self.name}] Rate limiter acquired ({self._acquired_count} active)")
+        return True
+
+    async def acquire_async(self, weight: float = 1.0, recheck_interval: float = 0.5):
+        """
+        Acquire the rate limiter from a coroutine without blocking the event loop.
+
+        The underlying semaphore and token bucket are shared with threaded
+        callers, so sync and async requests draw from the same budget. A
+        waiting coroutine sleeps on a future that release() resolves, so it
+        costs nothing while it waits.
+
+        Args:
+            weight: Token cost of the request (for the rate budget)
+            recheck_interval: Upper bound on a wait before the slot is
+                              re-checked (covers a wake-up taken by a thread)
+
+        Returns:
+            True if acquired, False if the daily budget is exhausted
         """
-        acquired = self.semaphore.acquire(timeout=timeout)
-        if acquired:
-            self._acquired_count += 1
-            logger.debug(f"[{self.name}] Rate limiter acquired ({self._acquired_count} active)")
-        return acquired
+        start = time.perf_counter()
+        # Concurrency slot first, as in acquire(): a coroutine parked on a
+        # slot must not hold a scheduled token reservation
+        loop = asyncio.get_running_loop()
+        while not self.semaphore.acquire(blocking=False):
+            waiter = loop.create_future()
+            with self._waiters_lock:
+                self._async_waiters.append((loop, waiter))
+            # A release between the failed attempt and registering would be missed
+            if self.semaphore.acquire(blocking=False):
+                waiter.cancel()
+                break
+            try:
+                await asyncio.wait_for(waiter, recheck_interval)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # Pass on a wake-up this coroutine can no longer use
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_async_waiter()
+                raise
+
+        try:
+            budget_ok = self.bucket is None or await self.bucket.acquire_async(weight)
+        except BaseException:
+            self._release_slot()
+            raise
+        if not budget_ok:
+            self._release_slot()
+            logger.warning(f"[{self.name}] Daily request budget exhausted")
+            return False
+
+        record_rate_limit_wait(self.name, time.perf_counter() - start)
+        self._acquired_count += 1
+        logger.debug(f"[{self.name}] Rate limiter acquired ({self._acquired_count} active)")
+        return True
+
+    def _wake_async_waiter(self):
+        """Wake the oldest coroutine still waiting for a slot."""
+        with self._waiters_lock:
+            while self._async_waiters:
+                loop, waiter = self._async_waiters.popleft()
+                if not waiter.done():
+                    break
+            else:
+                return
+
+        def wake():
+            if not waiter.done():
+                waiter.set_result(None)
+
+        try:
+            loop.call_soon_threadsafe(wake)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    def _release_slot(self):
+        """Return a concurrency slot and wake a waiting coroutine."""
+        self.semaphore.release()
+        if self._async_waiters:
+            self._wake_async_waiter()
 
     def release(self):
         """Release the rate limiter."""
-        self.semaphore.release()
+        self._release_slot()
         self._acquired_count = max(0, self._acquired_count - 1)
         logger.debug(f"[{self.name}] Rate limiter released ({self._acquired_count} active)")
 
@@ -62,15 +374,33 @@ class RateLimiter:
             with limiter.limit():
                 make_api_call()
         """
-        self.acquire()
+        if not self.acquire():
+            raise RateBudgetExhausted(f"{self.name} request budget exhausted")
         try:
             yield
         finally:
             self.release()
 
+    def get_usage(self) -> Dict[str, Any]:
+        """
+        Report concurrency and request budget usage.
+
+        Returns:
+            Dictionary with active requests and, if a bucket is attached, rate usage
+        """
+        usage = {
+            'name': self.name,
+            'max_concurrent': self.max_concurrent,
+            'active_requests': self._acquired_count
+        }
+        if self.bucket is not None:
+            usage.update(self.bucket.get_usage())
+        return usage
+
     def __enter__(self):
         """Support using as context manager."""
-        self.acquire()
+        if not self.acquire():
+            raise RateBudgetExhausted(f"{self.name} request budget exhausted")
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -88,7 +418,7 @@ class AdaptiveRateLimiter(RateLimiter):
 
     def __init__(self, max_concurrent: int, name: str = "API",
                  backoff_factor: float = 2.0, max_backoff: float = 60.0,
-                 min_delay: float = 0.0):
+                 min_delay: float = 0.0, bucket: Optional[TokenBucket] = None):
         """
         Initialize adaptive rate limiter.
 
@@ -98,8 +428,9 @@ class AdaptiveRateLimiter(RateLimiter):
             backoff_factor: Multiplier for backoff delay
             max_backoff: Maximum backoff delay in seconds
             min_delay: Minimum delay between requests in seconds (applied to all requests)
+            bucket: Optional token bucket enforcing a request rate budget
         """
-        super().__init__(max_concurrent, name)
+        super().__init__(max_concurrent, name, bucket=bucket)
         self.backoff_factor = backoff_factor
         self.max_backoff = max_backoff
         self.min_delay = min_delay
@@ -139,6 +470,10 @@ class AdaptiveRateLimiter(RateLimiter):
             f"({self._consecutive_failures} consecutive failures)"
         )
 
+        # Pause the shared budget so every caller backs off, not just this one
+        if self.bucket is not None:
+            self.bucket.penalize(self._current_backoff)
+
     def report_error(self):
         """Report a general error."""
         self._consecutive_failures += 1
@@ -160,7 +495,8 @@ class AdaptiveRateLimiter(RateLimiter):
                 logger.debug(f"[{self.name}] Applying delay: {sleep_time:.2f}s")
                 time.sleep(sleep_time)
 
-        self.acquire()
+        if not self.acquire():
+            raise RateBudgetExhausted(f"{self.name} request budget exhausted")
         try:
             yield
             self._last_request_time = time.time()
@@ -172,7 +508,9 @@ class GlobalRateLimiters:
     """
     Global rate limiter instances for different APIs.
 
-    This provides a singleton-like access to rate limiters.
+    This provides a singleton-like access to rate limiters. Each limiter
+    carries a token bucket sized to the provider's published request budget
+    (see APIConfig), so all clients in the process share one quota.
     """
 
     _fmp_limiter: Optional[RateLimiter] = None
@@ -188,13 +526,23 @@ class GlobalRateLimiters:
             max_concurrent: Max concurrent requests (default: 144 for Ultimate plan)
         """
         if cls._fmp_limiter is None:
+            bucket = TokenBucket(
+                rate_per_minute=Config.API.FMP_REQUESTS_PER_MINUTE,
+                burst=Config.API.FMP_BURST,
+                name="FMP",
+                endpoint_weights=Config.API.FMP_ENDPOINT_WEIGHTS
+            )
             cls._fmp_limiter = AdaptiveRateLimiter(
                 max_concurrent=max_concurrent,
                 name="FMP",
                 backoff_factor=2.0,
-                max_backoff=30.0
+                max_backoff=30.0,
+                bucket=bucket
+            )
+            logger.info(
+                f"✅ Initialized FMP rate limiter (max_concurrent={max_concurrent}, "
+                f"{Config.API.FMP_REQUESTS_PER_MINUTE} req/min)"
             )
-            logger.info(f"✅ Initialized FMP rate limiter (max_concurrent={max_concurrent})")
         return cls._fmp_limiter
 
     @classmethod
@@ -206,13 +554,23 @@ class GlobalRateLimiters:
             max_concurrent: Max concurrent requests (default: 2 for Premium)
         """
         if cls._alpha_vantage_limiter is None:
+            bucket = TokenBucket(
+                rate_per_minute=Config.API.ALPHA_VANTAGE_REQUESTS_PER_MINUTE,
+                burst=Config.API.ALPHA_VANTAGE_BURST,
+                name="Alpha Vantage",
+                daily_limit=Config.API.ALPHA_VANTAGE_REQUESTS_PER_DAY
+            )
             cls._alpha_vantage_limiter = AdaptiveRateLimiter(
                 max_concurrent=max_concurrent,
                 name="Alpha Vantage",
                 backoff_factor=2.0,
-                max_backoff=60.0
+                max_backoff=60.0,
+                bucket=bucket
+            )
+            logger.info(
+                f"✅ Initialized Alpha Vantage rate limiter (max_concurrent={max_concurrent}, "
+                f"{Config.API.ALPHA_VANTAGE_REQUESTS_PER_MINUTE} req/min)"
             )
-            logger.info(f"✅ Initialized Alpha Vantage rate limiter (max_concurrent={max_concurrent})")
         return cls._alpha_vantage_limiter
 
     @classmethod
@@ -224,16 +582,49 @@ class GlobalRateLimiters:
             max_concurrent: Max concurrent requests (default: 3)
         """
         if cls._yahoo_limiter is None:
+            bucket = TokenBucket(
+                rate_per_minute=Config.API.YAHOO_REQUESTS_PER_MINUTE,
+                burst=Config.API.YAHOO_BURST,
+                name="Yahoo Finance"
+            )
             cls._yahoo_limiter = AdaptiveRateLimiter(
                 max_concurrent=max_concurrent,
                 name="Yahoo Finance",
                 backoff_factor=2.0,
                 max_backoff=60.0,
-                min_delay=0.5  # 500ms minimum delay between requests
+                min_delay=0.5,  # 500ms minimum delay between requests
+                bucket=bucket
+            )
+            logger.info(
+                f"✅ Initialized Yahoo Finance rate limiter (max_concurrent={max_concurrent}, "
+                f"{Config.API.YAHOO_REQUESTS_PER_MINUTE} req/min, min_delay=0.5s)"
             )
-            logger.info(f"✅ Initialized Yahoo Finance rate limiter (max_concurrent={max_concurrent}, min_delay=0.5s)")
         return cls._yahoo_limiter
 
+    @classmethod
+    def get_usage_report(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        Get budget usage for every initialized limiter.
+
+        Returns:
+            Dictionary mapping limiter name -> usage statistics
+        """
+        limiters = [cls._fmp_limiter, cls._alpha_vantage_limiter, cls._yahoo_limiter]
+        return {limiter.name: limiter.get_usage() for limiter in limiters if limiter is not None}
+
+    @classmethod
+    def log_usage(cls):
+        """Log a one-line budget usage summary per initialized limiter."""
+        for name, usage in cls.get_usage_report().items():
+            if 'budget_per_minute' not in usage:
+                continue
+            logger.info(
+                f"📡 [{name}] {usage['requests_last_minute']:.0f}/{usage['budget_per_minute']:.0f} req/min "
+                f"({usage['utilization_pct']:.1f}% of budget), "
+                f"{usage['throttled_requests']:,} throttled, "
+                f"{usage['total_wait_seconds']:.1f}s total wait"
+            )
+
     @classmethod
     def reset_all(cls):
         """Reset all rate limiters (useful for testing)."""
@@ -260,6 +651,8 @@ def create_rate_limiter(max_concurrent: int, name: str = "API") -> RateLimiter:
 
 # Export main classes and functions
 __all__ = [
+    'RateBudgetExhausted',
+    'TokenBucket',
     'RateLimiter',
     'AdaptiveRateLimiter',
     'GlobalRateLimiters',
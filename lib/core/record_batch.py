@@ -0,0 +1,308 @@
+"""
+Record Batches
+
+Column-oriented containers for price and dividend rows on the ingest path.
+
+Provider records are appended straight into per-column storage (compact
+array('d') buffers for numbers, array('q') plus a null mask for bigint
+columns, lists for text), so backfills no longer
+build a StockPrice/Dividend object plus a dict for every row. Validation
+and serialization run once per batch with NumPy; row dictionaries are only
+materialized at the database boundary, for valid rows, with the same
+shape as StockPrice.to_dict() / Dividend.to_dict().
+"""
+
+import re
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+_NAN = float('nan')
+
+# Postgres bigint range (volume, aum)
+MAX_BIGINT_VALUE = 9223372036854775807
+MIN_BIGINT_VALUE = -MAX_BIGINT_VALUE - 1
+
+
+def _number(value: Any) -> float:
+    """Coerce a provider value to float (NaN for missing or malformed)."""
+    if value is None:
+        return _NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _integer(value: Any) -> Optional[int]:
+    """Coerce a provider value to an int within the bigint range (None for missing or malformed)."""
+    if not isinstance(value, int):
+        value = _number(value)
+        if value != value:
+            return None
+        # Clamp while still a float: float(MAX_BIGINT_VALUE) is 2**63, which
+        # wraps negative when cast to int64
+        if value >= MAX_BIGINT_VALUE:
+            return MAX_BIGINT_VALUE
+        if value <= MIN_BIGINT_VALUE:
+            return MIN_BIGINT_VALUE
+        return int(value)
+    return max(MIN_BIGINT_VALUE, min(MAX_BIGINT_VALUE, value))
+
+
+def _iso_date(value: Any) -> Optional[str]:
+    """Normalize a date or 'YYYY-MM-DD...' string to 'YYYY-MM-DD' (None if invalid)."""
+    if isinstance(value, date):
+        return value.isoformat()[:10]
+    if isinstance(value, str) and _DATE_RE.match(value):
+        return value[:10]
+    return None
+
+
+class RecordBatch:
+    """
+    Base class for columnar record batches.
+
+    Subclasses define NUMERIC_COLUMNS (stored as float64, NaN = missing),
+    TEXT_COLUMNS (stored as lists), INTEGER_COLUMNS (numeric columns kept
+    as exact int64 with a separate null mask) and OUTPUT_COLUMNS
+    (serialized row keys).
+    """
+
+    NUMERIC_COLUMNS: tuple = ()
+    TEXT_COLUMNS: tuple = ()
+    INTEGER_COLUMNS: tuple = ()
+    OUTPUT_COLUMNS: tuple = ()
+
+    __slots__ = ('_columns', '_nulls')
+
+    def __init__(self):
+        """Initialize an empty batch."""
+        self._columns: Dict[str, Any] = {}
+        self._nulls: Dict[str, array] = {}
+        self.clear()
+
+    def clear(self):
+        """Drop all rows."""
+        self._columns = {
+            column: array('q' if column in self.INTEGER_COLUMNS else 'd')
+            for column in self.NUMERIC_COLUMNS
+        }
+        self._columns.update({column: [] for column in self.TEXT_COLUMNS})
+        self._nulls = {column: array('b') for column in self.INTEGER_COLUMNS}
+
+    def _append_integer(self, name: str, value: Any):
+        """Append to an integer column (0 plus a null flag when missing)."""
+        value = _integer(value)
+        self._columns[name].append(0 if value is None else value)
+        self._nulls[name].append(value is None)
+
+    def __len__(self) -> int:
+        return len(self._columns['symbol'])
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get one column as a NumPy array.
+
+        float64 for numeric columns, int64 for integer columns (0 where
+        missing; see null_mask), object for text.
+        """
+        values = self._columns[name]
+        if isinstance(values, array):
+            return np.array(values, dtype=np.int64 if values.typecode == 'q' else np.float64)
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        return column
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Get all columns as NumPy arrays."""
+        return {name: self.column(name) for name in self._columns}
+
+    def null_mask(self, name: str) -> np.ndarray:
+        """Boolean mask of missing values in a numeric column."""
+        if name in self._nulls:
+            return np.array(self._nulls[name], dtype=bool)
+        return np.isnan(self.column(name))
+
+    def valid_mask(self) -> np.ndarray:
+        """Boolean mask of rows that pass validation."""
+        raise NotImplementedError
+
+    def _serialize(self, name: str, mask: np.ndarray) -> List[Any]:
+        """Serialize one output column for the selected rows."""
+        raise NotImplementedError
+
+    def _numeric_values(self, name: str, mask: np.ndarray, keep_zero: bool = False) -> List[Any]:
+        """Selected numeric values as Python numbers; NaN (and zero unless keep_zero) -> None."""
+        values = self.column(name)[mask]
+        missing = self.null_mask(name)[mask]
+        if not keep_zero:
+            missing |= values == 0
+        result = values.astype(object)
+        result[missing] = None
+        return result.tolist()
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """
+        Serialize valid rows for database upserts.
+
+        Returns:
+            List of row dictionaries (invalid rows omitted)
+        """
+        mask = self.valid_mask()
+        if not mask.any():
+            return []
+        values = [self._serialize(name, mask) for name in self.OUTPUT_COLUMNS]
+        return [dict(zip(self.OUTPUT_COLUMNS, row)) for row in zip(*values)]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Get one raw row (for logging invalid records)."""
+        row = {name: self._columns[name][index] for name in self.TEXT_COLUMNS}
+        for name in self.NUMERIC_COLUMNS:
+            value = self._columns[name][index]
+            if name in self._nulls:
+                row[name] = None if self._nulls[name][index] else value
+            else:
+                row[name] = None if value != value else value
+        return row
+
+    @property
+    def invalid_count(self) -> int:
+        """Number of rows that fail validation."""
+        return len(self) - int(self.valid_mask().sum())
+
+
+class PriceBatch(RecordBatch):
+    """
+    Columnar batch of raw_stock_prices rows.
+
+    Usage:
+        batch = PriceBatch()
+        batch.extend_records('AAPL', fmp_result['data'])
+        rows = batch.to_rows()   # Same rows StockPrice(...).to_dict() produced for valid records
+    """
+
+    NUMERIC_COLUMNS = ('open', 'high', 'low', 'close', 'adj_close', 'volume',
+                       'change', 'change_percent', 'aum', 'iv')
+    TEXT_COLUMNS = ('symbol', 'date')
+    INTEGER_COLUMNS = ('volume', 'aum')
+    OUTPUT_COLUMNS = ('symbol', 'date', 'price', 'open', 'high', 'low', 'close', 'adj_close',
+                      'volume', 'change', 'change_percent', 'aum', 'iv')
+
+    __slots__ = ()
+
+    def append(self, symbol: str, date: Any, open: Any = None, high: Any = None,
+               low: Any = None, close: Any = None, adj_close: Any = None, volume: Any = None,
+               change: Any = None, change_percent: Any = None, aum: Any = None, iv: Any = None):
+        """Append one price row (date as date or 'YYYY-MM-DD')."""
+        columns = self._columns
+        columns['symbol'].append(symbol.upper())
+        columns['date'].append(_iso_date(date))
+        columns['open'].append(_number(open))
+        columns['high'].append(_number(high))
+        columns['low'].append(_number(low))
+        columns['close'].append(_number(close))
+        columns['adj_close'].append(_number(adj_close))
+        self._append_integer('volume', volume)
+        columns['change'].append(_number(change))
+        columns['change_percent'].append(_number(change_percent))
+        self._append_integer('aum', aum)
+        columns['iv'].append(_number(iv))
+
+    def append_record(self, symbol: str, record: Dict[str, Any]):
+        """Append one FMP-style price record (camelCase keys, as returned by the data source clients)."""
+        self.append(
+            symbol, record.get('date'),
+            open=record.get('open'),
+            high=record.get('high'),
+            low=record.get('low'),
+            close=record.get('close'),
+            adj_close=record.get('adjClose'),
+            volume=record.get('volume'),
+            change=record.get('change'),
+            change_percent=record.get('changePercent'),
+            aum=record.get('aum'),
+            iv=record.get('iv')
+        )
+
+    def extend_records(self, symbol: str, records: Iterable[Dict[str, Any]]):
+        """Append many FMP-style price records for one symbol."""
+        for record in records:
+            self.append_record(symbol, record)
+
+    def valid_mask(self) -> np.ndarray:
+        """Rows with a date, close > 0 and volume > 0 (StockPrice.is_valid)."""
+        has_date = np.array([d is not None for d in self._columns['date']], dtype=bool)
+        with np.errstate(invalid='ignore'):
+            return has_date & (self.column('close') > 0) & (self.column('volume') > 0)
+
+    def _serialize(self, name: str, mask: np.ndarray) -> List[Any]:
+        if name in self.TEXT_COLUMNS:
+            return self.column(name)[mask].tolist()
+        if name == 'price':
+            # price column = close price
+            return self._numeric_values('close', mask)
+        return self._numeric_values(name, mask, keep_zero=name in self.INTEGER_COLUMNS)
+
+
+class DividendBatch(RecordBatch):
+    """
+    Columnar batch of raw_dividends rows.
+
+    Usage:
+        batch = DividendBatch()
+        batch.extend_records('KO', fmp_result['data'])
+        rows = batch.to_rows()   # Same rows Dividend(...).to_dict() produced for valid records
+    """
+
+    NUMERIC_COLUMNS = ('amount', 'adj_dividend')
+    TEXT_COLUMNS = ('symbol', 'ex_date', 'record_date', 'payment_date', 'declaration_date')
+    OUTPUT_COLUMNS = ('symbol', 'ex_date', 'amount', 'record_date', 'payment_date', 'declaration_date')
+
+    __slots__ = ()
+
+    def append(self, symbol: str, ex_date: Any, amount: Any, adj_dividend: Any = None,
+               record_date: Any = None, payment_date: Any = None, declaration_date: Any = None):
+        """Append one dividend row (dates as date or 'YYYY-MM-DD')."""
+        columns = self._columns
+        columns['symbol'].append(symbol.upper())
+        columns['ex_date'].append(_iso_date(ex_date))
+        columns['amount'].append(_number(amount))
+        columns['adj_dividend'].append(_number(adj_dividend))
+        columns['record_date'].append(_iso_date(record_date))
+        columns['payment_date'].append(_iso_date(payment_date))
+        columns['declaration_date'].append(_iso_date(declaration_date))
+
+    def append_record(self, symbol: str, record: Dict[str, Any]):
+        """Append one FMP/Yahoo-style dividend record ('dividend' or 'amount' key)."""
+        amount = record.get('amount')
+        self.append(
+            symbol, record.get('date'),
+            amount=amount if amount is not None else record.get('dividend'),
+            adj_dividend=record.get('adjDividend'),
+            record_date=record.get('recordDate'),
+            payment_date=record.get('paymentDate'),
+            declaration_date=record.get('declarationDate')
+        )
+
+    def extend_records(self, symbol: str, records: Iterable[Dict[str, Any]]):
+        """Append many dividend records for one symbol."""
+        for record in records:
+            self.append_record(symbol, record)
+
+    def valid_mask(self) -> np.ndarray:
+        """Rows with an ex-date and amount > 0 (Dividend.is_valid)."""
+        has_date = np.array([d is not None for d in self._columns['ex_date']], dtype=bool)
+        with np.errstate(invalid='ignore'):
+            return has_date & (self.column('amount') > 0)
+
+    def _serialize(self, name: str, mask: np.ndarray) -> List[Any]:
+        if name in self.TEXT_COLUMNS:
+            return self.column(name)[mask].tolist()
+        return self._numeric_values(name, mask, keep_zero=True)
+
+
+__all__ = ['RecordBatch', 'PriceBatch', 'DividendBatch', 'MAX_BIGINT_VALUE']
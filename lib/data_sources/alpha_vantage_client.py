@@ -8,7 +8,6 @@ NASDAQ official vendor with fast updates for new symbols.
 import logging
 import csv
 import io
-import requests
 from typing import Optional, Dict, Any, List
 from datetime import date, datetime
 
@@ -61,6 +60,13 @@ class AlphaVantageClient(DataSourceClient):
             return False
         return True
 
+    def _is_cacheable(self, response) -> bool:
+        """Reject 200 responses that carry errors or throttle notices instead of data."""
+        if not super()._is_cacheable(response):
+            return False
+        head = response.content[:512]
+        return b'"Note"' not in head and b'"Information"' not in head
+
     def fetch_prices(self, symbol: str, from_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
         """
         Fetch historical price data from Alpha Vantage.
@@ -88,7 +94,7 @@ class AlphaVantageClient(DataSourceClient):
             logger.debug(f"[Alpha Vantage] Fetching prices for {symbol}")
 
             with self.rate_limiter.limit():
-                response = requests.get(self.BASE_URL, params=params, timeout=self.timeout)
+                response = self._http_get(self.BASE_URL, params=params)
 
                 if response.status_code == 200:
                     data = response.json()
@@ -165,7 +171,7 @@ class AlphaVantageClient(DataSourceClient):
             logger.debug(f"[Alpha Vantage] Fetching dividend data for {symbol}")
 
             with self.rate_limiter.limit():
-                response = requests.get(self.BASE_URL, params=params, timeout=self.timeout)
+                response = self._http_get(self.BASE_URL, params=params)
 
                 if response.status_code == 200:
                     data = response.json()
@@ -233,7 +239,7 @@ class AlphaVantageClient(DataSourceClient):
             logger.debug(f"[Alpha Vantage] Fetching company overview for {symbol}")
 
             with self.rate_limiter.limit():
-                response = requests.get(self.BASE_URL, params=params, timeout=self.timeout)
+                response = self._http_get(self.BASE_URL, params=params)
 
                 if response.status_code == 200:
                     data = response.json()
@@ -289,7 +295,7 @@ class AlphaVantageClient(DataSourceClient):
             url = f"{self.BASE_URL}?function=LISTING_STATUS&apikey={api_key}"
 
             with self.rate_limiter.limit():
-                response = requests.get(url, timeout=self.timeout)
+                response = self._http_get(url)
                 response.raise_for_status()
 
                 # Check if response is JSON (error) or CSV (success)
@@ -389,7 +395,7 @@ class AlphaVantageClient(DataSourceClient):
             )
 
             with self.rate_limiter.limit():
-                response = requests.get(self.BASE_URL, params=params, timeout=self.timeout)
+                response = self._http_get(self.BASE_URL, params=params)
 
                 if response.status_code == 200:
                     data = response.json()
@@ -462,7 +468,7 @@ class AlphaVantageClient(DataSourceClient):
             )
 
             with self.rate_limiter.limit():
-                response = requests.get(self.BASE_URL, params=params, timeout=self.timeout)
+                response = self._http_get(self.BASE_URL, params=params)
 
                 if response.status_code == 200:
                     data = response.json()
@@ -0,0 +1,183 @@
+"""
+Async HTTP Engine
+
+Shared asyncio event loop and pooled HTTP session used by all data source
+clients. Requests run as coroutines on a single background loop thread with
+keep-alive connection reuse, so thousands of requests can be in flight from
+one process without one OS thread per call.
+
+Synchronous code reaches the engine through run()/run_many(), which submit
+coroutines to the loop and block until they complete.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Dict, Iterable, List, Optional
+
+import httpx
+
+from lib.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHTTPEngine:
+    """
+    Background event loop with a pooled httpx.AsyncClient.
+
+    Usage:
+        engine = AsyncHTTPEngine.get_instance()
+
+        # From synchronous code
+        response = engine.run(engine.get(url, params={'apikey': key}))
+
+        # Many requests concurrently
+        responses = engine.run_many([engine.get(u) for u in urls])
+    """
+
+    _instance: Optional['AsyncHTTPEngine'] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_connections: int = None, max_keepalive: int = None,
+                 timeout: float = None):
+        """
+        Initialize the engine and start its event loop thread.
+
+        Args:
+            max_connections: Maximum open connections across all hosts
+            max_keepalive: Maximum idle keep-alive connections kept in the pool
+            timeout: Default request timeout in seconds
+        """
+        self.max_connections = max_connections or Config.API.HTTP_MAX_CONNECTIONS
+        self.max_keepalive = max_keepalive or Config.API.HTTP_MAX_KEEPALIVE
+        self.timeout = timeout or Config.API.REQUEST_TIMEOUT
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="async-http-engine",
+            daemon=True
+        )
+        self._thread.start()
+
+        logger.info(
+            f"✅ Initialized async HTTP engine "
+            f"(max_connections={self.max_connections}, max_keepalive={self.max_keepalive})"
+        )
+
+    @classmethod
+    def get_instance(cls) -> 'AsyncHTTPEngine':
+        """Get the shared engine, creating it on first use."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def shutdown(cls):
+        """Close the shared engine (useful for testing and clean exits)."""
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.close()
+                cls._instance = None
+
+    def _run_loop(self):
+        """Event loop thread entry point."""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled client (must be called on the engine loop)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive
+                ),
+                timeout=self.timeout,
+                follow_redirects=True
+            )
+        return self._client
+
+    @property
+    def in_engine_thread(self) -> bool:
+        """Whether the caller is running on the engine's loop thread."""
+        return threading.current_thread() is self._thread
+
+    async def get(self, url: str, params: Optional[Dict] = None,
+                  timeout: Optional[float] = None,
+                  headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        Issue a GET request on the pooled session.
+
+        Args:
+            url: URL to fetch
+            params: Optional query parameters
+            timeout: Optional per-request timeout in seconds
+            headers: Optional extra headers (e.g. conditional request validators)
+
+        Returns:
+            httpx.Response
+        """
+        client = self._get_client()
+        return await client.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the engine loop and wait for its result.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Optional maximum seconds to wait
+
+        Returns:
+            Coroutine result
+        """
+        if self.in_engine_thread:
+            raise RuntimeError("AsyncHTTPEngine.run() cannot be called from the engine loop; await the coroutine instead")
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return future.result(timeout)
+
+    def run_many(self, coros: Iterable[Awaitable], timeout: Optional[float] = None) -> List[Any]:
+        """
+        Run many coroutines concurrently and return their results in order.
+
+        Exceptions are returned in place of results rather than raised.
+
+        Args:
+            coros: Coroutines to run
+            timeout: Optional maximum seconds to wait for all of them
+
+        Returns:
+            List of results (or exceptions) in submission order
+        """
+        coros = list(coros)
+        if not coros:
+            return []
+
+        async def _gather():
+            return await asyncio.gather(*coros, return_exceptions=True)
+
+        return self.run(_gather(), timeout=timeout)
+
+    def close(self):
+        """Close the pooled session and stop the event loop."""
+        async def _close_client():
+            if self._client is not None:
+                await self._client.aclose()
+                self._client = None
+
+        if self._loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(_close_client(), self._loop).result(timeout=10)
+            except Exception as e:
+                logger.debug(f"Async HTTP engine close error: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
+
+
+# Export main class
+__all__ = ['AsyncHTTPEngine']
@@ -2,17 +2,23 @@
 Base Data Source Client
 
 Abstract base class for all data source clients with common functionality
-like retry logic, error handling, and rate limiting.
+like retry logic, error handling, rate limiting and response caching.
 """
 
+import asyncio
+import json
 import logging
 import time
-import requests
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Awaitable
 from datetime import datetime, date
 
+import httpx
+
 from lib.core.rate_limiters import RateLimiter
+from lib.utils.performance_monitor import record_api_call
+from lib.data_sources.async_http import AsyncHTTPEngine
+from lib.data_sources.response_cache import ResponseCache, CachedEntry
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +28,10 @@ class DataSourceClient(ABC):
     Abstract base class for all data source clients.
 
     Provides common functionality:
+    - Pooled async HTTP (shared keep-alive session) with sync facades
     - Rate limiting
+    - On-disk response cache with conditional revalidation (cache hits
+      cost no provider quota; replay mode never touches the network)
     - Retry logic with exponential backoff
     - Error handling and logging
     - Response parsing
@@ -47,14 +56,29 @@ class DataSourceClient(ABC):
             'requests': 0,
             'successes': 0,
             'failures': 0,
-            'rate_limits': 0
+            'rate_limits': 0,
+            'cache_hits': 0,
+            'revalidated': 0
         }
 
+    @property
+    def engine(self) -> AsyncHTTPEngine:
+        """Shared async HTTP engine (pooled keep-alive session)."""
+        return AsyncHTTPEngine.get_instance()
+
+    @property
+    def cache(self) -> ResponseCache:
+        """Shared on-disk response cache."""
+        return ResponseCache.get_instance()
+
     def _fetch_with_retry(self, url: str, symbol: Optional[str] = None,
                          params: Optional[Dict] = None) -> Optional[Any]:
         """
         Fetch data with retry logic and rate limiting.
 
+        Synchronous facade over _afetch_with_retry(); the request itself runs
+        on the shared async engine so connections are pooled and reused.
+
         Args:
             url: URL to fetch
             symbol: Optional symbol for logging context
@@ -63,16 +87,48 @@ class DataSourceClient(ABC):
         Returns:
             Parsed JSON response or None on failure
         """
+        return self.engine.run(self._afetch_with_retry(url, symbol=symbol, params=params))
+
+    async def _afetch_with_retry(self, url: str, symbol: Optional[str] = None,
+                                 params: Optional[Dict] = None) -> Optional[Any]:
+        """
+        Fetch data with retry logic and rate limiting (async).
+
+        Args:
+            url: URL to fetch
+            symbol: Optional symbol for logging context
+            params: Optional query parameters
+
+        Returns:
+            Parsed JSON response (or text for non-JSON payloads such as CSV),
+            None on failure
+        """
         self._stats['requests'] += 1
 
+        # Fresh cache hits (and everything in replay mode) skip the limiter.
+        # Cache I/O (SQLite commits, body files) runs off the event loop.
+        cached, fresh = None, False
+        if self.cache.enabled:
+            cached, fresh = await asyncio.to_thread(self.cache.lookup, url, params)
+        if fresh:
+            self._stats['cache_hits'] += 1
+            self._stats['successes'] += 1
+            return self._parse_response(cached.to_response())
+        if self.cache.replay:
+            logger.debug(f"[{self.name}] Replay mode: no cached response for {self._metrics_endpoint(url, symbol)}")
+            self._stats['failures'] += 1
+            return None
+
         for attempt in range(self.max_retries):
             try:
                 # Apply rate limiting if configured
                 if self.rate_limiter:
-                    self.rate_limiter.acquire()
+                    weight = self.rate_limiter.weight_for(url)
+                    if not await self.rate_limiter.acquire_async(weight=weight):
+                        break
 
                 try:
-                    response = requests.get(url, params=params, timeout=self.timeout)
+                    response = await self._aget_revalidating(url, params, cached, symbol)
                 finally:
                     if self.rate_limiter:
                         self.rate_limiter.release()
@@ -83,7 +139,7 @@ class DataSourceClient(ABC):
                     # Report success to adaptive rate limiter
                     if hasattr(self.rate_limiter, 'report_success'):
                         self.rate_limiter.report_success()
-                    return response.json()
+                    return self._parse_response(response)
 
                 elif response.status_code == 429:
                     # Rate limited
@@ -96,7 +152,7 @@ class DataSourceClient(ABC):
                     # Report to adaptive rate limiter
                     if hasattr(self.rate_limiter, 'report_rate_limit'):
                         self.rate_limiter.report_rate_limit()
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
 
                 elif response.status_code == 404:
                     # Not found - expected for invalid symbols
@@ -121,14 +177,14 @@ class DataSourceClient(ABC):
                     )
                     self._stats['failures'] += 1
 
-            except requests.exceptions.Timeout:
+            except httpx.TimeoutException:
                 symbol_info = f" for {symbol}" if symbol else ""
                 logger.error(
                     f"[{self.name}] Timeout after {self.timeout}s{symbol_info} "
                     f"(attempt {attempt + 1}/{self.max_retries})"
                 )
                 if attempt < self.max_retries - 1:
-                    time.sleep(2 ** attempt)
+                    await asyncio.sleep(2 ** attempt)
 
             except Exception as e:
                 symbol_info = f" for {symbol}" if symbol else ""
@@ -140,11 +196,154 @@ class DataSourceClient(ABC):
                 if hasattr(self.rate_limiter, 'report_error'):
                     self.rate_limiter.report_error()
                 if attempt < self.max_retries - 1:
-                    time.sleep(2 ** attempt)
+                    await asyncio.sleep(2 ** attempt)
 
         self._stats['failures'] += 1
         return None
 
+    async def _aget_revalidating(self, url: str, params: Optional[Dict], cached: Optional[CachedEntry],
+                                 symbol: Optional[str] = None) -> httpx.Response:
+        """
+        GET through the cache: conditional if a stale entry has validators.
+
+        A 304 Not Modified refreshes the stale entry and returns its body as
+        a 200; a cacheable 200 is stored.
+
+        Args:
+            url: URL to fetch
+            params: Optional query parameters
+            cached: Stale cache entry for this request, if any
+            symbol: Optional symbol for the metrics endpoint label
+
+        Returns:
+            httpx.Response
+        """
+        headers = cached.conditional_headers() if cached else None
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            response = await self.engine.get(url, params=params, timeout=self.timeout, headers=headers or None)
+            status = str(response.status_code)
+        finally:
+            record_api_call(self.name, self._metrics_endpoint(url, symbol),
+                            time.perf_counter() - start, status)
+
+        if response.status_code == 304 and cached:
+            self._stats['revalidated'] += 1
+            await asyncio.to_thread(self.cache.mark_revalidated, cached)
+            return cached.to_response()
+        if self.cache.enabled and self._is_cacheable(response):
+            await asyncio.to_thread(self.cache.store, url, params, response)
+        return response
+
+    def _is_cacheable(self, response: httpx.Response) -> bool:
+        """
+        Whether a response may be stored in the cache.
+
+        Providers report some errors (bad symbol, exhausted quota) in a 200
+        body; clients whose error payloads look different override this.
+        Empty payloads are not stored either: a provider answers with an
+        empty list or header-only CSV before it publishes a session, and a
+        cached copy would hide the data once it appears.
+
+        Args:
+            response: Response to check
+
+        Returns:
+            True for successful, non-empty payloads
+        """
+        return (
+            response.status_code == 200
+            and b'"Error Message"' not in response.content[:512]
+            and not self._is_empty_payload(response.content)
+        )
+
+    @staticmethod
+    def _is_empty_payload(content: bytes) -> bool:
+        """True for bodies carrying no data: '', [], {}, header-only CSV, {"symbol": ..., "historical": []}."""
+        body = content.strip()
+        if body in (b'', b'[]', b'{}', b'null'):
+            return True
+        if body[:1] not in (b'[', b'{'):
+            return b'\n' not in body  # CSV with a header row only
+        if len(body) > 1024:
+            return False
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return False
+        if isinstance(payload, dict):
+            nested = [value for value in payload.values() if isinstance(value, (list, dict))]
+            return bool(nested) and not any(nested)
+        return not payload
+
+    @staticmethod
+    def _metrics_endpoint(url: str, symbol: Optional[str] = None) -> str:
+        """
+        Endpoint label for live metrics: URL path with symbols templated out.
+
+        Comma-separated segments (batch quotes) become {symbols} so every
+        batch shares one label; a segment equal to symbol becomes {symbol}.
+        """
+        segments = (httpx.URL(url).path or '/').split('/')
+        for i, segment in enumerate(segments):
+            if ',' in segment:
+                segments[i] = '{symbols}'
+            elif symbol and segment == symbol:
+                segments[i] = '{symbol}'
+        return '/'.join(segments) or '/'
+
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> Any:
+        """Decode a successful response as JSON, or text for CSV/plain payloads."""
+        content_type = response.headers.get('content-type', '')
+        if 'csv' in content_type or content_type.startswith('text/plain'):
+            return response.text
+        return response.json()
+
+    def _http_get(self, url: str, params: Optional[Dict] = None) -> httpx.Response:
+        """
+        Issue a single GET on the pooled session without retry handling.
+
+        For clients that inspect the raw response themselves (status codes,
+        CSV bodies, provider-specific error payloads).
+
+        Responses go through the on-disk cache like _fetch_with_retry():
+        fresh entries are returned without a request, and in replay mode a
+        miss comes back as a synthetic 504.
+
+        Args:
+            url: URL to fetch
+            params: Optional query parameters
+
+        Returns:
+            httpx.Response (same status_code/json()/text interface as requests)
+        """
+        cached, fresh = self.cache.lookup(url, params)
+        if fresh:
+            self._stats['cache_hits'] += 1
+            return cached.to_response()
+        if self.cache.replay:
+            return httpx.Response(504, content=b'', request=httpx.Request('GET', url))
+
+        return self.engine.run(self._aget_revalidating(url, params, cached))
+
+    def fetch_many(self, coros: List[Awaitable]) -> List[Any]:
+        """
+        Run many of this client's coroutines concurrently on the shared engine.
+
+        Usage:
+            results = client.fetch_many([client.afetch_prices(s) for s in symbols])
+
+        Args:
+            coros: Coroutines (e.g. afetch_* calls) to run
+
+        Returns:
+            Results in submission order (None where a call raised)
+        """
+        results = self.engine.run_many(coros)
+        return [None if isinstance(result, BaseException) else result for result in results]
+
     def get_stats(self) -> Dict[str, Any]:
         """Get client statistics."""
         stats = self._stats.copy()
@@ -160,7 +359,9 @@ class DataSourceClient(ABC):
             'requests': 0,
             'successes': 0,
             'failures': 0,
-            'rate_limits': 0
+            'rate_limits': 0,
+            'cache_hits': 0,
+            'revalidated': 0
         }
 
     # Abstract methods that must be implemented by subclasses
@@ -6,7 +6,7 @@ from the Financial Modeling Prep API.
 """
 
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set
 from datetime import date, datetime, timedelta
 
 from lib.core.config import Config
@@ -58,6 +58,10 @@ class FMPClient(DataSourceClient):
         return True
 
     def fetch_prices(self, symbol: str, from_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Synchronous facade for afetch_prices()."""
+        return self.engine.run(self.afetch_prices(symbol, from_date=from_date))
+
+    async def afetch_prices(self, symbol: str, from_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
         """
         Fetch historical price data from FMP.
 
@@ -87,13 +91,13 @@ class FMPClient(DataSourceClient):
             )
 
             logger.debug(f"[FMP] Fetching prices for {symbol}")
-            data = self._fetch_with_retry(url, symbol=symbol)
+            data = await self._afetch_with_retry(url, symbol=symbol)
 
             if data and 'historical' in data and data['historical']:
                 # Try to get AUM for ETFs
                 aum = None
                 try:
-                    etf_metadata = self.fetch_etf_metadata(symbol)
+                    etf_metadata = await self.afetch_etf_metadata(symbol)
                     if etf_metadata and etf_metadata.get('aum'):
                         aum = etf_metadata['aum']
                         logger.debug(f"[FMP] Found AUM for {symbol}: ${aum:,.0f}")
@@ -118,7 +122,13 @@ class FMPClient(DataSourceClient):
 
         return None
 
-    def fetch_batch_eod_prices(self, target_date: date) -> Optional[Dict[str, Any]]:
+    def fetch_batch_eod_prices(self, target_date: date,
+                               symbols: Optional[Set[str]] = None) -> Optional[Dict[str, Any]]:
+        """Synchronous facade for afetch_batch_eod_prices()."""
+        return self.engine.run(self.afetch_batch_eod_prices(target_date, symbols=symbols))
+
+    async def afetch_batch_eod_prices(self, target_date: date,
+                                      symbols: Optional[Set[str]] = None) -> Optional[Dict[str, Any]]:
         """
         Fetch batch end-of-day prices for ALL symbols on a specific date.
 
@@ -129,6 +139,8 @@ class FMPClient(DataSourceClient):
 
         Args:
             target_date: The date to fetch EOD prices for
+            symbols: Optional set of symbols to keep; other rows are skipped
+                     while parsing, so only the requested subset is held in memory
 
         Returns:
             Dictionary with parsed EOD data:
@@ -154,7 +166,7 @@ class FMPClient(DataSourceClient):
             logger.debug(f"[FMP] Fetching batch EOD prices for {date_str}")
 
             # Fetch CSV data using base client retry logic
-            data = self._fetch_with_retry(url)
+            data = await self._afetch_with_retry(url)
 
             if not data:
                 logger.warning(f"[FMP] Batch EOD not available for {date_str}")
@@ -170,7 +182,7 @@ class FMPClient(DataSourceClient):
             eod_data = {}
             for row in reader:
                 symbol = row.get('symbol')
-                if symbol:
+                if symbol and (symbols is None or symbol in symbols):
                     # Parse the row data
                     eod_data[symbol] = {
                         'date': date_str,
@@ -196,7 +208,44 @@ class FMPClient(DataSourceClient):
             # This is expected if not on Professional/Enterprise plan
             return None
 
+    def fetch_batch_eod_range(self, dates: List[date], symbols: Optional[Set[str]] = None,
+                              max_concurrency: int = None) -> Dict[date, Optional[Dict[str, Any]]]:
+        """
+        Fetch batch EOD prices for many dates concurrently.
+
+        Args:
+            dates: Trading dates to fetch
+            symbols: Optional set of symbols to keep from each day's payload
+            max_concurrency: Days in flight at once (bounds memory for the
+                             raw CSV payloads; default: DataFetchConfig.BATCH_EOD_CONCURRENCY)
+
+        Returns:
+            Dictionary mapping date -> afetch_batch_eod_prices() result (None if unavailable)
+        """
+        import asyncio
+
+        max_concurrency = max_concurrency or Config.DATA_FETCH.BATCH_EOD_CONCURRENCY
+
+        async def _fetch_all():
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def _fetch(target_date):
+                async with semaphore:
+                    return await self.afetch_batch_eod_prices(target_date, symbols=symbols)
+
+            return await asyncio.gather(*(_fetch(d) for d in dates), return_exceptions=True)
+
+        results = self.engine.run(_fetch_all())
+        return {
+            target_date: None if isinstance(result, BaseException) else result
+            for target_date, result in zip(dates, results)
+        }
+
     def fetch_batch_quote(self, symbols: List[str]) -> Optional[Dict[str, Any]]:
+        """Synchronous facade for afetch_batch_quote()."""
+        return self.engine.run(self.afetch_batch_quote(symbols))
+
+    async def afetch_batch_quote(self, symbols: List[str]) -> Optional[Dict[str, Any]]:
         """
         Fetch real-time quotes for multiple symbols in a single API call.
 
@@ -227,7 +276,7 @@ class FMPClient(DataSourceClient):
             url = f"{self.BASE_URL}/api/v3/quote/{symbols_str}?apikey={self.api_key}"
 
             logger.debug(f"[FMP] Fetching batch quote for {len(symbols)} symbols")
-            data = self._fetch_with_retry(url)
+            data = await self._afetch_with_retry(url, symbol=symbols_str)
 
             if data and isinstance(data, list):
                 # Convert list to dictionary keyed by symbol
@@ -241,6 +290,10 @@ class FMPClient(DataSourceClient):
         return None
 
     def fetch_dividends(self, symbol: str, from_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Synchronous facade for afetch_dividends()."""
+        return self.engine.run(self.afetch_dividends(symbol, from_date=from_date))
+
+    async def afetch_dividends(self, symbol: str, from_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
         """
         Fetch historical dividend data from FMP.
 
@@ -269,7 +322,7 @@ class FMPClient(DataSourceClient):
             )
 
             logger.debug(f"[FMP] Fetching dividends for {symbol}")
-            data = self._fetch_with_retry(url, symbol=symbol)
+            data = await self._afetch_with_retry(url, symbol=symbol)
 
             if data and 'historical' in data and data['historical']:
                 return {
@@ -284,6 +337,10 @@ class FMPClient(DataSourceClient):
         return None
 
     def fetch_company_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Synchronous facade for afetch_company_info()."""
+        return self.engine.run(self.afetch_company_info(symbol))
+
+    async def afetch_company_info(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
         Fetch company profile from FMP.
 
@@ -297,7 +354,7 @@ class FMPClient(DataSourceClient):
             url = f"{self.BASE_URL}/api/v3/profile/{symbol}?apikey={self.api_key}"
 
             logger.debug(f"[FMP] Fetching company profile for {symbol}")
-            data = self._fetch_with_retry(url, symbol=symbol)
+            data = await self._afetch_with_retry(url, symbol=symbol)
 
             if data and isinstance(data, list) and len(data) > 0:
                 profile = data[0]
@@ -325,6 +382,10 @@ class FMPClient(DataSourceClient):
         return None
 
     def fetch_etf_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Synchronous facade for afetch_etf_info()."""
+        return self.engine.run(self.afetch_etf_info(symbol))
+
+    async def afetch_etf_info(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
         Fetch ETF-specific information from FMP.
 
@@ -338,7 +399,7 @@ class FMPClient(DataSourceClient):
             url = f"{self.BASE_URL}/stable/etf/info?symbol={symbol}&apikey={self.api_key}"
 
             logger.debug(f"[FMP] Fetching ETF info for {symbol}")
-            data = self._fetch_with_retry(url, symbol=symbol)
+            data = await self._afetch_with_retry(url, symbol=symbol)
 
             if data and isinstance(data, list) and len(data) > 0:
                 etf_info = data[0]
@@ -362,6 +423,10 @@ class FMPClient(DataSourceClient):
         return None
 
     def fetch_etf_metadata(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Synchronous facade for afetch_etf_metadata()."""
+        return self.engine.run(self.afetch_etf_metadata(symbol))
+
+    async def afetch_etf_metadata(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
         Fetch ETF metadata including AUM.
 
@@ -372,12 +437,12 @@ class FMPClient(DataSourceClient):
             Dictionary with AUM and other metadata
         """
         # Try stable endpoint first
-        etf_info = self.fetch_etf_info(symbol)
+        etf_info = await self.afetch_etf_info(symbol)
         if etf_info and etf_info.get('aum'):
             return {'aum': etf_info['aum'], 'source': 'FMP-ETF'}
 
         # Try profile endpoint as fallback
-        profile = self.fetch_company_info(symbol)
+        profile = await self.afetch_company_info(symbol)
         if profile:
             # Check if market cap can be used as AUM proxy for ETFs
             if profile.get('is_etf') and profile.get('market_cap'):
@@ -0,0 +1,379 @@
+"""
+HTTP Response Cache
+
+Content-addressed on-disk cache for provider responses, shared by all
+data source clients (see DataSourceClient).
+
+Layout under HTTP_CACHE_DIR:
+    index.sqlite              request key -> body hash, validators, timestamps
+    objects/ab/abcdef...      response bodies, named by their SHA-256
+
+Requests are keyed by method + URL + sorted query parameters with API
+keys removed, so rotating a key keeps the cache and no key is written to
+disk. Identical bodies (empty lists, repeated payloads) are stored once.
+
+Modes (HTTP_CACHE_MODE):
+    on      Serve fresh entries (per-endpoint TTLs); revalidate expired
+            entries with If-None-Match / If-Modified-Since when the
+            provider sent an ETag or Last-Modified
+    off     Bypass the cache entirely
+    replay  Cache only: serve any stored entry regardless of age and never
+            touch the network (offline reruns against captured responses)
+
+The total size of stored bodies is bounded by HTTP_CACHE_MAX_MB; the least
+recently used entries are evicted first.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from lib.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ('on', 'off', 'replay')
+
+# Query parameters that carry credentials; never part of a cache key
+SECRET_PARAMS = frozenset({'apikey', 'api_key', 'token', 'key'})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_entries_body ON entries(body_hash);
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def canonical_url(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    URL with params merged, query sorted and credentials removed.
+
+    Args:
+        url: Request URL (may already contain a query string)
+        params: Extra query parameters
+
+    Returns:
+        Canonical URL used for cache keys and TTL matching
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((str(k), str(v)) for k, v in params.items() if v is not None)
+    query = sorted((k, v) for k, v in query if k.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+class CachedEntry:
+    """A stored response and its validators."""
+
+    __slots__ = ('key', 'url', 'body_hash', 'status', 'content_type', 'etag',
+                 'last_modified', 'stored_at', 'body')
+
+    def __init__(self, key: str, url: str, body_hash: str, status: int, content_type: Optional[str],
+                 etag: Optional[str], last_modified: Optional[str], stored_at: float, body: bytes):
+        self.key = key
+        self.url = url
+        self.body_hash = body_hash
+        self.status = status
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.body = body
+
+    @property
+    def age(self) -> float:
+        """Seconds since the entry was stored or last revalidated."""
+        return time.time() - self.stored_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Revalidation headers (empty if the provider sent no validators)."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self) -> httpx.Response:
+        """Rebuild an httpx.Response from the stored body."""
+        headers = {'content-type': self.content_type} if self.content_type else {}
+        return httpx.Response(
+            self.status, headers=headers, content=self.body,
+            request=httpx.Request('GET', self.url)
+        )
+
+
+class ResponseCache:
+    """
+    On-disk, content-addressed, size-bounded response cache.
+
+    Usage:
+        cache = ResponseCache.get_instance()
+        entry, fresh = cache.lookup(url, params)
+        if fresh:
+            response = entry.to_response()
+        else:
+            response = ...  # send with entry.conditional_headers() if entry
+            cache.store(url, params, response)
+    """
+
+    _instance: Optional['ResponseCache'] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str = None, mode: str = None, max_bytes: int = None,
+                 ttls: Dict[str, float] = None, default_ttl: float = None):
+        """
+        Initialize the cache (creates the directory and index).
+
+        Args:
+            cache_dir: Cache directory (default: APIConfig.HTTP_CACHE_DIR)
+            mode: 'on', 'off' or 'replay' (default: APIConfig.HTTP_CACHE_MODE)
+            max_bytes: Body storage bound (default: HTTP_CACHE_MAX_MB)
+            ttls: {URL fragment: seconds} per-endpoint TTLs (first match wins)
+            default_ttl: TTL for URLs matching no fragment
+        """
+        api_config = Config.API
+        self.cache_dir = cache_dir or api_config.HTTP_CACHE_DIR
+        self.mode = (mode or api_config.HTTP_CACHE_MODE).lower()
+        if self.mode not in CACHE_MODES:
+            logger.warning(f"⚠️  Unknown HTTP_CACHE_MODE '{self.mode}', cache disabled")
+            self.mode = 'off'
+        self.max_bytes = max_bytes or api_config.HTTP_CACHE_MAX_MB * 1024 * 1024
+        self.ttls = ttls if ttls is not None else api_config.HTTP_CACHE_TTLS
+        self.default_ttl = default_ttl if default_ttl is not None else api_config.HTTP_CACHE_DEFAULT_TTL
+
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+
+        if self.enabled:
+            self._open()
+
+    @classmethod
+    def get_instance(cls) -> 'ResponseCache':
+        """Get the process-wide cache."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache is consulted at all."""
+        return self.mode != 'off'
+
+    @property
+    def replay(self) -> bool:
+        """Cache-only mode: never touch the network."""
+        return self.mode == 'replay'
+
+    def _open(self):
+        """Open (or create) the index."""
+        try:
+            os.makedirs(os.path.join(self.cache_dir, 'objects'), exist_ok=True)
+            self._db = sqlite3.connect(
+                os.path.join(self.cache_dir, 'index.sqlite'),
+                check_same_thread=False, isolation_level=None, timeout=30
+            )
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(_SCHEMA)
+            self._total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM objects').fetchone()[0]
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"⚠️  HTTP cache unavailable at {self.cache_dir}: {e}")
+            self._db = None
+            self.mode = 'off'
+
+    def _object_path(self, body_hash: str) -> str:
+        return os.path.join(self.cache_dir, 'objects', body_hash[:2], body_hash)
+
+    def ttl_for(self, url: str) -> float:
+        """TTL in seconds for a canonical URL."""
+        for fragment, ttl in self.ttls.items():
+            if fragment in url:
+                return ttl
+        return self.default_ttl
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        """Cache key for a canonical URL."""
+        return hashlib.sha256(f"GET {url}".encode()).hexdigest()
+
+    def lookup(self, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Optional[CachedEntry], bool]:
+        """
+        Find a stored response.
+
+        Args:
+            url: Request URL
+            params: Query parameters
+
+        Returns:
+            (entry or None, fresh). In replay mode any entry counts as fresh.
+        """
+        if not self.enabled:
+            return None, False
+
+        canonical = canonical_url(url, params)
+        key = self.key_for(canonical)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body_hash, status, content_type, etag, last_modified, stored_at '
+                'FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None, False
+            try:
+                with open(self._object_path(row[0]), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                # Body evicted or removed by hand: treat as a miss
+                self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self.stats['misses'] += 1
+                return None, False
+            self._db.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (time.time(), key))
+
+        entry = CachedEntry(key, canonical, *row, body=body)
+        fresh = self.replay or entry.age <= self.ttl_for(canonical)
+        if fresh:
+            self.stats['hits'] += 1
+        return entry, fresh
+
+    def store(self, url: str, params: Optional[Dict[str, Any]], response: httpx.Response):
+        """
+        Store a successful response (bodies are deduplicated by hash).
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            response: Response to store
+        """
+        if not self.enabled or self.replay:
+            return
+
+        canonical = canonical_url(url, params)
+        key = self.key_for(canonical)
+        body = response.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        now = time.time()
+
+        with self._lock:
+            try:
+                known = self._db.execute('SELECT 1 FROM objects WHERE hash = ?', (body_hash,)).fetchone()
+                if not known:
+                    path = self._object_path(body_hash)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(body)
+                    os.replace(tmp_path, path)
+                    self._db.execute('INSERT OR REPLACE INTO objects (hash, size) VALUES (?, ?)',
+                                     (body_hash, len(body)))
+                    self._total_bytes += len(body)
+
+                previous = self._db.execute('SELECT body_hash FROM entries WHERE key = ?', (key,)).fetchone()
+                self._db.execute(
+                    'INSERT OR REPLACE INTO entries (key, url, body_hash, status, content_type, etag, '
+                    'last_modified, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, canonical, body_hash, response.status_code, response.headers.get('content-type'),
+                     response.headers.get('etag'), response.headers.get('last-modified'), now, now)
+                )
+                if previous and previous[0] != body_hash:
+                    self._drop_orphan(previous[0])
+                self.stats['stored'] += 1
+
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+            except (OSError, sqlite3.Error) as e:
+                logger.debug(f"HTTP cache store failed for {canonical}: {e}")
+
+    def mark_revalidated(self, entry: CachedEntry):
+        """Reset an entry's age after a 304 Not Modified."""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute('UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?',
+                             (now, now, entry.key))
+            self.stats['revalidated'] += 1
+            self.stats['hits'] += 1
+
+    def _drop_orphan(self, body_hash: str):
+        """Delete a body no entry references any more (caller holds the lock)."""
+        if self._db.execute('SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1', (body_hash,)).fetchone():
+            return
+        row = self._db.execute('SELECT size FROM objects WHERE hash = ?', (body_hash,)).fetchone()
+        self._db.execute('DELETE FROM objects WHERE hash = ?', (body_hash,))
+        if row:
+            self._total_bytes -= row[0]
+        try:
+            os.remove(self._object_path(body_hash))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Evict least recently used entries until under 90% of the bound (caller holds the lock)."""
+        target = self.max_bytes * 0.9
+        while self._total_bytes > target:
+            oldest = self._db.execute(
+                'SELECT key, body_hash FROM entries ORDER BY accessed_at LIMIT 256'
+            ).fetchall()
+            if not oldest:
+                break
+            for key, body_hash in oldest:
+                self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._drop_orphan(body_hash)
+                self.stats['evicted'] += 1
+                if self._total_bytes <= target:
+                    break
+
+    def clear(self):
+        """Remove every entry and body."""
+        if self._db is None:
+            return
+        with self._lock:
+            for (body_hash,) in self._db.execute('SELECT hash FROM objects').fetchall():
+                try:
+                    os.remove(self._object_path(body_hash))
+                except OSError:
+                    pass
+            self._db.execute('DELETE FROM entries')
+            self._db.execute('DELETE FROM objects')
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics (hit counts, size, mode)."""
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0] if self._db else 0
+            return {
+                **self.stats,
+                'mode': self.mode,
+                'entries': entries,
+                'size_mb': self._total_bytes / (1024 * 1024)
+            }
+
+
+__all__ = ['ResponseCache', 'CachedEntry', 'canonical_url', 'CACHE_MODES']
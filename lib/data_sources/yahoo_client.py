@@ -5,18 +5,101 @@ Client for fetching stock data using yfinance library.
 Provides excellent coverage including newest ETFs and alternative data.
 """
 
+import asyncio
 import logging
+import threading
+import time
 import pandas as pd
 import yfinance as yf
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from datetime import date, datetime, timedelta
 
 from lib.core.config import Config
 from lib.core.rate_limiters import GlobalRateLimiters
 from lib.data_sources.base_client import DataSourceClient
+from lib.utils.performance_monitor import track_api_call
 
 logger = logging.getLogger(__name__)
 
+# yf.download() column -> FMP-style record key
+PRICE_FIELDS = {
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Adj Close': 'adjClose',
+    'Volume': 'volume'
+}
+
+
+def price_frame(hist: pd.DataFrame, symbol: Optional[str] = None) -> pd.DataFrame:
+    """
+    Convert a yf.download() result to FMP-style price columns.
+
+    The (field, ticker) column index is flattened once and whole columns
+    are cast at a time, instead of unpacking every row.
+
+    Args:
+        hist: DataFrame from yf.download()
+        symbol: Ticker to select when the frame holds several tickers
+                (default: the only/first one)
+
+    Returns:
+        DataFrame with date, open, high, low, close, adjClose and volume
+        columns; rows without a close are dropped. Empty if the download
+        has no usable price columns.
+    """
+    columns = list(PRICE_FIELDS.values())
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=['date'] + columns)
+
+    if isinstance(hist.columns, pd.MultiIndex):
+        tickers = hist.columns.get_level_values(-1).unique()
+        if symbol in tickers:
+            hist = hist.xs(symbol, axis=1, level=-1)
+        elif symbol is None or len(tickers) == 1:
+            hist = hist.xs(tickers[0], axis=1, level=-1)
+        else:
+            return pd.DataFrame(columns=['date'] + columns)
+
+    if not set(PRICE_FIELDS).issubset(hist.columns):
+        return pd.DataFrame(columns=['date'] + columns)
+
+    frame = hist[list(PRICE_FIELDS)].rename(columns=PRICE_FIELDS)
+    frame = frame[frame['close'].notna()]
+
+    prices = frame[columns[:-1]].astype('float64')
+    prices.insert(0, 'date', frame.index.strftime('%Y-%m-%d'))
+    prices['volume'] = frame['volume'].fillna(0).astype('int64')
+    return prices.reset_index(drop=True)
+
+
+def dividend_records(dividends: pd.Series, from_date: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Convert a Yahoo dividend series (ticker.dividends or the download
+    'Dividends' column) to FMP-style dividend records.
+
+    Args:
+        dividends: Series of amounts indexed by ex-date
+        from_date: Optional first ex-date to keep
+
+    Returns:
+        List of dividend records (zero/NaN amounts dropped)
+    """
+    dividends = dividends[dividends.fillna(0) > 0]
+    if from_date:
+        dividends = dividends[dividends.index.strftime('%Y-%m-%d') >= from_date.isoformat()]
+    if dividends.empty:
+        return []
+
+    amounts = dividends.astype('float64').tolist()
+    return [
+        {'date': ex_date, 'amount': amount, 'adjDividend': amount, 'label': label}
+        for ex_date, label, amount in zip(
+            dividends.index.strftime('%Y-%m-%d'), dividends.index.strftime('%B %d, %y'), amounts
+        )
+    ]
+
 
 class YahooClient(DataSourceClient):
     """
@@ -27,8 +110,14 @@ class YahooClient(DataSourceClient):
     - Dividend history
     - Company/ETF metadata (including AUM for ETFs)
     - Free access with excellent coverage
+    - Multi-ticker batch downloads limited to the missing date window
     """
 
+    # AUM comes from ticker.info, which is slow and heavily throttled; it is
+    # shared across client instances and refreshed on its own slower cycle
+    _aum_cache: Dict[str, Tuple[float, Optional[int]]] = {}
+    _aum_lock = threading.Lock()
+
     def __init__(self):
         """Initialize Yahoo Finance client."""
         # Initialize with global Yahoo rate limiter
@@ -54,7 +143,7 @@ class YahooClient(DataSourceClient):
 
         Args:
             symbol: Stock/ETF symbol
-            from_date: Optional start date (not used - Yahoo returns max history)
+            from_date: Optional start date (default: full history)
 
         Returns:
             Dictionary with price data including AUM for ETFs
@@ -65,57 +154,33 @@ class YahooClient(DataSourceClient):
         try:
             with self.rate_limiter.limit():
                 logger.debug(f"[Yahoo] Fetching prices for {symbol}")
-                ticker = yf.Ticker(symbol)
-
                 # Get AUM (total assets) for ETFs - this is current value
-                aum = None
-                try:
-                    info = ticker.info
-                    aum = info.get('totalAssets')
-                    if aum:
-                        logger.debug(f"[Yahoo] Found AUM for {symbol}: ${aum:,.0f}")
-                except:
-                    pass  # AUM not available for this symbol
+                aum = self._cached_aum(symbol)
 
                 # Get historical prices with auto_adjust=False to get both raw and adjusted close
                 # Using download() instead of history() to access unadjusted prices
-                hist = yf.download(symbol, period="max", auto_adjust=False, progress=False)
-
-                if not hist.empty:
-                    # Convert to format similar to FMP
-                    price_data = []
-                    for date_idx, row in hist.iterrows():
-                        # Handle multi-column index from download()
-                        try:
-                            record = {
-                                'date': date_idx.strftime('%Y-%m-%d'),
-                                'open': float(row['Open'].iloc[0] if hasattr(row['Open'], 'iloc') else row['Open']),
-                                'high': float(row['High'].iloc[0] if hasattr(row['High'], 'iloc') else row['High']),
-                                'low': float(row['Low'].iloc[0] if hasattr(row['Low'], 'iloc') else row['Low']),
-                                'close': float(row['Close'].iloc[0] if hasattr(row['Close'], 'iloc') else row['Close']),
-                                'adjClose': float(row['Adj Close'].iloc[0] if hasattr(row['Adj Close'], 'iloc') else row['Adj Close']),
-                                'volume': int(row['Volume'].iloc[0] if hasattr(row['Volume'], 'iloc') else row['Volume']) if not pd.isna(row['Volume'].iloc[0] if hasattr(row['Volume'], 'iloc') else row['Volume']) else 0
-                            }
-                            # Add AUM to ALL records for daily AUM tracking (if available)
-                            # Note: AUM represents current assets, recorded daily to track growth over time
-                            if aum:
-                                record['aum'] = int(aum)
-                            price_data.append(record)
-                        except Exception as e:
-                            logger.debug(f"[Yahoo] Skipping invalid price record for {symbol} on {date_idx}: {e}")
-                            continue
-
-                    if price_data:
-                        # Report success to rate limiter
-                        if hasattr(self.rate_limiter, 'report_success'):
-                            self.rate_limiter.report_success()
-
-                        return {
-                            'source': 'Yahoo Finance',
-                            'data': price_data,
-                            'count': len(price_data),
-                            'aum': aum  # Also include AUM at top level
-                        }
+                with track_api_call(self.name, 'download'):
+                    hist = yf.download(symbol, auto_adjust=False, progress=False, **self._window(from_date))
+
+                # Convert to format similar to FMP in one vectorized pass
+                frame = price_frame(hist)
+                if aum:
+                    # Add AUM to ALL records for daily AUM tracking
+                    # Note: AUM represents current assets, recorded daily to track growth over time
+                    frame['aum'] = int(aum)
+                price_data = frame.to_dict('records')
+
+                if price_data:
+                    # Report success to rate limiter
+                    if hasattr(self.rate_limiter, 'report_success'):
+                        self.rate_limiter.report_success()
+
+                    return {
+                        'source': 'Yahoo Finance',
+                        'data': price_data,
+                        'count': len(price_data),
+                        'aum': aum  # Also include AUM at top level
+                    }
 
         except Exception as e:
             error_msg = str(e)
@@ -140,7 +205,7 @@ class YahooClient(DataSourceClient):
 
         Args:
             symbol: Stock/ETF symbol
-            from_date: Optional start date (not used - Yahoo returns max history)
+            from_date: Optional first ex-date to return (default: full history)
 
         Returns:
             Dictionary with dividend data
@@ -153,20 +218,11 @@ class YahooClient(DataSourceClient):
                 logger.debug(f"[Yahoo] Fetching dividends for {symbol}")
                 ticker = yf.Ticker(symbol)
 
-                # Get dividend history
-                dividends = ticker.dividends
-
-                if not dividends.empty:
-                    # Convert to format similar to FMP
-                    dividend_data = []
-                    for date_idx, amount in dividends.items():
-                        dividend_data.append({
-                            'date': date_idx.strftime('%Y-%m-%d'),
-                            'amount': float(amount),
-                            'adjDividend': float(amount),
-                            'label': f"{date_idx.strftime('%B %d, %y')}"
-                        })
+                # Get dividend history and convert to format similar to FMP
+                with track_api_call(self.name, 'dividends'):
+                    dividend_data = dividend_records(ticker.dividends, from_date)
 
+                if dividend_data:
                     # Report success to rate limiter
                     if hasattr(self.rate_limiter, 'report_success'):
                         self.rate_limiter.report_success()
@@ -194,6 +250,191 @@ class YahooClient(DataSourceClient):
 
         return None
 
+    @staticmethod
+    def _window(from_date: Optional[date]) -> Dict[str, Any]:
+        """yf.download() window arguments: start date if known, else full history."""
+        return {'start': from_date.isoformat()} if from_date else {'period': 'max'}
+
+    def _cached_aum(self, symbol: str) -> Optional[int]:
+        """
+        Get AUM from ticker.info, at most once per YAHOO_AUM_REFRESH_HOURS.
+
+        Called inside an acquired rate limiter slot.
+        """
+        max_age = Config.DATA_FETCH.YAHOO_AUM_REFRESH_HOURS * 3600
+        with self._aum_lock:
+            cached = self._aum_cache.get(symbol)
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+
+        aum = None
+        try:
+            aum = yf.Ticker(symbol).info.get('totalAssets')
+            if aum:
+                logger.debug(f"[Yahoo] Found AUM for {symbol}: ${aum:,.0f}")
+        except Exception:
+            pass  # AUM not available for this symbol
+
+        with self._aum_lock:
+            self._aum_cache[symbol] = (time.monotonic(), aum)
+        return aum
+
+    @staticmethod
+    def _batch_windows(symbols: List[str], from_dates: Optional[Dict[str, Optional[date]]],
+                       batch_size: int) -> Iterator[Tuple[List[str], Optional[date]]]:
+        """
+        Group symbols into download batches sharing one start date.
+
+        Symbols are ordered by from_date (no date = full history first), so
+        each batch starts at its earliest member and windows stay tight.
+        """
+        from_dates = from_dates or {}
+        ordered = sorted(symbols, key=lambda s: (from_dates.get(s) or date.min, s))
+        for i in range(0, len(ordered), batch_size):
+            batch = ordered[i:i + batch_size]
+            yield batch, from_dates.get(batch[0])
+
+    def _download_batch(self, symbols: List[str], from_date: Optional[date],
+                        actions: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Download history for several tickers in one request.
+
+        Args:
+            symbols: Tickers to download
+            from_date: First date to fetch (None = full history)
+            actions: Include Dividends/Stock Splits columns
+
+        Returns:
+            DataFrame with (field, ticker) columns, or None on failure
+        """
+        try:
+            with self.rate_limiter.limit():
+                logger.debug(f"[Yahoo] Batch download of {len(symbols)} tickers from {from_date or 'max'}")
+                with track_api_call(self.name, 'download_batch'):
+                    hist = yf.download(
+                        symbols, auto_adjust=False, actions=actions, progress=False,
+                        group_by='column', threads=True, **self._window(from_date)
+                    )
+
+                if hasattr(self.rate_limiter, 'report_success'):
+                    self.rate_limiter.report_success()
+                return hist
+
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"[Yahoo] Batch download error ({len(symbols)} tickers): {e}")
+
+            # Check if it's a rate limit error
+            if 'Too Many Requests' in error_msg or '429' in error_msg or 'Rate limited' in error_msg:
+                if hasattr(self.rate_limiter, 'report_rate_limit'):
+                    self.rate_limiter.report_rate_limit()
+            elif hasattr(self.rate_limiter, 'report_error'):
+                self.rate_limiter.report_error()
+
+        return None
+
+    def fetch_prices_batch(self, symbols: List[str],
+                           from_dates: Optional[Dict[str, Optional[date]]] = None,
+                           batch_size: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch prices for many symbols with multi-ticker downloads.
+
+        Each request covers up to batch_size tickers and only the window
+        after the earliest from_date in the batch; rows before a symbol's own
+        from_date are dropped. AUM is not fetched here (see
+        AUMDiscoveryProcessor for the slower AUM refresh cycle).
+
+        Args:
+            symbols: Stock/ETF symbols
+            from_dates: Optional {symbol: first date to fetch}; missing or None
+                        means full history
+            batch_size: Tickers per request (default: DataFetchConfig.YAHOO_BATCH_SIZE)
+
+        Returns:
+            {symbol: price result in the fetch_prices() format} for symbols with data
+        """
+        if not self.is_available() or not symbols:
+            return {}
+
+        from_dates = from_dates or {}
+        results = {}
+        for batch, start in self._batch_windows(symbols, from_dates, batch_size or Config.DATA_FETCH.YAHOO_BATCH_SIZE):
+            hist = self._download_batch(batch, start)
+            if hist is None or hist.empty:
+                continue
+
+            for symbol in batch:
+                frame = price_frame(hist, symbol)
+                since = from_dates.get(symbol)
+                if since:
+                    frame = frame[frame['date'] >= since.isoformat()]
+                if not frame.empty:
+                    price_data = frame.to_dict('records')
+                    results[symbol] = {
+                        'source': 'Yahoo Finance',
+                        'data': price_data,
+                        'count': len(price_data)
+                    }
+
+        logger.debug(f"[Yahoo] Batch prices: {len(results)}/{len(symbols)} symbols with data")
+        return results
+
+    def fetch_dividends_batch(self, symbols: List[str],
+                              from_dates: Optional[Dict[str, Optional[date]]] = None,
+                              batch_size: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch dividends for many symbols with multi-ticker downloads.
+
+        Args:
+            symbols: Stock/ETF symbols
+            from_dates: Optional {symbol: first ex-date to fetch}; missing or
+                        None means full history
+            batch_size: Tickers per request (default: DataFetchConfig.YAHOO_BATCH_SIZE)
+
+        Returns:
+            {symbol: dividend result in the fetch_dividends() format} for symbols with dividends
+        """
+        if not self.is_available() or not symbols:
+            return {}
+
+        from_dates = from_dates or {}
+        results = {}
+        for batch, start in self._batch_windows(symbols, from_dates, batch_size or Config.DATA_FETCH.YAHOO_BATCH_SIZE):
+            hist = self._download_batch(batch, start, actions=True)
+            if hist is None or hist.empty or 'Dividends' not in hist.columns.get_level_values(0):
+                continue
+
+            dividends = hist['Dividends']
+            if isinstance(dividends, pd.Series):
+                dividends = dividends.to_frame(batch[0])
+
+            for symbol in batch:
+                if symbol not in dividends.columns:
+                    continue
+                dividend_data = dividend_records(dividends[symbol], from_dates.get(symbol))
+                if dividend_data:
+                    results[symbol] = {
+                        'source': 'Yahoo Finance',
+                        'data': dividend_data,
+                        'count': len(dividend_data)
+                    }
+
+        logger.debug(f"[Yahoo] Batch dividends: {len(results)}/{len(symbols)} symbols with data")
+        return results
+
+    async def afetch_prices(self, symbol: str, from_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """
+        Async variant of fetch_prices().
+
+        yfinance is blocking and manages its own HTTP session, so the call runs
+        in a worker thread; the Yahoo rate limiter still caps concurrency.
+        """
+        return await asyncio.to_thread(self.fetch_prices, symbol, from_date)
+
+    async def afetch_dividends(self, symbol: str, from_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Async variant of fetch_dividends() (runs yfinance in a worker thread)."""
+        return await asyncio.to_thread(self.fetch_dividends, symbol, from_date)
+
     def fetch_company_info(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
         Fetch company/ETF information from Yahoo Finance.
@@ -407,4 +648,4 @@ class YahooClient(DataSourceClient):
 
 
 # Export Yahoo client
-__all__ = ['YahooClient']
+__all__ = ['YahooClient', 'price_frame', 'dividend_records']
@@ -6,6 +6,7 @@ Provides functions to get symbols from user portfolios that should bypass valida
 
 import logging
 from typing import List, Set
+from lib.core.db_pool import get_pool
 from supabase_helpers import supabase_select
 
 logger = logging.getLogger(__name__)
@@ -22,27 +23,9 @@ def get_portfolio_symbols() -> Set[str]:
         Set of symbols that exist in user portfolios
     """
     try:
-        import os
-        import psycopg2
-        import json
-
-        # Get database connection details
-        db_host = os.environ.get('DB_HOST', 'localhost')
-        db_port = os.environ.get('DB_PORT', '5434')
-        db_name = os.environ.get('DB_NAME', 'postgres')
-        db_user = os.environ.get('DB_USER', 'postgres')
-        db_password = os.environ.get('DB_PASSWORD', 'postgres')
-
-        # Connect to database
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            database=db_name,
-            user=db_user,
-            password=db_password
-        )
-
-        cursor = conn.cursor()
+        pool = get_pool()
+        if not pool:
+            raise RuntimeError("direct Postgres connection not available")
 
         # Query to extract symbols from positions JSONB
         # The structure is: positions -> array of position objects -> 'symbol' -> 'symbol' (nested) -> 'symbol' (ticker)
@@ -55,18 +38,13 @@ def get_portfolio_symbols() -> Set[str]:
         AND pos->'symbol'->'symbol'->>'symbol' IS NOT NULL
         """
 
-        cursor.execute(query)
-        rows = cursor.fetchall()
+        rows = pool.query(query)
 
         symbols = set()
         for row in rows:
-            if row and row[0]:
-                symbol = row[0].strip()
-                if symbol:
-                    symbols.add(symbol)
-
-        cursor.close()
-        conn.close()
+            symbol = (row.get('symbol') or '').strip()
+            if symbol:
+                symbols.add(symbol)
 
         logger.info(f"✅ Found {len(symbols)} unique symbols in user portfolios")
         if symbols:
@@ -5,5 +5,6 @@ High-level orchestration pipelines for complex workflows.
 """
 
 from lib.pipelines.stock_data_pipeline import StockDataPipeline
+from lib.pipelines.ingest_scheduler import IngestScheduler, WorkPlan, Wave
 
-__all__ = ['StockDataPipeline']
+__all__ = ['StockDataPipeline', 'IngestScheduler', 'WorkPlan', 'Wave']
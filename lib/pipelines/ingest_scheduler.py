@@ -0,0 +1,404 @@
+"""
+Ingest Scheduler
+
+Builds a work plan per run instead of sweeping the whole universe:
+
+1. Market calendar: resolve the last completed trading session locally.
+   If that session is already ingested (weekends, holidays, repeat runs)
+   the run ends without any database or API calls.
+2. Freshness: only symbols whose latest stored price is older than the
+   session are scheduled.
+3. Priority tiers: symbols are ranked once for the whole universe
+   (portfolio holdings, volume, market cap, exchange) and split into tiers
+   that become eligible at staggered times after the close, so load is
+   spread over the evening.
+4. Rate-budgeted waves: each plan runs in fixed-size waves paced to
+   SCHEDULER_CALLS_PER_MINUTE and capped by SCHEDULER_DAILY_CALL_BUDGET.
+5. Year rollover: the first run of each calendar year recomputes every
+   dividend streak, since streaks count back from the last complete year
+   and otherwise only change for symbols with new dividends.
+
+Usage:
+    scheduler = IngestScheduler()
+    plan = scheduler.build_plan()
+    scheduler.execute(plan)
+
+    # Or as a daemon
+    scheduler.run_forever()
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from lib.core.config import Config
+from lib.discovery.portfolio_helper import get_portfolio_symbols
+from lib.processors.aggressive_processor import AggressiveProcessor
+from lib.processors.dividend_processor import DividendProcessor
+from lib.processors.incremental_processor import IncrementalProcessor
+from lib.utils.market_hours import MarketHours
+from lib.utils.performance_monitor import publish_stats
+from lib.utils.security_classifier import load_classified_symbols, split_special_securities
+from lib.utils.symbol_prioritizer import SymbolPrioritizer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Wave:
+    """One batch of symbols from a single priority tier."""
+    tier: int
+    symbols: List[str]
+
+
+@dataclass
+class WorkPlan:
+    """Symbols to ingest for one session, split into waves."""
+    session: date
+    reason: str
+    waves: List[Wave] = field(default_factory=list)
+    stale_symbols: int = 0
+    fresh_symbols: int = 0
+    deferred_symbols: int = 0  # Stale, but their tier is not eligible yet
+    over_budget_symbols: int = 0  # Stale and eligible, but beyond the daily call budget
+    evaluated: bool = False  # Freshness was checked (False for early exits)
+
+    @property
+    def symbol_count(self) -> int:
+        """Symbols scheduled in this plan."""
+        return sum(len(wave.symbols) for wave in self.waves)
+
+    @property
+    def estimated_calls(self) -> int:
+        """API calls the plan is expected to make."""
+        return self.symbol_count * Config.PROCESSING.SCHEDULER_CALLS_PER_SYMBOL
+
+    @property
+    def completes_session(self) -> bool:
+        """Whether running this plan leaves nothing stale for the session."""
+        return self.evaluated and not self.deferred_symbols and not self.over_budget_symbols
+
+
+class IngestScheduler:
+    """
+    Plans and runs incremental ingest by calendar, freshness and priority.
+
+    State (last completed session, symbols attempted for the current
+    session, API calls used today, year of the last full streak refresh)
+    is kept in
+    <CHECKPOINT_DIR>/scheduler_state.json so repeat runs are free.
+    """
+
+    def __init__(self, max_workers: int = 200, state_path: Optional[str] = None):
+        """
+        Initialize scheduler.
+
+        Args:
+            max_workers: Concurrent workers per wave
+            state_path: Scheduler state file (default: <CHECKPOINT_DIR>/scheduler_state.json)
+        """
+        config = Config.PROCESSING
+        self.max_workers = max_workers
+        self.state_path = state_path or os.path.join(config.CHECKPOINT_DIR, 'scheduler_state.json')
+        self.ready_time = datetime.strptime(config.SCHEDULER_EOD_READY_TIME, '%H:%M').time()
+        self.tier_sizes = config.SCHEDULER_TIER_SIZES
+        self.tier_delays = config.SCHEDULER_TIER_DELAY_HOURS
+        self.wave_size = config.SCHEDULER_WAVE_SIZE
+        self.calls_per_symbol = config.SCHEDULER_CALLS_PER_SYMBOL
+        self.calls_per_minute = config.SCHEDULER_CALLS_PER_MINUTE
+        self.daily_budget = config.SCHEDULER_DAILY_CALL_BUDGET
+
+    def _load_state(self) -> Dict[str, Any]:
+        """Load scheduler state ({} if missing or unreadable)."""
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️  Could not read scheduler state {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self, state: Dict[str, Any]):
+        """Save scheduler state atomically."""
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _calls_used_today(self, state: Dict[str, Any], today: date) -> int:
+        """API calls the scheduler already spent today."""
+        return state.get('calls_used', {}).get(today.isoformat(), 0)
+
+    def _record_wave(self, session: date, symbols: List[str], calls: int):
+        """Record a finished wave: symbols attempted for the session and API calls used today."""
+        state = self._load_state()
+        today = date.today()
+        state['calls_used'] = {today.isoformat(): self._calls_used_today(state, today) + calls}
+
+        if state.get('attempted_session') != session.isoformat():
+            state['attempted_session'] = session.isoformat()
+            state['attempted'] = []
+        state['attempted'].extend(symbols)
+        self._save_state(state)
+
+    def _tier_of(self, rank: int) -> int:
+        """Priority tier (1-based) for a universe rank."""
+        boundary = 0
+        for tier, size in enumerate(self.tier_sizes, 1):
+            boundary += size
+            if rank < boundary:
+                return tier
+        return len(self.tier_sizes) + 1
+
+    def _eligible_tiers(self, session: date, now: datetime) -> int:
+        """Highest tier whose start time (EOD ready + tier delay) has passed."""
+        ready = datetime.combine(session, self.ready_time)
+        eligible = 0
+        for tier, delay_hours in enumerate(self.tier_delays, 1):
+            if now >= ready + timedelta(hours=delay_hours):
+                eligible = tier
+        return eligible
+
+    @staticmethod
+    def _load_universe() -> List[str]:
+        """Regular securities from raw_stocks (warrants, units, rights excluded)."""
+        categories = load_classified_symbols()
+        symbols, _ = split_special_securities(list(categories), categories)
+        return symbols
+
+    @staticmethod
+    def _stale_symbols(symbols: List[str], session: date) -> List[str]:
+        """
+        Symbols whose latest stored price is older than the session.
+
+        Symbols without a stored price are stale, so if the bulk latest-date
+        lookup fails every symbol is scheduled rather than the session being
+        taken as ingested.
+        """
+        latest_dates = IncrementalProcessor.get_bulk_latest_dates('raw_stock_prices', 'date')
+        if not latest_dates:
+            logger.warning("⚠️  No latest price dates available - treating every symbol as stale")
+        return [s for s in symbols if s not in latest_dates or latest_dates[s] < session]
+
+    def build_plan(self, now: Optional[datetime] = None,
+                   symbols: Optional[List[str]] = None) -> WorkPlan:
+        """
+        Build the work plan for the current session.
+
+        Args:
+            now: Planning time in market time (default: now)
+            symbols: Universe to consider (default: regular securities in raw_stocks)
+
+        Returns:
+            WorkPlan (no waves when there is nothing to do)
+        """
+        now = now or datetime.now()
+        session = MarketHours.last_completed_session(now, self.ready_time)
+        state = self._load_state()
+
+        if state.get('completed_session') == session.isoformat():
+            return WorkPlan(session, f"Session {session} already ingested - nothing to do")
+
+        budget = None
+        if self.daily_budget:
+            budget = self.daily_budget - self._calls_used_today(state, now.date())
+            if budget < self.calls_per_symbol:
+                return WorkPlan(session, f"Daily budget of {self.daily_budget:,} API calls used up")
+
+        universe = symbols if symbols is not None else self._load_universe()
+        stale = set(self._stale_symbols(universe, session))
+
+        # Symbols already fetched for this session (e.g. no data from any
+        # provider) are not retried until the next session
+        if state.get('attempted_session') == session.isoformat():
+            stale.difference_update(state.get('attempted', []))
+
+        # Rank the whole universe so a symbol's tier does not depend on what else is stale
+        ranked = SymbolPrioritizer.prioritize_symbols(
+            universe, portfolio_symbols=list(get_portfolio_symbols())
+        )
+        eligible_tier = self._eligible_tiers(session, now)
+
+        plan = WorkPlan(session, '', stale_symbols=len(stale), fresh_symbols=len(universe) - len(stale),
+                        evaluated=True)
+        max_symbols = budget // self.calls_per_symbol if budget is not None else None
+        by_tier: Dict[int, List[str]] = {}
+
+        for rank, symbol in enumerate(ranked):
+            if symbol not in stale:
+                continue
+            tier = self._tier_of(rank)
+            if tier > eligible_tier:
+                plan.deferred_symbols += 1
+            elif max_symbols is not None and max_symbols <= 0:
+                plan.over_budget_symbols += 1
+            else:
+                by_tier.setdefault(tier, []).append(symbol)
+                if max_symbols is not None:
+                    max_symbols -= 1
+
+        for tier in sorted(by_tier):
+            tier_symbols = by_tier[tier]
+            for i in range(0, len(tier_symbols), self.wave_size):
+                plan.waves.append(Wave(tier, tier_symbols[i:i + self.wave_size]))
+
+        if plan.waves:
+            plan.reason = (
+                f"{plan.symbol_count:,} stale symbols in tiers 1-{eligible_tier} "
+                f"({len(plan.waves)} waves, ~{plan.estimated_calls:,} API calls)"
+            )
+        elif not stale:
+            plan.reason = f"All {len(universe):,} symbols are fresh for {session}"
+        else:
+            plan.reason = f"{len(stale):,} stale symbols waiting for their tier window"
+
+        return plan
+
+    def log_plan(self, plan: WorkPlan):
+        """Log a work plan summary."""
+        logger.info("=" * 70)
+        logger.info(f"🗓️  INGEST PLAN for session {plan.session}")
+        logger.info("=" * 70)
+        logger.info(f"📋 {plan.reason}")
+        if plan.stale_symbols or plan.fresh_symbols:
+            logger.info(f"✅ Fresh: {plan.fresh_symbols:,}  ⏳ Stale: {plan.stale_symbols:,}")
+        if plan.waves:
+            tiers: Dict[int, int] = {}
+            for wave in plan.waves:
+                tiers[wave.tier] = tiers.get(wave.tier, 0) + len(wave.symbols)
+            logger.info("🎯 Scheduled: " + ", ".join(f"tier {t}: {n:,}" for t, n in sorted(tiers.items())))
+        if plan.deferred_symbols:
+            logger.info(f"⏸️  Deferred to a later tier window: {plan.deferred_symbols:,}")
+        if plan.over_budget_symbols:
+            logger.info(f"💸 Over today's call budget: {plan.over_budget_symbols:,}")
+        logger.info("=" * 70)
+
+    def execute(self, plan: WorkPlan) -> Dict[str, Any]:
+        """
+        Run a plan wave by wave, pacing waves to the call budget.
+
+        When the plan leaves nothing stale (including a plan with nothing
+        stale to begin with) the session is recorded as completed, so later
+        runs skip it without queries.
+
+        Args:
+            plan: Plan from build_plan()
+
+        Returns:
+            Run statistics
+        """
+        stats = {
+            'session': plan.session.isoformat(),
+            'waves': 0,
+            'symbols': 0,
+            'api_calls': 0,
+            'successful_prices': 0,
+            'successful_dividends': 0,
+            'paced_seconds': 0.0
+        }
+        processor = AggressiveProcessor(max_workers=self.max_workers) if plan.waves else None
+
+        for i, wave in enumerate(plan.waves, 1):
+            started = time.monotonic()
+            logger.info(f"🌊 Wave {i}/{len(plan.waves)} (tier {wave.tier}): {len(wave.symbols):,} symbols")
+
+            summary = processor.process_batch_aggressive(wave.symbols)
+            calls = summary['total_api_calls']
+
+            stats['waves'] += 1
+            stats['symbols'] += len(wave.symbols)
+            stats['api_calls'] += calls
+            stats['successful_prices'] += summary['successful_prices']
+            stats['successful_dividends'] += summary['successful_dividends']
+            self._record_wave(plan.session, wave.symbols, calls)
+            publish_stats('scheduler', {k: v for k, v in stats.items() if k != 'session'})
+
+            # Hold each wave to its share of the per-minute budget
+            if i < len(plan.waves) and self.calls_per_minute:
+                remaining = calls / self.calls_per_minute * 60 - (time.monotonic() - started)
+                if remaining > 0:
+                    logger.info(f"⏱️  Pacing: next wave in {remaining:.0f}s")
+                    stats['paced_seconds'] += remaining
+                    time.sleep(remaining)
+
+        if plan.completes_session:
+            state = self._load_state()
+            state['completed_session'] = plan.session.isoformat()
+            self._save_state(state)
+            logger.info(f"✅ Session {plan.session} fully ingested")
+
+        return stats
+
+    def refresh_streaks_on_rollover(self, today: Optional[date] = None) -> Optional[int]:
+        """
+        Recompute all dividend streaks once per calendar year.
+
+        Args:
+            today: Current date (default: today)
+
+        Returns:
+            Streak rows refreshed, or None if this year's refresh already ran
+            (or failed; it is retried on the next run)
+        """
+        year = (today or date.today()).year
+        if self._load_state().get('streaks_refreshed_year') == year:
+            return None
+
+        logger.info(f"📅 First run of {year}: refreshing all dividend streaks")
+        refreshed = DividendProcessor.refresh_all_streaks()
+        if refreshed is not None:
+            state = self._load_state()
+            state['streaks_refreshed_year'] = year
+            self._save_state(state)
+        return refreshed
+
+    def run_once(self, now: Optional[datetime] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Build, log and (unless dry_run) execute one plan.
+
+        Returns:
+            Run statistics (plan counts only for dry runs)
+        """
+        plan = self.build_plan(now)
+        self.log_plan(plan)
+        if dry_run:
+            return {
+                'session': plan.session.isoformat(),
+                'symbols': plan.symbol_count,
+                'waves': len(plan.waves),
+                'estimated_calls': plan.estimated_calls
+            }
+        stats = self.execute(plan)
+
+        refreshed = self.refresh_streaks_on_rollover((now or datetime.now()).date())
+        if refreshed is not None:
+            stats['streaks_refreshed'] = refreshed
+        return stats
+
+    def run_forever(self, poll_minutes: Optional[int] = None):
+        """
+        Daemon loop: plan and run every poll interval.
+
+        Args:
+            poll_minutes: Minutes between runs (default: SCHEDULER_POLL_MINUTES)
+        """
+        poll_minutes = poll_minutes or Config.PROCESSING.SCHEDULER_POLL_MINUTES
+        logger.info(f"🗓️  Ingest scheduler started (every {poll_minutes} min)")
+
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Scheduled run failed: {e}")
+            time.sleep(poll_minutes * 60)
+
+
+__all__ = ['IngestScheduler', 'WorkPlan', 'Wave']
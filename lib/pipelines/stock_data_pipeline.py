@@ -226,12 +226,16 @@ class StockDataPipeline:
             'duration_seconds': duration
         }
 
-    def run_future_dividends_mode(self, days_ahead: int = 90) -> Dict[str, Any]:
+    def run_future_dividends_mode(self, days_ahead: int = 90, lookback_days: int = 30) -> Dict[str, Any]:
         """
-        Fetch future dividend payments.
+        Refresh recent and future dividend payments from the dividend calendar.
+
+        One calendar request covers the whole window; only symbols with new
+        events are fetched (see DividendProcessor.refresh_from_calendar).
 
         Args:
             days_ahead: Number of days ahead to fetch dividends
+            lookback_days: Number of days back to pick up events that went ex
 
         Returns:
             Dictionary with dividend fetch results
@@ -244,56 +248,31 @@ class StockDataPipeline:
         logger.info("=" * 70)
         logger.info("")
 
-        # Get symbols with dividend history
-        logger.info("📊 Fetching dividend-paying symbols...")
-        cutoff_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-
-        # Query for symbols with recent dividends
-        dividend_symbols = supabase_select(
-            'raw_dividends',
-            'symbol',
-            filters={'ex_date': f'gte.{cutoff_date}'},
-            limit=None
+        today = start_time.date()
+        logger.info(f"🔄 Refreshing dividends from the calendar ({lookback_days} days back, {days_ahead} days ahead)...")
+        results = self.dividend_processor.refresh_from_calendar(
+            today - timedelta(days=lookback_days),
+            today + timedelta(days=days_ahead)
         )
 
-        unique_symbols = list(set(s['symbol'] for s in dividend_symbols)) if dividend_symbols else []
-        logger.info(f"✅ Found {len(unique_symbols)} dividend-paying symbols")
-
-        if not unique_symbols:
-            logger.warning("⚠️ No dividend-paying symbols found")
-            return {'fetched_count': 0, 'duration_seconds': 0}
-
-        # Fetch future dividends
-        logger.info("")
-        logger.info(f"🔄 Fetching future dividends ({days_ahead} days ahead)...")
-        fetched_count = 0
-
-        for i, symbol in enumerate(unique_symbols, 1):
-            if i % 100 == 0:
-                logger.info(f"   Progress: {i}/{len(unique_symbols)}")
-
-            # Fetch future dividends for symbol
-            dividends = self.dividend_processor.fetch_future_dividends(
-                symbol,
-                days_ahead=days_ahead
-            )
-            if dividends:
-                fetched_count += len(dividends)
-
         duration = (datetime.now() - start_time).total_seconds()
 
         logger.info("")
         logger.info("=" * 70)
         logger.info("✅ DIVIDEND FETCH COMPLETE")
         logger.info("=" * 70)
-        logger.info(f"Symbols processed: {len(unique_symbols)}")
-        logger.info(f"Dividends fetched: {fetched_count}")
+        logger.info(f"Calendar events: {results['calendar_events']}")
+        logger.info(f"Symbols fetched: {results['symbols_fetched']}")
+        logger.info(f"Dividends upserted: {results['dividends_upserted']}")
+        logger.info(f"Upcoming dividends upserted: {results['future_upserted']}")
+        logger.info(f"API calls: {results['api_calls']}")
         logger.info(f"Duration: {duration:.1f}s")
         logger.info("=" * 70)
 
         return {
-            'symbols_processed': len(unique_symbols),
-            'fetched_count': fetched_count,
+            'symbols_processed': results['symbols_fetched'],
+            'fetched_count': results['dividends_upserted'] + results['future_upserted'],
+            **results,
             'duration_seconds': duration
         }
 
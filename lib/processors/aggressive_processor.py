@@ -3,21 +3,32 @@ Aggressive Throughput Processor
 
 Maximizes API call throughput by batching database writes and reducing I/O.
 Target: 700+ API calls per minute (close to 750 req/min limit).
+
+Runs are journaled: a symbol is appended to the checkpoint journal once its
+price and dividend fetches (including the Yahoo fallback) are finished and
+all of its rows have been written, so a killed run can be resumed without
+re-fetching finished symbols. Symbols with dead-lettered rows are never
+journaled and are fetched again on resume.
 """
 
 import logging
+import math
+import threading
 from typing import List, Dict, Any
-from collections import defaultdict
+from collections import Counter, defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
-from queue import Queue
-import threading
 import time
 
 from lib.core.config import Config
+from lib.core.rate_limiters import GlobalRateLimiters
+from lib.core.record_batch import PriceBatch, DividendBatch
 from lib.processors.price_processor import PriceProcessor
 from lib.processors.dividend_processor import DividendProcessor
-from supabase_helpers import supabase_batch_upsert
+from lib.processors.batch_writer import BatchWriter
+from lib.processors.checkpoint_manager import CheckpointJournal
+from lib.processors.incremental_processor import IncrementalProcessor
+from lib.utils.performance_monitor import publish_stats
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +41,9 @@ class AggressiveProcessor:
     - Batch database writes every 100 symbols (not per symbol)
     - Use 200+ concurrent workers
     - Reduce logging I/O
-    - Pipeline fetch and write operations
+    - Pipeline fetch and write operations through bounded writer queues
+      (fetch workers block when writes fall behind)
+    - Append-only checkpoint journal for resuming killed runs
     """
 
     def __init__(self, max_workers: int = 200):
@@ -44,76 +57,108 @@ class AggressiveProcessor:
         self.price_processor = PriceProcessor()
         self.dividend_processor = DividendProcessor()
 
-        # Batching queues
-        self.price_queue = Queue()
-        self.dividend_queue = Queue()
+        # Batched, backpressured writers (started per run)
         self.write_batch_size = Config.DATABASE.AGGRESSIVE_BATCH_SIZE if Config.DATABASE.AGGRESSIVE_MODE else 100
+        self.price_writer = None
+        self.dividend_writer = None
+
+        # Checkpoint journal and rows still in flight per symbol:
+        # SYMBOL -> [unflushed rows, fetch finished, symbol as given, rows dead-lettered]
+        self.journal = None
+        self._pending: Dict[str, list] = {}
+        self._pending_lock = threading.Lock()
+
+        # Symbols with dividend rows written this run (streaks refreshed at the end)
+        self._dividend_symbols = set()
 
         # Statistics
         self.total_processed = 0
         self.total_api_calls = 0
         self.start_time = None
 
-        # Background writer thread
-        self.writer_thread = None
-        self.stop_writing = threading.Event()
-
-    def _batch_writer(self):
-        """Background thread that writes batches to database."""
-        price_batch = []
-        dividend_batch = []
-
-        while not self.stop_writing.is_set():
-            # Collect items from queues
-            try:
-                while not self.price_queue.empty() and len(price_batch) < self.write_batch_size:
-                    price_batch.append(self.price_queue.get_nowait())
-
-                while not self.dividend_queue.empty() and len(dividend_batch) < self.write_batch_size:
-                    dividend_batch.append(self.dividend_queue.get_nowait())
-
-                # Write batches if we have enough items or timeout
-                if len(price_batch) >= self.write_batch_size or (len(price_batch) > 0 and self.stop_writing.is_set()):
-                    if price_batch:
-                        supabase_batch_upsert('raw_stock_prices', price_batch, batch_size=len(price_batch))
-                        logger.info(f"📊 Batch wrote {len(price_batch)} price records")
-                        price_batch = []
-
-                if len(dividend_batch) >= self.write_batch_size or (len(dividend_batch) > 0 and self.stop_writing.is_set()):
-                    if dividend_batch:
-                        supabase_batch_upsert('raw_dividends', dividend_batch, batch_size=len(dividend_batch))
-                        logger.info(f"💰 Batch wrote {len(dividend_batch)} dividend records")
-                        dividend_batch = []
-
-                # Small sleep to avoid busy waiting
-                time.sleep(0.1)
-
-            except Exception as e:
-                logger.error(f"❌ Batch writer error: {e}")
-                time.sleep(1)
-
-        # Final flush
-        if price_batch:
-            supabase_batch_upsert('raw_stock_prices', price_batch, batch_size=len(price_batch))
-            logger.info(f"📊 Final flush: {len(price_batch)} price records")
-
-        if dividend_batch:
-            supabase_batch_upsert('raw_dividends', dividend_batch, batch_size=len(dividend_batch))
-            logger.info(f"💰 Final flush: {len(dividend_batch)} dividend records")
+    def _queue_prices(self, symbol: str, records: List[Dict[str, Any]]):
+        """Validate price records as one columnar batch and queue the valid rows."""
+        batch = PriceBatch()
+        batch.extend_records(symbol, records)
+        if batch.invalid_count:
+            logger.debug(f"⚠️ {symbol}: Skipping {batch.invalid_count} invalid price records")
+        rows = batch.to_rows()
+        self._track_rows(symbol, len(rows))
+        self.price_writer.put_many(rows)
+
+    def _queue_dividends(self, symbol: str, records: List[Dict[str, Any]]):
+        """Validate dividend records as one columnar batch and queue the valid rows."""
+        batch = DividendBatch()
+        batch.extend_records(symbol, records)
+        if batch.invalid_count:
+            logger.debug(f"⚠️ {symbol}: Skipping {batch.invalid_count} invalid dividend records")
+        rows = batch.to_rows()
+        self._track_rows(symbol, len(rows))
+        self.dividend_writer.put_many(rows)
+
+    def _track_rows(self, symbol: str, count: int):
+        """Count rows queued for a symbol that are not flushed yet."""
+        with self._pending_lock:
+            self._pending.setdefault(symbol.upper(), [0, False, symbol, False])[0] += count
+
+    def _finish_symbol(self, symbol: str):
+        """Mark all of a symbol's fetches finished; journal it once its rows are written."""
+        with self._pending_lock:
+            entry = self._pending.setdefault(symbol.upper(), [0, False, symbol, False])
+            entry[1] = True
+            done = entry[0] <= 0
+            if done:
+                del self._pending[symbol.upper()]
+
+        if done and not entry[3] and self.journal:
+            self.journal.mark_done(symbol)
+
+    def _on_flush(self, batch: List[Dict[str, Any]]):
+        """Writer callback: journal symbols whose last rows were just written."""
+        self._settle_rows(batch, failed=False)
+
+    def _on_dividend_flush(self, batch: List[Dict[str, Any]]):
+        """Dividend writer callback: also remember symbols whose streaks need a refresh."""
+        with self._pending_lock:
+            self._dividend_symbols.update(row['symbol'] for row in batch)
+        self._on_flush(batch)
+
+    def _on_dead_letter(self, batch: List[Dict[str, Any]]):
+        """Writer callback: keep symbols with dead-lettered rows out of the journal."""
+        self._settle_rows(batch, failed=True)
+
+    def _settle_rows(self, batch: List[Dict[str, Any]], failed: bool):
+        """Account for rows that left the writers; journal symbols that are complete."""
+        finished = []
+        with self._pending_lock:
+            for key, count in Counter(row['symbol'] for row in batch).items():
+                entry = self._pending.get(key)
+                if entry is None:
+                    continue
+                entry[0] -= count
+                entry[3] = entry[3] or failed
+                if entry[0] <= 0 and entry[1]:
+                    if not entry[3]:
+                        finished.append(entry[2])
+                    del self._pending[key]
+
+        if self.journal:
+            for symbol in finished:
+                self.journal.mark_done(symbol)
 
     def _process_symbol_aggressive(self, symbol: str) -> Dict[str, Any]:
         """
         Process single symbol with aggressive batching.
 
+        Yahoo is skipped here; symbols that FMP and Alpha Vantage miss are
+        fetched afterwards in multi-ticker batches (_yahoo_batch_fallback).
+
         Args:
             symbol: Symbol to process
 
         Returns:
             Result dictionary
         """
-        from lib.core.models import StockPrice, Dividend
-        from datetime import datetime
-
         result = {
             'symbol': symbol,
             'price_success': False,
@@ -123,37 +168,11 @@ class AggressiveProcessor:
 
         # Fetch price data
         try:
-            price_data = self.price_processor.fetch_prices(symbol, from_date=None, use_hybrid=True)
+            price_data = self.price_processor.fetch_prices(symbol, from_date=None, use_hybrid=True, use_yahoo=False)
             result['api_calls'] += 1
 
             if price_data and price_data.get('data'):
-                # Convert to StockPrice models (proper field names)
-                for record in price_data['data']:
-                    try:
-                        price_date = datetime.strptime(record['date'], '%Y-%m-%d').date()
-                        price = StockPrice(
-                            symbol=symbol,
-                            date=price_date,
-                            open=record.get('open'),
-                            high=record.get('high'),
-                            low=record.get('low'),
-                            close=record.get('close'),
-                            adj_close=record.get('adjClose'),  # Convert camelCase to snake_case
-                            volume=record.get('volume'),
-                            change=record.get('change'),
-                            change_percent=record.get('changePercent'),
-                            vwap=record.get('vwap'),
-                            label=record.get('label'),
-                            change_over_time=record.get('changeOverTime'),
-                            aum=record.get('aum'),
-                            iv=record.get('iv')
-                        )
-                        if price.is_valid:
-                            self.price_queue.put(price.to_dict())
-                    except Exception as e:
-                        logger.debug(f"⚠️ {symbol}: Invalid price record - {e}")
-                        continue
-
+                self._queue_prices(symbol, price_data['data'])
                 result['price_success'] = True
                 result['price_count'] = len(price_data['data'])
         except Exception as e:
@@ -161,30 +180,11 @@ class AggressiveProcessor:
 
         # Fetch dividend data
         try:
-            dividend_data = self.dividend_processor.fetch_dividends(symbol, from_date=None)
+            dividend_data = self.dividend_processor.fetch_dividends(symbol, from_date=None, use_yahoo=False)
             result['api_calls'] += 1
 
             if dividend_data and dividend_data.get('data'):
-                # Convert to Dividend models
-                for record in dividend_data['data']:
-                    try:
-                        div_date = datetime.strptime(record['date'], '%Y-%m-%d').date()
-                        dividend = Dividend(
-                            symbol=symbol,
-                            date=div_date,
-                            dividend=record.get('dividend'),
-                            adj_dividend=record.get('adjDividend'),
-                            declaration_date=record.get('declarationDate'),
-                            record_date=record.get('recordDate'),
-                            payment_date=record.get('paymentDate'),
-                            label=record.get('label')
-                        )
-                        if dividend.is_valid:
-                            self.dividend_queue.put(dividend.to_dict())
-                    except Exception as e:
-                        logger.debug(f"⚠️ {symbol}: Invalid dividend record - {e}")
-                        continue
-
+                self._queue_dividends(symbol, dividend_data['data'])
                 result['dividend_success'] = True
                 result['dividend_count'] = len(dividend_data['data'])
         except Exception as e:
@@ -192,25 +192,80 @@ class AggressiveProcessor:
 
         return result
 
-    def process_batch_aggressive(self, symbols: List[str]) -> Dict[str, Any]:
+    def _yahoo_batch_fallback(self, price_misses: List[str], dividend_misses: List[str]) -> Dict[str, int]:
+        """
+        Fetch symbols the primary sources missed from Yahoo in multi-ticker batches.
+
+        Only the window after each symbol's latest stored date is requested
+        (one bulk latest-date query per table instead of one per symbol).
+
+        Args:
+            price_misses: Symbols without price data from FMP/Alpha Vantage
+            dividend_misses: Symbols without dividend data from FMP/Alpha Vantage
+
+        Returns:
+            Dictionary with recovered symbol counts and Yahoo requests made
+        """
+        stats = {'prices': 0, 'dividends': 0, 'api_calls': 0}
+        if not Config.DATA_FETCH.FALLBACK_TO_YAHOO or not (price_misses or dividend_misses):
+            return stats
+
+        yahoo = self.price_processor.yahoo_client
+        batch_size = Config.DATA_FETCH.YAHOO_BATCH_SIZE
+        logger.info(
+            f"🟣 Yahoo batch fallback: {len(price_misses):,} price / {len(dividend_misses):,} dividend misses "
+            f"({batch_size} tickers per request)"
+        )
+
+        if price_misses:
+            from_dates = IncrementalProcessor.get_bulk_from_dates(price_misses, 'raw_stock_prices', 'date')
+            for symbol, price_data in yahoo.fetch_prices_batch(price_misses, from_dates).items():
+                self._queue_prices(symbol, price_data['data'])
+                stats['prices'] += 1
+            stats['api_calls'] += math.ceil(len(price_misses) / batch_size)
+
+        if dividend_misses:
+            from_dates = IncrementalProcessor.get_bulk_from_dates(dividend_misses, 'raw_dividends', 'ex_date')
+            for symbol, dividend_data in yahoo.fetch_dividends_batch(dividend_misses, from_dates).items():
+                self._queue_dividends(symbol, dividend_data['data'])
+                stats['dividends'] += 1
+            stats['api_calls'] += math.ceil(len(dividend_misses) / batch_size)
+
+        logger.info(f"✅ Yahoo recovered {stats['prices']:,} price and {stats['dividends']:,} dividend symbols")
+        return stats
+
+    def process_batch_aggressive(self, symbols: List[str], resume: bool = False) -> Dict[str, Any]:
         """
         Process symbols with maximum throughput.
 
         Args:
             symbols: List of symbols to process
+            resume: Skip symbols finished by an interrupted run (from the
+                    checkpoint journal) instead of starting fresh
 
         Returns:
             Processing statistics
         """
+        self.journal = CheckpointJournal('aggressive')
+        if resume:
+            symbols = self.journal.resume(symbols)
+        else:
+            self.journal.reset()
+        self._pending = {}
+        self._dividend_symbols = set()
+
         self.start_time = time.time()
         logger.info(f"🚀 AGGRESSIVE MODE: Processing {len(symbols):,} symbols with {self.max_workers} workers")
         logger.info(f"⚡ Target throughput: 700+ API calls/minute")
         logger.info(f"📦 Batch write size: {self.write_batch_size} records")
 
-        # Start background writer thread
-        self.stop_writing.clear()
-        self.writer_thread = threading.Thread(target=self._batch_writer, daemon=True)
-        self.writer_thread.start()
+        # Start writer workers
+        self.price_writer = BatchWriter('raw_stock_prices', batch_size=self.write_batch_size,
+                                        on_flush=self._on_flush, on_dead_letter=self._on_dead_letter)
+        self.dividend_writer = BatchWriter('raw_dividends', batch_size=self.write_batch_size,
+                                           on_flush=self._on_dividend_flush, on_dead_letter=self._on_dead_letter)
+        self.price_writer.start()
+        self.dividend_writer.start()
 
         # Process symbols in parallel
         results = []
@@ -218,39 +273,72 @@ class AggressiveProcessor:
         successful_dividends = 0
         total_api_calls = 0
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all symbols
-            futures = {executor.submit(self._process_symbol_aggressive, symbol): symbol
-                      for symbol in symbols}
-
-            # Collect results with progress logging every 100 symbols
-            for i, future in enumerate(as_completed(futures), 1):
-                try:
-                    result = future.result()
-                    results.append(result)
-
-                    if result['price_success']:
-                        successful_prices += 1
-                    if result['dividend_success']:
-                        successful_dividends += 1
-                    total_api_calls += result['api_calls']
-
-                    # Log progress every 100 symbols
-                    if i % 100 == 0:
-                        elapsed = time.time() - self.start_time
-                        rate = total_api_calls / (elapsed / 60) if elapsed > 0 else 0
-                        logger.info(
-                            f"📊 Progress: {i:,}/{len(symbols):,} symbols "
-                            f"({rate:.0f} API calls/min)"
-                        )
-
-                except Exception as e:
-                    logger.error(f"❌ Error: {e}")
-
-        # Stop background writer and wait for final flush
-        self.stop_writing.set()
-        if self.writer_thread:
-            self.writer_thread.join(timeout=30)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # Submit all symbols
+                futures = {executor.submit(self._process_symbol_aggressive, symbol): symbol
+                          for symbol in symbols}
+
+                # Collect results with progress logging every 100 symbols
+                for i, future in enumerate(as_completed(futures), 1):
+                    try:
+                        result = future.result()
+                        results.append(result)
+
+                        if result['price_success']:
+                            successful_prices += 1
+                        if result['dividend_success']:
+                            successful_dividends += 1
+                        if result['price_success'] and result['dividend_success']:
+                            # Price or dividend misses finish after the Yahoo batch fallback
+                            self._finish_symbol(result['symbol'])
+                        total_api_calls += result['api_calls']
+
+                        # Log progress every 100 symbols
+                        if i % 100 == 0:
+                            elapsed = time.time() - self.start_time
+                            rate = total_api_calls / (elapsed / 60) if elapsed > 0 else 0
+                            publish_stats('aggressive', {
+                                'symbols_done': i,
+                                'total_symbols': len(symbols),
+                                'successful_prices': successful_prices,
+                                'successful_dividends': successful_dividends,
+                                'total_api_calls': total_api_calls,
+                                'api_calls_per_minute': rate
+                            })
+                            logger.info(
+                                f"📊 Progress: {i:,}/{len(symbols):,} symbols "
+                                f"({rate:.0f} API calls/min)"
+                            )
+
+                    except Exception as e:
+                        logger.error(f"❌ Error: {e}")
+
+            # Symbols the primary sources missed go to Yahoo in multi-ticker batches
+            price_misses = [r['symbol'] for r in results if not r['price_success']]
+            dividend_misses = [r['symbol'] for r in results if not r['dividend_success']]
+            yahoo_stats = self._yahoo_batch_fallback(price_misses, dividend_misses)
+            for symbol in dict.fromkeys(price_misses + dividend_misses):
+                self._finish_symbol(symbol)
+            successful_prices += yahoo_stats['prices']
+            successful_dividends += yahoo_stats['dividends']
+            total_api_calls += yahoo_stats['api_calls']
+        finally:
+            # Drain writers (final flush of partial batches) and flush the journal even
+            # if the run fails, so queued rows are written and --resume starts from here
+            try:
+                price_writes = self.price_writer.close()
+                dividend_writes = self.dividend_writer.close()
+
+                # Keep divv_dividend_streaks current for the symbols whose dividends changed
+                streaks_refreshed = self.dividend_processor.refresh_streaks(self._dividend_symbols)
+            finally:
+                self.journal.close()
+
+        # Dead-lettered rows keep the journal: --resume re-fetches only those symbols
+        if not (price_writes['dead_lettered'] or dividend_writes['dead_lettered']):
+            # Every symbol is durable now; the next run starts fresh
+            self.journal.complete()
 
         # Final statistics
         elapsed = time.time() - self.start_time
@@ -263,8 +351,12 @@ class AggressiveProcessor:
             'total_api_calls': total_api_calls,
             'duration_seconds': elapsed,
             'api_calls_per_minute': api_rate,
-            'throughput_percentage': (api_rate / 750) * 100 if api_rate > 0 else 0
+            'throughput_percentage': (api_rate / 750) * 100 if api_rate > 0 else 0,
+            'price_writes': price_writes,
+            'dividend_writes': dividend_writes,
+            'streaks_refreshed': streaks_refreshed
         }
+        publish_stats('aggressive', {**summary, 'symbols_done': len(symbols)})
 
         logger.info("")
         logger.info("=" * 70)
@@ -274,6 +366,17 @@ class AggressiveProcessor:
         logger.info(f"✅ Successful: {successful_prices:,} prices, {successful_dividends:,} dividends")
         logger.info(f"📡 API calls: {total_api_calls:,} total")
         logger.info(f"⚡ Throughput: {api_rate:.0f} API calls/minute ({summary['throughput_percentage']:.1f}% of limit)")
+        logger.info(
+            f"💾 Written: {price_writes['written']:,} prices, {dividend_writes['written']:,} dividends "
+            f"(writers blocked fetchers {price_writes['blocked_puts'] + dividend_writes['blocked_puts']:,} times)"
+        )
+        dead_lettered = price_writes['dead_lettered'] + dividend_writes['dead_lettered']
+        if dead_lettered:
+            logger.warning(
+                f"💀 {dead_lettered:,} records dead-lettered to {self.price_writer.dead_letter_dir}/ "
+                f"(rerun with --resume to re-fetch the affected symbols)"
+            )
+        GlobalRateLimiters.log_usage()
         logger.info("=" * 70)
 
         return summary
@@ -238,7 +238,7 @@ class AUMDiscoveryProcessor:
                         ORDER BY date DESC
                         LIMIT 1
                     """
-                    result = supabase_raw_query(query, (symbol,))
+                    result = supabase_raw_query(query, (symbol,), prepare='latest_price_date')
 
                     if result and len(result) > 0:
                         latest_date = result[0]['date']
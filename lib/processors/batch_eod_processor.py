@@ -8,18 +8,36 @@ Target: 1-2 minutes for daily update (vs 60+ minutes for full historical fetch)
 """
 
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from datetime import date, datetime, timedelta
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 
 from lib.core.config import Config
 from lib.data_sources.fmp_client import FMPClient
 from lib.data_sources.yahoo_client import YahooClient
 from supabase_helpers import supabase_batch_upsert
-from lib.core.models import StockPrice, Dividend
+from lib.core.record_batch import MAX_BIGINT_VALUE, PriceBatch
+from lib.processors.dividend_processor import DividendProcessor
+from lib.utils.performance_monitor import publish_stats
+from lib.utils.security_classifier import load_classified_symbols, split_special_securities, summarize_exclusions
 
 logger = logging.getLogger(__name__)
 
+# Database field limit: numeric(12,4) can hold -99999999.9999 to 99999999.9999
+MAX_NUMERIC_VALUE = 99999999.0  # Use integer part only for safety
+
+
+def _cap_value(value, max_val=MAX_NUMERIC_VALUE):
+    """Cap numeric values to the database column range."""
+    if value is None:
+        return None
+    if abs(value) > max_val:
+        return max_val if value > 0 else -max_val
+    return value
+
 
 class BatchEODProcessor:
     """
@@ -33,6 +51,7 @@ class BatchEODProcessor:
         """Initialize batch EOD processor."""
         self.fmp_client = FMPClient()
         self.yahoo_client = YahooClient()
+        self.dividend_processor = DividendProcessor(fmp_client=self.fmp_client, yahoo_client=self.yahoo_client)
 
         # Statistics
         self.stats = {
@@ -40,6 +59,7 @@ class BatchEODProcessor:
             'prices_updated': 0,
             'dividends_updated': 0,
             'api_calls': 0,
+            'invalid_quotes': 0,
             'start_time': None,
             'end_time': None
         }
@@ -74,56 +94,18 @@ class BatchEODProcessor:
         # Step 0: Get symbol list if not provided
         if symbols is None:
             logger.info("📊 Fetching symbol list from database...")
-            from supabase_helpers import supabase_select
-            result = supabase_select('raw_stocks', columns='symbol', order_by='symbol')
-            all_symbols = [row['symbol'] for row in result] if result else []
-
-            # Filter out warrants, units, and other special securities
-            # Common patterns for special securities:
-            # - Warrants: end in W, WS, WT (with or without separator)
-            # - Units: end in U, UN, UU (with or without separator)
-            # - Rights: end in R, RT (with or without separator)
-            # - Special classes: XX, FX suffixes (often money market/mutual funds)
+            categories = load_classified_symbols()
+            all_symbols = list(categories)
 
+            # Filter out warrants, units, rights, money market funds and
+            # foreign listings (categories cached in raw_stocks)
             original_count = len(all_symbols)
-            symbols = []
-            excluded = []
-
-            for symbol in all_symbols:
-                is_excluded = False
-
-                # Pattern 1: Ends with separator + suffix (SYMBOL-W, SYMBOL.U)
-                if any(symbol.endswith(sep + suf) for sep in ['-', '.']
-                       for suf in ['W', 'WS', 'WT', 'U', 'UN', 'UU', 'R', 'RT']):
-                    is_excluded = True
-
-                # Pattern 2: Ends with U (units) - ARBGU, ARCKU, ARGUU
-                # Only if symbol is long enough and ends with U
-                elif len(symbol) >= 5 and symbol.endswith('U') and symbol[-2].isalpha():
-                    # Check if it's likely a unit (ends in U or UU)
-                    if symbol.endswith('UU') or (symbol.endswith('U') and not symbol.endswith('RU')):
-                        is_excluded = True
-
-                # Pattern 3: Ends with W (warrants) - ARCKW, ARGUW, ASPSW
-                elif len(symbol) >= 5 and symbol.endswith('W') and symbol[-2].isalpha():
-                    is_excluded = True
-
-                # Pattern 4: Money market funds and special funds (XX, FX suffix)
-                elif symbol.endswith('XX') or symbol.endswith('FX'):
-                    is_excluded = True
-
-                # Pattern 5: Contains .V (foreign exchanges we may not have data for)
-                elif '.V' in symbol or '.TO' in symbol:
-                    is_excluded = True
-
-                if is_excluded:
-                    excluded.append(symbol)
-                else:
-                    symbols.append(symbol)
+            symbols, excluded = split_special_securities(all_symbols, categories)
 
             logger.info(f"✅ Found {original_count:,} symbols in database")
             if excluded:
                 logger.info(f"🚫 Excluded {len(excluded):,} warrants/units/rights from price updates")
+                logger.info(f"   ({summarize_exclusions(excluded, categories)})")
                 logger.info(f"📊 Processing {len(symbols):,} regular securities")
 
         if not symbols:
@@ -133,18 +115,50 @@ class BatchEODProcessor:
         self.stats['total_symbols'] = len(symbols)
 
         # Step 1: Fetch batch quotes (500 symbols per API call)
+        # Step 2: Convert each chunk to a columnar PriceBatch and batch upsert it
+        chunk_size = Config.DATA_FETCH.BATCH_QUOTE_CHUNK_SIZE
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
         logger.info(f"📊 Fetching batch quotes for {len(symbols):,} symbols...")
-        logger.info(f"💡 This will require {(len(symbols) + 499) // 500} API calls (500 symbols each)")
+        logger.info(f"💡 This will require {len(chunks)} API calls ({chunk_size} symbols each)")
 
-        all_quote_data = {}
-        batch_size = 500
+        if Config.DATA_FETCH.PIPELINE_BATCH_QUOTES:
+            quotes_received = self._process_quotes_pipelined(chunks)
+        else:
+            quotes_received = self._process_quotes_serial(chunks)
+
+        if not quotes_received:
+            logger.error("❌ No quote data received")
+            return self._finalize_stats()
+
+        if self.stats['invalid_quotes'] > 0:
+            logger.info(f"⚠️ Skipped {self.stats['invalid_quotes']:,} invalid price records")
+        logger.info(f"✅ Received quotes for {quotes_received:,} symbols")
+        logger.info(f"✅ Upserted {self.stats['prices_updated']:,} prices")
+
+        logger.info("")
+
+        # Step 3: Refresh dividends from the dividend calendar (one calendar
+        # request plus one request per symbol with a new event)
+        logger.info("💰 Checking for recent dividend updates...")
+        self._refresh_dividends(target_date)
+
+        return self._finalize_stats()
+
+    def _process_quotes_serial(self, chunks: List[List[str]]) -> int:
+        """
+        Fetch every quote chunk first, then convert and upsert in one pass.
 
-        for i in range(0, len(symbols), batch_size):
-            batch_symbols = symbols[i:i+batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (len(symbols) + batch_size - 1) // batch_size
+        Args:
+            chunks: Symbol chunks, one batch quote call each
 
-            logger.info(f"📦 Fetching batch {batch_num}/{total_batches} ({len(batch_symbols)} symbols)...")
+        Returns:
+            Number of symbols that returned a quote
+        """
+        all_quote_data = {}
+
+        for batch_num, batch_symbols in enumerate(chunks, 1):
+            logger.info(f"📦 Fetching batch {batch_num}/{len(chunks)} ({len(batch_symbols)} symbols)...")
 
             batch_data = self.fmp_client.fetch_batch_quote(batch_symbols)
             self.stats['api_calls'] += 1
@@ -155,224 +169,183 @@ class BatchEODProcessor:
             else:
                 logger.warning(f"⚠️  Batch {batch_num} returned no data")
 
-        if not all_quote_data:
-            logger.error("❌ No quote data received")
-            return self._finalize_stats()
+        if all_quote_data:
+            logger.info("💾 Processing and upserting prices to database...")
+            self._write_quotes(all_quote_data)
 
-        logger.info(f"✅ Received quotes for {len(all_quote_data):,} symbols")
-        logger.info("")
+        return len(all_quote_data)
 
-        # Step 2: Convert to StockPrice models and batch upsert
-        logger.info("💾 Processing and upserting prices to database...")
-        price_records = []
-        stock_updates = []  # For fundamental data updates to raw_stocks
-        today = date.today()
-        invalid_count = 0
+    def _process_quotes_pipelined(self, chunks: List[List[str]]) -> int:
+        """
+        Fetch quote chunks concurrently and write each one as soon as it arrives.
 
-        for symbol, quote_data in all_quote_data.items():
-            try:
-                # Database field limit: numeric(12,4) can hold -99999999.9999 to 99999999.9999
-                MAX_NUMERIC_VALUE = 99999999.0  # Use integer part only for safety
-
-                # Helper function to cap numeric values
-                def cap_value(value, max_val=MAX_NUMERIC_VALUE):
-                    if value is None:
-                        return None
-                    if abs(value) > max_val:
-                        return max_val if value > 0 else -max_val
-                    return value
-
-                # Volume is bigint (integer) - ensure it's int not float
-                volume = quote_data.get('volume')
-                if volume is not None:
-                    volume = int(volume) if volume < 9223372036854775807 else 9223372036854775807
+        Fetches run on a small thread pool (each call still goes through the
+        shared FMP rate limiter), while conversion and upserts happen on the
+        calling thread so later chunks stay in flight during database writes.
 
-                # Batch quote returns current/latest price data
-                # We'll use today's date for the record
-                price = StockPrice(
-                    symbol=symbol,
-                    date=today,
-                    open=cap_value(quote_data.get('open')),
-                    high=cap_value(quote_data.get('dayHigh')),
-                    low=cap_value(quote_data.get('dayLow')),
-                    close=cap_value(quote_data.get('price')),
-                    adj_close=cap_value(quote_data.get('price')),  # Quote doesn't have adj_close
-                    volume=volume,
-                    change=cap_value(quote_data.get('change')),
-                    change_percent=cap_value(quote_data.get('changesPercentage'))
-                )
+        Args:
+            chunks: Symbol chunks, one batch quote call each
 
-                if price.is_valid:
-                    price_records.append(price.to_dict())
-                else:
-                    invalid_count += 1
-                    if invalid_count <= 3:  # Show first 3 invalid records
-                        logger.warning(f"⚠️ {symbol}: Invalid price - {price.to_dict()}")
+        Returns:
+            Number of symbols that returned a quote
+        """
+        workers = max(1, min(Config.DATA_FETCH.BATCH_QUOTE_WORKERS, len(chunks)))
+        logger.info(f"⚡ Pipelined fetch: {workers} concurrent batch quote calls")
 
-                # Extract fundamental data for raw_stocks update
-                # This gives us GOOGLEFINANCE parity!
-                avg_volume = quote_data.get('avgVolume')
-                if avg_volume is not None:
-                    avg_volume = int(avg_volume) if avg_volume < 9223372036854775807 else 9223372036854775807
+        quotes_received = 0
+        completed = 0
 
-                shares_outstanding = quote_data.get('sharesOutstanding')
-                if shares_outstanding is not None:
-                    shares_outstanding = int(shares_outstanding) if shares_outstanding < 9223372036854775807 else 9223372036854775807
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.fmp_client.fetch_batch_quote, batch_symbols): batch_num
+                for batch_num, batch_symbols in enumerate(chunks, 1)
+            }
 
-                stock_update = {
-                    'symbol': symbol,
-                    'shares_outstanding': shares_outstanding,
-                    'year_high': cap_value(quote_data.get('yearHigh')),
-                    'year_low': cap_value(quote_data.get('yearLow')),
-                    'avg_volume': avg_volume,
-                    'change': cap_value(quote_data.get('change')),
-                    'change_percent': cap_value(quote_data.get('changesPercentage')),
-                    'previous_close': cap_value(quote_data.get('previousClose')),
-                    'price_avg_50': cap_value(quote_data.get('priceAvg50')),
-                    'price_avg_200': cap_value(quote_data.get('priceAvg200')),
-                    'eps': cap_value(quote_data.get('eps')),
-                    'day_high': cap_value(quote_data.get('dayHigh')),
-                    'day_low': cap_value(quote_data.get('dayLow')),
-                    'open_price': cap_value(quote_data.get('open'))
-                }
-                stock_updates.append(stock_update)
+            for future in as_completed(futures):
+                batch_num = futures[future]
+                completed += 1
+                self.stats['api_calls'] += 1
 
-            except Exception as e:
-                invalid_count += 1
-                if invalid_count <= 3:
-                    logger.warning(f"⚠️ {symbol}: Exception - {e}")
-                continue
+                try:
+                    batch_data = future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️  Batch {batch_num} failed: {e}")
+                    continue
+
+                if not batch_data:
+                    logger.warning(f"⚠️  Batch {batch_num} returned no data")
+                    continue
+
+                quotes_received += len(batch_data)
+                logger.info(
+                    f"📦 Batch {batch_num} ({completed}/{len(chunks)}): "
+                    f"received {len(batch_data)} quotes, writing..."
+                )
+                self._write_quotes(batch_data)
+
+        return quotes_received
 
-        if invalid_count > 0:
-            logger.info(f"⚠️ Skipped {invalid_count:,} invalid price records")
-        logger.info(f"✅ Created {len(price_records):,} valid price records")
-        logger.info(f"✅ Created {len(stock_updates):,} fundamental data updates")
+    def _write_quotes(self, quote_data: Dict[str, Dict[str, Any]]):
+        """
+        Convert batch quote payloads to price records and upsert them.
 
-        # Batch upsert all prices
+        Args:
+            quote_data: Mapping of symbol -> FMP quote data
+        """
+        price_records, stock_updates = self._convert_quotes(quote_data)
+
+        # Batch upsert prices
         if price_records:
-            logger.info(f"📦 Upserting {len(price_records):,} price records...")
             supabase_batch_upsert('raw_stock_prices', price_records, batch_size=1000)
-            self.stats['prices_updated'] = len(price_records)
-            logger.info(f"✅ Upserted {len(price_records):,} prices")
+            self.stats['prices_updated'] += len(price_records)
         else:
             logger.warning("⚠️ No valid price records to upsert!")
 
         # Batch update fundamental data in raw_stocks
         if stock_updates:
-            logger.info(f"📦 Updating {len(stock_updates):,} stocks with fundamental data...")
             supabase_batch_upsert('raw_stocks', stock_updates, batch_size=1000)
-            logger.info(f"✅ Updated fundamental data for {len(stock_updates):,} stocks")
-        else:
-            logger.warning("⚠️ No fundamental data to update!")
 
-        logger.info("")
-
-        # Step 3: Fetch recent dividends (if available via batch)
-        # Note: FMP doesn't have a batch dividend endpoint, so we'll fetch for symbols
-        # that might have dividends (optional optimization)
-        logger.info("💰 Checking for recent dividend updates...")
-        dividend_records = self._fetch_recent_dividends(target_date)
-
-        if dividend_records:
-            logger.info(f"📦 Upserting {len(dividend_records):,} dividend records...")
-            supabase_batch_upsert('raw_dividends', dividend_records, batch_size=1000)
-            self.stats['dividends_updated'] = len(dividend_records)
-            logger.info(f"✅ Upserted {len(dividend_records):,} dividends")
-        else:
-            logger.info("ℹ️  No recent dividends found")
-
-        return self._finalize_stats()
-
-    def _fetch_recent_dividends(self, target_date: date, lookback_days: int = 30) -> List[Dict[str, Any]]:
+    def _convert_quotes(self, quote_data: Dict[str, Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
         """
-        Fetch dividends for recent date range using smart filtering.
-
-        Strategy:
-        1. Query database for symbols that historically pay dividends in this month
-        2. Only fetch dividends for those symbols (reduces API calls from 19K to ~500)
-        3. Use FMP's dividend calendar endpoint for upcoming dividends
+        Convert batch quote payloads to price rows and raw_stocks fundamental updates.
 
         Args:
-            target_date: Target date
-            lookback_days: Days to look back (default 30 for monthly dividends)
+            quote_data: Mapping of symbol -> FMP quote data
 
         Returns:
-            List of dividend records
+            (price_records, stock_updates)
         """
-        from datetime import timedelta
-        from supabase_helpers import supabase_select
-
-        dividend_records = []
-
-        # Step 1: Find symbols that historically pay dividends in this month
-        current_month = target_date.month
-        query = f"""
-            SELECT DISTINCT symbol
-            FROM raw_dividends
-            WHERE EXTRACT(MONTH FROM ex_date) = {current_month}
-            ORDER BY symbol
-        """
-
-        try:
-            # Get symbols that typically pay dividends (from last year's data)
-            from supabase import create_client
-            import os
-
-            supabase = create_client(
-                os.getenv('SUPABASE_URL'),
-                os.getenv('SUPABASE_KEY')
-            )
+        prices = PriceBatch()
+        stock_updates = []  # For fundamental data updates to raw_stocks
+        today = date.today()
 
-            # Query symbols that had dividends in the past year
-            one_year_ago = (target_date - timedelta(days=365)).isoformat()
-            response = supabase.table('raw_dividends')\
-                .select('symbol')\
-                .gte('ex_date', one_year_ago)\
-                .execute()
+        for symbol, quote in quote_data.items():
+            try:
+                # Batch quote returns current/latest price data
+                # We'll use today's date for the record
+                prices.append(
+                    symbol, today,
+                    open=_cap_value(quote.get('open')),
+                    high=_cap_value(quote.get('dayHigh')),
+                    low=_cap_value(quote.get('dayLow')),
+                    close=_cap_value(quote.get('price')),
+                    adj_close=_cap_value(quote.get('price')),  # Quote doesn't have adj_close
+                    volume=quote.get('volume'),  # PriceBatch clamps to bigint
+                    change=_cap_value(quote.get('change')),
+                    change_percent=_cap_value(quote.get('changesPercentage'))
+                )
 
-            dividend_symbols = list(set([row['symbol'] for row in response.data])) if response.data else []
+                # Extract fundamental data for raw_stocks update
+                # This gives us GOOGLEFINANCE parity!
+                avg_volume = quote.get('avgVolume')
+                if avg_volume is not None:
+                    avg_volume = int(avg_volume) if avg_volume < MAX_BIGINT_VALUE else MAX_BIGINT_VALUE
 
-            if not dividend_symbols:
-                logger.info("ℹ️  No symbols found with historical dividend patterns")
-                return []
+                shares_outstanding = quote.get('sharesOutstanding')
+                if shares_outstanding is not None:
+                    shares_outstanding = int(shares_outstanding) if shares_outstanding < MAX_BIGINT_VALUE else MAX_BIGINT_VALUE
 
-            logger.info(f"📊 Found {len(dividend_symbols):,} symbols with dividend history")
-            logger.info(f"💡 Fetching dividends (this will use {len(dividend_symbols):,} API calls)")
+                stock_updates.append({
+                    'symbol': symbol,
+                    'shares_outstanding': shares_outstanding,
+                    'year_high': _cap_value(quote.get('yearHigh')),
+                    'year_low': _cap_value(quote.get('yearLow')),
+                    'avg_volume': avg_volume,
+                    'change': _cap_value(quote.get('change')),
+                    'change_percent': _cap_value(quote.get('changesPercentage')),
+                    'previous_close': _cap_value(quote.get('previousClose')),
+                    'price_avg_50': _cap_value(quote.get('priceAvg50')),
+                    'price_avg_200': _cap_value(quote.get('priceAvg200')),
+                    'eps': _cap_value(quote.get('eps')),
+                    'day_high': _cap_value(quote.get('dayHigh')),
+                    'day_low': _cap_value(quote.get('dayLow')),
+                    'open_price': _cap_value(quote.get('open'))
+                })
 
-            # Step 2: Fetch dividends for these symbols only
-            from lib.core.models import Dividend
+            except Exception as e:
+                self.stats['invalid_quotes'] += 1
+                if self.stats['invalid_quotes'] <= 3:
+                    logger.warning(f"⚠️ {symbol}: Exception - {e}")
+                continue
 
-            for i, symbol in enumerate(dividend_symbols):
-                if (i + 1) % 100 == 0:
-                    logger.info(f"📦 Fetching dividends {i+1}/{len(dividend_symbols)}...")
+        # Validate and serialize all quotes at once
+        price_records = prices.to_rows()
+        invalid = prices.invalid_count
+        if invalid:
+            # Show first 3 invalid records
+            shown = max(0, 3 - self.stats['invalid_quotes'])
+            for index in np.flatnonzero(~prices.valid_mask())[:shown]:
+                record = prices.row(index)
+                logger.warning(f"⚠️ {record['symbol']}: Invalid price - {record}")
+            self.stats['invalid_quotes'] += invalid
 
-                try:
-                    # Fetch recent dividends for this symbol
-                    dividends = self.fmp_client.fetch_dividends(symbol)
-                    self.stats['api_calls'] += 1
-
-                    if dividends:
-                        # Filter to recent dividends only
-                        start_date = target_date - timedelta(days=lookback_days)
-                        for div_data in dividends:
-                            try:
-                                dividend = Dividend.from_fmp(div_data)
-                                if dividend.date >= start_date:
-                                    dividend_records.append(dividend.to_dict())
-                            except Exception as e:
-                                continue
+        return price_records, stock_updates
 
-                except Exception as e:
-                    logger.warning(f"⚠️  Failed to fetch dividends for {symbol}: {e}")
-                    continue
+    def _refresh_dividends(self, target_date: date, lookback_days: int = 30, days_ahead: int = 90):
+        """
+        Refresh recent and upcoming dividends around the target date.
 
-            logger.info(f"✅ Collected {len(dividend_records):,} dividend records")
+        The FMP dividend calendar for the window decides which symbols have
+        new events; only those are fetched (see DividendProcessor.refresh_from_calendar).
 
+        Args:
+            target_date: Target date
+            lookback_days: Days to look back for events that went ex
+            days_ahead: Days ahead for upcoming events
+        """
+        try:
+            refresh = self.dividend_processor.refresh_from_calendar(
+                target_date - timedelta(days=lookback_days),
+                target_date + timedelta(days=days_ahead)
+            )
         except Exception as e:
-            logger.error(f"❌ Error fetching dividends: {e}")
-            return []
+            logger.error(f"❌ Error refreshing dividends: {e}")
+            return
 
-        return dividend_records
+        self.stats['api_calls'] += refresh['api_calls']
+        self.stats['dividends_updated'] = refresh['dividends_upserted']
+        if not refresh['dividends_upserted']:
+            logger.info("ℹ️  No new recent dividends found")
 
     def _finalize_stats(self) -> Dict[str, Any]:
         """Calculate final statistics."""
@@ -384,6 +357,7 @@ class BatchEODProcessor:
         # If we had fetched individually: total_symbols * 2 (price + dividend)
         equivalent_calls = self.stats['total_symbols'] * 2
         equivalent_rate = (equivalent_calls / duration) * 60 if duration > 0 else 0
+        publish_stats('batch_eod', {**self.stats, 'duration_seconds': duration})
 
         logger.info("")
         logger.info("=" * 70)
@@ -0,0 +1,269 @@
+"""
+Batch Writer
+
+Bounded, multi-worker write stage for high-throughput ingestion.
+
+Fetch workers put records on a bounded queue and block when it is full,
+so a slow database throttles fetching instead of growing memory. Writer
+workers drain the queue into batches that flush on size or age, upsert
+them concurrently, retry failures with backoff and append batches that
+still fail to a dead-letter JSONL file for replay.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from queue import Queue, Empty, Full
+from typing import Any, Callable, Dict, List, Optional
+
+from lib.core.config import Config
+from lib.utils.performance_monitor import record_queue_depth
+from supabase_helpers import supabase_batch_upsert
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Bounded batching writer for one table.
+
+    Usage:
+        writer = BatchWriter('raw_stock_prices', batch_size=2000)
+        writer.start()
+
+        writer.put(record)     # Blocks while the queue is full
+        ...
+
+        stats = writer.close()  # Flush remaining batches and stop workers
+    """
+
+    def __init__(self, table: str, batch_size: int = None, flush_interval: float = None,
+                 workers: int = None, max_queue_size: int = None, max_retries: int = None,
+                 dead_letter_dir: str = None,
+                 write_fn: Callable[[str, List[Dict]], int] = None,
+                 on_flush: Callable[[List[Dict]], None] = None,
+                 on_dead_letter: Callable[[List[Dict]], None] = None):
+        """
+        Initialize writer.
+
+        Args:
+            table: Target table
+            batch_size: Records per write (default: DatabaseConfig.AGGRESSIVE_BATCH_SIZE)
+            flush_interval: Max seconds a partial batch waits before flushing
+            workers: Concurrent writer threads
+            max_queue_size: Queue bound in records (default: WRITER_QUEUE_BATCHES batches per worker)
+            max_retries: Retries per failed batch before dead-lettering
+            dead_letter_dir: Directory for <table>.jsonl dead-letter files
+            write_fn: Function(table, records) -> rows written (default: supabase_batch_upsert)
+            on_flush: Called with each batch once it is written, e.g. to journal
+                      finished symbols
+            on_dead_letter: Called with each batch that was dead-lettered instead
+        """
+        db_config = Config.DATABASE
+        self.table = table
+        self.batch_size = batch_size or db_config.AGGRESSIVE_BATCH_SIZE
+        self.flush_interval = flush_interval or db_config.WRITER_FLUSH_INTERVAL
+        self.workers = workers or db_config.WRITER_WORKERS_PER_TABLE
+        self.max_queue_size = max_queue_size or self.batch_size * self.workers * db_config.WRITER_QUEUE_BATCHES
+        self.max_retries = max_retries if max_retries is not None else db_config.WRITER_MAX_RETRIES
+        self.dead_letter_dir = dead_letter_dir or db_config.DEAD_LETTER_DIR
+        self.write_fn = write_fn or (lambda tbl, records: supabase_batch_upsert(tbl, records, batch_size=len(records)))
+        self.on_flush = on_flush
+        self.on_dead_letter = on_dead_letter
+
+        self.queue: Queue = Queue(maxsize=self.max_queue_size)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'queued': 0,
+            'written': 0,
+            'batches': 0,
+            'retries': 0,
+            'failed_batches': 0,
+            'dead_lettered': 0,
+            'blocked_puts': 0,
+            'max_queue_depth': 0
+        }
+
+    def start(self):
+        """Start writer worker threads."""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"writer-{self.table}-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def put(self, record: Dict[str, Any]):
+        """
+        Queue one record, blocking while the queue is full (backpressure).
+
+        Args:
+            record: Row to upsert
+        """
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            with self._lock:
+                self.stats['blocked_puts'] += 1
+            self.queue.put(record)
+
+        with self._lock:
+            self.stats['queued'] += 1
+            depth = self.queue.qsize()
+            if depth > self.stats['max_queue_depth']:
+                self.stats['max_queue_depth'] = depth
+        record_queue_depth(self.table, depth)
+
+    def put_many(self, records: List[Dict[str, Any]]):
+        """Queue several records."""
+        for record in records:
+            self.put(record)
+
+    def _worker(self):
+        """Drain the queue into batches flushed by size or age."""
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except Empty:
+                item = None
+
+            if item is _STOP:
+                break
+
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        """Write one batch (retrying, then dead-lettering) and report the outcome."""
+        written = self._write_with_retry(batch)
+        record_queue_depth(self.table, self.queue.qsize())
+        callback = self.on_flush if written else self.on_dead_letter
+        if callback:
+            try:
+                callback(batch)
+            except Exception as e:
+                logger.error(f"❌ Flush callback failed for {self.table}: {e}")
+
+    def _write_with_retry(self, batch: List[Dict[str, Any]]) -> bool:
+        """Write one batch with retry; dead-letter it if all attempts fail. True if written."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                written = self.write_fn(self.table, batch)
+                # supabase_batch_upsert logs and swallows errors; nothing written means failure
+                if written:
+                    with self._lock:
+                        self.stats['written'] += len(batch)
+                        self.stats['batches'] += 1
+                    logger.info(f"📦 Wrote {len(batch)} records to {self.table}")
+                    return True
+                error = "no rows written"
+            except Exception as e:
+                error = str(e)
+
+            if attempt < self.max_retries:
+                with self._lock:
+                    self.stats['retries'] += 1
+                wait_time = 2 ** attempt
+                logger.warning(
+                    f"⚠️ Write to {self.table} failed ({error}), retry {attempt + 1}/{self.max_retries} in {wait_time}s"
+                )
+                time.sleep(wait_time)
+
+        with self._lock:
+            self.stats['failed_batches'] += 1
+        logger.error(f"❌ Giving up on {len(batch)} {self.table} records after {self.max_retries} retries: {error}")
+        self._dead_letter(batch, error)
+        return False
+
+    def _dead_letter(self, batch: List[Dict[str, Any]], error: str):
+        """Append a failed batch to <dead_letter_dir>/<table>.jsonl."""
+        try:
+            os.makedirs(self.dead_letter_dir, exist_ok=True)
+            path = os.path.join(self.dead_letter_dir, f"{self.table}.jsonl")
+            failed_at = datetime.now().isoformat()
+            with self._lock:
+                with open(path, 'a') as f:
+                    for record in batch:
+                        f.write(json.dumps({'failed_at': failed_at, 'error': error, 'record': record}, default=str) + '\n')
+                self.stats['dead_lettered'] += len(batch)
+            logger.error(f"💀 Dead-lettered {len(batch)} records to {path}")
+        except Exception as e:
+            logger.error(f"❌ Could not write dead-letter file for {self.table}: {e}")
+
+    def close(self, timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        Flush all queued records and stop the workers.
+
+        Args:
+            timeout: Optional seconds to wait for each worker
+
+        Returns:
+            Writer statistics
+        """
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        return self.get_stats()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get a snapshot of writer statistics."""
+        with self._lock:
+            return dict(self.stats)
+
+
+def replay_dead_letters(table: str, dead_letter_dir: str = None, batch_size: int = 1000) -> int:
+    """
+    Re-upsert records from a dead-letter file and remove it on success.
+
+    Args:
+        table: Table whose dead-letter file to replay
+        dead_letter_dir: Dead-letter directory (default: DatabaseConfig.DEAD_LETTER_DIR)
+        batch_size: Records per upsert
+
+    Returns:
+        Number of records written
+    """
+    path = os.path.join(dead_letter_dir or Config.DATABASE.DEAD_LETTER_DIR, f"{table}.jsonl")
+    if not os.path.exists(path):
+        return 0
+
+    with open(path) as f:
+        records = [json.loads(line)['record'] for line in f if line.strip()]
+
+    written = supabase_batch_upsert(table, records, batch_size=batch_size)
+    if written >= len(records):
+        os.remove(path)
+        logger.info(f"✅ Replayed {len(records)} dead-lettered records into {table}")
+    else:
+        logger.warning(f"⚠️ Replayed {written}/{len(records)} dead-lettered records into {table}; keeping {path}")
+    return written
+
+
+__all__ = ['BatchWriter', 'replay_dead_letters']
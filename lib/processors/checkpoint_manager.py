@@ -2,18 +2,163 @@
 Checkpoint Manager for Progress Tracking and Error Recovery
 
 Provides automatic checkpointing and recovery for long-running batch operations.
+
+Resumable runs use an append-only journal (one JSON line per finished item)
+instead of snapshot files: marking an item done is a single atomic append,
+a killed run loses at most a torn final line, and resume is one sequential
+read into a set.
 """
 
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
 from datetime import datetime
 from pathlib import Path
 
+from lib.core.config import Config
+
 logger = logging.getLogger(__name__)
 
 
+class CheckpointJournal:
+    """
+    Append-only journal of finished items for one resumable run.
+
+    Usage:
+        journal = CheckpointJournal('aggressive')
+        remaining = journal.resume(all_symbols)   # or journal.reset() for a fresh run
+
+        journal.mark_done('AAPL')                 # O(1) atomic append
+        ...
+        journal.complete()                        # Run finished; next run starts fresh
+    """
+
+    def __init__(self, checkpoint_type: str, checkpoint_dir: Optional[str] = None,
+                 fsync_every: Optional[int] = None):
+        """
+        Initialize journal.
+
+        Args:
+            checkpoint_type: Run type (e.g., 'aggressive', 'prices')
+            checkpoint_dir: Directory for <type>.journal files (default: ProcessingConfig.CHECKPOINT_DIR)
+            fsync_every: Entries between fsyncs (default: ProcessingConfig.CHECKPOINT_FSYNC_EVERY)
+        """
+        self.checkpoint_type = checkpoint_type
+        self.checkpoint_dir = Path(checkpoint_dir or Config.PROCESSING.CHECKPOINT_DIR)
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.checkpoint_dir / f"{checkpoint_type}.journal"
+        self.fsync_every = fsync_every or Config.PROCESSING.CHECKPOINT_FSYNC_EVERY
+
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self.done_count = 0
+
+    def _append(self, entry: Dict[str, Any]):
+        """Append one entry as a single O_APPEND write (atomic for a line)."""
+        line = (json.dumps(entry, separators=(',', ':'), default=str) + '\n').encode()
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+                size = os.fstat(self._fd).st_size
+                if size and os.pread(self._fd, 1, size - 1) != b'\n':
+                    # Terminate a line torn by a crash so only that entry is lost
+                    os.write(self._fd, b'\n')
+            os.write(self._fd, line)
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                os.fsync(self._fd)
+                self._unsynced = 0
+
+    def mark_done(self, item: str, **info):
+        """
+        Record an item as finished.
+
+        Args:
+            item: Item identifier (e.g., symbol)
+            **info: Optional details stored with the entry
+        """
+        entry = {'item': item}
+        entry.update(info)
+        self._append(entry)
+        self.done_count += 1
+
+    def mark_many(self, items: Iterable[str]):
+        """Record several items as finished."""
+        for item in items:
+            self.mark_done(item)
+
+    def processed(self) -> Set[str]:
+        """
+        Read the set of finished items.
+
+        Lines that fail to parse (a write torn by a crash) are skipped.
+
+        Returns:
+            Set of item identifiers
+        """
+        items = set()
+        if not self.path.exists():
+            return items
+
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if 'item' in entry:
+                    items.add(entry['item'])
+        return items
+
+    def resume(self, all_items: List[str]) -> List[str]:
+        """
+        Get items not finished by the interrupted run, in input order.
+
+        Args:
+            all_items: Complete list of items to process
+
+        Returns:
+            List of remaining items
+        """
+        processed = self.processed()
+        if not processed:
+            logger.info(f"📝 No {self.checkpoint_type} journal to resume - processing all {len(all_items):,} items")
+            return list(all_items)
+
+        remaining = [item for item in all_items if item not in processed]
+        logger.info(
+            f"📂 Resuming {self.checkpoint_type} run: {len(all_items) - len(remaining):,} already done, "
+            f"{len(remaining):,} remaining"
+        )
+        return remaining
+
+    def reset(self):
+        """Discard the journal and start a fresh run."""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.done_count = 0
+
+    def close(self):
+        """Flush the journal to disk and close it."""
+        with self._lock:
+            if self._fd is not None:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
+                self._unsynced = 0
+
+    def complete(self):
+        """Mark the run as finished; the next run starts fresh."""
+        logger.info(f"✅ {self.checkpoint_type} run complete ({self.done_count:,} items journaled)")
+        self.reset()
+
+
 class CheckpointManager:
     """
     Manages checkpoints for resumable batch processing.
@@ -106,9 +251,35 @@ class CheckpointManager:
             logger.error(f"❌ Failed to load checkpoint: {e}")
             return None
 
+    def journal(self, checkpoint_type: str) -> CheckpointJournal:
+        """
+        Get the append-only journal for a checkpoint type.
+
+        Args:
+            checkpoint_type: Type of checkpoint
+
+        Returns:
+            CheckpointJournal stored in this manager's directory
+        """
+        return CheckpointJournal(checkpoint_type, str(self.checkpoint_dir))
+
+    def mark_processed(self, checkpoint_type: str, items: Iterable[str]):
+        """
+        Append finished items to the checkpoint journal (no snapshot rewrite).
+
+        Args:
+            checkpoint_type: Type of checkpoint
+            items: Finished item identifiers
+        """
+        journal = self.journal(checkpoint_type)
+        try:
+            journal.mark_many(items)
+        finally:
+            journal.close()
+
     def get_processed_items(self, checkpoint_type: str) -> List[str]:
         """
-        Get list of already processed items from checkpoint.
+        Get list of already processed items from the journal and latest checkpoint.
 
         Args:
             checkpoint_type: Type of checkpoint
@@ -116,13 +287,13 @@ class CheckpointManager:
         Returns:
             List of processed item identifiers
         """
-        checkpoint = self.load_checkpoint(checkpoint_type)
+        processed = self.journal(checkpoint_type).processed()
 
-        if not checkpoint:
-            return []
+        checkpoint = self.load_checkpoint(checkpoint_type)
+        if checkpoint:
+            processed.update(checkpoint.get('data', {}).get('processed_items', []))
 
-        data = checkpoint.get('data', {})
-        return data.get('processed_items', [])
+        return list(processed)
 
     def save_progress(self,
                      checkpoint_type: str,
@@ -328,4 +499,4 @@ class ProgressTracker:
 
 
 # Export main classes
-__all__ = ['CheckpointManager', 'ProgressTracker']
+__all__ = ['CheckpointManager', 'CheckpointJournal', 'ProgressTracker']
@@ -6,16 +6,17 @@ Handles hybrid fetching with fallback logic and future dividend calendar.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 from datetime import date, datetime, timedelta
 
 from lib.core.config import Config
 from lib.core.models import Dividend, ProcessingStats
+from lib.core.record_batch import DividendBatch
 from lib.data_sources.fmp_client import FMPClient
 from lib.data_sources.yahoo_client import YahooClient
 from lib.data_sources.alpha_vantage_client import AlphaVantageClient
 from lib.processors.incremental_processor import IncrementalProcessor
-from supabase_helpers import supabase_batch_upsert
+from supabase_helpers import supabase_batch_upsert, supabase_select, get_supabase_admin_client
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,7 @@ class DividendProcessor:
     - Hybrid fetching with fallback logic
     - Historical and future dividends
     - Batch database operations
+    - Incremental dividend streak refresh
     - Statistics tracking
     """
 
@@ -48,10 +50,12 @@ class DividendProcessor:
         self.av_client = av_client or AlphaVantageClient()
 
         self.stats = ProcessingStats()
+        self._streaks_pending = set()  # Symbols with stored dividends awaiting a streak refresh
 
     def fetch_dividends(self, symbol: str,
                        from_date: Optional[date] = None,
-                       use_hybrid: bool = True) -> Optional[Dict[str, Any]]:
+                       use_hybrid: bool = True,
+                       use_yahoo: bool = True) -> Optional[Dict[str, Any]]:
         """
         Fetch dividend data with hybrid fallback strategy.
 
@@ -64,6 +68,8 @@ class DividendProcessor:
             symbol: Stock/ETF symbol
             from_date: Optional start date
             use_hybrid: Enable hybrid fallback (default: True)
+            use_yahoo: Allow the per-symbol Yahoo fallback (disable when
+                       misses go through YahooClient batch downloads instead)
 
         Returns:
             Dictionary with dividend data or None
@@ -91,7 +97,7 @@ class DividendProcessor:
                 logger.debug(f"⚠️  {symbol}: Alpha Vantage dividends failed - {e}")
 
         # Final fallback to Yahoo Finance
-        if use_hybrid and Config.DATA_FETCH.FALLBACK_TO_YAHOO:
+        if use_hybrid and use_yahoo and Config.DATA_FETCH.FALLBACK_TO_YAHOO:
             try:
                 dividends = self.yahoo_client.fetch_dividends(symbol, from_date=from_date)
                 if dividends and dividends.get('data'):
@@ -199,6 +205,7 @@ class DividendProcessor:
             )
 
             if result:
+                self._streaks_pending.add(symbol)
                 logger.info(
                     f"✅ {symbol}: Stored {len(dividend_records)} dividend records "
                     f"(source: {dividend_data['source']})"
@@ -243,6 +250,7 @@ class DividendProcessor:
             )
             results[symbol] = success
 
+        self.refresh_streaks()
         self.stats.complete()
 
         logger.info(
@@ -337,6 +345,216 @@ class DividendProcessor:
             logger.error(f"❌ Future dividend storage error: {e}")
             return False
 
+    @staticmethod
+    def _stored_dividends(from_date: date, to_date: date) -> Dict[tuple, float]:
+        """Stored (symbol, ex_date) -> amount in raw_dividends for a window (one paginated query)."""
+        rows = supabase_select(
+            Config.DATABASE.TABLE_DIVIDEND_HISTORY,
+            'symbol,ex_date,amount',
+            where_clause={
+                'condition': 'ex_date >= %s AND ex_date <= %s',
+                'params': [from_date.isoformat(), to_date.isoformat()]
+            }
+        )
+        stored = {}
+        for row in rows:
+            try:
+                stored[(row['symbol'], str(row['ex_date'])[:10])] = float(row['amount'])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return stored
+
+    def refresh_from_calendar(self,
+                              from_date: date,
+                              to_date: date,
+                              symbols: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Refresh dividends for a window, driven by the FMP dividend calendar.
+
+        One calendar request lists every event in the window. Events that
+        have gone ex and are missing from raw_dividends (or changed amount)
+        decide which symbols are re-fetched, concurrently under the FMP
+        limiter; upcoming events go straight to the future dividends table.
+        Everything is bulk-upserted.
+
+        Args:
+            from_date: Window start (e.g. 30 days ago)
+            to_date: Window end (e.g. 90 days ahead)
+            symbols: Optional universe to restrict events to
+
+        Returns:
+            Dictionary with calendar, fetch and upsert counts
+        """
+        stats = {
+            'calendar_events': 0,
+            'new_events': 0,
+            'symbols_fetched': 0,
+            'api_calls': 0,
+            'dividends_upserted': 0,
+            'future_upserted': 0,
+            'streaks_refreshed': 0
+        }
+
+        calendar = self.fmp_client.fetch_dividend_calendar(
+            from_date=from_date,
+            to_date=to_date,
+            symbols=set(symbols) if symbols else None
+        )
+        stats['api_calls'] += 1
+        events = calendar.get('data', []) if calendar else []
+        stats['calendar_events'] = len(events)
+        if not events:
+            logger.info(f"ℹ️  No dividend events between {from_date} and {to_date}")
+            return stats
+
+        batch = DividendBatch()
+        for event in events:
+            batch.append(
+                event['symbol'], event.get('ex_date'), event.get('amount'),
+                adj_dividend=event.get('adj_dividend'),
+                record_date=event.get('record_date'),
+                payment_date=event.get('payment_date'),
+                declaration_date=event.get('declaration_date')
+            )
+        valid = batch.valid_mask()
+        rows = batch.to_rows()
+
+        today = date.today().isoformat()
+        past_rows = [row for row in rows if row['ex_date'] <= today]
+        future_events = [
+            {**event, 'symbol': event['symbol'].upper()}
+            for event, ok in zip(events, valid) if ok and event['ex_date'][:10] > today
+        ]
+
+        # Events already stored with the same amount need no provider call
+        stored = self._stored_dividends(from_date, min(to_date, date.today())) if past_rows else {}
+        new_rows = [
+            row for row in past_rows
+            if abs(stored.get((row['symbol'], row['ex_date']), -1.0) - row['amount']) > 1e-9
+        ]
+        stats['new_events'] = len(new_rows)
+
+        new_symbols = sorted({row['symbol'] for row in new_rows})
+        dividend_rows = []
+        if new_symbols:
+            logger.info(
+                f"💰 {len(new_rows):,} new dividend events across {len(new_symbols):,} symbols "
+                f"(of {len(events):,} calendar events)"
+            )
+            results = self.fmp_client.fetch_many([
+                self.fmp_client.afetch_dividends(symbol, from_date=from_date) for symbol in new_symbols
+            ])
+            stats['api_calls'] += len(new_symbols)
+
+            fetched = DividendBatch()
+            missing = set()
+            for symbol, result in zip(new_symbols, results):
+                if result and result.get('data'):
+                    fetched.extend_records(symbol, result['data'])
+                    stats['symbols_fetched'] += 1
+                else:
+                    missing.add(symbol)
+
+            window_end = min(to_date.isoformat(), today)
+            dividend_rows = [
+                row for row in fetched.to_rows()
+                if from_date.isoformat() <= row['ex_date'] <= window_end
+            ]
+            # Calendar rows stand in for symbols whose history fetch failed
+            dividend_rows.extend(row for row in new_rows if row['symbol'] in missing)
+
+        # One row per (symbol, ex_date): an upsert cannot touch the same key twice
+        dividend_rows = list({(r['symbol'], r['ex_date']): r for r in dividend_rows}.values())
+        future_events = list({(e['symbol'], e['ex_date']): e for e in future_events}.values())
+
+        if dividend_rows:
+            stats['dividends_upserted'] = supabase_batch_upsert(
+                Config.DATABASE.TABLE_DIVIDEND_HISTORY, dividend_rows,
+                batch_size=Config.DATABASE.UPSERT_BATCH_SIZE
+            )
+            stats['streaks_refreshed'] = self.refresh_streaks({row['symbol'] for row in dividend_rows})
+        if future_events:
+            stats['future_upserted'] = supabase_batch_upsert(
+                Config.DATABASE.TABLE_DIVIDEND_CALENDAR, future_events,
+                batch_size=Config.DATABASE.UPSERT_BATCH_SIZE
+            )
+
+        logger.info(
+            f"✅ Dividend refresh: {stats['dividends_upserted']:,} dividends, "
+            f"{stats['future_upserted']:,} upcoming ({stats['api_calls']:,} API calls)"
+        )
+        return stats
+
+    def refresh_streaks(self, symbols: Optional[Iterable[str]] = None) -> int:
+        """
+        Recompute divv_dividend_streaks for symbols whose dividends changed.
+
+        Consecutive annual increases, 5-year dividend CAGR and last cut date
+        are computed in the database by refresh_dividend_streaks(), batched
+        by Config.DATABASE.STREAK_REFRESH_BATCH symbols per call.
+
+        Args:
+            symbols: Symbols to refresh (default: everything stored by
+                     process_and_store since the last refresh)
+
+        Returns:
+            Number of streak rows refreshed
+        """
+        from_pending = symbols is None
+        symbols = sorted(self._streaks_pending if from_pending else set(symbols))
+        if not symbols:
+            return 0
+
+        client = get_supabase_admin_client()
+        if client is None:
+            logger.warning("⚠️  Dividend streaks not refreshed (service role client unavailable)")
+            return 0
+
+        batch_size = Config.DATABASE.STREAK_REFRESH_BATCH
+        refreshed = 0
+        for start in range(0, len(symbols), batch_size):
+            chunk = symbols[start:start + batch_size]
+            try:
+                result = client.rpc('refresh_dividend_streaks', {'p_symbols': chunk}).execute()
+                refreshed += result.data or 0
+            except Exception as e:
+                logger.error(f"❌ Error refreshing dividend streaks for {len(chunk)} symbols: {e}")
+                continue
+            if from_pending:
+                self._streaks_pending.difference_update(chunk)
+
+        logger.info(f"📈 Refreshed dividend streaks for {refreshed:,} symbols")
+        return refreshed
+
+    @staticmethod
+    def refresh_all_streaks() -> Optional[int]:
+        """
+        Recompute divv_dividend_streaks for every symbol with dividends.
+
+        Streaks count back from the last complete calendar year, so they
+        change at year rollover even for symbols with no new payments (a
+        symbol that stopped paying drops to 0 increases). refresh_streaks()
+        only covers symbols just written; this full pass must run at least
+        once per year (IngestScheduler does it on its first run of each year).
+
+        Returns:
+            Number of streak rows refreshed, or None if the refresh failed
+        """
+        client = get_supabase_admin_client()
+        if client is None:
+            logger.warning("⚠️  Dividend streaks not refreshed (service role client unavailable)")
+            return None
+
+        try:
+            result = client.rpc('refresh_dividend_streaks', {'p_symbols': None}).execute()
+        except Exception as e:
+            logger.error(f"❌ Error refreshing all dividend streaks: {e}")
+            return None
+
+        refreshed = result.data or 0
+        logger.info(f"📈 Refreshed dividend streaks for all {refreshed:,} symbols")
+        return refreshed
+
     def get_statistics(self) -> Dict[str, Any]:
         """Get processing statistics."""
         return self.stats.to_dict()
@@ -358,7 +576,9 @@ def process_dividends(symbol: str, from_date: Optional[date] = None) -> bool:
         success = process_dividends('AAPL', from_date=date(2025, 1, 1))
     """
     processor = DividendProcessor()
-    return processor.process_and_store(symbol, from_date=from_date)
+    success = processor.process_and_store(symbol, from_date=from_date)
+    processor.refresh_streaks()
+    return success
 
 
 def process_dividends_batch(symbols: List[str],
@@ -6,13 +6,16 @@ the latest data date and only fetching newer data.
 """
 
 import logging
-from typing import Optional
+from typing import Dict, Iterable, Optional
 from datetime import date, datetime, timedelta
 
 from supabase_helpers import supabase_select
 
 logger = logging.getLogger(__name__)
 
+STALENESS_QUERY_CHUNK = 500  # Symbols per raw_stocks IN (...) lookup
+LATEST_DATES_PAGE_SIZE = 1000  # Symbols per get_latest_dates_by_symbol page (PostgREST max_rows)
+
 
 class IncrementalProcessor:
     """
@@ -144,9 +147,12 @@ class IncrementalProcessor:
     @staticmethod
     def get_bulk_latest_dates(table: str, date_column: str = 'date') -> dict:
         """
-        Bulk fetch latest dates for all symbols in a single query.
+        Bulk fetch latest dates for all symbols with one query per 1,000 symbols.
         This replaces individual queries for each symbol, dramatically improving performance.
 
+        Pages are keyed on symbol (after_symbol) because PostgREST caps RPC
+        results at max_rows.
+
         Args:
             table: Table name ('raw_stock_prices' or 'raw_dividends')
             date_column: Date column name ('date' for prices, 'ex_date' for dividends)
@@ -160,37 +166,63 @@ class IncrementalProcessor:
 
             logger.info(f"📊 Bulk fetching latest {date_column}s from {table}...")
 
-            # Use RPC function for efficient bulk fetching
-            # This single query replaces tens of thousands of individual queries
-            result = supabase.rpc(
-                'get_latest_dates_by_symbol',
-                {'table_name': table, 'date_col': date_column}
-            ).execute()
-
-            if result.data:
-                # Convert to dict for fast lookups
-                latest_dates = {}
-                for row in result.data:
+            latest_dates = {}
+            after_symbol = None
+            while True:
+                # Use RPC function for efficient bulk fetching
+                result = supabase.rpc(
+                    'get_latest_dates_by_symbol',
+                    {'table_name': table, 'date_col': date_column,
+                     'after_symbol': after_symbol, 'page_size': LATEST_DATES_PAGE_SIZE}
+                ).execute()
+                rows = result.data or []
+
+                for row in rows:
                     try:
-                        symbol = row['symbol']
-                        date_str = row['latest_date']
-                        latest_dates[symbol] = datetime.strptime(date_str, '%Y-%m-%d').date()
+                        latest_dates[row['symbol']] = datetime.strptime(row['latest_date'], '%Y-%m-%d').date()
                     except Exception as e:
                         logger.debug(f"⚠️  Error parsing date for {row.get('symbol')}: {e}")
                         continue
 
-                logger.info(f"✅ Fetched latest dates for {len(latest_dates):,} symbols in single query")
-                return latest_dates
+                if len(rows) < LATEST_DATES_PAGE_SIZE:
+                    break
+                after_symbol = rows[-1]['symbol']
+
+            if latest_dates:
+                logger.info(f"✅ Fetched latest dates for {len(latest_dates):,} symbols")
             else:
-                logger.info("📊 No existing data found in {table}")
-                return {}
+                logger.info(f"📊 No existing data found in {table}")
+            return latest_dates
 
         except Exception as e:
             # Fallback to empty dict if RPC function doesn't exist
             logger.warning(f"⚠️  Bulk fetch failed (falling back to individual queries): {e}")
-            logger.info("💡 To enable bulk fetching, run: migrations/create_bulk_latest_dates_function.sql")
+            logger.info("💡 To enable bulk fetching, run: supabase/migrations/20251118_extend_latest_dates_whitelist.sql")
             return {}
 
+    @staticmethod
+    def get_bulk_from_dates(symbols: Iterable[str], table: str = 'raw_stock_prices',
+                            date_column: str = 'date',
+                            add_buffer_days: int = 1) -> Dict[str, Optional[date]]:
+        """
+        Incremental fetch windows for many symbols from one bulk latest-date query.
+
+        Args:
+            symbols: Symbols to fetch
+            table: Table name ('raw_stock_prices' or 'raw_dividends')
+            date_column: Date column name ('date' for prices, 'ex_date' for dividends)
+            add_buffer_days: Days after the latest stored date to start from
+
+        Returns:
+            Dictionary mapping symbol -> from_date, or None for symbols with
+            no stored data (fetch full history)
+        """
+        latest_dates = IncrementalProcessor.get_bulk_latest_dates(table, date_column)
+        return {
+            symbol: latest_dates[symbol] + timedelta(days=add_buffer_days) if symbol in latest_dates else None
+            for symbol in symbols
+        }
+
     @staticmethod
     def filter_stale_symbols(symbols: list, max_staleness_hours: int = 24) -> tuple:
         """
@@ -214,14 +246,17 @@ class IncrementalProcessor:
 
             logger.info(f"📊 Checking staleness for {len(symbols):,} symbols (cutoff: {max_staleness_hours}h)...")
 
-            # Batch query to check updated_at timestamps
-            # Query all symbols at once for efficiency
-            result = supabase.table('raw_stocks') \
-                .select('symbol, updated_at') \
-                .in_('symbol', symbols) \
-                .execute()
-
-            if not result.data:
+            # Batch query to check updated_at timestamps, in chunks that keep
+            # the IN (...) filter well under URL length limits
+            rows = []
+            for i in range(0, len(symbols), STALENESS_QUERY_CHUNK):
+                result = supabase.table('raw_stocks') \
+                    .select('symbol, updated_at') \
+                    .in_('symbol', symbols[i:i + STALENESS_QUERY_CHUNK]) \
+                    .execute()
+                rows.extend(result.data or [])
+
+            if not rows:
                 logger.info("📊 No symbols found in database, all need updating")
                 return symbols, []
 
@@ -230,7 +265,7 @@ class IncrementalProcessor:
             fresh_symbols = []
 
             # Create lookup dict for fast access
-            updated_at_map = {row['symbol']: row.get('updated_at') for row in result.data}
+            updated_at_map = {row['symbol']: row.get('updated_at') for row in rows}
 
             for symbol in symbols:
                 updated_at_str = updated_at_map.get(symbol)
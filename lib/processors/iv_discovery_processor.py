@@ -203,7 +203,7 @@ class IVDiscoveryProcessor:
                         ORDER BY date DESC
                         LIMIT 1
                     """
-                    price_result = supabase_raw_query(query, (symbol,))
+                    price_result = supabase_raw_query(query, (symbol,), prepare='latest_price_date')
 
                     if price_result and len(price_result) > 0:
                         latest_date = price_result[0]['date']
@@ -13,6 +13,7 @@ from tqdm import tqdm
 
 from lib.core.config import Config
 from lib.core.models import StockPrice, ProcessingStats
+from lib.core.record_batch import PriceBatch
 from lib.data_sources.fmp_client import FMPClient
 from lib.data_sources.yahoo_client import YahooClient
 from lib.data_sources.alpha_vantage_client import AlphaVantageClient
@@ -84,7 +85,8 @@ class PriceProcessor:
 
     def fetch_prices(self, symbol: str,
                     from_date: Optional[date] = None,
-                    use_hybrid: bool = True) -> Optional[Dict[str, Any]]:
+                    use_hybrid: bool = True,
+                    use_yahoo: bool = True) -> Optional[Dict[str, Any]]:
         """
         Fetch price data with hybrid fallback strategy.
 
@@ -97,6 +99,8 @@ class PriceProcessor:
             symbol: Stock/ETF symbol
             from_date: Optional start date
             use_hybrid: Enable hybrid fallback (default: True)
+            use_yahoo: Allow the per-symbol Yahoo fallback (disable when
+                       misses go through YahooClient batch downloads instead)
 
         Returns:
             Dictionary with price data or None
@@ -123,7 +127,7 @@ class PriceProcessor:
                 logger.debug(f"⚠️  {symbol}: Alpha Vantage prices failed - {e}")
 
         # Final fallback to Yahoo Finance
-        if use_hybrid and Config.DATA_FETCH.FALLBACK_TO_YAHOO:
+        if use_hybrid and use_yahoo and Config.DATA_FETCH.FALLBACK_TO_YAHOO:
             try:
                 prices = self.yahoo_client.fetch_prices(symbol, from_date=from_date)
                 if prices and prices.get('data'):
@@ -252,8 +256,11 @@ class PriceProcessor:
         Process prices using batch EOD for recent data + individual calls for older data.
 
         This is a hybrid approach that:
-        1. Uses batch EOD API for the last N days (very fast - 1 call per day)
-        2. Falls back to individual symbol calls for older historical data
+        1. Fetches the batch EOD payload for each of the last N trading days
+           concurrently (one call per day for the whole market)
+        2. Matches each day against the requested symbols by set intersection
+        3. Writes all days as a few large multi-symbol upserts
+        4. Falls back to individual symbol calls for symbols with no batch data
 
         Args:
             symbols: List of symbols to process
@@ -264,100 +271,56 @@ class PriceProcessor:
         Returns:
             Dictionary mapping symbol -> success status
         """
-        from datetime import timedelta
         from collections import defaultdict
 
         logger.info(f"📊 Processing prices for {len(symbols)} symbols (batch EOD optimization)")
 
         results = {}
         today = datetime.now().date()
+        wanted = set(symbols)
 
-        # Try batch EOD for recent data if enabled
         batch_eod_data = defaultdict(list)  # symbol -> [price_records]
 
         if use_batch_eod:
-            logger.info(f"⚡ Fetching batch EOD for last {batch_eod_days} days...")
-
-            # Fetch batch EOD for each day in the range
             batch_start_date = today - timedelta(days=batch_eod_days)
+            # Skip weekends (simple check)
+            trading_days = [
+                batch_start_date + timedelta(days=offset)
+                for offset in range(batch_eod_days + 1)
+                if (batch_start_date + timedelta(days=offset)).weekday() < 5
+            ]
+
+            logger.info(f"⚡ Fetching batch EOD for {len(trading_days)} trading days concurrently...")
+            payloads = self.fmp_client.fetch_batch_eod_range(trading_days, symbols=wanted)
+
+            available = [payload for payload in payloads.values() if payload and payload.get('data')]
+            if not available:
+                # Batch EOD not available (not on Professional/Enterprise plan)
+                logger.info("⚠️  Batch EOD not available - falling back to individual calls")
+                use_batch_eod = False
+            else:
+                for payload in available:
+                    day_data = payload['data']
+                    for symbol in wanted & day_data.keys():
+                        batch_eod_data[symbol].append(day_data[symbol])
 
-            for day_offset in range(batch_eod_days + 1):
-                target_date = batch_start_date + timedelta(days=day_offset)
-
-                # Skip weekends (simple check)
-                if target_date.weekday() >= 5:  # Saturday = 5, Sunday = 6
-                    continue
-
-                # Fetch batch EOD for this date
-                eod_data = self.fmp_client.fetch_batch_eod_prices(target_date)
-
-                if eod_data and eod_data.get('data'):
-                    # Extract data for our symbols
-                    for symbol in symbols:
-                        if symbol in eod_data['data']:
-                            batch_eod_data[symbol].append(eod_data['data'][symbol])
-
-                    logger.debug(f"   ✅ {target_date}: {eod_data['count']:,} symbols")
-                else:
-                    # Batch EOD not available (not on Professional/Enterprise plan)
-                    logger.info("⚠️  Batch EOD not available - falling back to individual calls")
-                    use_batch_eod = False
-                    break
-
-            if use_batch_eod:
-                symbols_with_eod = len([s for s in symbols if batch_eod_data[s]])
-                logger.info(f"✅ Batch EOD complete: {symbols_with_eod}/{len(symbols)} symbols have recent data")
-
-        # Now process symbols
-        # For symbols with batch EOD data, store it first, then fetch older historical if needed
-        # For symbols without batch EOD data, use regular individual processing
+                logger.info(
+                    f"✅ Batch EOD complete: {len(batch_eod_data)}/{len(symbols)} symbols have recent data "
+                    f"({len(available)}/{len(trading_days)} days returned data)"
+                )
 
         self.stats.start()
 
+        # Store batch EOD data for all symbols at once
+        if batch_eod_data:
+            results.update(self._store_batch_eod_records(batch_eod_data))
+
+        # Symbols without batch EOD data use regular individual processing
         for symbol in symbols:
+            if symbol in batch_eod_data:
+                continue
             try:
-                # Check if we have batch EOD data for this symbol
-                if batch_eod_data[symbol]:
-                    # Store batch EOD data
-                    price_records = []
-                    for eod_record in batch_eod_data[symbol]:
-                        try:
-                            price = StockPrice(
-                                symbol=symbol,
-                                date=datetime.strptime(eod_record['date'], '%Y-%m-%d').date(),
-                                open=eod_record.get('open'),
-                                high=eod_record.get('high'),
-                                low=eod_record.get('low'),
-                                close=eod_record.get('close'),
-                                adj_close=eod_record.get('adjClose'),
-                                volume=eod_record.get('volume')
-                            )
-                            if price.is_valid:
-                                price_records.append(price.to_dict())
-                        except Exception as e:
-                            logger.debug(f"⚠️  {symbol}: Skipping invalid EOD record - {e}")
-
-                    if price_records:
-                        result = supabase_batch_upsert(
-                            'raw_stock_prices',
-                            price_records,
-                            batch_size=Config.DATABASE.UPSERT_BATCH_SIZE
-                        )
-                        if result:
-                            logger.info(f"✅ {symbol}: Stored {len(price_records)} EOD prices (batch)")
-                            results[symbol] = True
-                            self.stats.successful += 1
-                        else:
-                            results[symbol] = False
-                            self.stats.failed += 1
-                    else:
-                        results[symbol] = False
-                        self.stats.failed += 1
-                else:
-                    # No batch EOD data - use regular processing
-                    success = self.process_and_store(symbol, from_date=from_date)
-                    results[symbol] = success
-
+                results[symbol] = self.process_and_store(symbol, from_date=from_date)
             except Exception as e:
                 logger.error(f"❌ {symbol}: Error - {e}")
                 results[symbol] = False
@@ -366,6 +329,50 @@ class PriceProcessor:
         self.stats.complete()
         return results
 
+    def _store_batch_eod_records(self, batch_eod_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, bool]:
+        """
+        Convert batch EOD records and upsert them in large multi-symbol writes.
+
+        Args:
+            batch_eod_data: symbol -> list of batch EOD records
+
+        Returns:
+            Dictionary mapping symbol -> success status
+        """
+        # Sorted by symbol so each write covers a contiguous block of symbols
+        batch = PriceBatch()
+        for symbol in sorted(batch_eod_data):
+            batch.extend_records(symbol, batch_eod_data[symbol])
+        price_records = batch.to_rows()
+
+        # Symbols with no valid records count as failed; others succeed unless their write fails
+        valid_symbols = {record['symbol'] for record in price_records}
+        results = {symbol: symbol.upper() in valid_symbols for symbol in batch_eod_data}
+        del batch  # Release the column buffers before the writes
+
+        write_rows = Config.DATA_FETCH.BACKFILL_WRITE_ROWS
+        for i in range(0, len(price_records), write_rows):
+            chunk = price_records[i:i + write_rows]
+            written = supabase_batch_upsert(
+                'raw_stock_prices',
+                chunk,
+                batch_size=Config.DATABASE.UPSERT_BATCH_SIZE
+            )
+            if written:
+                logger.info(f"✅ Stored {len(chunk):,} batch EOD prices ({chunk[0]['symbol']}..{chunk[-1]['symbol']})")
+            else:
+                logger.error(f"❌ Failed to store batch EOD prices for {chunk[0]['symbol']}..{chunk[-1]['symbol']}")
+                for record in chunk:
+                    results[record['symbol']] = False
+
+        for success in results.values():
+            if success:
+                self.stats.successful += 1
+            else:
+                self.stats.failed += 1
+
+        return results
+
     def process_batch(self, symbols: List[str],
                      from_date: Optional[date] = None,
                      use_hybrid: bool = True,
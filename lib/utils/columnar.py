@@ -0,0 +1,244 @@
+"""
+Columnar Results
+
+Converts row-oriented query results (lists of dicts from PostgREST or
+psycopg2) into typed columns: a dict of NumPy arrays or a PyArrow table.
+
+Rows are converted in fixed-size chunks while they stream in, so a large
+price history never exists as one list of per-row dicts in memory.
+
+Column types are inferred from the first non-null value, except that a
+numeric column holding any float or Decimal is float64 (PostgREST returns
+whole-valued numerics such as 150.0 as the int 150):
+    bool               -> bool (object if the column has NULLs)
+    int                -> int64 (float64 with NaN if the column has NULLs)
+    float / Decimal    -> float64
+    date / 'YYYY-MM-DD' -> datetime64[D]  (Arrow: date32)
+    datetime / ISO ts  -> datetime64[us]  (Arrow: timestamp[us], UTC-naive)
+    anything else      -> object          (Arrow: inferred, usually string)
+"""
+
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+COLUMNAR_FORMATS = ('numpy', 'arrow')
+DEFAULT_CHUNK_ROWS = 100000
+
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_TIMESTAMP_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}')
+
+
+def _infer_kind(value: Any) -> str:
+    """Infer the column kind from a non-null sample value."""
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, (float, Decimal)):
+        return 'float'
+    if isinstance(value, datetime):
+        return 'timestamp'
+    if isinstance(value, date):
+        return 'date'
+    if isinstance(value, str):
+        if _DATE_RE.match(value):
+            return 'date'
+        if _TIMESTAMP_RE.match(value):
+            return 'timestamp'
+    return 'object'
+
+
+def _column_kind(values: List[Any]) -> Optional[str]:
+    """Infer the kind of a chunk of column values (None if all NULL)."""
+    sample = next((v for v in values if v is not None), None)
+    if sample is None:
+        return None
+    kind = _infer_kind(sample)
+    if kind == 'int' and any(isinstance(v, (float, Decimal)) for v in values):
+        return 'float'
+    return kind
+
+
+def _to_array(values: List[Any], kind: str) -> np.ndarray:
+    """Convert one chunk of column values to a typed NumPy array."""
+    if kind == 'int':
+        if any(v is None for v in values):
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        return np.array(values, dtype=np.int64)
+    if kind == 'float':
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    if kind == 'date':
+        return np.array([v.isoformat() if isinstance(v, date) else v for v in values],
+                        dtype='datetime64[D]')
+    if kind == 'timestamp':
+        parsed = pd.to_datetime(pd.Series(values, dtype=object), utc=True, format='ISO8601')
+        return parsed.dt.tz_localize(None).to_numpy(dtype='datetime64[us]')
+    if kind == 'bool' and not any(v is None for v in values):
+        return np.array(values, dtype=bool)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+class ColumnarBuilder:
+    """
+    Accumulates rows and converts them to typed column arrays chunk by chunk.
+
+    Usage:
+        builder = ColumnarBuilder()
+        for row in rows:
+            builder.append(row)
+        columns = builder.to_numpy()    # {'close': array([...]), ...}
+        table = builder.to_arrow()      # pyarrow.Table
+    """
+
+    def __init__(self, columns: Optional[List[str]] = None,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        """
+        Initialize builder.
+
+        Args:
+            columns: Column names (default: keys of the first row)
+            chunk_rows: Rows buffered before converting to arrays
+        """
+        self.columns = list(columns) if columns else None
+        self.chunk_rows = chunk_rows
+        self.kinds: Dict[str, str] = {}
+        self._pending: Dict[str, List[Any]] = {}
+        self._chunks: Dict[str, List[np.ndarray]] = {}
+        self._pending_rows = 0
+        self.row_count = 0
+
+    def append(self, row: Dict[str, Any]):
+        """Add one row."""
+        if self.columns is None:
+            self.columns = list(row.keys())
+        if not self._pending:
+            self._pending = {column: [] for column in self.columns}
+
+        for column in self.columns:
+            self._pending[column].append(row.get(column))
+
+        self._pending_rows += 1
+        self.row_count += 1
+        if self._pending_rows >= self.chunk_rows:
+            self._flush()
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        """Add many rows."""
+        for row in rows:
+            self.append(row)
+
+    def _flush(self):
+        """Convert buffered values to arrays."""
+        if not self._pending_rows:
+            return
+
+        for column, values in self._pending.items():
+            kind = self.kinds.get(column)
+            if kind == 'int' and _column_kind(values) == 'float':
+                # Earlier chunks were whole numbers; to_numpy() promotes them
+                kind = self.kinds[column] = 'float'
+            if kind is None:
+                kind = _column_kind(values)
+                if kind is None:
+                    # All NULL so far; decide on a later chunk
+                    self._chunks.setdefault(column, []).append(values)
+                    continue
+                self.kinds[column] = kind
+                # Convert any all-NULL chunks held back before the type was known
+                self._chunks[column] = [
+                    _to_array(chunk, self.kinds[column]) if isinstance(chunk, list) else chunk
+                    for chunk in self._chunks.get(column, [])
+                ]
+            self._chunks.setdefault(column, []).append(_to_array(values, self.kinds[column]))
+
+        self._pending = {}
+        self._pending_rows = 0
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """
+        Build the result as a dict of NumPy arrays.
+
+        Returns:
+            {column: ndarray}, all arrays of length row_count
+        """
+        self._flush()
+        result = {}
+        for column in self.columns or []:
+            kind = self.kinds.setdefault(column, 'object')
+            chunks = [
+                _to_array(chunk, kind) if isinstance(chunk, list) else chunk
+                for chunk in self._chunks.get(column, [])
+            ]
+            if not chunks:
+                result[column] = _to_array([], kind)
+            elif len(chunks) == 1:
+                result[column] = chunks[0]
+            else:
+                if any(chunk.dtype != chunks[0].dtype for chunk in chunks):
+                    # e.g. an int column that only had NULLs in some chunks
+                    dtype = np.result_type(*chunks)
+                    chunks = [chunk.astype(dtype) for chunk in chunks]
+                result[column] = np.concatenate(chunks)
+        return result
+
+    def to_arrow(self):
+        """
+        Build the result as a PyArrow table.
+
+        NaN/NaT values become Arrow nulls.
+
+        Returns:
+            pyarrow.Table
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("pyarrow is required for columnar='arrow'. Install with: pip install pyarrow")
+
+        arrays = self.to_numpy()
+        return pa.table({
+            column: pa.array(values, from_pandas=True)
+            for column, values in arrays.items()
+        })
+
+    def build(self, fmt: str) -> Union[Dict[str, np.ndarray], Any]:
+        """Build the result in the given format ('numpy' or 'arrow')."""
+        if fmt == 'arrow':
+            return self.to_arrow()
+        return self.to_numpy()
+
+
+def to_columnar(rows: Iterable[Dict[str, Any]], fmt: str = 'numpy',
+                columns: Optional[List[str]] = None,
+                chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Union[Dict[str, np.ndarray], Any]:
+    """
+    Convert rows (list or iterator of dicts) to a columnar result.
+
+    Args:
+        rows: Row dictionaries
+        fmt: 'numpy' (dict of arrays) or 'arrow' (pyarrow.Table)
+        columns: Column names (default: keys of the first row)
+        chunk_rows: Rows buffered before converting to arrays
+
+    Returns:
+        Dict of NumPy arrays or pyarrow.Table
+    """
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format '{fmt}' (expected one of {COLUMNAR_FORMATS})")
+
+    builder = ColumnarBuilder(columns, chunk_rows)
+    builder.extend(rows)
+    return builder.build(fmt)
+
+
+__all__ = ['ColumnarBuilder', 'to_columnar', 'COLUMNAR_FORMATS']
@@ -81,7 +81,7 @@ class DataSourceTracker:
             """
             params = (symbol, data_type.value, source.value, has_data, notes)
 
-            result = supabase_raw_query(query, params)
+            result = supabase_raw_query(query, params, prepare='dst_record_check')
 
             if result:
                 logger.debug(
@@ -133,7 +133,7 @@ class DataSourceTracker:
             """
             params = (symbol, data_type.value)
 
-            result = supabase_raw_query(query, params)
+            result = supabase_raw_query(query, params, prepare='dst_preferred_source')
 
             if result and len(result) > 0:
                 source_str = result[0].get('preferred_source')
@@ -186,7 +186,7 @@ class DataSourceTracker:
             """
             params = (symbol, data_type.value)
 
-            result = supabase_raw_query(query, params)
+            result = supabase_raw_query(query, params, prepare='dst_available_sources')
 
             if result:
                 sources = [DataSource(row['source']) for row in result]
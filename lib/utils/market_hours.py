@@ -5,7 +5,7 @@ Provides utilities for checking if markets are open and determining optimal upda
 """
 
 import logging
-from datetime import datetime, time
+from datetime import date, datetime, time, timedelta
 from typing import Tuple
 
 logger = logging.getLogger(__name__)
@@ -176,6 +176,62 @@ class MarketHours:
         current_time = dt.time()
         return MarketHours.PREMARKET_OPEN <= current_time <= MarketHours.AFTERHOURS_CLOSE
 
+    @staticmethod
+    def is_trading_day(day: date) -> bool:
+        """
+        Check if a date is a trading day (weekday and not a market holiday).
+
+        Local calendar check only; no API calls.
+
+        Args:
+            day: Date to check
+
+        Returns:
+            True if the market has a session on that date
+        """
+        dt = datetime.combine(day, time(12, 0))
+        if not MarketHours.is_weekday(dt):
+            return False
+        is_holiday, _ = MarketHours.is_market_holiday(dt)
+        return not is_holiday
+
+    @staticmethod
+    def previous_trading_day(day: date) -> date:
+        """
+        Get the last trading day strictly before the given date.
+
+        Args:
+            day: Reference date
+
+        Returns:
+            Previous trading day
+        """
+        day -= timedelta(days=1)
+        while not MarketHours.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    @staticmethod
+    def last_completed_session(dt: datetime = None, ready_time: time = None) -> date:
+        """
+        Get the most recent trading session whose EOD data should be available.
+
+        Args:
+            dt: Datetime to check (default: now)
+            ready_time: Time after the close when providers publish EOD data
+                        (default: MARKET_CLOSE)
+
+        Returns:
+            Session date (today after ready_time on a trading day, else the
+            previous trading day)
+        """
+        dt = dt or datetime.now()
+        ready_time = ready_time or MarketHours.MARKET_CLOSE
+        today = dt.date()
+        if MarketHours.is_trading_day(today) and dt.time() >= ready_time:
+            return today
+        return MarketHours.previous_trading_day(today)
+
     @staticmethod
     def should_run_daily_update(dt: datetime = None, allow_weekends: bool = False) -> Tuple[bool, str]:
         """
@@ -2,19 +2,369 @@
 Performance Monitoring and Metrics Collection
 
 Tracks and reports on system performance, API usage, and optimization effectiveness.
+
+Live instrumentation goes through one process-wide MetricsRegistry
+(METRICS) shared by the data source clients, rate limiters, Supabase
+helpers, writers and processors. start_metrics_server() exposes it on a
+local HTTP endpoint in the Prometheus text format:
+
+    ingest_api_request_seconds{provider,endpoint}      Provider request latency
+    ingest_api_requests_total{provider,endpoint,status}
+    ingest_rate_limiter_wait_seconds{limiter}          Time spent waiting for a slot/token
+    ingest_queue_depth{queue}                          Writer queue depths
+    ingest_db_write_seconds{table,method}              Database write latency
+    ingest_db_writes_total{table,method,status}
+    ingest_rows_written_total{table}
+    ingest_rows_written_per_second{table}              Trailing 60s write rate
+    ingest_processor_stat{processor,stat}              Processor stats dicts
 """
 
 import logging
 import json
+import threading
 import time
-from typing import Dict, Any, List, Optional
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Any, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+
+from lib.core.config import Config
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROWS_RATE_WINDOW_SECONDS = 60
+
+
+def _escape_label(value: Any) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = '') -> str:
+    """Format a label set, e.g. {provider="FMP",le="0.5"}."""
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    One labelled metric family (counter, gauge or histogram).
+
+    Label values are passed as keyword arguments:
+        API_LATENCY.observe(0.42, provider='FMP', endpoint='/api/v3/quote')
+    """
+
+    def __init__(self, name: str, help_text: str, kind: str,
+                 labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),) if kind == 'histogram' else ()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase a counter or gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels):
+        """Set a gauge."""
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def observe(self, value: float, **labels):
+        """Record one histogram observation."""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [bucket counts..., sum, count]
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def get(self, **labels) -> Any:
+        """Current value (histograms: {'sum': ..., 'count': ...})."""
+        with self._lock:
+            value = self._values.get(self._key(labels))
+        if self.kind == 'histogram':
+            return {'sum': value[-2], 'count': value[-1]} if value else {'sum': 0.0, 'count': 0}
+        return value or 0.0
+
+    def render(self) -> List[str]:
+        """Render the family in Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            items = [(key, list(value) if isinstance(value, list) else value) for key, value in items]
+
+        for key, value in items:
+            if self.kind != 'histogram':
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+                continue
+            for bound, count in zip(self.buckets, value):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(value[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {value[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of metric families.
+
+    Collectors are callbacks run before each render, for values that are
+    cheaper to compute on scrape (e.g. rate limiter usage, write rates).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, help_text: str, kind: str,
+                  labelnames: Sequence[str], **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Metric(name, help_text, kind, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Metric:
+        """Get or create a counter."""
+        return self._register(name, help_text, 'counter', labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Metric:
+        """Get or create a gauge."""
+        return self._register(name, help_text, 'gauge', labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Metric:
+        """Get or create a histogram."""
+        return self._register(name, help_text, 'histogram', labelnames, buckets=buckets)
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Register a callback run before each render."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format."""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.debug(f"Metrics collector failed: {e}")
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = MetricsRegistry()
+
+API_LATENCY = METRICS.histogram(
+    'ingest_api_request_seconds', 'Data provider request latency', ('provider', 'endpoint'))
+API_REQUESTS = METRICS.counter(
+    'ingest_api_requests_total', 'Data provider requests by outcome', ('provider', 'endpoint', 'status'))
+RATE_LIMIT_WAIT = METRICS.histogram(
+    'ingest_rate_limiter_wait_seconds', 'Time spent waiting for a rate limiter slot or token', ('limiter',))
+QUEUE_DEPTH = METRICS.gauge(
+    'ingest_queue_depth', 'Records waiting in a write queue', ('queue',))
+DB_WRITE_LATENCY = METRICS.histogram(
+    'ingest_db_write_seconds', 'Database write latency', ('table', 'method'))
+DB_WRITES = METRICS.counter(
+    'ingest_db_writes_total', 'Database write calls by outcome', ('table', 'method', 'status'))
+ROWS_WRITTEN = METRICS.counter(
+    'ingest_rows_written_total', 'Rows written to the database', ('table',))
+ROWS_PER_SECOND = METRICS.gauge(
+    'ingest_rows_written_per_second', f'Rows written per second over the last {ROWS_RATE_WINDOW_SECONDS}s', ('table',))
+PROCESSOR_STAT = METRICS.gauge(
+    'ingest_processor_stat', 'Numeric processor statistics', ('processor', 'stat'))
+PHASE_DURATION = METRICS.gauge(
+    'ingest_phase_duration_seconds', 'Duration of completed processing phases', ('phase',))
+
+_recent_writes: Dict[str, deque] = defaultdict(deque)
+_recent_writes_lock = threading.Lock()
+
+
+def record_api_call(provider: str, endpoint: str, seconds: float, status: str = 'ok'):
+    """
+    Record one provider request.
+
+    Args:
+        provider: Data source name (e.g. 'FMP')
+        endpoint: Normalized endpoint (no symbols or query strings)
+        seconds: Request latency
+        status: 'ok', an HTTP status code, or 'error'
+    """
+    API_LATENCY.observe(seconds, provider=provider, endpoint=endpoint)
+    API_REQUESTS.inc(provider=provider, endpoint=endpoint, status=status)
+
+
+@contextmanager
+def track_api_call(provider: str, endpoint: str) -> Iterator[None]:
+    """Time a provider call; exceptions are recorded with status 'error'."""
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except Exception:
+        status = 'error'
+        raise
+    finally:
+        record_api_call(provider, endpoint, time.perf_counter() - start, status)
+
+
+def record_rate_limit_wait(limiter: str, seconds: float):
+    """Record time a caller spent waiting on a rate limiter."""
+    RATE_LIMIT_WAIT.observe(seconds, limiter=limiter)
+
+
+def record_queue_depth(queue: str, depth: int):
+    """Publish the current depth of a write queue."""
+    QUEUE_DEPTH.set(depth, queue=queue)
+
+
+def record_db_write(table: str, rows: int, seconds: float, success: bool = True,
+                    method: str = 'postgrest'):
+    """
+    Record one database write.
+
+    Args:
+        table: Target table
+        rows: Rows written
+        seconds: Write latency
+        success: Whether the write succeeded
+        method: Write path ('postgrest' or 'copy')
+    """
+    DB_WRITE_LATENCY.observe(seconds, table=table, method=method)
+    DB_WRITES.inc(table=table, method=method, status='ok' if success else 'error')
+    if success and rows:
+        ROWS_WRITTEN.inc(rows, table=table)
+        with _recent_writes_lock:
+            _recent_writes[table].append((time.monotonic(), rows))
+
+
+def _collect_write_rates():
+    """Update rows-per-second gauges from the trailing write window."""
+    cutoff = time.monotonic() - ROWS_RATE_WINDOW_SECONDS
+    with _recent_writes_lock:
+        for table, writes in _recent_writes.items():
+            while writes and writes[0][0] < cutoff:
+                writes.popleft()
+            ROWS_PER_SECOND.set(sum(rows for _, rows in writes) / ROWS_RATE_WINDOW_SECONDS, table=table)
+
+
+METRICS.add_collector(_collect_write_rates)
+
+
+def publish_stats(processor: str, stats: Dict[str, Any]):
+    """
+    Publish a processor's numeric stats as ingest_processor_stat gauges.
+
+    Args:
+        processor: Processor name (e.g. 'batch_eod')
+        stats: Stats dictionary (non-numeric values are ignored)
+    """
+    for stat, value in stats.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            PROCESSOR_STAT.set(value, processor=processor, stat=stat)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves /metrics in Prometheus text format."""
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = METRICS.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep scrapes out of the run log."""
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve live metrics on http://host:port/metrics from a daemon thread.
+
+    Safe to call more than once; later calls return the running server.
+
+    Args:
+        port: Port to listen on (default: LoggingConfig.METRICS_PORT; 0 disables)
+        host: Interface to bind (default: LoggingConfig.METRICS_HOST)
+
+    Returns:
+        The HTTP server, or None if disabled or the port is unavailable
+    """
+    global _server
+    port = Config.LOGGING.METRICS_PORT if port is None else port
+    host = host or Config.LOGGING.METRICS_HOST
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                logger.warning(f"⚠️  Could not start metrics server on {host}:{port}: {e}")
+                return None
+            thread = threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True)
+            thread.start()
+            logger.info(f"📈 Live metrics at http://{host}:{port}/metrics")
+        return _server
+
+
+def stop_metrics_server():
+    """Stop the metrics server if it is running."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
+
 
 @dataclass
 class APIMetrics:
@@ -170,7 +520,8 @@ class PerformanceMonitor:
             duration = (self.run_end_time - self.run_start_time).total_seconds()
             logger.info(f"⏱️  Total execution time: {duration:.1f}s ({duration/60:.1f}m)")
 
-    def record_api_call(self, endpoint: str, success: bool, response_time: float):
+    def record_api_call(self, endpoint: str, success: bool, response_time: float,
+                        provider: str = 'api'):
         """
         Record an API call.
 
@@ -178,12 +529,14 @@ class PerformanceMonitor:
             endpoint: API endpoint name
             success: Whether the call succeeded
             response_time: Response time in seconds
+            provider: Data source name for the live metrics
         """
         if endpoint not in self.api_metrics:
             self.api_metrics[endpoint] = APIMetrics(endpoint=endpoint)
 
         self.api_metrics[endpoint].record_call(success, response_time)
         self.total_api_calls += 1
+        record_api_call(provider, endpoint, response_time, 'ok' if success else 'error')
 
     def start_phase(self, phase_name: str):
         """
@@ -214,6 +567,7 @@ class PerformanceMonitor:
             phase.items_processed = items_processed
             phase.items_successful = items_successful
             phase.items_failed = items_failed
+            PHASE_DURATION.set(phase.duration_seconds, phase=phase_name)
 
             logger.info(
                 f"✅ Phase complete: {phase_name} - "
@@ -368,4 +722,9 @@ class PerformanceMonitor:
 
 
 # Export main class
-__all__ = ['PerformanceMonitor', 'APIMetrics', 'OptimizationMetrics', 'PhaseMetrics']
+__all__ = [
+    'PerformanceMonitor', 'APIMetrics', 'OptimizationMetrics', 'PhaseMetrics',
+    'MetricsRegistry', 'Metric', 'METRICS', 'record_api_call', 'track_api_call',
+    'record_rate_limit_wait', 'record_queue_depth', 'record_db_write', 'publish_stats',
+    'start_metrics_server', 'stop_metrics_server'
+]
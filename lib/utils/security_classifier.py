@@ -0,0 +1,172 @@
+"""
+Special Security Classifier
+
+Identifies warrants, units, rights, money market funds and foreign listings
+that the price pipelines skip. All rules are compiled into one anchored
+regular expression evaluated in a single pass per symbol, and each match
+reports the exclusion category.
+
+Categories are cached per symbol in raw_stocks.security_category, so
+regular runs only classify symbols that are new since the last run.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+REGULAR = 'regular'
+WARRANT = 'warrant'
+UNIT = 'unit'
+RIGHT = 'right'
+MONEY_MARKET = 'money_market'
+FOREIGN = 'foreign'
+
+EXCLUDED_CATEGORIES = (WARRANT, UNIT, RIGHT, MONEY_MARKET, FOREIGN)
+
+SYMBOL_READERS = 4  # Concurrent key-range readers when loading raw_stocks
+
+# Rules in priority order: (group name, category, pattern matching the whole symbol).
+# The first rule that matches decides the category.
+_RULES = [
+    # Separator + suffix: SYMBOL-W, SYMBOL.WS, SYMBOL.U, SYMBOL-RT
+    ('sep_warrant', WARRANT, r'.*[-.](?:WS|WT|W)'),
+    ('sep_unit', UNIT, r'.*[-.](?:UN|UU|U)'),
+    ('sep_right', RIGHT, r'.*[-.](?:RT|R)'),
+    # 5+ character symbols ending in letter + U are units (ARBGU, ARGUU),
+    # except letter + RU, which stays regular and skips the remaining rules
+    ('ru_exception', REGULAR, r'.{3,}RU'),
+    ('unit', UNIT, r'.{3,}[A-Za-z]U'),
+    # 5+ character symbols ending in letter + W are warrants (ARCKW, ASPSW)
+    ('warrant', WARRANT, r'.{3,}[A-Za-z]W'),
+    # Money market and special funds
+    ('money_market', MONEY_MARKET, r'.*(?:XX|FX)'),
+    # Foreign listings we don't have data for
+    ('foreign', FOREIGN, r'.*(?:\.V|\.TO).*'),
+]
+
+_GROUP_CATEGORIES = {name: category for name, category, _ in _RULES}
+
+SPECIAL_SECURITY_PATTERN = re.compile(
+    r'^(?:' + '|'.join(f'(?P<{name}>{pattern})' for name, _, pattern in _RULES) + r')\Z',
+    re.DOTALL
+)
+
+
+@lru_cache(maxsize=65536)
+def classify_symbol(symbol: str) -> str:
+    """
+    Classify a single symbol.
+
+    Args:
+        symbol: Ticker symbol
+
+    Returns:
+        One of EXCLUDED_CATEGORIES, or REGULAR
+    """
+    if not symbol:
+        return REGULAR
+    match = SPECIAL_SECURITY_PATTERN.match(symbol)
+    return _GROUP_CATEGORIES[match.lastgroup] if match else REGULAR
+
+
+def classify_symbols(symbols: Iterable[str]) -> Dict[str, str]:
+    """
+    Classify many symbols in one vectorized pass.
+
+    Args:
+        symbols: Ticker symbols
+
+    Returns:
+        Dictionary mapping symbol to category
+    """
+    series = pd.Series(list(symbols), dtype=object)
+    if series.empty:
+        return {}
+
+    groups = series.str.extract(SPECIAL_SECURITY_PATTERN)
+    matched = groups.notna()
+    first_group = matched.idxmax(axis=1).where(matched.any(axis=1))
+    categories = first_group.map(_GROUP_CATEGORIES).fillna(REGULAR)
+
+    return dict(zip(series, categories))
+
+
+def split_special_securities(symbols: Iterable[str],
+                             categories: Optional[Dict[str, str]] = None) -> Tuple[List[str], List[str]]:
+    """
+    Split symbols into regular and special securities.
+
+    Args:
+        symbols: Ticker symbols
+        categories: Known categories (missing symbols are classified here)
+
+    Returns:
+        (regular_symbols, excluded_symbols), both in input order
+    """
+    symbols = list(symbols)
+    categories = dict(categories or {})
+    missing = [symbol for symbol in symbols if symbol not in categories]
+    if missing:
+        categories.update(classify_symbols(missing))
+
+    regular, excluded = [], []
+    for symbol in symbols:
+        (regular if categories[symbol] == REGULAR else excluded).append(symbol)
+    return regular, excluded
+
+
+def summarize_exclusions(symbols: Iterable[str], categories: Dict[str, str]) -> str:
+    """Format counts per exclusion category, e.g. 'warrant: 812, unit: 403'."""
+    counts = pd.Series([categories[symbol] for symbol in symbols], dtype=object).value_counts()
+    return ', '.join(f"{category}: {count:,}" for category, count in counts.items())
+
+
+def load_classified_symbols(persist: bool = True) -> Dict[str, str]:
+    """
+    Load all symbols from raw_stocks with their security category.
+
+    Symbols without a cached category are classified in one vectorized pass
+    and, if persist is set, written back to raw_stocks.security_category.
+    Falls back to classifying everything in memory when the column has not
+    been migrated yet.
+
+    Args:
+        persist: Write newly classified categories back to the database
+
+    Returns:
+        Dictionary mapping symbol to category
+    """
+    from supabase_helpers import supabase_select, supabase_batch_upsert
+
+    # Full scan over concurrent keyset ranges (row order is not needed)
+    rows = supabase_select('raw_stocks', columns='symbol,security_category', parallel=SYMBOL_READERS)
+    if not rows:
+        # security_category column missing (or empty table): classify in memory only
+        rows = supabase_select('raw_stocks', columns='symbol', parallel=SYMBOL_READERS)
+        persist = False
+
+    categories = {row['symbol']: row.get('security_category') for row in rows if row.get('symbol')}
+    unclassified = [symbol for symbol, category in categories.items() if not category]
+
+    if unclassified:
+        fresh = classify_symbols(unclassified)
+        categories.update(fresh)
+
+        if persist:
+            updates = [{'symbol': symbol, 'security_category': category} for symbol, category in fresh.items()]
+            supabase_batch_upsert('raw_stocks', updates)
+            logger.info(f"🏷️  Cached security category for {len(updates):,} new symbols")
+
+    return categories
+
+
+__all__ = [
+    'classify_symbol', 'classify_symbols', 'split_special_securities',
+    'summarize_exclusions', 'load_classified_symbols', 'SPECIAL_SECURITY_PATTERN',
+    'EXCLUDED_CATEGORIES', 'REGULAR', 'WARRANT', 'UNIT', 'RIGHT', 'MONEY_MARKET', 'FOREIGN'
+]
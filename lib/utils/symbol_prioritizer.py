@@ -3,14 +3,144 @@ Symbol Prioritizer Module
 
 Provides utilities for prioritizing symbols during batch processing.
 Ensures high-priority symbols (portfolio holdings, high volume, large cap) are processed first.
+
+Scores come from a local snapshot of raw_stocks metadata (volume, market
+cap, exchange) for the whole universe, saved to PRIORITY_SNAPSHOT_PATH and
+refreshed from the database every PRIORITY_SNAPSHOT_HOURS. Scoring is
+vectorized over the snapshot once; ordering a run's symbols is a sorted
+lookup plus one lexsort, with no per-symbol queries or IN (...) filters.
 """
 
 import logging
+import os
+import threading
+import time
 from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from lib.core.config import Config
 from supabase_helpers import supabase_select
 
 logger = logging.getLogger(__name__)
 
+# Score tiers: points for values strictly above each threshold
+VOLUME_THRESHOLDS = np.array([100_000, 1_000_000, 10_000_000, 100_000_000], dtype=np.float64)
+MARKET_CAP_THRESHOLDS = np.array([300_000_000, 2_000_000_000, 10_000_000_000, 200_000_000_000], dtype=np.float64)
+TIER_POINTS = np.array([0, 25, 50, 75, 100], dtype=np.int64)
+
+PORTFOLIO_BOOST = 1000  # Ensure portfolio symbols come first
+
+
+def _tier_scores(values: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Map values to tier points (NaN/missing -> 0)."""
+    values = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+    return TIER_POINTS[np.searchsorted(thresholds, values, side='left')]
+
+
+def _exchange_scores(exchanges: np.ndarray) -> np.ndarray:
+    """Exchange points: NYSE/NASDAQ 50, AMEX/TSX 30, OTC* 10."""
+    exchanges = np.char.upper(exchanges.astype(str))
+    return np.select(
+        [np.isin(exchanges, ('NYSE', 'NASDAQ')),
+         np.isin(exchanges, ('AMEX', 'TSX')),
+         np.char.startswith(exchanges, 'OTC')],
+        [50, 30, 10],
+        default=0
+    ).astype(np.int64)
+
+
+class MetadataSnapshot:
+    """
+    Scored symbol metadata for the whole universe, sorted by symbol.
+
+    Attributes:
+        symbols: Sorted symbol array
+        volume, market_cap: float64 arrays (NaN = unknown)
+        volume_score, market_cap_score, exchange_score: int64 score components
+        loaded_at: Epoch seconds the data was read from the database
+    """
+
+    def __init__(self, symbols: np.ndarray, volume: np.ndarray, market_cap: np.ndarray,
+                 exchange: np.ndarray, loaded_at: float):
+        order = np.argsort(symbols, kind='stable')
+        self.symbols = symbols[order]
+        self.volume = volume[order]
+        self.market_cap = market_cap[order]
+        self.exchange = exchange[order]
+        self.loaded_at = loaded_at
+
+        self.volume_score = _tier_scores(self.volume, VOLUME_THRESHOLDS)
+        self.market_cap_score = _tier_scores(self.market_cap, MARKET_CAP_THRESHOLDS)
+        self.exchange_score = _exchange_scores(self.exchange)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @classmethod
+    def from_database(cls) -> 'MetadataSnapshot':
+        """Read volume, market cap and exchange for every symbol in raw_stocks."""
+        columns = supabase_select(
+            'raw_stocks', 'symbol,volume,market_cap,exchange',
+            order_by='symbol', columnar='numpy'
+        )
+        symbols = np.asarray(columns.get('symbol', []), dtype=object)
+        keep = np.array([bool(s) for s in symbols], dtype=bool)
+
+        def numeric(name):
+            values = columns.get(name)
+            if values is None or len(values) != len(symbols):
+                return np.full(len(symbols), np.nan)
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64) \
+                if values.dtype == object else values.astype(np.float64)
+
+        exchange = columns.get('exchange')
+        if exchange is None or len(exchange) != len(symbols):
+            exchange = np.full(len(symbols), '', dtype=object)
+        exchange = np.array(['' if e is None else e for e in exchange], dtype=str)
+
+        return cls(symbols[keep].astype(str), numeric('volume')[keep], numeric('market_cap')[keep],
+                   exchange[keep], time.time())
+
+    @classmethod
+    def load(cls, path: str) -> 'MetadataSnapshot':
+        """Load a snapshot saved with save()."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['symbols'], data['volume'], data['market_cap'],
+                       data['exchange'], float(data['loaded_at']))
+
+    def save(self, path: str):
+        """Save the snapshot atomically (write to a temp file, then rename)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, symbols=self.symbols, volume=self.volume, market_cap=self.market_cap,
+                 exchange=self.exchange, loaded_at=np.float64(self.loaded_at))
+        os.replace(tmp_path, path)
+
+    def is_stale(self, max_age_hours: float) -> bool:
+        """Whether the data is older than max_age_hours."""
+        return time.time() - self.loaded_at > max_age_hours * 3600
+
+    def scores(self, include_volume: bool = True, include_market_cap: bool = True) -> np.ndarray:
+        """Priority score per snapshot symbol."""
+        scores = self.exchange_score.copy()
+        if include_volume:
+            scores += self.volume_score
+        if include_market_cap:
+            scores += self.market_cap_score
+        return scores
+
+    def lookup(self, symbols: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Gather per-symbol values for arbitrary symbols (0 for symbols not in the snapshot)."""
+        if not len(self.symbols) or not len(symbols):
+            return np.zeros(len(symbols), dtype=values.dtype)
+        index = np.searchsorted(self.symbols, symbols)
+        index = np.minimum(index, len(self.symbols) - 1)
+        found = self.symbols[index] == symbols
+        return np.where(found, values[index], 0)
+
 
 class SymbolPrioritizer:
     """
@@ -23,6 +153,78 @@ class SymbolPrioritizer:
     4. Everything else alphabetically
     """
 
+    _snapshot: Optional[MetadataSnapshot] = None
+    _snapshot_lock = threading.Lock()
+
+    @classmethod
+    def get_snapshot(cls, refresh: bool = False) -> Optional[MetadataSnapshot]:
+        """
+        Get the metadata snapshot, refreshing it when stale.
+
+        The in-process snapshot is reused; otherwise the on-disk snapshot is
+        loaded, and the database is only read when that is missing or older
+        than PRIORITY_SNAPSHOT_HOURS (or refresh is set).
+
+        Args:
+            refresh: Re-read metadata from the database
+
+        Returns:
+            MetadataSnapshot, or None if no metadata is available
+        """
+        config = Config.PROCESSING
+        max_age = config.PRIORITY_SNAPSHOT_HOURS
+        path = config.PRIORITY_SNAPSHOT_PATH
+
+        with cls._snapshot_lock:
+            snapshot = cls._snapshot
+            if not refresh and snapshot is not None and not snapshot.is_stale(max_age):
+                return snapshot
+
+            if not refresh and os.path.exists(path):
+                try:
+                    snapshot = MetadataSnapshot.load(path)
+                except Exception as e:
+                    logger.warning(f"⚠️  Could not read symbol metadata snapshot {path}: {e}")
+                    snapshot = None
+                if snapshot is not None and not snapshot.is_stale(max_age):
+                    cls._snapshot = snapshot
+                    return snapshot
+
+            try:
+                fresh = MetadataSnapshot.from_database()
+            except Exception as e:
+                logger.warning(f"⚠️  Could not refresh symbol metadata: {e}")
+                fresh = None
+
+            if fresh is not None and len(fresh):
+                try:
+                    fresh.save(path)
+                except OSError as e:
+                    logger.warning(f"⚠️  Could not save symbol metadata snapshot {path}: {e}")
+                logger.info(f"📊 Refreshed symbol metadata snapshot ({len(fresh):,} symbols)")
+                snapshot = fresh
+            elif snapshot is not None:
+                logger.warning("⚠️  Using stale symbol metadata snapshot")
+
+            cls._snapshot = snapshot
+            return snapshot
+
+    @staticmethod
+    def _score_array(
+        symbols: List[str],
+        include_volume: bool = True,
+        include_market_cap: bool = True
+    ) -> np.ndarray:
+        """Priority scores aligned with symbols (0 when no metadata)."""
+        snapshot = SymbolPrioritizer.get_snapshot()
+        if snapshot is None:
+            logger.debug("No symbol data found for prioritization")
+            return np.zeros(len(symbols), dtype=np.int64)
+        return snapshot.lookup(
+            np.asarray(symbols, dtype=str),
+            snapshot.scores(include_volume=include_volume, include_market_cap=include_market_cap)
+        )
+
     @staticmethod
     def get_priority_symbols(
         symbols: List[str],
@@ -40,71 +242,13 @@ class SymbolPrioritizer:
         Returns:
             Dictionary mapping symbol -> priority score (higher = more important)
         """
-        priority_scores = {symbol: 0 for symbol in symbols}
-
         try:
-            # Fetch symbol data from database
-            symbol_data = supabase_select(
-                'raw_stocks',
-                'symbol,volume,market_cap,exchange',
-                where_clause={'symbol': f'in.({",".join(symbols)})'},
-                limit=None
-            )
-
-            if not symbol_data:
-                logger.debug("No symbol data found for prioritization")
-                return priority_scores
-
-            # Calculate priority scores
-            for data in symbol_data:
-                symbol = data.get('symbol')
-                if symbol not in priority_scores:
-                    continue
-
-                score = 0
-
-                # Volume priority (0-100 points)
-                if include_volume and data.get('volume'):
-                    volume = data['volume']
-                    if volume > 100_000_000:  # Ultra high volume
-                        score += 100
-                    elif volume > 10_000_000:  # High volume
-                        score += 75
-                    elif volume > 1_000_000:  # Medium volume
-                        score += 50
-                    elif volume > 100_000:  # Low volume
-                        score += 25
-
-                # Market cap priority (0-100 points)
-                if include_market_cap and data.get('market_cap'):
-                    market_cap = data['market_cap']
-                    if market_cap > 200_000_000_000:  # Mega cap ($200B+)
-                        score += 100
-                    elif market_cap > 10_000_000_000:  # Large cap ($10B+)
-                        score += 75
-                    elif market_cap > 2_000_000_000:  # Mid cap ($2B+)
-                        score += 50
-                    elif market_cap > 300_000_000:  # Small cap ($300M+)
-                        score += 25
-
-                # Exchange priority (0-50 points)
-                # Prefer major exchanges (NYSE, NASDAQ) over OTC
-                exchange = data.get('exchange', '').upper()
-                if exchange in ('NYSE', 'NASDAQ'):
-                    score += 50
-                elif exchange in ('AMEX', 'TSX'):
-                    score += 30
-                elif exchange.startswith('OTC'):
-                    score += 10
-
-                priority_scores[symbol] = score
-
-            logger.info(f"📊 Calculated priority scores for {len(priority_scores):,} symbols")
-
+            scores = SymbolPrioritizer._score_array(symbols, include_volume, include_market_cap)
+            logger.info(f"📊 Calculated priority scores for {len(symbols):,} symbols")
+            return dict(zip(symbols, scores.tolist()))
         except Exception as e:
             logger.warning(f"⚠️  Priority calculation failed: {e}")
-
-        return priority_scores
+            return {symbol: 0 for symbol in symbols}
 
     @staticmethod
     def prioritize_symbols(
@@ -128,24 +272,20 @@ class SymbolPrioritizer:
         if not symbols:
             return []
 
-        # Get base priority scores
-        priority_scores = SymbolPrioritizer.get_priority_symbols(
-            symbols,
-            include_volume=include_volume,
-            include_market_cap=include_market_cap
-        )
+        symbol_array = np.asarray(symbols, dtype=str)
+        try:
+            scores = SymbolPrioritizer._score_array(symbols, include_volume, include_market_cap)
+        except Exception as e:
+            logger.warning(f"⚠️  Priority calculation failed: {e}")
+            scores = np.zeros(len(symbols), dtype=np.int64)
 
         # Boost portfolio holdings to highest priority
         if portfolio_symbols:
-            for symbol in portfolio_symbols:
-                if symbol in priority_scores:
-                    priority_scores[symbol] += 1000  # Ensure portfolio symbols come first
+            scores = scores + np.isin(symbol_array, np.asarray(portfolio_symbols, dtype=str)) * PORTFOLIO_BOOST
 
         # Sort by priority (descending), then alphabetically for ties
-        sorted_symbols = sorted(
-            symbols,
-            key=lambda s: (-priority_scores.get(s, 0), s)
-        )
+        order = np.lexsort((symbol_array, -scores))
+        sorted_symbols = [symbols[i] for i in order]
 
         # Log top priorities
         if len(sorted_symbols) >= 10:
@@ -166,7 +306,18 @@ class SymbolPrioritizer:
             List of major symbols
         """
         try:
-            # Get high-volume, large-cap symbols
+            snapshot = SymbolPrioritizer.get_snapshot()
+            if snapshot is not None and len(snapshot):
+                # Highest volume first, then market cap (unknown values last)
+                order = np.lexsort((
+                    -np.nan_to_num(snapshot.market_cap, nan=-np.inf),
+                    -np.nan_to_num(snapshot.volume, nan=-np.inf)
+                ))
+                symbols = snapshot.symbols[order[:limit]].tolist()
+                logger.info(f"📊 Found {len(symbols)} major symbols")
+                return symbols
+
+            # No snapshot available: get high-volume, large-cap symbols directly
             result = supabase_select(
                 'raw_stocks',
                 'symbol',
@@ -220,4 +371,4 @@ class SymbolPrioritizer:
 
 
 # Export main class
-__all__ = ['SymbolPrioritizer']
+__all__ = ['SymbolPrioritizer', 'MetadataSnapshot']
@@ -0,0 +1,16 @@
+-- Add security_category column to raw_stocks table
+-- Caches the special-security classification (lib/utils/security_classifier.py)
+-- so batch runs only classify symbols added since the last run
+
+-- Add the column (NULL = not yet classified)
+ALTER TABLE raw_stocks
+ADD COLUMN IF NOT EXISTS security_category VARCHAR(20);
+
+-- Add comment explaining the column
+COMMENT ON COLUMN raw_stocks.security_category IS
+'regular, warrant, unit, right, money_market or foreign - set by the pipeline on first sight of a symbol';
+
+-- Create index for filtering by category
+CREATE INDEX IF NOT EXISTS idx_raw_stocks_security_category
+ON raw_stocks(security_category)
+WHERE security_category IS DISTINCT FROM 'regular';
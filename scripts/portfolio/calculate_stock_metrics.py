@@ -15,13 +15,17 @@ import logging
 import sys
 from pathlib import Path
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from collections import Counter
+from itertools import islice
+
+import numpy as np
+import pandas as pd
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from supabase_helpers import supabase_select, supabase_batch_upsert, supabase_update
+from supabase_helpers import supabase_select, supabase_select_iter, supabase_batch_upsert, supabase_update, supabase_raw_query, get_postgres_pool
 
 # Configure logging
 logging.basicConfig(
@@ -31,6 +35,29 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Dividend frequency bands: (label, min days, max days) between ex-dates.
+# Checked in order, so overlapping bands resolve to the first match.
+FREQUENCY_BANDS = [
+    ('Weekly', 4, 13),         # ~7 days
+    ('Bi-Weekly', 11, 20),     # ~14 days
+    ('Monthly', 21, 45),       # ~30 days
+    ('Quarterly', 70, 115),    # ~90 days
+    ('Semi-Annual', 140, 220), # ~180 days
+    ('Annual', 320, 410),      # ~365 days
+]
+
+BULK_SHARD_SIZE = 2000       # Symbols loaded per set-based query round
+DIVIDEND_HISTORY_LIMIT = 100  # Recent dividends used for frequency (matches per-symbol mode)
+SYMBOL_READERS = 4           # Concurrent key-range readers for the raw_stocks symbol scan
+
+
+def _frequency_for_interval(interval: float) -> Optional[str]:
+    """Map an interval in days between dividends to a frequency label."""
+    for label, low, high in FREQUENCY_BANDS:
+        if low <= interval <= high:
+            return label
+    return None
+
 
 class StockMetricsCalculator:
     """Calculates derived metrics for stocks based on historical data."""
@@ -76,45 +103,16 @@ class StockMetricsCalculator:
         # Calculate average interval
         avg_interval = sum(intervals) / len(intervals)
 
-        # Determine frequency based on average interval
-        # Weekly: ~7 days (4-13 days tolerance)
-        # Bi-Weekly: ~14 days (11-20 days tolerance)
-        # Monthly: ~30 days (21-45 days tolerance)
-        # Quarterly: ~90 days (70-115 days tolerance)
-        # Semi-Annual: ~180 days (140-220 days tolerance)
-        # Annual: ~365 days (320-410 days tolerance)
-
-        if 4 <= avg_interval <= 13:
-            return 'Weekly'
-        elif 11 <= avg_interval <= 20:
-            return 'Bi-Weekly'
-        elif 21 <= avg_interval <= 45:
-            return 'Monthly'
-        elif 70 <= avg_interval <= 115:
-            return 'Quarterly'
-        elif 140 <= avg_interval <= 220:
-            return 'Semi-Annual'
-        elif 320 <= avg_interval <= 410:
-            return 'Annual'
-        else:
-            # If it doesn't fit, use the most common interval
-            interval_counts = Counter(intervals)
-            most_common_interval = interval_counts.most_common(1)[0][0]
-
-            if 4 <= most_common_interval <= 13:
-                return 'Weekly'
-            elif 11 <= most_common_interval <= 20:
-                return 'Bi-Weekly'
-            elif 21 <= most_common_interval <= 45:
-                return 'Monthly'
-            elif 70 <= most_common_interval <= 115:
-                return 'Quarterly'
-            elif 140 <= most_common_interval <= 220:
-                return 'Semi-Annual'
-            elif 320 <= most_common_interval <= 410:
-                return 'Annual'
-
-        return None
+        # Determine frequency based on average interval (see FREQUENCY_BANDS)
+        frequency = _frequency_for_interval(avg_interval)
+        if frequency:
+            return frequency
+
+        # If it doesn't fit, use the most common interval
+        interval_counts = Counter(intervals)
+        most_common_interval = interval_counts.most_common(1)[0][0]
+
+        return _frequency_for_interval(most_common_interval)
 
     def calculate_total_return_ttm(self,
                                    symbol: str,
@@ -242,112 +240,104 @@ class StockMetricsCalculator:
                 limit=1
             )
 
-            if current_prices and len(current_prices) > 0:
+            # A NULL adj_close on the latest row means no current price (as in bulk mode)
+            if current_prices and current_prices[0].get('adj_close') is not None:
                 result['current_price'] = float(current_prices[0]['adj_close'])
 
             # Get historical prices using direct PostgreSQL for accurate date range queries
+            # (pooled connection; statements are prepared once per connection)
             try:
-                import os
-                from dotenv import load_dotenv
-                load_dotenv()
-
-                # Direct PostgreSQL query for better date range filtering
-                import psycopg2
-                conn = psycopg2.connect(
-                    host='localhost',
-                    port=5434,
-                    database='postgres',
-                    user='postgres',
-                    password=os.getenv('PGPASSWORD', 'postgres')
-                )
-                cursor = conn.cursor()
+                pool = get_postgres_pool()
+                if not pool:
+                    raise RuntimeError("direct Postgres connection not available")
 
-                # Find price closest to 12 months ago (within 30-day window)
-                twelve_mo_start = twelve_months_ago - timedelta(days=15)
-                twelve_mo_end = twelve_months_ago + timedelta(days=15)
+                with pool.connection() as conn, conn.cursor() as cursor:
+                    # Find price closest to 12 months ago (within 30-day window)
+                    twelve_mo_start = twelve_months_ago - timedelta(days=15)
+                    twelve_mo_end = twelve_months_ago + timedelta(days=15)
 
-                cursor.execute("""
-                    SELECT adj_close, date
-                    FROM raw_stock_prices
-                    WHERE symbol = %s
-                      AND date >= %s
-                      AND date <= %s
-                    ORDER BY ABS(EXTRACT(EPOCH FROM (date::timestamp - %s::timestamp)))
-                    LIMIT 1
-                """, (symbol, twelve_mo_start, twelve_mo_end, twelve_months_ago))
-
-                row = cursor.fetchone()
-                if row:
-                    result['price_12mo_ago'] = float(row[0])
-                    result['price_12mo_ago_date'] = row[1]
-                else:
-                    # No data in 30-day window, try to find earliest available price
-                    # We'll use this to calculate a projected TTM
-                    cursor.execute("""
+                    pool.execute(cursor, """
                         SELECT adj_close, date
                         FROM raw_stock_prices
                         WHERE symbol = %s
-                        ORDER BY date ASC
+                          AND adj_close IS NOT NULL
+                          AND date >= %s
+                          AND date <= %s
+                        ORDER BY ABS(EXTRACT(EPOCH FROM (date::timestamp - %s::timestamp)))
                         LIMIT 1
-                    """, (symbol,))
+                    """, (symbol, twelve_mo_start, twelve_mo_end, twelve_months_ago), prepare='metrics_price_near_date')
 
                     row = cursor.fetchone()
                     if row:
-                        earliest_date = row[1]
-                        days_of_data = (today - earliest_date).days
-
-                        # For projected TTM, require:
-                        # 1. At least 90 days of data (3 months minimum)
-                        # 2. Less than 18 months (to avoid using very old data)
-                        # 3. Check for large gaps (would invalidate projection)
-                        if 90 <= days_of_data < 547:  # 547 days = 18 months
-                            # Check for gaps > 90 days in the price history
-                            cursor.execute("""
-                                WITH gaps AS (
-                                    SELECT date - LAG(date) OVER (ORDER BY date) as gap_days
-                                    FROM raw_stock_prices
-                                    WHERE symbol = %s
-                                    ORDER BY date
-                                )
-                                SELECT MAX(gap_days) as max_gap
-                                FROM gaps
-                            """, (symbol,))
-
-                            max_gap_row = cursor.fetchone()
-                            max_gap = max_gap_row[0] if max_gap_row and max_gap_row[0] else 0
-
-                            if max_gap and max_gap > 90:
-                                logger.debug(f"📊 {symbol}: Data has gap of {max_gap} days - skipping projected TTM")
+                        result['price_12mo_ago'] = float(row[0])
+                        result['price_12mo_ago_date'] = row[1]
+                    else:
+                        # No data in 30-day window, try to find earliest available price
+                        # We'll use this to calculate a projected TTM
+                        pool.execute(cursor, """
+                            SELECT adj_close, date
+                            FROM raw_stock_prices
+                            WHERE symbol = %s
+                              AND adj_close IS NOT NULL
+                            ORDER BY date ASC
+                            LIMIT 1
+                        """, (symbol,), prepare='metrics_first_price')
+
+                        row = cursor.fetchone()
+                        if row:
+                            earliest_date = row[1]
+                            days_of_data = (today - earliest_date).days
+
+                            # For projected TTM, require:
+                            # 1. At least 90 days of data (3 months minimum)
+                            # 2. Less than 18 months (to avoid using very old data)
+                            # 3. Check for large gaps (would invalidate projection)
+                            if 90 <= days_of_data < 547:  # 547 days = 18 months
+                                # Check for gaps > 90 days in the price history
+                                pool.execute(cursor, """
+                                    WITH gaps AS (
+                                        SELECT date - LAG(date) OVER (ORDER BY date) as gap_days
+                                        FROM raw_stock_prices
+                                        WHERE symbol = %s
+                                        ORDER BY date
+                                    )
+                                    SELECT MAX(gap_days) as max_gap
+                                    FROM gaps
+                                """, (symbol,), prepare='metrics_max_price_gap')
+
+                                max_gap_row = cursor.fetchone()
+                                max_gap = max_gap_row[0] if max_gap_row and max_gap_row[0] else 0
+
+                                if max_gap and max_gap > 90:
+                                    logger.debug(f"📊 {symbol}: Data has gap of {max_gap} days - skipping projected TTM")
+                                else:
+                                    result['price_12mo_ago'] = float(row[0])
+                                    result['price_12mo_ago_date'] = earliest_date
+                                    result['projected_ttm'] = True
+                                    result['days_of_data'] = days_of_data
+                                    logger.debug(f"📊 {symbol}: Using earliest price from {earliest_date} for projected TTM ({days_of_data} days of data)")
+                            elif days_of_data < 90:
+                                logger.debug(f"📊 {symbol}: Insufficient data for projected TTM ({days_of_data} days, need 90+)")
                             else:
-                                result['price_12mo_ago'] = float(row[0])
-                                result['price_12mo_ago_date'] = earliest_date
-                                result['projected_ttm'] = True
-                                result['days_of_data'] = days_of_data
-                                logger.debug(f"📊 {symbol}: Using earliest price from {earliest_date} for projected TTM ({days_of_data} days of data)")
-                        elif days_of_data < 90:
-                            logger.debug(f"📊 {symbol}: Insufficient data for projected TTM ({days_of_data} days, need 90+)")
-                        else:
-                            logger.debug(f"📊 {symbol}: Data too old for projected TTM ({days_of_data} days, max 18 months)")
-
-                # Get price at year start (with 15-day window)
-                year_start_window_end = year_start + timedelta(days=15)
-
-                cursor.execute("""
-                    SELECT adj_close, date
-                    FROM raw_stock_prices
-                    WHERE symbol = %s
-                      AND date >= %s
-                      AND date <= %s
-                    ORDER BY date ASC
-                    LIMIT 1
-                """, (symbol, year_start, year_start_window_end))
+                                logger.debug(f"📊 {symbol}: Data too old for projected TTM ({days_of_data} days, max 18 months)")
 
-                row = cursor.fetchone()
-                if row:
-                    result['price_year_start'] = float(row[0])
+                    # Get price at year start (with 15-day window)
+                    year_start_window_end = year_start + timedelta(days=15)
 
-                cursor.close()
-                conn.close()
+                    pool.execute(cursor, """
+                        SELECT adj_close, date
+                        FROM raw_stock_prices
+                        WHERE symbol = %s
+                          AND adj_close IS NOT NULL
+                          AND date >= %s
+                          AND date <= %s
+                        ORDER BY date ASC
+                        LIMIT 1
+                    """, (symbol, year_start, year_start_window_end), prepare='metrics_year_start_price')
+
+                    row = cursor.fetchone()
+                    if row:
+                        result['price_year_start'] = float(row[0])
 
             except Exception as e:
                 logger.debug(f"⚠️  {symbol}: Direct SQL query failed - {e}")
@@ -543,31 +533,374 @@ class StockMetricsCalculator:
             self.stats['errors'].append(f"{symbol}: {str(e)}")
             return None
 
-    def process_all_stocks(self, batch_size: int = 100, limit: Optional[int] = None):
+    def _load_bulk_data(self, symbols: List[str], today: date) -> Dict[str, pd.DataFrame]:
         """
-        Process all stocks and update their metrics.
+        Load everything needed for a shard of symbols in four set-based queries.
 
         Args:
-            batch_size: Number of stocks to update in each batch
+            symbols: Symbols in this shard
+            today: Reference date
+
+        Returns:
+            Dictionary of DataFrames: bounds (first/last price per symbol),
+            windows (prices near 12 months ago and year start), history
+            (dates for recently listed symbols, for gap detection), dividends
+        """
+        twelve_months_ago = today - timedelta(days=365)
+        year_start = date(today.year, 1, 1)
+
+        # First priced row and latest row per symbol (two index seeks each).
+        # Prices ignore NULL adj_close rows, like the per-symbol queries; the
+        # current price is the latest row's adj_close even when NULL.
+        bounds = supabase_raw_query("""
+            SELECT s.symbol,
+                   f.date AS first_date, f.adj_close AS first_close,
+                   l.date AS last_date, l.adj_close AS last_close
+            FROM unnest(%s::text[]) AS s(symbol)
+            CROSS JOIN LATERAL (
+                SELECT date, adj_close FROM raw_stock_prices p
+                WHERE p.symbol = s.symbol AND p.adj_close IS NOT NULL
+                ORDER BY date ASC LIMIT 1
+            ) f
+            CROSS JOIN LATERAL (
+                SELECT date, adj_close FROM raw_stock_prices p
+                WHERE p.symbol = s.symbol ORDER BY date DESC LIMIT 1
+            ) l
+        """, (symbols,), columnar='numpy')
+        bounds = pd.DataFrame(bounds)
+
+        # Prices within 15 days of 12 months ago and of the year start
+        windows = pd.DataFrame(supabase_raw_query("""
+            SELECT symbol, date, adj_close
+            FROM raw_stock_prices
+            WHERE symbol = ANY(%s)
+              AND adj_close IS NOT NULL
+              AND (date BETWEEN %s AND %s OR date BETWEEN %s AND %s)
+        """, (
+            symbols,
+            twelve_months_ago - timedelta(days=15), twelve_months_ago + timedelta(days=15),
+            year_start, year_start + timedelta(days=15)
+        ), columnar='numpy'))
+
+        # Full (short) history of symbols eligible for a projected TTM
+        history = pd.DataFrame(columns=['symbol', 'date'])
+        if not bounds.empty:
+            days_of_data = (np.datetime64(today) - bounds['first_date'].values).astype('timedelta64[D]').astype(int)
+            young = bounds.loc[(days_of_data >= 90) & (days_of_data < 547), 'symbol'].tolist()
+            if young:
+                history = pd.DataFrame(supabase_raw_query("""
+                    SELECT symbol, date
+                    FROM raw_stock_prices
+                    WHERE symbol = ANY(%s)
+                    ORDER BY symbol, date
+                """, (young,), columnar='numpy'))
+
+        # Most recent dividends per symbol
+        dividends = pd.DataFrame(supabase_raw_query("""
+            SELECT symbol, ex_date, amount
+            FROM (
+                SELECT symbol, ex_date, amount,
+                       ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY ex_date DESC) AS rn
+                FROM raw_dividends
+                WHERE symbol = ANY(%s)
+            ) d
+            WHERE rn <= %s
+            ORDER BY symbol, ex_date
+        """, (symbols, DIVIDEND_HISTORY_LIMIT), columnar='numpy'))
+
+        return {'bounds': bounds, 'windows': windows, 'history': history, 'dividends': dividends}
+
+    def calculate_metrics_bulk(self, symbols: List[str],
+                               today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        Calculate metrics for many symbols at once with vectorized group-bys.
+
+        Produces the same fields and rules as calculate_metrics_for_symbol,
+        but from a handful of set-based queries per shard instead of five
+        round trips per symbol.
+
+        Args:
+            symbols: Symbols to calculate
+            today: Reference date (default: today)
+
+        Returns:
+            List of metrics dictionaries (symbols with no metrics are omitted)
+        """
+        today = today or date.today()
+        data = self._load_bulk_data(symbols, today)
+        bounds, windows, history, dividends = data['bounds'], data['windows'], data['history'], data['dividends']
+
+        frame = pd.DataFrame(index=pd.Index(symbols, name='symbol'))
+        today64 = np.datetime64(today)
+        twelve_months_ago = np.datetime64(today - timedelta(days=365))
+        year_start = np.datetime64(date(today.year, 1, 1))
+
+        # Current price and earliest price
+        if not bounds.empty:
+            bounds = bounds.set_index('symbol')
+            frame['current_price'] = bounds['last_close'].astype(float)
+            frame['first_date'] = bounds['first_date']
+            frame['first_close'] = bounds['first_close'].astype(float)
+        else:
+            frame['current_price'] = np.nan
+            frame['first_date'] = pd.NaT
+            frame['first_close'] = np.nan
+
+        # Price closest to 12 months ago, and first price of the year
+        frame['price_12mo_ago'] = np.nan
+        frame['price_year_start'] = np.nan
+        if not windows.empty:
+            windows['adj_close'] = windows['adj_close'].astype(float)
+            distance = np.abs((windows['date'].values - twelve_months_ago).astype('timedelta64[D]').astype(int))
+            near_12mo = windows[distance <= 15].assign(distance=distance[distance <= 15])
+            near_12mo = near_12mo.sort_values(['symbol', 'distance', 'date']).drop_duplicates('symbol')
+            frame['price_12mo_ago'] = near_12mo.set_index('symbol')['adj_close']
+
+            in_year_start = windows[(windows['date'] >= year_start) &
+                                    (windows['date'] <= year_start + np.timedelta64(15, 'D'))]
+            in_year_start = in_year_start.sort_values(['symbol', 'date']).drop_duplicates('symbol')
+            frame['price_year_start'] = in_year_start.set_index('symbol')['adj_close']
+
+        # Projected TTM from earliest price: 90 days to 18 months of data, no gap > 90 days
+        frame['days_of_data'] = (today64 - frame['first_date'].values.astype('datetime64[D]')).astype('timedelta64[D]').astype(float)
+        max_gap = pd.Series(dtype=float)
+        if not history.empty:
+            gaps = history['date'].diff().dt.days
+            gaps[history['symbol'] != history['symbol'].shift()] = np.nan
+            max_gap = gaps.groupby(history['symbol']).max()
+        frame['max_gap'] = max_gap.reindex(frame.index).fillna(0)
+
+        projected = (
+            frame['price_12mo_ago'].isna() &
+            (frame['days_of_data'] >= 90) & (frame['days_of_data'] < 547) &
+            (frame['max_gap'] <= 90)
+        )
+        frame['projected'] = projected
+        frame.loc[projected, 'price_12mo_ago'] = frame.loc[projected, 'first_close']
+        frame.loc[~projected, 'days_of_data'] = np.nan
+
+        # Dividends: last payment, TTM sums, frequency
+        frame['last_dividend_date'] = None
+        frame['last_dividend_amount'] = np.nan
+        frame['dividends_ttm'] = 0.0
+        frame['frequency'] = None
+        if not dividends.empty:
+            dividends['amount'] = dividends['amount'].astype(float)
+            by_symbol = dividends.groupby('symbol', sort=False)
+
+            last = by_symbol.tail(1).set_index('symbol')
+            frame['last_dividend_date'] = pd.Series(
+                np.datetime_as_string(last['ex_date'].values, unit='D'), index=last.index
+            )
+            frame['last_dividend_amount'] = last['amount']
+
+            # TTM window starts at the earliest price for projected symbols, else 12 months ago
+            start = frame['first_date'].where(frame['projected'], twelve_months_ago)
+            in_ttm = dividends['ex_date'].values >= start.reindex(dividends['symbol']).values
+            frame['dividends_ttm'] = dividends[in_ttm].groupby('symbol')['amount'].sum()
+            frame['dividends_ttm'] = frame['dividends_ttm'].fillna(0.0)
+
+            frame['frequency'] = self._bulk_dividend_frequency(dividends)
+
+        return self._assemble_bulk_metrics(frame)
+
+    def _bulk_dividend_frequency(self, dividends: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized calculate_dividend_frequency over all symbols.
+
+        Args:
+            dividends: symbol, ex_date rows sorted by symbol then ex_date
+
+        Returns:
+            Series of frequency labels indexed by symbol
+        """
+        intervals = dividends['ex_date'].diff().dt.days
+        intervals = intervals[dividends['symbol'] == dividends['symbol'].shift()]
+        interval_symbols = dividends.loc[intervals.index, 'symbol']
+        if intervals.empty:
+            return pd.Series(dtype=object)
+
+        def classify(values: pd.Series) -> pd.Series:
+            conditions = [(values >= low) & (values <= high) for _, low, high in FREQUENCY_BANDS]
+            labels = [label for label, _, _ in FREQUENCY_BANDS]
+            return pd.Series(np.select(conditions, labels, default=''), index=values.index).replace('', None)
+
+        frequency = classify(intervals.groupby(interval_symbols).mean())
+
+        # Fall back to the most common interval (ties: earliest occurrence, like Counter)
+        unmatched = frequency.index[frequency.isna()]
+        if len(unmatched):
+            counts = pd.DataFrame({
+                'symbol': interval_symbols,
+                'interval': intervals,
+                'position': np.arange(len(intervals))
+            })
+            counts = counts[counts['symbol'].isin(unmatched)]
+            counts = counts.groupby(['symbol', 'interval']).agg(count=('position', 'size'), first=('position', 'min'))
+            counts = counts.reset_index().sort_values(['symbol', 'count', 'first'], ascending=[True, False, True])
+            mode = counts.drop_duplicates('symbol').set_index('symbol')['interval']
+            frequency.loc[unmatched] = classify(mode).reindex(unmatched)
+
+        return frequency
+
+    def _assemble_bulk_metrics(self, frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Apply the per-symbol output rules to computed columns and update stats."""
+        current = frame['current_price']
+        base = frame['price_12mo_ago']
+        days = frame['days_of_data']
+        annualize = days < 365  # NaN (not projected) compares False
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valid_base = base > 0
+            total_return = (current - base + frame['dividends_ttm']) / base
+            total_return = total_return.where(~annualize, (1 + total_return) ** (365.0 / days) - 1)
+            price_change = (current - base) / base
+            price_change = price_change.where(~annualize, (1 + price_change) ** (365.0 / days) - 1)
+            ytd = (current - frame['price_year_start']) / frame['price_year_start']
+
+            # Dividend yield uses linearly annualized dividends for short projected histories
+            yield_dividends = frame['dividends_ttm'].where(
+                ~(annualize & (days > 0)), frame['dividends_ttm'] * (365.0 / days)
+            )
+            dividend_yield = yield_dividends / current
+
+        has_current = current.notna() & (current != 0)
+        has_ttm = has_current & base.notna() & (base != 0)
+
+        def value(series: pd.Series, symbol: str) -> Optional[float]:
+            result = series.get(symbol)
+            return None if result is None or pd.isna(result) or np.iscomplexobj(result) else float(result)
+
+        results = []
+        for symbol in frame.index:
+            self.stats['total_processed'] += 1
+            metrics = {'symbol': symbol}
+
+            frequency = frame.at[symbol, 'frequency']
+            if pd.notna(frequency) and frequency:
+                metrics['frequency'] = frequency
+                self.stats['frequency_calculated'] += 1
+
+            if has_current[symbol]:
+                metrics['price'] = float(current[symbol])
+
+            if pd.notna(frame.at[symbol, 'last_dividend_date']):
+                metrics['last_dividend_date'] = frame.at[symbol, 'last_dividend_date']
+                metrics['last_dividend_amount'] = value(frame['last_dividend_amount'], symbol)
+
+            if has_ttm[symbol]:
+                if valid_base[symbol] and value(total_return, symbol) is not None:
+                    metrics['total_return_ttm'] = value(total_return, symbol)
+                    self.stats['ttm_calculated'] += 1
+                if valid_base[symbol] and value(price_change, symbol) is not None:
+                    metrics['price_change_ttm'] = value(price_change, symbol)
+            else:
+                # Explicitly NULL out stale TTM values
+                metrics['total_return_ttm'] = None
+                metrics['price_change_ttm'] = None
+
+            if has_current[symbol] and frame.at[symbol, 'price_year_start'] > 0:
+                metrics['price_change_ytd'] = value(ytd, symbol)
+                self.stats['ytd_calculated'] += 1
+
+            if has_current[symbol] and yield_dividends[symbol] > 0:
+                metrics['dividend_yield'] = value(dividend_yield, symbol)
+
+            if len(metrics) > 1:
+                results.append(metrics)
+                self.stats['successful'] += 1
+            else:
+                self.stats['failed'] += 1
+
+        return results
+
+    def _iter_symbols(self, limit: Optional[int] = None) -> Iterator[str]:
+        """
+        Stream the symbols to process from raw_stocks (the first `limit` if given).
+
+        The full scan is keyset-paginated over SYMBOL_READERS concurrent key
+        ranges, so processing starts with the first page instead of after the
+        whole table is loaded. A failed read is logged and ends the stream.
+        """
+        try:
+            if limit:
+                rows = supabase_select('raw_stocks', columns='symbol', limit=limit)
+            else:
+                rows = supabase_select_iter('raw_stocks', columns='symbol', parallel=SYMBOL_READERS)
+            for row in rows:
+                yield row['symbol']
+        except Exception as e:
+            logger.error(f"❌ Error reading symbols from raw_stocks: {e}")
+            self.stats['errors'].append(f"symbol scan: {str(e)}")
+
+    def process_all_stocks_bulk(self, shard_size: int = BULK_SHARD_SIZE, limit: Optional[int] = None):
+        """
+        Calculate metrics for all stocks with set-based queries per shard.
+
+        Falls back to process_all_stocks() when direct Postgres access is
+        not configured (neither DATABASE_URL nor DB_* variables are set) or
+        the database is unreachable.
+
+        Args:
+            shard_size: Symbols per query round
             limit: Optional limit on number of stocks to process
         """
-        logger.info("🚀 Starting stock metrics calculation")
+        if not get_postgres_pool():
+            logger.warning("⚠️  Direct Postgres unavailable - falling back to per-symbol mode")
+            return self.process_all_stocks(limit=limit)
 
-        # Get all stock symbols
-        stocks = supabase_select('raw_stocks', columns='symbol', limit=limit if limit else 100000)
+        logger.info("🚀 Starting bulk stock metrics calculation")
+        logger.info(f"📊 Processing stocks in shards of {shard_size}")
 
-        if not stocks:
+        # Shards are cut from the symbol stream as it arrives
+        symbols = self._iter_symbols(limit)
+        updates = []
+        processed = 0
+        shard_number = 0
+        while True:
+            shard = list(islice(symbols, shard_size))
+            if not shard:
+                break
+
+            shard_number += 1
+            processed += len(shard)
+            try:
+                updates.extend(self.calculate_metrics_bulk(shard))
+            except Exception as e:
+                logger.error(f"❌ Shard {shard_number} failed: {e}")
+                self.stats['failed'] += len(shard)
+                self.stats['errors'].append(f"shard {shard[0]}..{shard[-1]}: {str(e)}")
+                continue
+            logger.info(f"📈 Progress: {processed} stocks")
+
+        if not processed:
             logger.error("❌ No stocks found in database")
             return
 
-        total_stocks = len(stocks)
-        logger.info(f"📊 Processing {total_stocks} stocks")
+        # Rows with the same columns go out in one upsert, so a missing metric
+        # never overwrites an existing value with NULL
+        by_columns = {}
+        for metrics in updates:
+            by_columns.setdefault(tuple(sorted(metrics)), []).append(metrics)
+        for group in by_columns.values():
+            self._batch_update_stocks(group, batch_size=len(group))
+
+        self._print_summary()
+
+    def process_all_stocks(self, batch_size: int = 100, limit: Optional[int] = None):
+        """
+        Process all stocks and update their metrics.
+
+        Args:
+            batch_size: Number of stocks to update in each batch
+            limit: Optional limit on number of stocks to process
+        """
+        logger.info("🚀 Starting stock metrics calculation")
 
-        # Process in batches
+        # Process in batches as symbols stream in
         updates = []
 
-        for idx, stock in enumerate(stocks, 1):
-            symbol = stock['symbol']
+        for idx, symbol in enumerate(self._iter_symbols(limit), 1):
             self.stats['total_processed'] += 1
 
             # Calculate metrics
@@ -579,7 +912,7 @@ class StockMetricsCalculator:
 
                 # Log progress every 100 stocks
                 if idx % 100 == 0:
-                    logger.info(f"📈 Progress: {idx}/{total_stocks} ({idx/total_stocks*100:.1f}%)")
+                    logger.info(f"📈 Progress: {idx} stocks")
 
                 # Update database in batches
                 if len(updates) >= batch_size:
@@ -588,6 +921,10 @@ class StockMetricsCalculator:
             else:
                 self.stats['failed'] += 1
 
+        if not self.stats['total_processed']:
+            logger.error("❌ No stocks found in database")
+            return
+
         # Update remaining
         if updates:
             self._batch_update_stocks(updates)
@@ -595,14 +932,14 @@ class StockMetricsCalculator:
         # Print summary
         self._print_summary()
 
-    def _batch_update_stocks(self, updates: List[Dict[str, Any]]):
+    def _batch_update_stocks(self, updates: List[Dict[str, Any]], batch_size: int = 100):
         """Update stocks table with calculated metrics."""
         try:
             # Use batch upsert to update raw_stocks
             result = supabase_batch_upsert(
                 'raw_stocks',
                 updates,
-                batch_size=100
+                batch_size=batch_size
             )
 
             if result:
@@ -644,6 +981,8 @@ def main():
     parser.add_argument('--limit', type=int, help='Limit number of stocks to process (for testing)')
     parser.add_argument('--batch-size', type=int, default=100, help='Batch size for database updates')
     parser.add_argument('--symbol', type=str, help='Process a specific symbol only')
+    parser.add_argument('--bulk', action='store_true', help='Use set-based bulk queries (requires DATABASE_URL)')
+    parser.add_argument('--shard-size', type=int, default=BULK_SHARD_SIZE, help='Symbols per bulk query round')
     args = parser.parse_args()
 
     calculator = StockMetricsCalculator()
@@ -662,6 +1001,11 @@ def main():
             calculator._batch_update_stocks([metrics])
         else:
             logger.error(f"❌ Failed to calculate metrics for {args.symbol}")
+    elif args.bulk:
+        calculator.process_all_stocks_bulk(
+            shard_size=args.shard_size,
+            limit=args.limit
+        )
     else:
         calculator.process_all_stocks(
             batch_size=args.batch_size,
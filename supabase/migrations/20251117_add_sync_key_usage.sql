@@ -0,0 +1,53 @@
+-- Migration: Batched API Key Usage Sync
+-- Created: 2025-11-17
+-- Description: Adds sync_key_usage(), used by the API rate limiter to
+-- reconcile in-memory/Redis usage counters to divv_api_keys in one call
+-- instead of calling increment_key_usage() on every request.
+
+CREATE OR REPLACE FUNCTION public.sync_key_usage(
+    key_ids uuid[],
+    deltas integer[],
+    monthly_usages integer[],
+    reset_ats timestamptz[]
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $function$
+BEGIN
+    -- Only service_role can call this (from rate limiter middleware)
+    IF auth.role() != 'service_role' THEN
+        RAISE EXCEPTION 'Unauthorized: Service role required';
+    END IF;
+
+    -- A non-null monthly_usage is the shared (Redis) total and is
+    -- authoritative. A null one comes from a single worker's in-memory
+    -- counters: only its delta is added (starting a new period when the
+    -- stored one has ended), so workers never overwrite each other.
+    -- request_count accumulates the deltas since the last sync.
+    UPDATE divv_api_keys k
+    SET
+        monthly_usage = CASE
+            WHEN u.monthly_usage IS NOT NULL THEN u.monthly_usage
+            WHEN k.monthly_usage_reset_at IS NOT NULL AND k.monthly_usage_reset_at <= NOW() THEN u.delta
+            ELSE COALESCE(k.monthly_usage, 0) + u.delta
+        END,
+        monthly_usage_reset_at = CASE
+            WHEN u.monthly_usage IS NOT NULL THEN u.reset_at
+            WHEN k.monthly_usage_reset_at IS NULL OR k.monthly_usage_reset_at <= NOW() THEN u.reset_at
+            ELSE k.monthly_usage_reset_at
+        END,
+        request_count = COALESCE(k.request_count, 0) + u.delta,
+        last_used_at = NOW(),
+        updated_at = NOW()
+    FROM unnest(key_ids, deltas, monthly_usages, reset_ats)
+        AS u(key_id, delta, monthly_usage, reset_at)
+    WHERE k.id = u.key_id;
+END;
+$function$;
+
+-- Revoke all access and grant only to service role
+REVOKE EXECUTE ON FUNCTION public.sync_key_usage(uuid[], integer[], integer[], timestamptz[]) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.sync_key_usage(uuid[], integer[], integer[], timestamptz[]) TO service_role;
+
+COMMENT ON FUNCTION public.sync_key_usage IS 'Batch-apply API key usage from rate limiter counters (service_role only)';
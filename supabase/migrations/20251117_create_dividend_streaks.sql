@@ -0,0 +1,189 @@
+-- Migration: Precomputed Dividend Streaks
+-- Created: 2025-11-17
+-- Description: Adds divv_dividend_streaks (consecutive annual increases,
+-- 5-year dividend CAGR, last cut date per symbol) and
+-- refresh_dividend_streaks(), which the dividend ingest calls for the
+-- symbols it just wrote. The aristocrat/king screeners read
+-- divv_dividend_streak_screener in one indexed query instead of loading
+-- every stock's dividend history per request.
+--
+-- Definitions (complete calendar years only; the current year is partial):
+--   consecutive_increases  Years, counting back from the last complete year,
+--                          whose total dividend exceeded the year before.
+--                          0 if the symbol paid nothing last year.
+--   dividend_cagr_5yr      % growth rate of annual totals over the last 5 years
+--   last_cut_date          Latest ex-date paying less than the payment before it
+
+BEGIN;
+
+-- ============================================================================
+-- Streak table
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS divv_dividend_streaks (
+    symbol TEXT PRIMARY KEY,
+    consecutive_increases INTEGER NOT NULL DEFAULT 0,
+    years_paid INTEGER NOT NULL DEFAULT 0,
+    last_annual_dividend NUMERIC,
+    dividend_cagr_5yr NUMERIC,
+    last_cut_date DATE,
+    last_ex_date DATE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Aristocrat (25+) / king (50+) lookups
+CREATE INDEX IF NOT EXISTS idx_divv_dividend_streaks_increases
+    ON divv_dividend_streaks(consecutive_increases DESC)
+    WHERE consecutive_increases > 0;
+
+ALTER TABLE divv_dividend_streaks ENABLE ROW LEVEL SECURITY;
+
+-- Derived from public dividend data; tier filtering applies through
+-- raw_stocks in the screener view
+CREATE POLICY "public_dividend_streaks_access"
+ON divv_dividend_streaks
+FOR SELECT
+USING (true);
+
+-- ============================================================================
+-- Incremental refresh
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.refresh_dividend_streaks(p_symbols text[] DEFAULT NULL)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $function$
+DECLARE
+    last_year integer := EXTRACT(YEAR FROM CURRENT_DATE)::integer - 1;
+    refreshed integer;
+BEGIN
+    -- Only service_role can call this (from the dividend ingest)
+    IF auth.role() != 'service_role' THEN
+        RAISE EXCEPTION 'Unauthorized: Service role required';
+    END IF;
+
+    WITH payments AS (
+        SELECT
+            symbol,
+            ex_date,
+            amount,
+            LAG(amount) OVER (PARTITION BY symbol ORDER BY ex_date) AS prev_amount
+        FROM raw_dividends
+        WHERE amount > 0
+          AND (p_symbols IS NULL OR symbol = ANY(p_symbols))
+    ),
+    per_symbol AS (
+        SELECT
+            symbol,
+            MAX(ex_date) AS last_ex_date,
+            MAX(ex_date) FILTER (WHERE amount < prev_amount) AS last_cut_date
+        FROM payments
+        GROUP BY symbol
+    ),
+    annual AS (
+        SELECT
+            symbol,
+            EXTRACT(YEAR FROM ex_date)::integer AS year,
+            SUM(amount) AS total
+        FROM payments
+        WHERE ex_date < make_date(last_year + 1, 1, 1)
+        GROUP BY symbol, EXTRACT(YEAR FROM ex_date)
+    ),
+    annual_changes AS (
+        SELECT
+            symbol,
+            year,
+            total,
+            -- A year breaks the streak unless it follows a paid year with a lower total
+            NOT (
+                COALESCE(LAG(year) OVER w = year - 1, false)
+                AND total > LAG(total) OVER w
+            ) AS breaks_streak
+        FROM annual
+        WINDOW w AS (PARTITION BY symbol ORDER BY year)
+    ),
+    streaks AS (
+        SELECT
+            symbol,
+            COUNT(*)::integer AS years_paid,
+            CASE
+                WHEN MAX(year) < last_year THEN 0
+                ELSE (last_year - MAX(year) FILTER (WHERE breaks_streak))::integer
+            END AS consecutive_increases,
+            MAX(total) FILTER (WHERE year = last_year) AS last_annual_dividend,
+            MAX(total) FILTER (WHERE year = last_year - 5) AS base_annual_dividend
+        FROM annual_changes
+        GROUP BY symbol
+    )
+    INSERT INTO divv_dividend_streaks (
+        symbol, consecutive_increases, years_paid, last_annual_dividend,
+        dividend_cagr_5yr, last_cut_date, last_ex_date, updated_at
+    )
+    SELECT
+        p.symbol,
+        COALESCE(s.consecutive_increases, 0),
+        COALESCE(s.years_paid, 0),
+        s.last_annual_dividend,
+        CASE
+            WHEN s.base_annual_dividend > 0 AND s.last_annual_dividend > 0 THEN
+                ROUND(((POWER(s.last_annual_dividend / s.base_annual_dividend, 0.2) - 1) * 100)::numeric, 2)
+        END,
+        p.last_cut_date,
+        p.last_ex_date,
+        NOW()
+    FROM per_symbol p
+    LEFT JOIN streaks s USING (symbol)
+    ON CONFLICT (symbol) DO UPDATE SET
+        consecutive_increases = EXCLUDED.consecutive_increases,
+        years_paid = EXCLUDED.years_paid,
+        last_annual_dividend = EXCLUDED.last_annual_dividend,
+        dividend_cagr_5yr = EXCLUDED.dividend_cagr_5yr,
+        last_cut_date = EXCLUDED.last_cut_date,
+        last_ex_date = EXCLUDED.last_ex_date,
+        updated_at = EXCLUDED.updated_at;
+
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+    RETURN refreshed;
+END;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.refresh_dividend_streaks(text[]) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.refresh_dividend_streaks(text[]) TO service_role;
+
+COMMENT ON FUNCTION public.refresh_dividend_streaks IS 'Recompute divv_dividend_streaks for the given symbols (all when NULL); service_role only';
+
+-- ============================================================================
+-- Screener view (stock fields + streak, one row per symbol)
+-- ============================================================================
+
+CREATE OR REPLACE VIEW divv_dividend_streak_screener
+WITH (security_invoker = true) AS
+SELECT
+    s.symbol,
+    s.company,
+    s.exchange,
+    s.type,
+    s.price,
+    s.market_cap,
+    s.dividend_yield,
+    s.payout_ratio,
+    d.consecutive_increases,
+    d.years_paid,
+    d.last_annual_dividend,
+    d.dividend_cagr_5yr,
+    d.last_cut_date,
+    d.last_ex_date
+FROM divv_dividend_streaks d
+JOIN raw_stocks s ON s.symbol = d.symbol;
+
+GRANT SELECT ON divv_dividend_streak_screener TO anon, authenticated, service_role;
+
+-- ============================================================================
+-- Initial backfill (later updates come from the dividend ingest)
+-- ============================================================================
+
+SELECT refresh_dividend_streaks(NULL);
+
+COMMIT;
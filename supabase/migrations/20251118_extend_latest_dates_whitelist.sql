@@ -0,0 +1,54 @@
+-- Migration: Allow raw_* tables in get_latest_dates_by_symbol() and page its results
+-- Date: 2025-11-18
+-- Description: The ingest pipeline writes raw_stock_prices and raw_dividends,
+-- but the 20251115 security fix only whitelisted divv_stock_prices,
+-- divv_dividends and raw_hourly_prices, so every bulk latest-date lookup
+-- (IncrementalProcessor.get_bulk_latest_dates) failed and callers fell back
+-- to full-history fetches. This keeps the whitelist validation, adds the raw
+-- tables, and adds keyset paging (after_symbol, page_size) because PostgREST
+-- truncates RPC results at max_rows (1000).
+
+DROP FUNCTION IF EXISTS public.get_latest_dates_by_symbol(text, text);
+
+CREATE OR REPLACE FUNCTION public.get_latest_dates_by_symbol(
+    table_name text,
+    date_col text DEFAULT 'date'::text,
+    after_symbol text DEFAULT NULL,
+    page_size integer DEFAULT 1000
+)
+RETURNS TABLE(symbol text, latest_date date)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $function$
+BEGIN
+    -- Whitelist allowed tables to prevent SQL injection
+    IF table_name NOT IN ('raw_stock_prices', 'raw_dividends', 'raw_hourly_prices',
+                          'divv_stock_prices', 'divv_dividends') THEN
+        RAISE EXCEPTION 'Invalid table name: %. Allowed tables: raw_stock_prices, raw_dividends, raw_hourly_prices, divv_stock_prices, divv_dividends', table_name;
+    END IF;
+
+    -- Whitelist allowed date columns
+    IF date_col NOT IN ('date', 'ex_date', 'payment_date', 'timestamp') THEN
+        RAISE EXCEPTION 'Invalid column name: %. Allowed columns: date, ex_date, payment_date, timestamp', date_col;
+    END IF;
+
+    -- Execute with validated inputs; symbols after after_symbol, in order
+    RETURN QUERY EXECUTE format('
+        SELECT
+            symbol::text,
+            MAX(%I)::date as latest_date
+        FROM %I
+        WHERE $1 IS NULL OR symbol > $1
+        GROUP BY symbol
+        ORDER BY symbol
+        LIMIT $2
+    ', date_col, table_name)
+    USING after_symbol, LEAST(GREATEST(page_size, 1), 1000);
+END;
+$function$;
+
+-- Revoke public access and grant only to service role
+REVOKE EXECUTE ON FUNCTION public.get_latest_dates_by_symbol(text, text, text, integer) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.get_latest_dates_by_symbol(text, text, text, integer) TO service_role;
+
+COMMENT ON FUNCTION public.get_latest_dates_by_symbol IS 'Get latest dates by symbol from whitelisted tables, one keyset page at a time (service_role only)';
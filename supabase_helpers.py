@@ -6,11 +6,17 @@ used in the dividend tracker project.
 """
 
 import os
+import io
+import time
 import logging
-from typing import List, Dict, Any, Optional, Union
+import threading
+import uuid
+from queue import Full, Queue
+from typing import List, Dict, Any, Optional, Union, Iterable, Iterator, Tuple
 from datetime import datetime, date
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from lib.utils.performance_monitor import record_db_write
 import json
 
 # Load environment variables
@@ -23,6 +29,19 @@ logger = logging.getLogger(__name__)
 _supabase_client = None
 _supabase_admin_client = None
 
+# Direct Postgres bulk-load backend (used by supabase_batch_upsert for large batches)
+BULK_COPY_THRESHOLD = int(os.getenv('BULK_COPY_THRESHOLD', '5000'))  # Rows before switching to COPY
+BULK_COPY_CHUNK_ROWS = 100000  # Rows streamed per COPY command
+
+# Unique constraints used for ON CONFLICT handling, per table
+UPSERT_CONFLICT_COLUMNS = {
+    'raw_stock_prices': 'symbol,date',
+    'raw_dividends': 'symbol,ex_date',
+    'divv_future_dividends': 'symbol,ex_date',
+    'raw_stocks': 'symbol',
+    'raw_stocks_excluded': 'symbol',
+}
+
 def get_supabase_client() -> Optional[Client]:
     """Get or create a Supabase client instance."""
     global _supabase_client
@@ -139,7 +158,9 @@ def supabase_select(table: str, columns: str = "*",
                    where_clause: Optional[Dict] = None,
                    limit: Optional[int] = None,
                    offset: Optional[int] = None,
-                   order_by: Optional[str] = None) -> List[Dict]:
+                   order_by: Optional[str] = None,
+                   parallel: int = 1,
+                   columnar: Optional[str] = None) -> Union[List[Dict], Dict[str, Any], Any]:
     """
     Execute SELECT query on Supabase with automatic pagination for large datasets.
 
@@ -150,53 +171,33 @@ def supabase_select(table: str, columns: str = "*",
         limit: Maximum number of rows to return (None = all rows with pagination)
         offset: Number of rows to skip
         order_by: Column to order by (can include "DESC")
+        parallel: Concurrent key-range readers when paginating all rows
+                  (rows are then grouped by key range, not globally ordered)
+        columnar: Return typed columns instead of row dicts:
+                  'numpy' (dict of arrays) or 'arrow' (pyarrow.Table)
 
     Returns:
-        List of dictionaries representing rows
+        List of dictionaries representing rows, or a columnar result
     """
+    column_names = None if columns == "*" else columns.replace(" ", "").split(",")
+
+    def _result(rows):
+        if columnar:
+            from lib.utils.columnar import to_columnar
+            return to_columnar(rows, columnar, columns=column_names)
+        return rows if isinstance(rows, list) else list(rows)
+
     try:
         supabase = get_supabase_client()
         if not supabase:
-            return []
+            return _result([])
 
         # If no limit specified, paginate through all results
         if limit is None and offset is None:
-            all_results = []
-            page_size = 1000
-            current_offset = 0
-
-            while True:
-                query = supabase.table(table)
-
-                # Handle column selection
-                if columns != "*":
-                    columns_clean = columns.replace(" ", "")
-                    query = query.select(columns_clean)
-                else:
-                    query = query.select("*")
-
-                # Apply where clause
-                query = _apply_where_clause(query, where_clause)
-
-                # Apply order by
-                query = _apply_order_by(query, order_by)
-
-                # Apply pagination
-                query = query.range(current_offset, current_offset + page_size - 1)
-
-                result = query.execute()
-                if not result.data:
-                    break
-
-                all_results.extend(result.data)
-
-                # If we got less than page_size, we're done
-                if len(result.data) < page_size:
-                    break
-
-                current_offset += page_size
-
-            return all_results
+            # Columnar results are built page by page from the stream
+            return _result(supabase_select_iter(
+                table, columns, where_clause, order_by=order_by, parallel=parallel
+            ))
 
         # Standard query with explicit limit/offset
         query = supabase.table(table)
@@ -221,12 +222,273 @@ def supabase_select(table: str, columns: str = "*",
             query = query.range(offset, offset + (limit or 1000) - 1)
 
         result = query.execute()
-        return result.data if result.data else []
+        return _result(result.data if result.data else [])
 
     except Exception as e:
         logger.error(f"❌ Supabase select error on {table}: {e}")
+        return _result([])
+
+
+def supabase_select_iter(table: str, columns: str = "*",
+                         where_clause: Optional[Dict] = None,
+                         order_by: Optional[str] = None,
+                         page_size: int = 1000,
+                         parallel: int = 1,
+                         key_columns: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    Stream all matching rows page by page in constant memory.
+
+    Uses keyset (seek) pagination on the table's unique key, so every page
+    is an index seek instead of an OFFSET re-scan. The key defaults to the
+    table's UPSERT_CONFLICT_COLUMNS, led by the order_by column when it is
+    part of the key; tables without a known key fall back to OFFSET paging.
+
+    With parallel > 1 the leading key column is split into disjoint ranges
+    that are read concurrently. Rows are then yielded page by page as
+    ranges complete, so they are not globally ordered.
+
+    Usage:
+        for row in supabase_select_iter('raw_stock_prices', 'symbol,date,close'):
+            process(row)
+
+    Args:
+        table: Table name
+        columns: Columns to select (comma-separated string or "*")
+        where_clause: Same formats as supabase_select
+        order_by: Column to order by (can include "DESC")
+        page_size: Rows per request (PostgREST caps this at its max-rows setting)
+        parallel: Number of concurrent key-range readers
+        key_columns: Unique key to paginate on (overrides the table default)
+
+    Yields:
+        Row dictionaries
+
+    Raises:
+        The first error from any key-range reader (remaining readers are
+        stopped, as they are when the generator is closed early)
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return
+
+    keys, descending = _keyset_columns(table, order_by, key_columns)
+    if not keys:
+        yield from _offset_pages(table, columns, where_clause, order_by, page_size)
+        return
+
+    extra = []
+    if columns != "*":
+        # Key columns are needed to build the next cursor; removed again before yielding
+        selected = columns.replace(" ", "").split(",")
+        extra = [key for key in keys if key not in selected]
+        columns = ",".join(selected + extra)
+
+    def strip(rows: Iterable[Dict]) -> Iterator[Dict]:
+        for row in rows:
+            for key in extra:
+                row.pop(key, None)
+            yield row
+
+    if parallel <= 1:
+        yield from strip(_keyset_pages(table, columns, where_clause, keys, descending, page_size))
+        return
+
+    bounds = _keyset_boundaries(table, where_clause, keys[0], parallel)
+    ranges = list(zip([None] + bounds, bounds + [None]))
+    pages: Queue = Queue(maxsize=parallel * 2)
+    done = object()
+    stop = threading.Event()  # Set when the consumer stops (finished, failed or closed early)
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def read_range(lower, upper):
+        try:
+            page = []
+            for row in _keyset_pages(table, columns, where_clause, keys, descending,
+                                     page_size, lower=lower, upper=upper):
+                page.append(row)
+                if len(page) >= page_size:
+                    if not put(page):
+                        return
+                    page = []
+            if page:
+                put(page)
+        except Exception as e:
+            logger.error(f"❌ Supabase keyset range [{lower}, {upper}) error on {table}: {e}")
+            # Re-raised by the consumer so a failed range never looks like a short result
+            put(e)
+        finally:
+            put(done)
+
+    threads = [threading.Thread(target=read_range, args=key_range, daemon=True) for key_range in ranges]
+    for thread in threads:
+        thread.start()
+
+    try:
+        remaining = len(threads)
+        while remaining:
+            page = pages.get()
+            if page is done:
+                remaining -= 1
+                continue
+            if isinstance(page, Exception):
+                raise page
+            yield from strip(page)
+    finally:
+        stop.set()
+
+
+def _keyset_columns(table: str, order_by: Optional[str],
+                    key_columns: Optional[List[str]] = None) -> Tuple[List[str], bool]:
+    """
+    Resolve the unique key used for keyset pagination.
+
+    Returns:
+        (key columns in sort order, descending) or ([], False) if keyset
+        pagination cannot be used for this table/order
+    """
+    descending = False
+    order_column = None
+    if order_by:
+        order_column = order_by.replace('.desc', '').replace('.DESC', '').replace('.asc', '').replace('.ASC', '')
+        order_column = order_column.replace(' DESC', '').replace(' desc', '').replace(' ASC', '').replace(' asc', '').strip()
+        descending = 'desc' in order_by.lower()
+
+    if key_columns:
+        keys = list(key_columns)
+    elif table in UPSERT_CONFLICT_COLUMNS:
+        keys = UPSERT_CONFLICT_COLUMNS[table].split(',')
+    else:
+        return [], False
+
+    if order_column:
+        # Ordering by a non-key column could contain NULLs/duplicates the cursor can't seek past
+        if order_column not in keys:
+            return [], False
+        keys = [order_column] + [key for key in keys if key != order_column]
+
+    return keys, descending
+
+
+def _postgrest_value(value: Any) -> str:
+    """Quote a value for use inside a PostgREST logical (or/and) filter."""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _keyset_pages(table: str, columns: str, where_clause: Optional[Dict],
+                  keys: List[str], descending: bool, page_size: int,
+                  lower: Any = None, upper: Any = None) -> Iterator[Dict]:
+    """
+    Yield rows using keyset pagination over `keys`.
+
+    Args:
+        lower/upper: Optional [lower, upper) bounds on the leading key column
+    """
+    supabase = get_supabase_client()
+    cursor = None
+    seek_op = 'lt' if descending else 'gt'
+
+    while True:
+        query = supabase.table(table).select(columns.replace(" ", "") if columns != "*" else "*")
+        query = _apply_where_clause(query, where_clause)
+
+        if lower is not None:
+            query = query.gte(keys[0], lower)
+        if upper is not None:
+            query = query.lt(keys[0], upper)
+
+        if cursor is not None:
+            # (k1, k2, ...) > (v1, v2, ...) expanded for PostgREST:
+            # k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...
+            conditions = []
+            for i, key in enumerate(keys):
+                op = seek_op if i == 0 else 'gt'
+                parts = [f"{keys[j]}.eq.{_postgrest_value(cursor[j])}" for j in range(i)]
+                parts.append(f"{key}.{op}.{_postgrest_value(cursor[i])}")
+                conditions.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+            query = query.or_(",".join(conditions))
+
+        for i, key in enumerate(keys):
+            query = query.order(key, desc=descending if i == 0 else False)
+
+        result = query.limit(page_size).execute()
+        rows = result.data or []
+        if len(rows) < page_size:
+            yield from rows
+            break
+
+        # Taken before yielding: consumers may drop key columns from the rows
+        cursor = [rows[-1][key] for key in keys]
+        yield from rows
+
+
+def _keyset_boundaries(table: str, where_clause: Optional[Dict],
+                       key: str, parts: int) -> List[Any]:
+    """
+    Find distinct leading-key values that split the result into ~equal ranges.
+
+    Probes `parts - 1` evenly spaced offsets (one small index scan each, once
+    per read) rather than paging the whole table.
+    """
+    supabase = get_supabase_client()
+
+    query = supabase.table(table).select(key, count='exact')
+    query = _apply_where_clause(query, where_clause)
+    total = query.limit(1).execute().count or 0
+    if total == 0:
         return []
 
+    bounds = []
+    for i in range(1, parts):
+        query = supabase.table(table).select(key)
+        query = _apply_where_clause(query, where_clause)
+        result = query.order(key).range(total * i // parts, total * i // parts).execute()
+        if result.data:
+            value = result.data[0][key]
+            if value is not None and (not bounds or value > bounds[-1]):
+                bounds.append(value)
+    return bounds
+
+
+def _offset_pages(table: str, columns: str, where_clause: Optional[Dict],
+                  order_by: Optional[str], page_size: int) -> Iterator[Dict]:
+    """Yield rows using OFFSET pagination (tables without a known unique key)."""
+    supabase = get_supabase_client()
+    current_offset = 0
+
+    while True:
+        query = supabase.table(table)
+
+        # Handle column selection
+        if columns != "*":
+            query = query.select(columns.replace(" ", ""))
+        else:
+            query = query.select("*")
+
+        query = _apply_where_clause(query, where_clause)
+        query = _apply_order_by(query, order_by)
+        query = query.range(current_offset, current_offset + page_size - 1)
+
+        result = query.execute()
+        if not result.data:
+            break
+
+        yield from result.data
+
+        # If we got less than page_size, we're done
+        if len(result.data) < page_size:
+            break
+
+        current_offset += page_size
+
 
 def _apply_where_clause(query, where_clause: Optional[Dict]):
     """Helper to apply where clause to query."""
@@ -252,21 +514,26 @@ def _apply_where_clause(query, where_clause: Optional[Dict]):
 
             for part in parts:
                 part = part.strip()
+                # ex_date before date: 'date >= %s' is a substring of 'ex_date >= %s'
                 if 'symbol = %s' in part and param_index < len(params):
                     query = query.eq('symbol', params[param_index])
                     param_index += 1
-                elif 'date >= %s' in part and param_index < len(params):
-                    query = query.gte('date', str(params[param_index]))
-                    param_index += 1
-                elif 'date <= %s' in part and param_index < len(params):
-                    query = query.lte('date', str(params[param_index]))
-                    param_index += 1
                 elif 'ex_date >= %s' in part and param_index < len(params):
                     query = query.gte('ex_date', str(params[param_index]))
                     param_index += 1
                 elif 'ex_date <= %s' in part and param_index < len(params):
                     query = query.lte('ex_date', str(params[param_index]))
                     param_index += 1
+                elif 'date >= %s' in part and param_index < len(params):
+                    query = query.gte('date', str(params[param_index]))
+                    param_index += 1
+                elif 'date <= %s' in part and param_index < len(params):
+                    query = query.lte('date', str(params[param_index]))
+                    param_index += 1
+        elif 'ex_date >= %s' in condition and params:
+            query = query.gte('ex_date', str(params[0]))
+        elif 'ex_date <= %s' in condition and params:
+            query = query.lte('ex_date', str(params[0]))
         elif 'date >= %s' in condition and params:
             query = query.gte('date', str(params[0]))
         elif 'date <= %s' in condition and params:
@@ -437,19 +704,9 @@ def supabase_upsert(table: str, data: Union[Dict, List[Dict]], batch_size: int =
             try:
                 # Specify conflict columns for proper upsert behavior
                 # Different tables have different unique constraints
-                if table == 'raw_stock_prices':
-                    # raw_stock_prices has unique constraint on (symbol, date)
-                    result = supabase.table(table).upsert(batch, on_conflict='symbol,date').execute()
-                elif table == 'raw_dividends':
-                    # raw_dividends has unique constraint on (symbol, ex_date)
-                    # Use proper upsert to update existing records
-                    result = supabase.table(table).upsert(batch, on_conflict='symbol,ex_date').execute()
-                elif table == 'raw_stocks':
-                    # raw_stocks has unique constraint on symbol
-                    result = supabase.table(table).upsert(batch, on_conflict='symbol').execute()
-                elif table == 'raw_stocks_excluded':
-                    # raw_stocks_excluded has unique constraint on symbol
-                    result = supabase.table(table).upsert(batch, on_conflict='symbol').execute()
+                conflict_columns = UPSERT_CONFLICT_COLUMNS.get(table)
+                if conflict_columns:
+                    result = supabase.table(table).upsert(batch, on_conflict=conflict_columns).execute()
                 else:
                     # Default upsert without explicit conflict handling
                     result = supabase.table(table).upsert(batch).execute()
@@ -573,6 +830,10 @@ def supabase_batch_upsert(table: str, data: List[Dict], batch_size: int = 1000)
     """
     Execute batch upsert operations on Supabase.
 
+    Large batches (BULK_COPY_THRESHOLD rows or more) on tables with a known
+    unique constraint are written with a direct Postgres COPY + merge when
+    DATABASE_URL is configured; everything else goes through PostgREST.
+
     Args:
         table: Table name
         data: List of dictionaries to upsert
@@ -584,13 +845,26 @@ def supabase_batch_upsert(table: str, data: List[Dict], batch_size: int = 1000)
     if not data:
         return 0
 
+    if len(data) >= BULK_COPY_THRESHOLD and table in UPSERT_CONFLICT_COLUMNS and get_postgres_pool():
+        start = time.perf_counter()
+        try:
+            total_upserted = postgres_copy_upsert(table, data)
+            record_db_write(table, total_upserted, time.perf_counter() - start, method='copy')
+            logger.info(f"✅ COPY bulk upserted {total_upserted} records to {table}")
+            return total_upserted
+        except Exception as e:
+            record_db_write(table, 0, time.perf_counter() - start, success=False, method='copy')
+            logger.warning(f"⚠️ COPY bulk upsert failed on {table}, falling back to PostgREST: {e}")
+
     total_upserted = 0
 
     try:
         # Process in batches
         for i in range(0, len(data), batch_size):
             batch = data[i:i + batch_size]
+            start = time.perf_counter()
             result = supabase_upsert(table, batch)
+            record_db_write(table, len(result) if result else 0, time.perf_counter() - start, success=bool(result))
             if result:
                 total_upserted += len(result)
                 logger.info(f"✅ Batch upserted {len(result)} records to {table}")
@@ -601,6 +875,217 @@ def supabase_batch_upsert(table: str, data: List[Dict], batch_size: int = 1000)
         logger.error(f"❌ Batch upsert error on {table}: {e}")
         return total_upserted
 
+def get_postgres_pool():
+    """
+    Get the shared direct Postgres connection pool (bulk loads and raw SQL).
+
+    Returns:
+        lib.core.db_pool.PostgresPool, or None if the database is not
+        reachable directly
+    """
+    from lib.core.db_pool import get_pool
+    return get_pool()
+
+def _copy_value(value: Any) -> Optional[str]:
+    """Convert a Python value to its COPY text form (None stays None, i.e. NULL)."""
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _copy_line(values: List[Any]) -> str:
+    """
+    One COPY CSV line.
+
+    Uses COPY's default CSV NULL: NULL is an unquoted empty field and every
+    other value is quoted, so no text (including '' or '\\N') reads as NULL.
+    """
+    fields = []
+    for value in values:
+        text = _copy_value(value)
+        fields.append('' if text is None else '"' + text.replace('"', '""') + '"')
+    return ','.join(fields) + '\n'
+
+def postgres_copy_upsert(table: str, data: List[Dict],
+                         conflict_columns: Optional[str] = None) -> int:
+    """
+    Upsert rows by streaming them with COPY into a temp table and merging.
+
+    All rows are loaded into an unconstrained staging table in
+    BULK_COPY_CHUNK_ROWS chunks, then merged into the target with a single
+    INSERT ... ON CONFLICT DO UPDATE inside one transaction. Duplicate keys
+    within the batch resolve to the last occurrence, matching the
+    sequential PostgREST upsert behaviour.
+
+    Args:
+        table: Table name
+        data: List of dictionaries to upsert
+        conflict_columns: Comma-separated unique key (defaults to UPSERT_CONFLICT_COLUMNS)
+
+    Returns:
+        Number of rows inserted or updated
+    """
+    from psycopg2 import sql
+
+    if not data:
+        return 0
+
+    conflict_columns = conflict_columns or UPSERT_CONFLICT_COLUMNS.get(table)
+    if not conflict_columns:
+        raise ValueError(f"No conflict columns known for {table}")
+    keys = [col.strip() for col in conflict_columns.split(',')]
+
+    # Union of keys across rows, in first-seen order
+    columns = list(dict.fromkeys(key for row in data for key in row))
+    update_columns = [col for col in columns if col not in keys]
+
+    pool = get_postgres_pool()
+    if not pool:
+        raise RuntimeError("Direct Postgres connection not available for bulk loads")
+
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            stage = sql.Identifier(f"_stage_{table}")
+            column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+            key_list = sql.SQL(', ').join(map(sql.Identifier, keys))
+
+            cursor.execute(sql.SQL(
+                "CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+                "SELECT {columns} FROM {table} WITH NO DATA"
+            ).format(stage=stage, columns=column_list, table=sql.Identifier(table)))
+            cursor.execute(sql.SQL(
+                "ALTER TABLE {stage} ADD COLUMN _row_order BIGSERIAL"
+            ).format(stage=stage))
+
+            copy_sql = sql.SQL(
+                "COPY {stage} ({columns}) FROM STDIN WITH (FORMAT csv)"
+            ).format(stage=stage, columns=column_list).as_string(conn)
+
+            for i in range(0, len(data), BULK_COPY_CHUNK_ROWS):
+                buffer = io.StringIO()
+                for row in data[i:i + BULK_COPY_CHUNK_ROWS]:
+                    buffer.write(_copy_line([row.get(col) for col in columns]))
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+
+            if update_columns:
+                conflict_action = sql.SQL("DO UPDATE SET {}").format(sql.SQL(', ').join(
+                    sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(col))
+                    for col in update_columns
+                ))
+            else:
+                conflict_action = sql.SQL("DO NOTHING")
+
+            cursor.execute(sql.SQL(
+                "INSERT INTO {table} ({columns}) "
+                "SELECT DISTINCT ON ({keys}) {columns} FROM {stage} "
+                "ORDER BY {keys}, _row_order DESC "
+                "ON CONFLICT ({keys}) {action}"
+            ).format(
+                table=sql.Identifier(table),
+                columns=column_list,
+                keys=key_list,
+                stage=stage,
+                action=conflict_action
+            ))
+            merged = cursor.rowcount
+
+    return merged
+
+RAW_QUERY_FETCH_ROWS = 50000  # Rows per fetch when streaming a columnar raw query
+
+def supabase_raw_query(query: str, params: Optional[Union[tuple, Dict]] = None,
+                       allow_multi: bool = False,
+                       columnar: Optional[str] = None,
+                       prepare: Optional[str] = None) -> Union[List[Dict], Dict[str, Any], Any]:
+    """
+    Execute raw SQL directly against Postgres on the shared connection pool.
+
+    Used for queries PostgREST can't express (functions, aggregates,
+    DISTINCT ON, migrations). The statement runs in its own transaction
+    and is committed on success.
+
+    Args:
+        query: SQL with %s / %(name)s placeholders
+        params: Query parameters
+        allow_multi: Allow a multi-statement script (params must be None)
+        columnar: Return typed columns instead of row dicts:
+                  'numpy' (dict of arrays) or 'arrow' (pyarrow.Table).
+                  The query then runs on a server-side cursor and rows are
+                  streamed in RAW_QUERY_FETCH_ROWS chunks (it must return rows)
+        prepare: Prepared statement name for queries run many times
+                 (positional %s parameters only)
+
+    Returns:
+        Rows of the last result set as dictionaries (empty list for
+        statements without results), or a columnar result
+
+    Raises:
+        RuntimeError: If direct Postgres access is not available
+        psycopg2.Error: On SQL errors (after rollback)
+    """
+    if allow_multi and params is not None:
+        raise ValueError("Multi-statement queries cannot take parameters")
+
+    pool = get_postgres_pool()
+    if not pool:
+        raise RuntimeError("Direct Postgres connection not available for raw SQL queries")
+
+    if columnar and not allow_multi:
+        return _raw_query_columnar(pool, query, params, columnar, prepare)
+
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            pool.execute(cursor, query, params, prepare=prepare)
+
+            if cursor.description is None:
+                if columnar:
+                    from lib.utils.columnar import to_columnar
+                    return to_columnar([], columnar)
+                return []
+
+            columns = [col.name for col in cursor.description]
+            if not columnar:
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+            from lib.utils.columnar import to_columnar
+            return to_columnar((dict(zip(columns, row)) for row in cursor.fetchall()),
+                               columnar, columns=columns)
+
+
+def _raw_query_columnar(pool, query: str, params, columnar: str, prepare: Optional[str]):
+    """
+    Run a row-returning query on a named (server-side) cursor and build columns.
+
+    Postgres holds the result; RAW_QUERY_FETCH_ROWS rows are transferred per
+    round trip, so the full result never sits in client memory as rows.
+    """
+    from lib.utils.columnar import to_columnar
+
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            statement, args = pool.statement(cursor, query, params, prepare)
+
+        with conn.cursor(name=f"raw_query_{uuid.uuid4().hex[:12]}") as cursor:
+            cursor.itersize = RAW_QUERY_FETCH_ROWS
+            cursor.execute(statement, args)
+
+            # A named cursor only has a description after its first fetch
+            chunk = cursor.fetchmany(RAW_QUERY_FETCH_ROWS)
+            columns = [col.name for col in cursor.description]
+
+            def _stream(chunk):
+                while chunk:
+                    for row in chunk:
+                        yield dict(zip(columns, row))
+                    chunk = cursor.fetchmany(RAW_QUERY_FETCH_ROWS)
+
+            return to_columnar(_stream(chunk), columnar, columns=columns)
+
 # Compatibility aliases (drop-in replacements for pg_* functions)
 pg_select = supabase_select
 pg_insert = supabase_insert
@@ -0,0 +1,11 @@
+"""
+Offline unit tests (no API server, database or network).
+
+Run from the repository root:
+    python -m pytest tests/unit -q
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
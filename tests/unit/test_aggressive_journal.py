@@ -0,0 +1,146 @@
+"""
+Tests for checkpoint journaling in lib/processors/aggressive_processor.py
+(row accounting only; no fetching or database writes).
+"""
+
+import threading
+
+import pytest
+
+from lib.processors import aggressive_processor
+from lib.processors.aggressive_processor import AggressiveProcessor
+
+
+class FakeJournal:
+    def __init__(self, *args):
+        self.done = []
+        self.closed = False
+        self.completed = False
+
+    def mark_done(self, item, **info):
+        self.done.append(item)
+
+    def reset(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def complete(self):
+        self.completed = True
+
+
+class FakeWriter:
+    instances = []
+
+    def __init__(self, table, **kwargs):
+        self.table = table
+        self.closed = False
+        FakeWriter.instances.append(self)
+
+    def start(self):
+        pass
+
+    def close(self):
+        self.closed = True
+        return {'dead_lettered': 0}
+
+
+class FakeDividendProcessor:
+    def __init__(self):
+        self.refreshed = None
+
+    def refresh_streaks(self, symbols):
+        self.refreshed = set(symbols)
+        return len(symbols)
+
+
+@pytest.fixture
+def processor():
+    proc = AggressiveProcessor.__new__(AggressiveProcessor)
+    proc.journal = FakeJournal()
+    proc._pending = {}
+    proc._pending_lock = threading.Lock()
+    proc._dividend_symbols = set()
+    return proc
+
+
+def rows(symbol, count):
+    return [{'symbol': symbol, 'date': f'2025-01-{i + 1:02d}'} for i in range(count)]
+
+
+class TestAggressiveJournal:
+    """A symbol is journaled only when all of its rows are written"""
+
+    def test_not_journaled_before_fetches_finish(self, processor):
+        processor._track_rows('AAPL', 2)
+        processor._on_flush(rows('AAPL', 2))
+        assert processor.journal.done == []
+
+        processor._finish_symbol('AAPL')
+        assert processor.journal.done == ['AAPL']
+
+    def test_not_journaled_while_rows_unwritten(self, processor):
+        processor._track_rows('AAPL', 3)
+        processor._finish_symbol('AAPL')
+        processor._on_flush(rows('AAPL', 2))
+        assert processor.journal.done == []
+
+        processor._on_flush(rows('AAPL', 1))
+        assert processor.journal.done == ['AAPL']
+
+    def test_late_fallback_rows_hold_the_symbol(self, processor):
+        """Price rows written, dividend fallback rows queued later: wait for both"""
+        processor._track_rows('KO', 1)
+        processor._on_flush(rows('KO', 1))
+        processor._track_rows('KO', 4)      # Yahoo dividend fallback
+        processor._finish_symbol('KO')
+        assert processor.journal.done == []
+
+        processor._on_flush(rows('KO', 4))
+        assert processor.journal.done == ['KO']
+
+    def test_dead_lettered_rows_are_never_journaled(self, processor):
+        processor._track_rows('T', 4)
+        processor._finish_symbol('T')
+        processor._on_dead_letter(rows('T', 2))
+        processor._on_flush(rows('T', 2))
+        assert processor.journal.done == []
+        assert processor._pending == {}
+
+    def test_symbol_without_rows(self, processor):
+        processor._finish_symbol('NODATA')
+        assert processor.journal.done == ['NODATA']
+
+    def test_dividend_flush_collects_streak_symbols(self, processor):
+        processor._track_rows('KO', 2)
+        processor._on_dividend_flush(rows('KO', 1) + rows('PEP', 1))
+        processor._on_flush(rows('MSFT', 1))
+        assert processor._dividend_symbols == {'KO', 'PEP'}
+
+
+class TestAggressiveShutdown:
+    """Writers and the journal are closed even when the run fails"""
+
+    def test_failed_yahoo_fallback_still_drains_writers(self, processor, monkeypatch):
+        FakeWriter.instances = []
+        monkeypatch.setattr(aggressive_processor, 'BatchWriter', FakeWriter)
+        monkeypatch.setattr(aggressive_processor, 'CheckpointJournal', FakeJournal)
+        processor.max_workers = 2
+        processor.write_batch_size = 10
+        processor.dividend_processor = FakeDividendProcessor()
+        processor._process_symbol_aggressive = lambda symbol: {
+            'symbol': symbol, 'price_success': False, 'dividend_success': True, 'api_calls': 1
+        }
+
+        def yahoo_down(price_misses, dividend_misses):
+            processor._dividend_symbols.add('KO')
+            raise RuntimeError("yahoo unavailable")
+        processor._yahoo_batch_fallback = yahoo_down
+
+        with pytest.raises(RuntimeError):
+            processor.process_batch_aggressive(['KO', 'PEP'])
+
+        assert [writer.closed for writer in FakeWriter.instances] == [True, True]
+        assert processor.dividend_processor.refreshed == {'KO'}
+        assert processor.journal.closed and not processor.journal.completed
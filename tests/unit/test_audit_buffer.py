@@ -0,0 +1,260 @@
+"""Tests for AuditBuffer batching, spilling and rejected-row isolation"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from api.database import DatabaseError
+from api.middleware import audit_logger
+from api.middleware.audit_logger import AuditBuffer
+
+
+class FakeInsert:
+    def __init__(self, db, rows):
+        self.db = db
+        self.rows = rows
+
+    async def execute(self):
+        self.db.calls.append([row['id'] for row in self.rows])
+        if self.db.down:
+            raise DatabaseError("connection refused", status_code=503)
+        bad = [row for row in self.rows if row['id'] in self.db.bad_ids]
+        if bad:
+            raise DatabaseError("violates foreign key constraint", code='23503', status_code=409)
+        self.db.rows.extend(self.rows)
+
+
+class FakeTable:
+    def __init__(self, db):
+        self.db = db
+
+    def insert(self, rows, returning=None):
+        return FakeInsert(self.db, rows)
+
+
+class FakeAdminDb:
+    """Records inserts; rows with an id in bad_ids are refused with a 409."""
+
+    def __init__(self, bad_ids=()):
+        self.bad_ids = set(bad_ids)
+        self.down = False
+        self.rows = []
+        self.calls = []
+
+    def table(self, name):
+        return FakeTable(self)
+
+
+@pytest.fixture
+def make_buffer(tmp_path, monkeypatch):
+    def make(db, batch_size=8):
+        monkeypatch.setattr(audit_logger, 'get_admin_db', lambda: db)
+        return AuditBuffer(batch_size=batch_size, flush_interval=60, max_size=1000,
+                           spill_path=str(tmp_path / 'spill.jsonl'),
+                           rejected_path=str(tmp_path / 'rejected.jsonl'))
+    return make
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def fill(buffer, count):
+    buffer._records.extend({'id': i} for i in range(count))
+
+
+class TestAuditBufferRejections:
+    """4xx rejections are isolated; connection failures are spilled"""
+
+    def test_bad_row_is_isolated_and_rest_written(self, make_buffer, tmp_path):
+        db = FakeAdminDb(bad_ids={5})
+        buffer = make_buffer(db)
+        fill(buffer, 8)
+
+        written = asyncio.run(buffer.flush())
+
+        assert written == 7
+        assert sorted(row['id'] for row in db.rows) == [0, 1, 2, 3, 4, 6, 7]
+        rejected = read_jsonl(tmp_path / 'rejected.jsonl')
+        assert [entry['record']['id'] for entry in rejected] == [5]
+        assert rejected[0]['status_code'] == 409
+        assert not (tmp_path / 'spill.jsonl').exists()
+        assert buffer.stats['rejected'] == 1
+
+    def test_bisection_is_logarithmic(self, make_buffer):
+        db = FakeAdminDb(bad_ids={3})
+        buffer = make_buffer(db, batch_size=64)
+        fill(buffer, 64)
+
+        asyncio.run(buffer.flush())
+
+        # One failed insert per level plus one for each untouched half
+        assert len(db.calls) <= 2 * 7 + 1
+        assert len(db.rows) == 63
+
+    def test_unreachable_database_spills_everything(self, make_buffer, tmp_path):
+        db = FakeAdminDb()
+        db.down = True
+        buffer = make_buffer(db)
+        fill(buffer, 8)
+
+        assert asyncio.run(buffer.flush()) == 0
+        assert len(db.calls) == 1
+        assert [row['id'] for row in read_jsonl(tmp_path / 'spill.jsonl')] == list(range(8))
+        assert not (tmp_path / 'rejected.jsonl').exists()
+
+    def test_auth_errors_are_not_treated_as_rejections(self):
+        assert not AuditBuffer._is_rejection(DatabaseError("JWT expired", status_code=401))
+        assert not AuditBuffer._is_rejection(DatabaseError("slow down", status_code=429))
+        assert AuditBuffer._is_rejection(DatabaseError("bad row", status_code=400))
+        assert not AuditBuffer._is_rejection(ValueError("not a database error"))
+
+    def test_replay_dead_letters_rejected_rows_instead_of_respilling(self, make_buffer, tmp_path):
+        db = FakeAdminDb(bad_ids={2})
+        buffer = make_buffer(db, batch_size=4)
+        buffer._spill([{'id': i} for i in range(6)])
+
+        assert asyncio.run(buffer.replay_spill())
+        assert sorted(row['id'] for row in db.rows) == [0, 1, 3, 4, 5]
+        assert not (tmp_path / 'spill.jsonl').exists()
+        assert [entry['record']['id'] for entry in read_jsonl(tmp_path / 'rejected.jsonl')] == [2]
+
+    def test_outage_during_bisection_spills_unwritten_rows(self, make_buffer, tmp_path, monkeypatch):
+        db = FakeAdminDb(bad_ids={0})
+        buffer = make_buffer(db, batch_size=4)
+        fill(buffer, 4)
+
+        original_execute = FakeInsert.execute
+
+        async def execute_then_fail(self):
+            # The full batch is rejected, then the database goes away
+            if len(self.db.calls) == 1:
+                self.db.down = True
+            await original_execute(self)
+
+        monkeypatch.setattr(FakeInsert, 'execute', execute_then_fail)
+        asyncio.run(buffer.flush())
+
+        assert db.rows == []
+        assert sorted(row['id'] for row in read_jsonl(tmp_path / 'spill.jsonl')) == [0, 1, 2, 3]
+
+
+class TestAuditBufferOverflow:
+    """A full ring overflows to memory; only the flush task touches disk"""
+
+    def test_add_does_no_file_io_and_flush_spills_overflow_first(self, make_buffer, tmp_path):
+        db = FakeAdminDb()
+        db.down = True
+        buffer = make_buffer(db)
+        buffer.max_size = 3
+
+        async def main():
+            for i in range(5):
+                buffer.add({'id': i})
+            spilled_during_add = (tmp_path / 'spill.jsonl').exists()
+            pending = buffer.get_stats()['pending']
+            await buffer.flush()
+            buffer._task.cancel()
+            return spilled_during_add, pending
+
+        spilled_during_add, pending = asyncio.run(main())
+
+        assert not spilled_during_add
+        assert pending == 5
+        assert [row['id'] for row in read_jsonl(tmp_path / 'spill.jsonl')] == [0, 1, 2, 3, 4]
+        assert buffer.get_stats()['pending'] == 0
+
+    def test_spill_runs_off_the_event_loop(self, make_buffer, monkeypatch):
+        db = FakeAdminDb()
+        db.down = True
+        buffer = make_buffer(db)
+        threads = []
+        original = AuditBuffer._append_jsonl
+
+        def recording_append(path, entries, kind):
+            threads.append(threading.get_ident())
+            return original(path, entries, kind)
+
+        monkeypatch.setattr(AuditBuffer, '_append_jsonl', staticmethod(recording_append))
+        fill(buffer, 4)
+
+        async def main():
+            await buffer.flush()
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(main())
+        assert threads and loop_thread not in threads
+
+
+class TestAuditBufferShutdown:
+    """Closing or interrupting a flush or replay loses no rows"""
+
+    def test_close_waits_for_insert_in_flight(self, make_buffer, tmp_path, monkeypatch):
+        db = FakeAdminDb()
+        buffer = make_buffer(db, batch_size=2)
+        original_execute = FakeInsert.execute
+
+        async def slow_execute(self):
+            await asyncio.sleep(0.05)
+            await original_execute(self)
+
+        monkeypatch.setattr(FakeInsert, 'execute', slow_execute)
+
+        async def main():
+            for i in range(4):
+                buffer.add({'id': i})
+            await asyncio.sleep(0.01)  # The flush task is inside the first insert
+            await buffer.close()
+
+        asyncio.run(main())
+
+        assert sorted(row['id'] for row in db.rows) == [0, 1, 2, 3]
+        assert buffer.get_stats()['pending'] == 0
+        assert not (tmp_path / 'spill.jsonl').exists()
+
+    def test_cancelled_flush_keeps_taken_rows(self, make_buffer, monkeypatch):
+        db = FakeAdminDb()
+        buffer = make_buffer(db, batch_size=2)
+        buffer._overflow = [{'id': 'old'}]
+        fill(buffer, 4)
+
+        async def hang(self):
+            await asyncio.Event().wait()
+
+        monkeypatch.setattr(FakeInsert, 'execute', hang)
+
+        async def main():
+            task = asyncio.create_task(buffer.flush())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+
+        assert buffer._overflow == [{'id': 'old'}]
+        assert [row['id'] for row in buffer._records] == [0, 1, 2, 3]
+
+    def test_interrupted_replay_file_is_merged_not_overwritten(self, make_buffer, tmp_path):
+        db = FakeAdminDb()
+        buffer = make_buffer(db, batch_size=4)
+        # An earlier replay was killed mid-way, its last line unterminated
+        (tmp_path / 'spill.jsonl.replay').write_text('{"id": 0}\n{"id": 1}\n{"id": 2}')
+        buffer._spill([{'id': 10}, {'id': 11}])
+
+        assert asyncio.run(buffer.replay_spill())
+        assert sorted(row['id'] for row in db.rows) == [0, 1, 2, 10, 11]
+        assert not (tmp_path / 'spill.jsonl').exists()
+        assert not (tmp_path / 'spill.jsonl.replay').exists()
+
+    def test_leftover_replay_file_is_replayed_without_a_spill(self, make_buffer, tmp_path):
+        db = FakeAdminDb()
+        buffer = make_buffer(db)
+        (tmp_path / 'spill.jsonl.replay').write_text('{"id": 0}\n{"id": 1}\n')
+
+        assert asyncio.run(buffer.replay_spill())
+        assert [row['id'] for row in db.rows] == [0, 1]
+        assert not (tmp_path / 'spill.jsonl.replay').exists()
@@ -0,0 +1,138 @@
+"""Tests for DataSourceClient's cached async fetch path"""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from lib.data_sources import base_client
+from lib.data_sources.base_client import DataSourceClient
+from lib.data_sources.response_cache import ResponseCache
+from lib.utils import performance_monitor
+
+
+class StubClient(DataSourceClient):
+    def fetch_prices(self, symbol, from_date=None):
+        return None
+
+    def fetch_dividends(self, symbol, from_date=None):
+        return None
+
+    def fetch_company_info(self, symbol):
+        return None
+
+    def discover_symbols(self, limit=None):
+        return []
+
+    def is_available(self):
+        return True
+
+
+class StubEngine:
+    def __init__(self, body=b'[{"date": "2025-01-02"}]'):
+        self.body = body
+        self.calls = 0
+
+    async def get(self, url, params=None, timeout=None, headers=None):
+        self.calls += 1
+        return httpx.Response(200, content=self.body, headers={'content-type': 'application/json'},
+                              request=httpx.Request('GET', url))
+
+
+class ThreadRecordingCache(ResponseCache):
+    """Real cache that records which thread each call runs on."""
+
+    def __init__(self, cache_dir):
+        super().__init__(cache_dir=cache_dir, mode='on', ttls={}, default_ttl=3600)
+        self.threads = []
+
+    def lookup(self, url, params=None):
+        self.threads.append(threading.get_ident())
+        return super().lookup(url, params)
+
+    def store(self, url, params, response):
+        self.threads.append(threading.get_ident())
+        super().store(url, params, response)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    cache = ThreadRecordingCache(str(tmp_path))
+    engine = StubEngine()
+    monkeypatch.setattr(base_client.ResponseCache, 'get_instance', classmethod(lambda cls: cache))
+    monkeypatch.setattr(base_client.AsyncHTTPEngine, 'get_instance', classmethod(lambda cls: engine))
+    return StubClient('stub'), cache, engine
+
+
+class TestAsyncCacheAccess:
+    """Cache I/O must not run on the event loop thread"""
+
+    def test_lookup_and_store_run_off_loop(self, client):
+        stub, cache, engine = client
+
+        async def main():
+            loop_thread = threading.get_ident()
+            first = await stub._afetch_with_retry('https://example.com/v3/eod/AAPL')
+            second = await stub._afetch_with_retry('https://example.com/v3/eod/AAPL')
+            return loop_thread, first, second
+
+        loop_thread, first, second = asyncio.run(main())
+
+        assert first == second == [{'date': '2025-01-02'}]
+        assert engine.calls == 1  # Second call is a cache hit
+        assert len(cache.threads) == 3  # lookup, store, lookup
+        assert loop_thread not in cache.threads
+
+
+class TestMetricsEndpoint:
+    """Endpoint labels must not carry symbols (one series per route)"""
+
+    def test_batch_urls_share_one_label(self, client):
+        stub, cache, engine = client
+        stub.name = 'batch-label-test'
+        batches = [['AAPL', 'MSFT'], ['KO', 'PEP', 'T'], [f'S{i}' for i in range(500)]]
+
+        async def main():
+            for batch in batches:
+                symbols = ','.join(batch)
+                await stub._afetch_with_retry(f'https://example.com/api/v3/quote/{symbols}?apikey=x',
+                                              symbol=symbols)
+
+        asyncio.run(main())
+
+        labels = {key[1] for key in performance_monitor.API_LATENCY._values if key[0] == stub.name}
+        assert labels == {'/api/v3/quote/{symbols}'}
+
+    def test_symbol_segment_is_templated(self):
+        endpoint = DataSourceClient._metrics_endpoint
+        assert endpoint('https://x/api/v3/profile/V?apikey=k', 'V') == '/api/v3/profile/{symbol}'
+        assert endpoint('https://x/api/v3/quote/AAPL,MSFT') == '/api/v3/quote/{symbols}'
+        # Only whole segments are replaced, never substrings of the route
+        assert endpoint('https://x/api/v3/etf/list', 'E') == '/api/v3/etf/list'
+
+
+class TestDailyPriceTtl:
+    """Daily price endpoints are revalidated on every request"""
+
+    @pytest.mark.parametrize('url', [
+        'https://financialmodelingprep.com/api/v3/historical-price-full/AAPL?from=2025-01-01',
+        'https://financialmodelingprep.com/api/v4/batch-request-end-of-day-prices?date=2025-06-13',
+        'https://www.alphavantage.co/query?function=TIME_SERIES_DAILY_ADJUSTED&symbol=AAPL',
+    ])
+    def test_stored_entry_is_never_fresh(self, tmp_path, url):
+        cache = ResponseCache(cache_dir=str(tmp_path), mode='on')
+        response = httpx.Response(200, content=b'[{"close": 1}]', request=httpx.Request('GET', url),
+                                  headers={'content-type': 'application/json', 'etag': '"v1"'})
+        cache.store(url, None, response)
+
+        entry, fresh = cache.lookup(url)
+        assert entry is not None and not fresh
+        assert entry.conditional_headers() == {'If-None-Match': '"v1"'}
+
+    def test_other_endpoints_keep_their_ttl(self, tmp_path):
+        url = 'https://financialmodelingprep.com/api/v3/profile/AAPL'
+        cache = ResponseCache(cache_dir=str(tmp_path), mode='on')
+        cache.store(url, None, httpx.Response(200, content=b'[{"symbol": "AAPL"}]',
+                                              request=httpx.Request('GET', url)))
+        assert cache.lookup(url)[1]
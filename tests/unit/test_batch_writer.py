@@ -0,0 +1,129 @@
+"""Tests for BatchWriter batching, retry and dead-lettering"""
+
+import json
+import threading
+
+import pytest
+
+from lib.processors import batch_writer
+from lib.processors.batch_writer import BatchWriter
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Skip retry backoff sleeps."""
+    sleeps = []
+    monkeypatch.setattr(batch_writer.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+class FakeWrites:
+    """write_fn that fails the first `failures` attempts (raising or returning 0)."""
+
+    def __init__(self, failures=0, raises=True):
+        self.failures = failures
+        self.raises = raises
+        self.attempts = 0
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def __call__(self, table, records):
+        with self._lock:
+            self.attempts += 1
+            if self.attempts <= self.failures:
+                if self.raises:
+                    raise RuntimeError("upstream timeout")
+                return 0
+            self.batches.append(list(records))
+            return len(records)
+
+
+def make_writer(tmp_path, write_fn, **kwargs):
+    flushed, dead = [], []
+    writer = BatchWriter(
+        'raw_stock_prices', batch_size=kwargs.pop('batch_size', 3), flush_interval=60,
+        workers=kwargs.pop('workers', 1), max_retries=kwargs.pop('max_retries', 2),
+        dead_letter_dir=str(tmp_path), write_fn=write_fn,
+        on_flush=flushed.append, on_dead_letter=dead.append, **kwargs
+    )
+    return writer, flushed, dead
+
+
+class TestBatchWriter:
+    """Size/close flushing, retries and dead letters"""
+
+    def test_batches_by_size_and_flushes_remainder_on_close(self, tmp_path):
+        writes = FakeWrites()
+        writer, flushed, dead = make_writer(tmp_path, writes)
+        writer.start()
+        writer.put_many([{'id': i} for i in range(7)])
+        stats = writer.close()
+
+        assert [len(batch) for batch in writes.batches] == [3, 3, 1]
+        assert stats['written'] == 7
+        assert stats['batches'] == 3
+        assert len(flushed) == 3 and dead == []
+
+    def test_retries_then_succeeds(self, tmp_path, no_backoff):
+        writes = FakeWrites(failures=2)
+        writer, flushed, dead = make_writer(tmp_path, writes)
+        writer.start()
+        writer.put_many([{'id': i} for i in range(3)])
+        stats = writer.close()
+
+        assert stats['retries'] == 2
+        assert stats['written'] == 3
+        assert no_backoff == [1, 2]
+        assert len(flushed) == 1 and dead == []
+        assert not (tmp_path / 'raw_stock_prices.jsonl').exists()
+
+    def test_zero_rows_written_counts_as_failure(self, tmp_path):
+        writes = FakeWrites(failures=1, raises=False)
+        writer, flushed, _ = make_writer(tmp_path, writes)
+        writer.start()
+        writer.put_many([{'id': i} for i in range(3)])
+
+        assert writer.close()['retries'] == 1
+        assert len(flushed) == 1
+
+    def test_dead_letters_after_retries_exhausted(self, tmp_path):
+        writes = FakeWrites(failures=100)
+        writer, flushed, dead = make_writer(tmp_path, writes, max_retries=2)
+        writer.start()
+        writer.put_many([{'id': i} for i in range(3)])
+        stats = writer.close()
+
+        assert writes.attempts == 3
+        assert stats['failed_batches'] == 1
+        assert stats['dead_lettered'] == 3
+        assert flushed == [] and dead == [[{'id': 0}, {'id': 1}, {'id': 2}]]
+
+        with open(tmp_path / 'raw_stock_prices.jsonl') as f:
+            entries = [json.loads(line) for line in f]
+        assert [entry['record'] for entry in entries] == [{'id': 0}, {'id': 1}, {'id': 2}]
+        assert entries[0]['error'] == 'upstream timeout'
+
+    def test_callback_error_does_not_stop_worker(self, tmp_path):
+        writes = FakeWrites()
+        writer = BatchWriter('raw_dividends', batch_size=2, flush_interval=60, workers=1,
+                             dead_letter_dir=str(tmp_path), write_fn=writes,
+                             on_flush=lambda batch: 1 / 0)
+        writer.start()
+        writer.put_many([{'id': i} for i in range(4)])
+
+        assert writer.close()['written'] == 4
+
+    def test_replay_dead_letters(self, tmp_path, monkeypatch):
+        writes = FakeWrites(failures=100)
+        writer, _, _ = make_writer(tmp_path, writes, max_retries=0)
+        writer.start()
+        writer.put_many([{'id': i} for i in range(3)])
+        writer.close()
+
+        upserted = []
+        monkeypatch.setattr(batch_writer, 'supabase_batch_upsert',
+                            lambda table, records, batch_size: upserted.extend(records) or len(records))
+
+        assert batch_writer.replay_dead_letters('raw_stock_prices', str(tmp_path)) == 3
+        assert upserted == [{'id': 0}, {'id': 1}, {'id': 2}]
+        assert not (tmp_path / 'raw_stock_prices.jsonl').exists()
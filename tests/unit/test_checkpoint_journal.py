@@ -0,0 +1,73 @@
+"""Tests for CheckpointJournal resume semantics"""
+
+from lib.processors.checkpoint_manager import CheckpointJournal
+
+SYMBOLS = ['AAPL', 'KO', 'MSFT', 'O', 'T']
+
+
+class TestCheckpointJournal:
+    """Append-only journal of finished items"""
+
+    def test_fresh_run_processes_everything(self, tmp_path):
+        journal = CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path))
+        assert journal.resume(SYMBOLS) == SYMBOLS
+
+    def test_resume_skips_journaled_items_in_input_order(self, tmp_path):
+        journal = CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path), fsync_every=1)
+        journal.mark_done('MSFT', rows=10)
+        journal.mark_many(['AAPL'])
+        journal.close()
+
+        # A new process reads the same file
+        resumed = CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path))
+        assert resumed.resume(SYMBOLS) == ['KO', 'O', 'T']
+        assert journal.done_count == 2
+
+    def test_torn_final_line_is_ignored(self, tmp_path):
+        journal = CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path))
+        journal.mark_done('AAPL')
+        journal.close()
+        with open(journal.path, 'ab') as f:
+            f.write(b'{"item":"K')
+
+        assert CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path)).processed() == {'AAPL'}
+
+    def test_append_after_torn_line_starts_a_new_line(self, tmp_path):
+        journal = CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path))
+        journal.mark_done('AAPL')
+        journal.close()
+        with open(journal.path, 'ab') as f:
+            f.write(b'{"item":"K')
+
+        resumed = CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path))
+        resumed.mark_done('MSFT')
+        resumed.close()
+        assert resumed.processed() == {'AAPL', 'MSFT'}
+
+    def test_entries_survive_without_close(self, tmp_path):
+        """Each entry is written immediately, so a killed run keeps it"""
+        journal = CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path), fsync_every=1000)
+        journal.mark_done('KO')
+
+        assert CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path)).processed() == {'KO'}
+        journal.close()
+
+    def test_complete_and_reset_start_fresh(self, tmp_path):
+        journal = CheckpointJournal('aggressive', checkpoint_dir=str(tmp_path))
+        journal.mark_done('AAPL')
+        journal.complete()
+
+        assert not journal.path.exists()
+        assert journal.resume(SYMBOLS) == SYMBOLS
+
+        journal.mark_done('KO')
+        journal.reset()
+        assert journal.done_count == 0
+        assert journal.processed() == set()
+
+    def test_journals_are_per_run_type(self, tmp_path):
+        prices = CheckpointJournal('prices', checkpoint_dir=str(tmp_path))
+        prices.mark_done('AAPL')
+        prices.close()
+
+        assert CheckpointJournal('dividends', checkpoint_dir=str(tmp_path)).resume(SYMBOLS) == SYMBOLS
@@ -0,0 +1,60 @@
+"""
+Tests for lib/utils/columnar.py
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+from lib.utils.columnar import ColumnarBuilder, to_columnar
+
+
+class TestColumnarKinds:
+    """Column type inference"""
+
+    def test_mixed_int_and_float_is_float(self):
+        """Whole-valued numerics returned as ints must not truncate later decimals"""
+        result = to_columnar([{'close': 150}, {'close': 150.25}])
+        assert result['close'].dtype == np.float64
+        assert result['close'].tolist() == [150.0, 150.25]
+
+    def test_mixed_int_and_decimal_is_float(self):
+        result = to_columnar([{'amount': 1}, {'amount': Decimal('0.2375')}])
+        assert result['amount'].dtype == np.float64
+        assert result['amount'][1] == 0.2375
+
+    def test_float_in_later_chunk_promotes_column(self):
+        """An int-only first chunk is promoted when a later chunk has decimals"""
+        rows = [{'close': 100}, {'close': 101}, {'close': 101.5}, {'close': 102}]
+        result = to_columnar(rows, chunk_rows=2)
+        assert result['close'].dtype == np.float64
+        assert result['close'].tolist() == [100.0, 101.0, 101.5, 102.0]
+
+    def test_int_column_stays_int64(self):
+        result = to_columnar([{'volume': 10}, {'volume': 2 ** 60}])
+        assert result['volume'].dtype == np.int64
+        assert result['volume'][1] == 2 ** 60
+
+    def test_int_with_nulls_is_float_nan(self):
+        result = to_columnar([{'volume': 10}, {'volume': None}])
+        assert result['volume'].dtype == np.float64
+        assert np.isnan(result['volume'][1])
+
+    def test_dates(self):
+        result = to_columnar([{'date': '2025-01-02'}, {'date': date(2025, 1, 3)}])
+        assert result['date'].dtype == np.dtype('datetime64[D]')
+        assert str(result['date'][1]) == '2025-01-03'
+
+    def test_all_null_chunk_converted_once_kind_known(self):
+        rows = [{'close': None}, {'close': None}, {'close': 1.5}]
+        result = to_columnar(rows, chunk_rows=2)
+        assert result['close'].dtype == np.float64
+        assert np.isnan(result['close'][0]) and result['close'][2] == 1.5
+
+    def test_row_count_and_columns(self):
+        builder = ColumnarBuilder(columns=['symbol', 'close'])
+        builder.extend([{'symbol': 'AAPL', 'close': 1.0, 'extra': 1}] * 3)
+        result = builder.to_numpy()
+        assert builder.row_count == 3
+        assert list(result) == ['symbol', 'close']
@@ -0,0 +1,87 @@
+"""Tests for the COPY serialization used by postgres_copy_upsert"""
+
+from datetime import date, datetime
+
+import pytest
+
+import supabase_helpers
+from supabase_helpers import _copy_line, _copy_value
+
+
+def parse_copy_csv(text):
+    """Parse COPY FORMAT csv input with the default NULL (unquoted empty field)."""
+    rows, fields, i = [], [], 0
+    while i < len(text):
+        if text[i] == '"':
+            value, i = '', i + 1
+            while True:
+                if text[i] == '"' and text[i + 1:i + 2] == '"':
+                    value, i = value + '"', i + 2
+                elif text[i] == '"':
+                    i += 1
+                    break
+                else:
+                    value, i = value + text[i], i + 1
+        else:
+            end = min(j for j in (text.find(',', i), text.find('\n', i)) if j >= 0)
+            value = text[i:end] or None
+            i = end
+        fields.append(value)
+        if text[i] == '\n':
+            rows.append(fields)
+            fields = []
+        i += 1
+    return rows
+
+
+def copy_roundtrip(rows, columns):
+    """Write rows the way postgres_copy_upsert does and parse them back as COPY would."""
+    text = ''.join(_copy_line([row.get(col) for col in columns]) for row in rows)
+    return parse_copy_csv(text)
+
+
+class TestCopyValue:
+    """Python values -> COPY CSV text"""
+
+    def test_scalars(self):
+        assert _copy_value(None) is None
+        assert _copy_value(date(2025, 1, 2)) == '2025-01-02'
+        assert _copy_value(datetime(2025, 1, 2, 3, 4, 5)) == '2025-01-02T03:04:05'
+        assert _copy_value({'a': [1, 2]}) == '{"a": [1, 2]}'
+        assert _copy_value(12.5) == '12.5'
+
+    def test_null_is_an_unquoted_empty_field(self):
+        assert _copy_line([None, 'a', '', 1]) == ',"a","","1"\n'
+
+    def test_missing_keys_become_null(self):
+        rows = [{'symbol': 'AAPL', 'price': 1.5}, {'symbol': 'KO'}]
+        assert copy_roundtrip(rows, ['symbol', 'price']) == [['AAPL', '1.5'], ['KO', None]]
+
+    def test_text_needing_quotes_survives(self):
+        rows = [{'symbol': 'BRK.B', 'company': 'Berkshire, "Class B"\nHathaway'}]
+        assert copy_roundtrip(rows, ['symbol', 'company']) == [
+            ['BRK.B', 'Berkshire, "Class B"\nHathaway']
+        ]
+
+    def test_empty_string_is_not_null(self):
+        assert copy_roundtrip([{'note': ''}], ['note']) == [['']]
+
+    def test_backslash_n_text_is_not_null(self):
+        rows = [{'note': '\\N', 'other': None}]
+        assert copy_roundtrip(rows, ['note', 'other']) == [['\\N', None]]
+
+
+class TestPostgresCopyUpsertGuards:
+    """Argument checks that run before any connection is made"""
+
+    def test_empty_data(self):
+        assert supabase_helpers.postgres_copy_upsert('raw_stocks', []) == 0
+
+    def test_unknown_conflict_columns(self):
+        with pytest.raises(ValueError, match='No conflict columns'):
+            supabase_helpers.postgres_copy_upsert('no_such_table', [{'id': 1}])
+
+    def test_no_pool(self, monkeypatch):
+        monkeypatch.setattr(supabase_helpers, 'get_postgres_pool', lambda: None)
+        with pytest.raises(RuntimeError, match='not available'):
+            supabase_helpers.postgres_copy_upsert('raw_stocks', [{'symbol': 'AAPL'}])
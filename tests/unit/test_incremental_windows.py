@@ -0,0 +1,92 @@
+"""
+Tests for bulk latest-date lookups in lib/processors/incremental_processor.py
+(no database: the Supabase client is replaced with a paging fake of the
+get_latest_dates_by_symbol RPC).
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+import supabase_helpers
+from lib.data_sources.yahoo_client import YahooClient
+from lib.processors import incremental_processor
+from lib.processors.incremental_processor import IncrementalProcessor
+
+LATEST = date(2025, 6, 13)
+
+
+class FakeRpcResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeSupabase:
+    """Serves get_latest_dates_by_symbol pages from {symbol: latest date}."""
+
+    def __init__(self, latest_dates):
+        self.latest_dates = latest_dates
+        self.calls = []
+
+    def rpc(self, name, params):
+        assert name == 'get_latest_dates_by_symbol'
+        self.calls.append(params)
+        after = params['after_symbol']
+        symbols = sorted(s for s in self.latest_dates if after is None or s > after)
+        page = [{'symbol': s, 'latest_date': self.latest_dates[s].isoformat()}
+                for s in symbols[:params['page_size']]]
+
+        class Request:
+            @staticmethod
+            def execute():
+                return FakeRpcResult(page)
+        return Request()
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """2,500 symbols with stored prices, so the lookup spans three pages."""
+    monkeypatch.setattr(incremental_processor, 'LATEST_DATES_PAGE_SIZE', 1000)
+    client = FakeSupabase({f'S{i:05d}': LATEST - timedelta(days=i % 7) for i in range(2500)})
+    monkeypatch.setattr(supabase_helpers, 'get_supabase_client', lambda: client)
+    return client
+
+
+class TestBulkLatestDates:
+    """get_bulk_latest_dates() pages past PostgREST's max_rows"""
+
+    def test_reads_every_page(self, stored):
+        latest = IncrementalProcessor.get_bulk_latest_dates('raw_stock_prices', 'date')
+        assert latest == stored.latest_dates
+        assert [call['after_symbol'] for call in stored.calls] == [None, 'S00999', 'S01999']
+
+    def test_rpc_failure_returns_empty(self, monkeypatch):
+        class Rejecting:
+            def rpc(self, name, params):
+                raise RuntimeError("Invalid table name: raw_stock_prices")
+        monkeypatch.setattr(supabase_helpers, 'get_supabase_client', lambda: Rejecting())
+        assert IncrementalProcessor.get_bulk_latest_dates('raw_stock_prices', 'date') == {}
+
+
+class TestIncrementalWindows:
+    """Stored dates narrow the Yahoo download windows"""
+
+    def test_stored_dates_narrow_from_dates(self, stored):
+        from_dates = IncrementalProcessor.get_bulk_from_dates(['S00000', 'S02499', 'NEW'])
+        assert from_dates == {
+            'S00000': LATEST + timedelta(days=1),
+            'S02499': stored.latest_dates['S02499'] + timedelta(days=1),
+            'NEW': None
+        }
+
+    def test_batches_start_after_stored_dates(self, stored):
+        symbols = [f'S{i:05d}' for i in range(0, 2500, 10)] + ['NEW1', 'NEW2']
+        from_dates = IncrementalProcessor.get_bulk_from_dates(symbols)
+        windows = list(YahooClient._batch_windows(symbols, from_dates, 50))
+
+        # Only the batch holding the unknown symbols downloads full history
+        assert [start for _, start in windows].count(None) == 1
+        for batch, start in windows:
+            if start is not None:
+                assert start >= LATEST - timedelta(days=6) + timedelta(days=1)
+                assert all(from_dates[s] >= start for s in batch)
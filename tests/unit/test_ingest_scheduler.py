@@ -0,0 +1,116 @@
+"""
+Tests for session bookkeeping in lib/pipelines/ingest_scheduler.py
+(no database or API calls: freshness, ranking and processing are faked).
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from lib.pipelines import ingest_scheduler
+from lib.pipelines.ingest_scheduler import IngestScheduler
+from lib.processors.incremental_processor import IncrementalProcessor
+
+SESSION = date(2025, 6, 13)  # Friday
+NOW = datetime(2025, 6, 14, 12, 0)  # Saturday: every tier window is open
+
+
+class FakeProcessor:
+    def __init__(self, max_workers):
+        pass
+
+    def process_batch_aggressive(self, symbols):
+        return {'total_api_calls': len(symbols), 'successful_prices': len(symbols),
+                'successful_dividends': len(symbols)}
+
+
+@pytest.fixture
+def scheduler(monkeypatch, tmp_path):
+    latest = {}
+    monkeypatch.setattr(IncrementalProcessor, 'get_bulk_latest_dates',
+                        staticmethod(lambda table, column='date': dict(latest)))
+    monkeypatch.setattr(ingest_scheduler.SymbolPrioritizer, 'prioritize_symbols',
+                        staticmethod(lambda symbols, portfolio_symbols=None: sorted(symbols)))
+    monkeypatch.setattr(ingest_scheduler, 'get_portfolio_symbols', lambda: set())
+    monkeypatch.setattr(ingest_scheduler, 'publish_stats', lambda *args: None)
+    monkeypatch.setattr(ingest_scheduler, 'AggressiveProcessor', FakeProcessor)
+    monkeypatch.setattr(ingest_scheduler.MarketHours, 'last_completed_session',
+                        staticmethod(lambda now, ready_time: SESSION))
+
+    full_refreshes = []
+
+    def refresh_all_streaks():
+        full_refreshes.append(True)
+        return None if sched.streaks_down else 42
+    monkeypatch.setattr(ingest_scheduler.DividendProcessor, 'refresh_all_streaks',
+                        staticmethod(refresh_all_streaks))
+
+    sched = IngestScheduler(state_path=str(tmp_path / 'scheduler_state.json'))
+    sched.daily_budget = 0
+    sched.calls_per_minute = 0
+    sched.latest = latest
+    sched.full_refreshes = full_refreshes
+    sched.streaks_down = False
+    return sched
+
+
+class TestSessionCompletion:
+    """completed_session is written by execute() only"""
+
+    def test_failed_lookup_schedules_everything(self, scheduler):
+        plan = scheduler.build_plan(NOW, symbols=['AAPL', 'MSFT'])
+        assert plan.stale_symbols == 2 and plan.symbol_count == 2
+        assert 'completed_session' not in scheduler._load_state()
+
+    def test_dry_run_does_not_complete_the_session(self, scheduler):
+        scheduler.latest.update({'AAPL': SESSION, 'MSFT': SESSION})
+        scheduler._load_universe = lambda: ['AAPL', 'MSFT']
+
+        assert scheduler.run_once(NOW, dry_run=True)['symbols'] == 0
+        assert 'completed_session' not in scheduler._load_state()
+
+        scheduler.run_once(NOW)
+        assert scheduler._load_state()['completed_session'] == SESSION.isoformat()
+
+    def test_execute_completes_after_all_waves(self, scheduler):
+        scheduler.latest.update({'AAPL': SESSION})
+        plan = scheduler.build_plan(NOW, symbols=['AAPL', 'MSFT'])
+        assert [wave.symbols for wave in plan.waves] == [['MSFT']]
+
+        stats = scheduler.execute(plan)
+        state = scheduler._load_state()
+        assert stats['symbols'] == 1
+        assert state['completed_session'] == SESSION.isoformat()
+        assert scheduler.build_plan(NOW, symbols=['AAPL', 'MSFT']).symbol_count == 0
+
+    def test_budget_exit_does_not_complete_the_session(self, scheduler):
+        scheduler.daily_budget = 1
+        plan = scheduler.build_plan(NOW, symbols=['AAPL'])
+        assert not plan.waves and not plan.completes_session
+        scheduler.execute(plan)
+        assert 'completed_session' not in scheduler._load_state()
+
+
+class TestStreakRollover:
+    """All dividend streaks are recomputed on the first run of each year"""
+
+    def test_once_per_year(self, scheduler):
+        assert scheduler.refresh_streaks_on_rollover(date(2025, 6, 14)) == 42
+        assert scheduler.refresh_streaks_on_rollover(date(2025, 12, 31)) is None
+        assert scheduler.refresh_streaks_on_rollover(date(2026, 1, 1)) == 42
+        assert len(scheduler.full_refreshes) == 2
+
+    def test_failed_refresh_is_retried(self, scheduler):
+        scheduler.streaks_down = True
+        assert scheduler.refresh_streaks_on_rollover(date(2026, 1, 1)) is None
+        scheduler.streaks_down = False
+        assert scheduler.refresh_streaks_on_rollover(date(2026, 1, 2)) == 42
+        assert len(scheduler.full_refreshes) == 2
+
+    def test_run_once_refreshes_even_without_work(self, scheduler):
+        scheduler._load_universe = lambda: []
+        stats = scheduler.run_once(NOW)
+        assert stats['streaks_refreshed'] == 42
+
+        assert scheduler.run_once(NOW, dry_run=True)
+        assert len(scheduler.full_refreshes) == 1
@@ -0,0 +1,40 @@
+"""Tests for opt-in direct Postgres configuration"""
+
+import pytest
+
+from lib.core.config import DatabaseConfig
+from lib.core.db_pool import PostgresPool
+
+
+@pytest.fixture
+def db_config(monkeypatch):
+    """Start every test with no DATABASE_URL and no DB_* variables."""
+    monkeypatch.setattr(DatabaseConfig, 'DATABASE_URL', None)
+    monkeypatch.setattr(DatabaseConfig, 'PG_CONFIGURED', False)
+    monkeypatch.setattr(PostgresPool, '_instance', None)
+    monkeypatch.setattr(PostgresPool, '_unavailable', False)
+    return DatabaseConfig
+
+
+class TestPostgresDsn:
+    """get_postgres_dsn returns a DSN only when explicitly configured"""
+
+    def test_unconfigured_returns_none(self, db_config):
+        assert db_config.get_postgres_dsn() is None
+
+    def test_database_url_wins(self, db_config, monkeypatch):
+        monkeypatch.setattr(db_config, 'DATABASE_URL', 'postgresql://u:p@db:5432/app')
+        assert db_config.get_postgres_dsn() == 'postgresql://u:p@db:5432/app'
+
+    def test_db_vars_build_dsn(self, db_config, monkeypatch):
+        monkeypatch.setattr(db_config, 'PG_CONFIGURED', True)
+        monkeypatch.setattr(db_config, 'PG_HOST', 'db.internal')
+        dsn = db_config.get_postgres_dsn()
+        assert dsn.startswith('host=db.internal ')
+
+    def test_pool_not_created_when_unconfigured(self, db_config, monkeypatch):
+        def fail_init(self, *args, **kwargs):
+            raise AssertionError("pool should not connect without configuration")
+
+        monkeypatch.setattr(PostgresPool, '__init__', fail_init)
+        assert PostgresPool.get_instance() is None
@@ -0,0 +1,210 @@
+"""
+Tests for lib/core/rate_limiters.py
+"""
+
+import asyncio
+import threading
+import time
+
+from lib.core.rate_limiters import RateLimiter, TokenBucket
+
+
+class TestRateLimiterAcquire:
+    """Concurrency slot and token budget interplay"""
+
+    def test_semaphore_timeout_does_not_spend_tokens(self):
+        bucket = TokenBucket(rate_per_minute=60, burst=5)
+        limiter = RateLimiter(1, bucket=bucket)
+        assert limiter.acquire()
+        used = bucket.get_usage()['total_requests']
+
+        assert not limiter.acquire(timeout=0.05)
+        assert bucket.get_usage()['total_requests'] == used
+
+        limiter.release()
+
+    def test_exhausted_daily_budget_releases_slot(self):
+        bucket = TokenBucket(rate_per_minute=600, burst=10, daily_limit=1)
+        limiter = RateLimiter(1, bucket=bucket)
+        assert limiter.acquire()
+        limiter.release()
+
+        assert not limiter.acquire(timeout=0.05)
+        assert limiter.semaphore.acquire(blocking=False)  # Slot was given back
+        limiter.semaphore.release()
+
+    def test_async_waiter_does_not_reserve_tokens(self):
+        bucket = TokenBucket(rate_per_minute=60, burst=5)
+        limiter = RateLimiter(1, bucket=bucket)
+        assert limiter.acquire()
+
+        async def main():
+            task = asyncio.ensure_future(limiter.acquire_async())
+            await asyncio.sleep(0.05)
+            used = bucket.get_usage()['total_requests']
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            return used
+
+        assert asyncio.run(main()) == 1  # Only the sync holder's reservation
+        limiter.release()
+        assert limiter.semaphore.acquire(blocking=False)
+        limiter.semaphore.release()
+
+    def test_cancelled_token_wait_refunds_reservation(self):
+        bucket = TokenBucket(rate_per_minute=60, burst=1, daily_limit=10)  # 1 token/s
+        limiter = RateLimiter(2, bucket=bucket)
+
+        async def main():
+            assert await limiter.acquire_async()  # Uses the burst token
+            task = asyncio.ensure_future(limiter.acquire_async())  # Holds a slot, waits ~1s
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(main())
+        usage = bucket.get_usage()
+        assert usage['total_requests'] == 1 and usage['daily_used'] == 1
+        # The refunded token is not charged to the next caller
+        assert bucket.reserve() < 1.5  # ~0.95s; 1.95s without the refund
+        # The cancelled waiter's slot was returned
+        limiter.release()
+        assert limiter.semaphore.acquire(blocking=False) and limiter.semaphore.acquire(blocking=False)
+        limiter.semaphore.release()
+        limiter.semaphore.release()
+
+    def test_async_exhausted_daily_budget_releases_slot(self):
+        bucket = TokenBucket(rate_per_minute=600, burst=10, daily_limit=1)
+        limiter = RateLimiter(1, bucket=bucket)
+
+        async def main():
+            assert await limiter.acquire_async()
+            limiter.release()
+            return await limiter.acquire_async()
+
+        assert asyncio.run(main()) is False
+        assert limiter.semaphore.acquire(blocking=False)
+        limiter.semaphore.release()
+
+
+class TestRateLimiterAsync:
+    """acquire_async waits on release() instead of polling"""
+
+    def test_waiters_are_woken_by_release(self):
+        limiter = RateLimiter(2)
+        active = []
+        peak = []
+
+        async def request(i):
+            assert await limiter.acquire_async()
+            active.append(i)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.remove(i)
+            limiter.release()
+
+        async def main():
+            started = time.perf_counter()
+            await asyncio.gather(*(request(i) for i in range(20)))
+            return time.perf_counter() - started
+
+        elapsed = asyncio.run(main())
+        assert max(peak) == 2
+        # 10 rounds of 10 ms; the 0.5 s re-check fallback would take far longer
+        assert elapsed < 0.4
+
+    def test_release_from_thread_wakes_coroutine(self):
+        limiter = RateLimiter(1)
+        assert limiter.acquire()
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, lambda: threading.Thread(target=limiter.release).start())
+            started = time.perf_counter()
+            assert await limiter.acquire_async()
+            return time.perf_counter() - started
+
+        assert asyncio.run(main()) < 0.3
+        limiter.release()
+
+    def test_waiting_does_not_poll(self):
+        limiter = RateLimiter(1)
+        assert limiter.acquire()
+        attempts = []
+        original = limiter.semaphore.acquire
+
+        def counting_acquire(*args, **kwargs):
+            attempts.append(1)
+            return original(*args, **kwargs)
+
+        limiter.semaphore.acquire = counting_acquire
+
+        async def main():
+            asyncio.get_running_loop().call_later(0.3, limiter.release)
+            await limiter.acquire_async()
+
+        asyncio.run(main())
+        # A 5 ms poll would have made ~60 attempts
+        assert len(attempts) <= 4
+        limiter.release()
+
+
+class TestTokenBucket:
+    """Pacing, daily budget and 429 penalties"""
+
+    def test_burst_then_paced(self):
+        bucket = TokenBucket(rate_per_minute=600, burst=3)  # 10 tokens/s
+
+        waits = [bucket.reserve() for _ in range(5)]
+
+        assert waits[:3] == [0.0, 0.0, 0.0]
+        # Debt grows by one token (0.1 s) per extra reservation
+        assert 0.05 < waits[3] <= 0.1
+        assert 0.15 < waits[4] <= 0.2
+        assert bucket.get_usage()['throttled_requests'] == 2
+
+    def test_refills_over_time(self):
+        bucket = TokenBucket(rate_per_minute=6000, burst=1)  # 100 tokens/s
+        assert bucket.reserve() == 0.0
+        time.sleep(0.05)
+        assert bucket.reserve() == 0.0
+
+    def test_daily_limit(self):
+        bucket = TokenBucket(rate_per_minute=6000, burst=10, daily_limit=3)
+
+        assert bucket.acquire(weight=2)
+        assert not bucket.acquire(weight=2)
+        assert bucket.acquire(weight=1)
+        assert bucket.reserve() is None
+        assert bucket.get_usage()['daily_used'] == 3
+
+    def test_endpoint_weights(self):
+        bucket = TokenBucket(rate_per_minute=60, endpoint_weights={'/bulk': 5})
+
+        assert bucket.weight_for('https://api.example.com/v3/bulk?x=1') == 5
+        assert bucket.weight_for('/v3/quote') == 1.0
+        assert bucket.weight_for(None) == 1.0
+
+    def test_penalize_pushes_next_reservation_out(self):
+        bucket = TokenBucket(rate_per_minute=600, burst=5)
+
+        bucket.penalize(2.0)
+
+        assert bucket.reserve() > 1.9
+
+    def test_async_acquire_sleeps_for_debt(self):
+        bucket = TokenBucket(rate_per_minute=1200, burst=1)  # 20 tokens/s
+
+        async def main():
+            started = time.perf_counter()
+            assert await bucket.acquire_async()
+            assert await bucket.acquire_async()
+            return time.perf_counter() - started
+
+        assert asyncio.run(main()) >= 0.04
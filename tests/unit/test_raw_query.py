@@ -0,0 +1,98 @@
+"""
+Tests for supabase_raw_query(columnar=...) streaming (fake connection pool).
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+
+import supabase_helpers
+
+Column = namedtuple('Column', 'name')
+
+
+class FakeCursor:
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.connection = conn
+        self.name = name
+        self.description = None
+        self.itersize = 2000
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        self.conn.executed.append((self.name, statement, params))
+        self._rows = list(self.conn.rows)
+        if self.name is None:
+            self.description = [Column('symbol'), Column('close')]
+
+    def fetchmany(self, size):
+        self.conn.fetch_sizes.append(size)
+        self.description = [Column('symbol'), Column('close')]
+        chunk, self._rows = self._rows[:size], self._rows[size:]
+        return chunk
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.fetch_sizes = []
+        self.prepared = set()
+
+    def cursor(self, name=None):
+        return FakeCursor(self, name)
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def connection(self):
+        yield self.conn
+
+    def statement(self, cursor, query, params=None, prepare=None):
+        return query, params
+
+    def execute(self, cursor, query, params=None, prepare=None):
+        cursor.execute(query, params)
+
+
+class TestRawQueryColumnar:
+    """Columnar raw queries stream from a server-side cursor"""
+
+    def test_uses_named_cursor_in_chunks(self, monkeypatch):
+        rows = [('AAPL', 150), ('AAPL', 150.25), ('MSFT', 400.5)]
+        conn = FakeConnection(rows)
+        monkeypatch.setattr(supabase_helpers, 'get_postgres_pool', lambda: FakePool(conn))
+        monkeypatch.setattr(supabase_helpers, 'RAW_QUERY_FETCH_ROWS', 2)
+
+        result = supabase_helpers.supabase_raw_query('SELECT symbol, close FROM t', columnar='numpy')
+
+        name, statement, _ = conn.executed[0]
+        assert name and name.startswith('raw_query_')
+        assert statement == 'SELECT symbol, close FROM t'
+        assert conn.fetch_sizes == [2, 2, 2]  # last fetch returns no rows
+        assert result['symbol'].tolist() == ['AAPL', 'AAPL', 'MSFT']
+        assert result['close'].dtype == np.float64
+
+    def test_row_results_use_client_cursor(self, monkeypatch):
+        conn = FakeConnection([('AAPL', 1.0)])
+        monkeypatch.setattr(supabase_helpers, 'get_postgres_pool', lambda: FakePool(conn))
+
+        result = supabase_helpers.supabase_raw_query('SELECT symbol, close FROM t')
+
+        assert conn.executed[0][0] is None
+        assert result == [{'symbol': 'AAPL', 'close': 1.0}]
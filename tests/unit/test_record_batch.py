@@ -0,0 +1,70 @@
+"""Tests for columnar price/dividend batches"""
+
+from datetime import date
+
+import numpy as np
+
+from lib.core.record_batch import MAX_BIGINT_VALUE, DividendBatch, PriceBatch
+
+
+class TestPriceBatchIntegers:
+    """volume and aum stay exact int64 with a null mask"""
+
+    def test_volume_serialized_as_exact_int(self):
+        batch = PriceBatch()
+        big = 2 ** 53 + 1  # Not representable as float64
+        batch.append('aapl', '2024-01-02', close=10, volume=big)
+        batch.append('aapl', '2024-01-03', close=10, volume='1500.0')
+
+        rows = batch.to_rows()
+        assert [row['volume'] for row in rows] == [big, 1500]
+        assert all(type(row['volume']) is int for row in rows)
+        assert batch.column('volume').dtype == np.int64
+
+    def test_out_of_range_volume_clamps_instead_of_wrapping(self):
+        batch = PriceBatch()
+        batch.append('AAPL', '2024-01-02', close=10, volume=float(MAX_BIGINT_VALUE))
+        batch.append('AAPL', '2024-01-03', close=10, volume=10 ** 30)
+        batch.append('AAPL', '2024-01-04', close=10, volume=float('inf'))
+
+        assert [row['volume'] for row in batch.to_rows()] == [MAX_BIGINT_VALUE] * 3
+
+    def test_missing_volume_is_null_and_invalid(self):
+        batch = PriceBatch()
+        batch.append('AAPL', '2024-01-02', close=10, volume=None)
+        batch.append('AAPL', '2024-01-03', close=10, volume='n/a')
+        batch.append('AAPL', '2024-01-04', close=10, volume=100)
+
+        assert batch.null_mask('volume').tolist() == [True, True, False]
+        assert batch.invalid_count == 2
+        assert batch.row(0)['volume'] is None
+
+    def test_aum_keeps_zero_and_null_distinct(self):
+        batch = PriceBatch()
+        batch.append('SPY', date(2024, 1, 2), close=10, volume=1, aum=0)
+        batch.append('SPY', date(2024, 1, 3), close=10, volume=1)
+
+        assert [row['aum'] for row in batch.to_rows()] == [0, None]
+
+    def test_float_columns_unchanged(self):
+        batch = PriceBatch()
+        batch.append('AAPL', '2024-01-02', open=0, close=10.5, volume=1, iv=None)
+
+        row = batch.to_rows()[0]
+        assert row['price'] == 10.5
+        assert row['open'] is None
+        assert row['iv'] is None
+
+
+class TestDividendBatch:
+    """Dividend batches have no integer columns"""
+
+    def test_rows(self):
+        batch = DividendBatch()
+        batch.append_record('ko', {'date': '2024-03-14', 'dividend': 0.485})
+        batch.append_record('ko', {'date': None, 'dividend': 0.485})
+
+        assert batch.to_rows() == [{
+            'symbol': 'KO', 'ex_date': '2024-03-14', 'amount': 0.485,
+            'record_date': None, 'payment_date': None, 'declaration_date': None
+        }]
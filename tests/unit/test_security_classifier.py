@@ -0,0 +1,86 @@
+"""Tests for lib/utils/security_classifier.py"""
+
+import random
+
+import pytest
+
+from lib.utils.security_classifier import (
+    FOREIGN, MONEY_MARKET, REGULAR, RIGHT, UNIT, WARRANT,
+    classify_symbol, classify_symbols, split_special_securities, summarize_exclusions
+)
+
+
+def legacy_is_excluded(symbol):
+    """The elif chain update.py and BatchEODProcessor used before the shared classifier."""
+    if any(symbol.endswith(sep + suf) for sep in ['-', '.']
+           for suf in ['W', 'WS', 'WT', 'U', 'UN', 'UU', 'R', 'RT']):
+        return True
+    elif len(symbol) >= 5 and symbol.endswith('U') and symbol[-2].isalpha():
+        if symbol.endswith('UU') or (symbol.endswith('U') and not symbol.endswith('RU')):
+            return True
+    elif len(symbol) >= 5 and symbol.endswith('W') and symbol[-2].isalpha():
+        return True
+    elif symbol.endswith('XX') or symbol.endswith('FX'):
+        return True
+    elif '.V' in symbol or '.TO' in symbol:
+        return True
+    return False
+
+
+def random_symbols(count, seed=20251116):
+    """Symbols biased towards the suffixes and separators the rules look at."""
+    rng = random.Random(seed)
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    tails = ['', 'W', 'WS', 'WT', 'U', 'UN', 'UU', 'RU', 'R', 'RT', 'XX', 'FX', 'V', 'TO', 'O', '1']
+    symbols = []
+    for _ in range(count):
+        body = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 5)))
+        separator = rng.choice(['', '', '', '-', '.'])
+        symbols.append(body + separator + rng.choice(tails))
+    return [symbol for symbol in symbols if symbol]
+
+
+class TestClassifierParity:
+    """Compiled rules exclude exactly what the old elif chain excluded"""
+
+    def test_single_symbol_matches_legacy(self):
+        for symbol in random_symbols(20000):
+            assert (classify_symbol(symbol) != REGULAR) == legacy_is_excluded(symbol), symbol
+
+    def test_vectorized_matches_single_symbol(self):
+        symbols = random_symbols(20000, seed=7)
+        categories = classify_symbols(symbols)
+        assert categories == {symbol: classify_symbol(symbol) for symbol in symbols}
+
+    @pytest.mark.parametrize('symbol, category', [
+        ('ACAHW', WARRANT), ('ABC-WS', WARRANT), ('XYZ.WT', WARRANT),
+        ('ARBGU', UNIT), ('ARGUU', UNIT), ('ABC.U', UNIT), ('ABC-UN', UNIT),
+        ('ABC-RT', RIGHT), ('ABC.R', RIGHT),
+        ('SPAXX', MONEY_MARKET), ('VMFXX', MONEY_MARKET), ('ABCFX', MONEY_MARKET),
+        ('SHOP.TO', FOREIGN), ('ABC.V', FOREIGN), ('XY.VN', FOREIGN),
+        ('AAPL', REGULAR), ('BRK.B', REGULAR), ('LOW', REGULAR), ('PRU', REGULAR),
+        ('AMGRU', REGULAR), ('ABC1W', REGULAR), ('', REGULAR),
+    ])
+    def test_known_symbols(self, symbol, category):
+        assert classify_symbol(symbol) == category
+        if symbol:
+            assert classify_symbols([symbol]) == {symbol: category}
+
+
+class TestSplitSpecialSecurities:
+    """split_special_securities / summarize_exclusions"""
+
+    def test_split_keeps_input_order_and_uses_known_categories(self):
+        symbols = ['AAPL', 'ACAHW', 'KO', 'SPAXX', 'MSFT']
+        regular, excluded = split_special_securities(symbols, categories={'KO': UNIT})
+
+        assert regular == ['AAPL', 'MSFT']
+        assert excluded == ['ACAHW', 'KO', 'SPAXX']
+
+    def test_summary(self):
+        categories = classify_symbols(['ACAHW', 'ARCKW', 'SPAXX'])
+        assert summarize_exclusions(['ACAHW', 'ARCKW', 'SPAXX'], categories) == 'warrant: 2, money_market: 1'
+
+    def test_empty(self):
+        assert classify_symbols([]) == {}
+        assert split_special_securities([]) == ([], [])
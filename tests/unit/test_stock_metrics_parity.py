@@ -0,0 +1,243 @@
+"""
+Parity tests for scripts/portfolio/calculate_stock_metrics.py: the bulk
+(set-based, pandas) path must produce the same metrics as the per-symbol
+path on the same data. Both run against in-memory fakes of the queries
+they issue.
+"""
+
+import importlib.util
+import os
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+
+from lib.utils.columnar import to_columnar
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'portfolio', 'calculate_stock_metrics.py')
+TODAY = date(2025, 6, 16)
+
+
+def load_script():
+    spec = importlib.util.spec_from_file_location('calculate_stock_metrics', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FrozenDate(date):
+    @classmethod
+    def today(cls):
+        return cls(TODAY.year, TODAY.month, TODAY.day)
+
+
+def daily(start, end, price=100.0, step=0.05, skip=()):
+    """Weekday closes from start to end, skipping dates in `skip`."""
+    rows, day = [], start
+    while day <= end:
+        if day.weekday() < 5 and day not in skip:
+            rows.append((day, round(price, 4)))
+            price += step
+        day += timedelta(days=1)
+    return rows
+
+
+def every(start, days, count, amount):
+    return [(start + timedelta(days=days * i), amount) for i in range(count)]
+
+
+def date_range(start, end):
+    return {start + timedelta(days=i) for i in range((end - start).days + 1)}
+
+
+def build_fixture():
+    prices, dividends = {}, {}
+
+    # Regular: 2.5 years of prices, quarterly dividends
+    prices['FULL'] = daily(date(2023, 1, 2), TODAY)
+    dividends['FULL'] = every(date(2023, 2, 10), 91, 10, 0.5)
+
+    # Listed 200 days ago: projected (annualized) TTM, monthly dividends
+    prices['YOUNG'] = daily(TODAY - timedelta(days=200), TODAY, price=20.0, step=0.02)
+    dividends['YOUNG'] = every(TODAY - timedelta(days=190), 30, 7, 0.1)
+
+    # 300 days of data with a 120-day hole: no projection
+    start = TODAY - timedelta(days=300)
+    prices['GAPPY'] = daily(start, TODAY, price=50.0,
+                            skip=date_range(start + timedelta(days=60), start + timedelta(days=180)))
+
+    # Mean interval (54 days) fits no band: falls back to the most common (30 -> Monthly)
+    prices['MODE'] = daily(date(2023, 6, 1), TODAY, price=30.0)
+    dividends['MODE'] = every(TODAY - timedelta(days=300), 30, 5, 0.2) + [(TODAY - timedelta(days=30), 0.25)]
+
+    # Regular TTM but nothing traded in the first weeks of the year
+    prices['NOYS'] = daily(date(2023, 1, 2), TODAY, price=80.0,
+                           skip=date_range(date(2024, 12, 20), date(2025, 1, 20)))
+    dividends['NOYS'] = every(date(2024, 7, 1), 182, 2, 1.0)
+
+    # NULL adj_close on the rows nearest 12 months ago (a Sunday) and at the year start
+    prices['NULLS'] = [
+        (day, None if day in (date(2024, 6, 17), date(2025, 1, 1)) else close)
+        for day, close in daily(date(2023, 1, 2), TODAY, price=60.0)
+    ]
+
+    # Delisted two years ago: old current price, no TTM
+    prices['OLD'] = daily(date(2022, 1, 3), date(2023, 5, 1), price=10.0)
+    dividends['OLD'] = every(date(2022, 2, 1), 365, 2, 0.3)
+
+    # No rows at all
+    prices['EMPTY'] = []
+    return prices, dividends
+
+
+PRICES, DIVIDENDS = build_fixture()
+SYMBOLS = list(PRICES)
+
+
+class FakeCursor:
+    def __init__(self):
+        self.row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def fetchone(self):
+        return self.row
+
+
+class FakeConnection:
+    def cursor(self):
+        return FakeCursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakePool:
+    """Answers the per-symbol prepared statements from the fixture."""
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection()
+
+    def execute(self, cursor, query, params, prepare=None):
+        symbol = params[0]
+        rows = PRICES[symbol]
+        if 'adj_close IS NOT NULL' in query:
+            rows = [row for row in rows if row[1] is not None]
+
+        if prepare == 'metrics_price_near_date':
+            _, start, end, target = params
+            window = [row for row in rows if start <= row[0] <= end]
+            best = min(window, key=lambda row: (abs((row[0] - target).days), row[0]), default=None)
+            cursor.row = None if best is None else (best[1], best[0])
+        elif prepare == 'metrics_first_price':
+            cursor.row = None if not rows else (rows[0][1], rows[0][0])
+        elif prepare == 'metrics_max_price_gap':
+            gaps = [(b[0] - a[0]).days for a, b in zip(rows, rows[1:])]
+            cursor.row = (max(gaps) if gaps else None,)
+        elif prepare == 'metrics_year_start_price':
+            _, start, end = params
+            window = [row for row in rows if start <= row[0] <= end]
+            cursor.row = None if not window else (window[0][1], window[0][0])
+        else:
+            raise AssertionError(f"unexpected statement {prepare}")
+
+
+def fake_select(table, columns='*', where_clause=None, order_by=None, limit=None, **kwargs):
+    symbol = where_clause['symbol']
+    if table == 'raw_stock_prices':
+        rows = [{'adj_close': close, 'date': day.isoformat()} for day, close in reversed(PRICES[symbol])]
+    else:
+        rows = [{'ex_date': day.isoformat(), 'amount': amount}
+                for day, amount in reversed(DIVIDENDS.get(symbol, []))]
+    return rows[:limit]
+
+
+def fake_raw_query(query, params=None, columnar=None, **kwargs):
+    """Answers the four bulk queries from the fixture, honouring their NULL filters."""
+    symbols = params[0]
+
+    def priced(rows, clause):
+        return [row for row in rows if row[1] is not None] if 'adj_close IS NOT NULL' in clause else rows
+
+    if 'CROSS JOIN LATERAL' in query:
+        _, first_clause, last_clause = query.split('CROSS JOIN LATERAL')
+        rows = []
+        for symbol in symbols:
+            first, last = priced(PRICES[symbol], first_clause), priced(PRICES[symbol], last_clause)
+            if first and last:
+                rows.append({'symbol': symbol, 'first_date': first[0][0], 'first_close': first[0][1],
+                             'last_date': last[-1][0], 'last_close': last[-1][1]})
+        columns = ['symbol', 'first_date', 'first_close', 'last_date', 'last_close']
+    elif 'BETWEEN' in query:
+        _, a, b, c, d = params
+        rows = [{'symbol': symbol, 'date': day, 'adj_close': close}
+                for symbol in symbols for day, close in priced(PRICES[symbol], query)
+                if a <= day <= b or c <= day <= d]
+        columns = ['symbol', 'date', 'adj_close']
+    elif 'ROW_NUMBER' in query:
+        limit = params[1]
+        rows = [{'symbol': symbol, 'ex_date': day, 'amount': amount}
+                for symbol in sorted(symbols) for day, amount in DIVIDENDS.get(symbol, [])[-limit:]]
+        columns = ['symbol', 'ex_date', 'amount']
+    else:
+        rows = [{'symbol': symbol, 'date': day} for symbol in sorted(symbols) for day, _ in PRICES[symbol]]
+        columns = ['symbol', 'date']
+    return to_columnar(rows, columnar, columns=columns)
+
+
+@pytest.fixture
+def metrics_module(monkeypatch):
+    module = load_script()
+    monkeypatch.setattr(module, 'date', FrozenDate)
+    monkeypatch.setattr(module, 'supabase_select', fake_select)
+    monkeypatch.setattr(module, 'supabase_raw_query', fake_raw_query)
+    monkeypatch.setattr(module, 'get_postgres_pool', lambda: FakePool())
+    return module
+
+
+def approx(metrics):
+    return {key: pytest.approx(value, rel=1e-9) if isinstance(value, float) else value
+            for key, value in metrics.items()}
+
+
+class TestBulkMetricsParity:
+    """calculate_metrics_bulk == calculate_metrics_for_symbol"""
+
+    def test_bulk_matches_per_symbol(self, metrics_module):
+        calculator = metrics_module.StockMetricsCalculator()
+        per_symbol = {}
+        for symbol in SYMBOLS:
+            metrics = calculator.calculate_metrics_for_symbol(symbol)
+            if metrics:
+                per_symbol[symbol] = metrics
+
+        bulk = {row['symbol']: row for row in
+                metrics_module.StockMetricsCalculator().calculate_metrics_bulk(SYMBOLS, today=FrozenDate.today())}
+
+        assert set(bulk) == set(per_symbol)
+        for symbol, metrics in per_symbol.items():
+            assert bulk[symbol] == approx(metrics), symbol
+
+    def test_fixture_exercises_each_rule(self, metrics_module):
+        """Guard against fixture drift: each scenario hits the rule it is for"""
+        bulk = {row['symbol']: row for row in
+                metrics_module.StockMetricsCalculator().calculate_metrics_bulk(SYMBOLS, today=FrozenDate.today())}
+
+        young = PRICES['YOUNG']
+        period = (young[-1][1] - young[0][1] + 0.1 * 7) / young[0][1]
+        assert bulk['YOUNG']['total_return_ttm'] == pytest.approx((1 + period) ** (365.0 / 200) - 1)
+        assert bulk['GAPPY']['total_return_ttm'] is None
+        assert bulk['MODE']['frequency'] == 'Monthly'
+        assert bulk['FULL']['frequency'] == 'Quarterly'
+        assert 'price_change_ytd' not in bulk['NOYS'] and bulk['NOYS']['total_return_ttm'] is not None
+        assert bulk['NULLS']['total_return_ttm'] is not None and 'price_change_ytd' in bulk['NULLS']
+        assert bulk['OLD']['total_return_ttm'] is None and 'price' in bulk['OLD']
+        assert bulk['EMPTY'] == {'symbol': 'EMPTY', 'total_return_ttm': None, 'price_change_ttm': None}
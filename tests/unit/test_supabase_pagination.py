@@ -0,0 +1,222 @@
+"""
+Tests for keyset pagination in supabase_helpers.py (no database: the
+page readers are replaced with in-memory fakes).
+"""
+
+import threading
+
+import pytest
+
+import supabase_helpers
+
+
+@pytest.fixture
+def fake_ranges(monkeypatch):
+    """Three key ranges of 2500 rows each; returns the per-range behaviour dict."""
+    behaviour = {}
+
+    monkeypatch.setattr(supabase_helpers, 'get_supabase_client', lambda: object())
+    monkeypatch.setattr(supabase_helpers, '_keyset_boundaries',
+                        lambda table, where, key, parallel: ['B', 'C'])
+
+    def fake_pages(table, columns, where_clause, keys, descending, page_size,
+                   lower=None, upper=None):
+        prefix = lower or 'A'
+        for i in range(2500):
+            if behaviour.get(prefix) == 'fail' and i == 1200:
+                raise RuntimeError(f"range {prefix} failed")
+            yield {'symbol': f'{prefix}{i:05d}', 'date': '2025-01-01'}
+
+    monkeypatch.setattr(supabase_helpers, '_keyset_pages', fake_pages)
+    return behaviour
+
+
+class TestParallelSelectIter:
+    """supabase_select_iter(parallel > 1)"""
+
+    def test_unselected_key_columns_are_removed(self, fake_ranges):
+        rows = list(supabase_helpers.supabase_select_iter('raw_stock_prices', 'date', parallel=3))
+        assert len(rows) == 7500
+        assert all(row == {'date': '2025-01-01'} for row in rows)
+
+    def test_reads_every_range(self, fake_ranges):
+        rows = list(supabase_helpers.supabase_select_iter('raw_stock_prices', parallel=3))
+        assert len(rows) == 7500
+        assert len({row['symbol'] for row in rows}) == 7500
+
+    def test_range_error_is_raised(self, fake_ranges):
+        """A failed range must not look like a short, successful result"""
+        fake_ranges['B'] = 'fail'
+        with pytest.raises(RuntimeError, match='range B failed'):
+            list(supabase_helpers.supabase_select_iter('raw_stock_prices', parallel=3))
+
+    def test_select_does_not_return_partial_rows(self, fake_ranges):
+        fake_ranges['C'] = 'fail'
+        assert supabase_helpers.supabase_select('raw_stock_prices', parallel=3) == []
+
+    def test_early_close_stops_producers(self, fake_ranges):
+        before = set(threading.enumerate())
+        rows = supabase_helpers.supabase_select_iter('raw_stock_prices', parallel=3, page_size=100)
+        next(rows)
+        readers = set(threading.enumerate()) - before
+        assert readers
+        rows.close()
+        for reader in readers:
+            reader.join(timeout=5)
+        assert not any(reader.is_alive() for reader in readers)
+
+
+def _split_top_level(text):
+    """Split a PostgREST logical filter on commas outside parentheses/quotes."""
+    parts, depth, quoted, current = [], 0, False, ''
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        current += char
+    parts.append(current)
+    return parts
+
+
+OPERATORS = {
+    'eq': lambda a, b: a == b,
+    'gt': lambda a, b: a > b,
+    'lt': lambda a, b: a < b,
+    'gte': lambda a, b: a >= b,
+}
+
+
+def _condition(text):
+    """Compile 'key.op."value"' or 'and(...)' into a row predicate."""
+    if text.startswith('and('):
+        checks = [_condition(part) for part in _split_top_level(text[4:-1])]
+        return lambda row: all(check(row) for check in checks)
+    key, op, value = text.split('.', 2)
+    value = value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    return lambda row: OPERATORS[op](str(row[key]), value)
+
+
+class FakeQuery:
+    """Evaluates the subset of the PostgREST builder that _keyset_pages uses."""
+
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.filters = []
+        self.orders = []
+        self.page_size = None
+        self.columns = None
+
+    def select(self, columns):
+        self.columns = None if columns == '*' else columns.split(',')
+        return self
+
+    def gte(self, key, value):
+        self.filters.append(lambda row: row[key] >= value)
+        return self
+
+    def lt(self, key, value):
+        self.filters.append(lambda row: row[key] < value)
+        return self
+
+    def or_(self, text):
+        checks = [_condition(part) for part in _split_top_level(text)]
+        self.filters.append(lambda row: any(check(row) for check in checks))
+        self.log.append(text)
+        return self
+
+    def order(self, key, desc=False):
+        self.orders.append((key, desc))
+        return self
+
+    def limit(self, count):
+        self.page_size = count
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if all(check(row) for check in self.filters)]
+        for key, desc in reversed(self.orders):
+            rows.sort(key=lambda row: row[key], reverse=desc)
+        # Fresh dicts per response, projected like PostgREST
+        data = [{key: row[key] for key in (self.columns or row)} for row in rows[:self.page_size]]
+        return type('Result', (), {'data': data})()
+
+
+@pytest.fixture
+def fake_table(monkeypatch):
+    """raw_stock_prices with 7 symbols x 5 dates; returns (rows, or_ filter log)."""
+    rows = [{'symbol': symbol, 'date': f'2025-01-0{day}'}
+            for symbol in ['AAPL', 'BRK.B', 'KO', 'MSFT', 'O', 'T', 'VZ'] for day in range(1, 6)]
+    log = []
+
+    class FakeClient:
+        def table(self, name):
+            return FakeQuery(rows, log)
+
+    monkeypatch.setattr(supabase_helpers, 'get_supabase_client', lambda: FakeClient())
+    return rows, log
+
+
+class TestKeysetPages:
+    """_keyset_pages cursor progression over a composite key"""
+
+    def test_reads_each_row_once_across_key_ties(self, fake_table):
+        rows, log = fake_table
+        result = list(supabase_helpers._keyset_pages(
+            'raw_stock_prices', '*', None, ['symbol', 'date'], False, page_size=4))
+
+        assert result == sorted(rows, key=lambda row: (row['symbol'], row['date']))
+        # 35 rows in pages of 4: the cursor is applied from page 2 onwards
+        assert len(log) == 8
+
+    def test_cursor_seeks_past_last_row(self, fake_table):
+        rows, log = fake_table
+        pages = supabase_helpers._keyset_pages(
+            'raw_stock_prices', '*', None, ['symbol', 'date'], False, page_size=4)
+        for _ in range(5):
+            next(pages)
+
+        assert log == ['symbol.gt."AAPL",and(symbol.eq."AAPL",date.gt."2025-01-04")']
+
+    def test_descending_leading_key(self, fake_table):
+        rows, _ = fake_table
+        result = list(supabase_helpers._keyset_pages(
+            'raw_stock_prices', '*', None, ['symbol', 'date'], True, page_size=3))
+
+        assert [row['symbol'] for row in result[::5]] == ['VZ', 'T', 'O', 'MSFT', 'KO', 'BRK.B', 'AAPL']
+        assert [row['date'] for row in result[:5]] == [f'2025-01-0{day}' for day in range(1, 6)]
+
+    def test_bounds_limit_leading_key(self, fake_table):
+        result = list(supabase_helpers._keyset_pages(
+            'raw_stock_prices', '*', None, ['symbol', 'date'], False, page_size=4,
+            lower='KO', upper='O'))
+
+        assert {row['symbol'] for row in result} == {'KO', 'MSFT'}
+        assert len(result) == 10
+
+    def test_exact_page_multiple_ends_on_empty_page(self, fake_table):
+        rows, log = fake_table
+        result = list(supabase_helpers._keyset_pages(
+            'raw_stock_prices', '*', None, ['symbol', 'date'], False, page_size=5))
+
+        assert len(result) == 35
+        assert len(log) == 7
+
+
+class TestSelectIterColumns:
+    """Key columns added for the cursor are not returned"""
+
+    def test_only_selected_columns_across_pages(self, fake_table):
+        rows, log = fake_table
+        result = list(supabase_helpers.supabase_select_iter('raw_stock_prices', 'date', page_size=4))
+
+        assert result == [{'date': row['date']}
+                          for row in sorted(rows, key=lambda row: (row['symbol'], row['date']))]
+        assert len(log) == 8
@@ -0,0 +1,127 @@
+"""
+Tests for the in-memory symbol access index in api/middleware/tier_enforcer.py
+(no database: get_db is replaced with a paging in-memory fake).
+"""
+
+import asyncio
+
+import pytest
+
+from api.middleware import tier_enforcer
+from api.middleware.tier_enforcer import SymbolAccessIndex, TierEnforcer
+
+STOCKS = [
+    {'symbol': 'AAPL', 'exchange': 'NASDAQ'},
+    {'symbol': 'KO', 'exchange': 'NYSE'},
+    {'symbol': 'RY', 'exchange': 'TSX'},
+    {'symbol': 'BP', 'exchange': 'LSE'},
+    {'symbol': 'OTC1', 'exchange': None},  # Unlisted exchange counts as US
+]
+FREE_TIER = [{'symbol': 'KO'}]
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.start = self.end = None
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.start, self.end = start, end
+        return self
+
+    async def execute(self):
+        self.db.queries += 1
+        if self.db.down:
+            raise ConnectionError("database unreachable")
+        rows = sorted(self.db.tables[self.table], key=lambda row: row['symbol'])
+
+        class Result:
+            data = rows[self.start:self.end + 1]
+        return Result()
+
+
+class FakeDb:
+    def __init__(self):
+        self.tables = {'raw_stocks': STOCKS, 'divv_free_tier_stocks': FREE_TIER}
+        self.down = False
+        self.queries = 0
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDb()
+    monkeypatch.setattr(tier_enforcer, 'get_db', lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def index(monkeypatch, db):
+    index = SymbolAccessIndex(refresh_seconds=300, retry_seconds=60)
+    index.PAGE_SIZE = 2  # Exercise paging
+    monkeypatch.setattr(tier_enforcer, 'symbol_access_index', index)
+    return index
+
+
+def filter_symbols(tier, symbols):
+    return asyncio.run(TierEnforcer.filter_accessible_symbols(tier, symbols))
+
+
+class TestTierFilter:
+    """Accessible symbols per tier, order kept"""
+
+    SYMBOLS = ['BP', 'aapl', 'RY', 'KO', 'OTC1', 'UNKNOWN']
+
+    def test_premium_covers_all_listed_countries(self, index):
+        assert filter_symbols('premium', self.SYMBOLS) == ['BP', 'aapl', 'RY', 'KO', 'OTC1']
+
+    def test_starter_is_us_only(self, index):
+        assert filter_symbols('starter', self.SYMBOLS) == ['aapl', 'KO', 'OTC1']
+
+    def test_free_is_the_sample_set(self, index):
+        assert filter_symbols('free', self.SYMBOLS) == ['KO']
+
+    def test_unrestricted_and_unknown_tiers(self, index, db):
+        assert filter_symbols('enterprise', self.SYMBOLS) == self.SYMBOLS
+        assert filter_symbols('bogus', self.SYMBOLS) == []
+        assert db.queries == 0
+
+
+class TestLoadFailure:
+    """A failed load is not repeated on every request"""
+
+    def test_denies_without_reloading_during_backoff(self, index, db):
+        db.down = True
+        assert filter_symbols('starter', ['AAPL']) == []
+        queries = db.queries
+        assert filter_symbols('starter', ['AAPL']) == []
+        assert filter_symbols('premium', ['BP']) == []
+        assert db.queries == queries
+        assert index.get_stats()['consecutive_failures'] == 1
+
+    def test_retries_after_backoff(self, index, db):
+        db.down = True
+        filter_symbols('starter', ['AAPL'])
+        db.down = False
+        index._retry_at = 0.0  # Backoff elapsed
+        assert filter_symbols('starter', ['AAPL']) == ['AAPL']
+        assert index.get_stats()['consecutive_failures'] == 0
+
+    def test_backoff_doubles_up_to_refresh_interval(self, index, db):
+        db.down = True
+        delays = []
+        for _ in range(5):
+            index._retry_at = 0.0
+            before = tier_enforcer.time.monotonic()
+            asyncio.run(index.ensure_fresh())
+            delays.append(round(index._retry_at - before, -1))
+        assert delays == [60, 120, 240, 300, 300]
@@ -0,0 +1,401 @@
+"""Tests for UsageCounters limits, period rollover and DB sync on both backends"""
+
+import asyncio
+import math
+from datetime import datetime, timezone
+
+import pytest
+
+import api.middleware.usage_counters as usage_module
+from api.middleware.usage_counters import (
+    ALLOWED, MINUTE_EXCEEDED, MONTH_SECONDS, MONTHLY_EXCEEDED, UsageCounters
+)
+
+START = 1_750_000_000.0  # 2025-06-15 15:06:40 UTC, 40s into a minute
+
+
+class RedisDown(Exception):
+    pass
+
+
+class FakeRedis:
+    """
+    Dict-backed stand-in for redis.asyncio with decode_responses=True.
+
+    register_script returns a Python port of _CONSUME_LUA run against the
+    same hashes and strings, so the script and the sync pipelines share state.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.strings = {}
+        self.down = False
+        self.closed = False
+        self.script_calls = 0
+
+    def _check(self):
+        if self.down:
+            raise RedisDown("connection refused")
+
+    def register_script(self, source):
+        assert source == usage_module._CONSUME_LUA
+
+        async def script(keys, args):
+            self.script_calls += 1
+            self._check()
+            return self._consume(keys, args)
+        return script
+
+    def _consume(self, keys, args):
+        month_key, current_key, previous_key, pending_key = keys
+        now, seed_count, seed_end, monthly_limit, burst_limit, fraction, key_id, period = args
+        month = self.hashes.setdefault(month_key, {})
+        period_end = float(month.get('end', 0))
+        count = int(month.get('count', 0))
+        if period_end == 0:
+            period_end, count = seed_end, seed_count
+        if now >= period_end:
+            period_end, count = now + period, 0
+        month.update({'end': str(period_end), 'count': str(count)})
+
+        current = int(self.strings.get(current_key, 0))
+        previous = int(self.strings.get(previous_key, 0))
+        weight = 1 - fraction
+        minute = math.floor(previous * weight + current)
+        if count >= monthly_limit:
+            return [0, count, minute, period_end]
+        if minute >= burst_limit:
+            return [-1, count, minute, period_end]
+
+        count = self.hincrby(month_key, 'count', 1)
+        current = int(self.strings.get(current_key, 0)) + 1
+        self.strings[current_key] = str(current)
+        self.hincrby(pending_key, key_id, 1)
+        return [1, count, math.floor(previous * weight + current), period_end]
+
+    async def ping(self):
+        self._check()
+        return True
+
+    def hincrby(self, name, field, amount):
+        values = self.hashes.setdefault(name, {})
+        values[field] = str(int(values.get(field, 0)) + amount)
+        return int(values[field])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def hgetall(self, name):
+        self.commands.append(lambda: dict(self.redis.hashes.get(name, {})))
+        return self
+
+    def delete(self, name):
+        self.commands.append(lambda: int(self.redis.hashes.pop(name, None) is not None))
+        return self
+
+    def hmget(self, name, *fields):
+        self.commands.append(lambda: [self.redis.hashes.get(name, {}).get(f) for f in fields])
+        return self
+
+    def hincrby(self, name, field, amount):
+        self.commands.append(lambda: self.redis.hincrby(name, field, amount))
+        return self
+
+    async def execute(self):
+        self.redis._check()
+        commands, self.commands = self.commands, []
+        return [command() for command in commands]
+
+
+class FakeAdminDb:
+    """Records sync_key_usage payloads; raises while down, waits delay seconds first."""
+
+    def __init__(self):
+        self.down = False
+        self.delay = 0
+        self.calls = []
+
+    async def rpc(self, name, params):
+        assert name == 'sync_key_usage'
+        await asyncio.sleep(self.delay)
+        if self.down:
+            raise ConnectionError("database unreachable")
+        self.calls.append(params)
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(START)
+    monkeypatch.setattr(usage_module.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def admin_db(monkeypatch):
+    db = FakeAdminDb()
+    monkeypatch.setattr(usage_module, 'get_admin_db', lambda: db)
+    return db
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    """Memory backend without trying the configured Redis."""
+    monkeypatch.setattr(UsageCounters, '_connect_redis', staticmethod(lambda: None))
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def make_counters(request, no_redis):
+    """UsageCounters factory, once per backend."""
+    def make():
+        redis = FakeRedis() if request.param == 'redis' else None
+        return UsageCounters(sync_interval=3600, redis_client=redis)
+    return make
+
+
+def key(monthly_usage=0, reset_at=None, key_id='key-1'):
+    return {'id': key_id, 'monthly_usage': monthly_usage, 'monthly_usage_reset_at': reset_at}
+
+
+def run(coro_fn):
+    """Run on a fresh loop; the background sync task is cancelled with it."""
+    return asyncio.run(coro_fn())
+
+
+class TestBurstWindow:
+    """Sliding one-minute window across a fixed-minute boundary"""
+
+    def test_previous_minute_carries_over_by_remaining_weight(self, make_counters, clock):
+        counters = make_counters()
+
+        async def main():
+            info = key()
+            clock.now = START + 15  # 55s into the minute
+            first = [(await counters.consume(info, 1000, 5))[0] for _ in range(6)]
+
+            # 10s into the next minute: previous minute weighs 50/60 -> 5 * 5/6 = 4.17
+            clock.now = START + 30
+            second = [(await counters.consume(info, 1000, 5))[0] for _ in range(2)]
+
+            # 50s in: previous (5) weighs 1/6 -> 0.83 + 1 current
+            clock.now = START + 70
+            third = await counters.consume(info, 1000, 5)
+            return first, second, third
+
+        first, second, third = run(main)
+        assert first == [ALLOWED] * 5 + [MINUTE_EXCEEDED]
+        assert second == [ALLOWED, MINUTE_EXCEEDED]
+        assert third[0] == ALLOWED and third[2] == 2
+        assert counters.stats['consumed'] == 7 and counters.stats['rejected'] == 2
+
+    def test_rejected_requests_are_not_counted(self, make_counters, clock):
+        counters = make_counters()
+
+        async def main():
+            info = key(monthly_usage=3)
+            for _ in range(4):
+                outcome, monthly, _, _ = await counters.consume(info, 1000, 2)
+            return outcome, monthly
+
+        assert run(main) == (MINUTE_EXCEEDED, 5)
+
+
+class TestMonthlyPeriod:
+    """Seeding from the DB row and resetting when the billing period ends"""
+
+    def test_limit_then_reset_at_period_end(self, make_counters, clock):
+        counters = make_counters()
+        reset_at = datetime.fromtimestamp(START + 100, timezone.utc)
+
+        async def main():
+            info = key(monthly_usage=9, reset_at=reset_at)
+            results = [await counters.consume(info, 10, 100) for _ in range(2)]
+            clock.now = START + 100
+            results.append(await counters.consume(info, 10, 100))
+            return results
+
+        last_allowed, exceeded, after_reset = run(main)
+        assert last_allowed[:2] == (ALLOWED, 10) and last_allowed[3] == START + 100
+        assert exceeded[:2] == (MONTHLY_EXCEEDED, 10)
+        assert after_reset[:2] == (ALLOWED, 1)
+        assert after_reset[3] == START + 100 + MONTH_SECONDS
+
+    def test_db_seed_is_ignored_once_the_period_is_tracked(self, make_counters, clock):
+        counters = make_counters()
+
+        async def main():
+            await counters.consume(key(monthly_usage=4), 1000, 100)
+            # A stale row (the DB has not been synced yet) must not rewind the count
+            return await counters.consume(key(monthly_usage=0), 1000, 100)
+
+        assert run(main)[1] == 6
+
+
+class TestSync:
+    """Reconciling pending deltas to divv_api_keys"""
+
+    def test_memory_deltas_are_restored_after_failed_rpc(self, no_redis, clock, admin_db):
+        counters = UsageCounters(sync_interval=3600)
+
+        async def main():
+            for key_id in ('a', 'a', 'b'):
+                await counters.consume(key(key_id=key_id), 1000, 100)
+            admin_db.down = True
+            failed = await counters.sync()
+            pending_after_failure = dict(counters._pending)
+            admin_db.down = False
+            return failed, pending_after_failure, await counters.sync()
+
+        failed, pending, synced = run(main)
+        assert failed == 0 and pending == {'a': 2, 'b': 1}
+        assert synced == 2 and counters._pending == {}
+        assert admin_db.calls == [{
+            'key_ids': ['a', 'b'],
+            'deltas': [2, 1],
+            'monthly_usages': [None, None],
+            'reset_ats': [datetime.fromtimestamp(START + MONTH_SECONDS, timezone.utc).isoformat()] * 2
+        }]
+        assert counters.stats['sync_failures'] == 1
+
+    def test_redis_and_outage_deltas_are_restored_and_merged(self, clock, admin_db):
+        redis = FakeRedis()
+        counters = UsageCounters(sync_interval=3600, redis_client=redis)
+
+        async def main():
+            info = key(monthly_usage=10)
+            for _ in range(2):
+                await counters.consume(info, 1000, 100)
+            redis.down = True
+            await counters.consume(info, 1000, 100)  # counted in memory during the outage
+            redis.down = False
+            assert await counters._probe_redis()
+
+            admin_db.down = True
+            assert await counters.sync() == 0
+            restored = (dict(redis.hashes[usage_module._PENDING_KEY]), dict(counters._pending))
+            admin_db.down = False
+            return restored, await counters.sync()
+
+        (redis_pending, memory_pending), synced = run(main)
+        assert redis_pending == {'key-1': '2'} and memory_pending == {'key-1': 1}
+        assert synced == 1
+        assert admin_db.calls[0]['deltas'] == [3]
+        # Shared Redis total (12) plus the request only the memory fallback saw
+        assert admin_db.calls[0]['monthly_usages'] == [13]
+        assert usage_module._PENDING_KEY not in redis.hashes and counters._pending == {}
+
+    def test_nothing_pending_skips_the_rpc(self, make_counters, admin_db):
+        counters = make_counters()
+        assert run(counters.sync) == 0
+        assert admin_db.calls == []
+
+    def test_cancelled_sync_restores_taken_deltas(self, clock, admin_db):
+        redis = FakeRedis()
+        counters = UsageCounters(sync_interval=3600, redis_client=redis)
+        admin_db.delay = 60
+
+        async def main():
+            await counters.consume(key(), 1000, 100)
+            redis.down = True
+            await counters.consume(key(), 1000, 100)  # counted in memory
+            redis.down = False
+            assert await counters._probe_redis()
+
+            task = asyncio.create_task(counters.sync())
+            await asyncio.sleep(0.01)  # Inside the RPC, deltas already taken
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        run(main)
+        assert redis.hashes[usage_module._PENDING_KEY] == {'key-1': '1'}
+        assert counters._pending == {'key-1': 1}
+
+    def test_close_waits_for_sync_in_flight(self, make_counters, clock, admin_db):
+        counters = make_counters()
+        counters.sync_interval = 0.01
+        admin_db.delay = 0.05
+
+        async def main():
+            for _ in range(3):
+                await counters.consume(key(), 1000, 100)
+            await asyncio.sleep(0.03)  # The background sync is inside the RPC
+            await counters.close()
+
+        run(main)
+        assert [call['deltas'] for call in admin_db.calls] == [[3]]
+        assert counters._pending == {}
+
+
+class TestRedisAvailability:
+    """Startup ping and background reconnect probing"""
+
+    def test_unreachable_redis_at_startup_uses_memory(self, monkeypatch):
+        redis = pytest.importorskip('redis')
+
+        class Unreachable:
+            def __init__(self, **options):
+                pass
+
+            def ping(self):
+                raise redis.ConnectionError("connection refused")
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(usage_module.settings, 'USAGE_COUNTERS_BACKEND', 'auto')
+        monkeypatch.setattr(redis, 'Redis', Unreachable)
+        assert UsageCounters(sync_interval=3600).backend == 'memory'
+
+    def test_failed_call_is_not_retried_on_the_request_path(self, clock):
+        redis = FakeRedis()
+        counters = UsageCounters(sync_interval=3600, redis_client=redis)
+
+        async def main():
+            redis.down = True
+            outcomes = [(await counters.consume(key(), 1000, 100))[0] for _ in range(3)]
+            return outcomes
+
+        assert run(main) == [ALLOWED] * 3
+        # One failed attempt, then memory until a probe succeeds
+        assert redis.script_calls == 1
+        assert counters.stats['redis_errors'] == 1
+        assert not counters.redis_available and counters._pending == {'key-1': 3}
+
+    def test_background_task_probes_until_redis_answers(self, clock, admin_db):
+        redis = FakeRedis()
+        counters = UsageCounters(sync_interval=3600, redis_client=redis)
+        counters.retry_interval = 0.01
+
+        async def main():
+            redis.down = True
+            await counters.consume(key(), 1000, 100)
+            await asyncio.sleep(0.05)
+            still_down = counters.redis_available
+            redis.down = False
+            await asyncio.sleep(0.05)
+            return still_down, counters.redis_available
+
+        assert run(main) == (False, True)
@@ -39,7 +39,11 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from lib.processors.batch_eod_processor import BatchEODProcessor
 from lib.processors.aggressive_processor import AggressiveProcessor
 from lib.core.config import Config
-from supabase_helpers import test_supabase_connection, supabase_select
+from lib.utils.performance_monitor import start_metrics_server
+from lib.utils.security_classifier import (
+    load_classified_symbols, split_special_securities, summarize_exclusions
+)
+from supabase_helpers import test_supabase_connection
 
 # Configure logging
 logging.basicConfig(
@@ -55,43 +59,12 @@ def filter_special_securities(symbols: list) -> tuple:
     """
     Filter out warrants, units, and other special securities.
 
+    See lib.utils.security_classifier for the rules.
+
     Returns:
         (regular_symbols, excluded_symbols)
     """
-    excluded = []
-    regular = []
-
-    for symbol in symbols:
-        is_excluded = False
-
-        # Pattern 1: Ends with separator + suffix (SYMBOL-W, SYMBOL.U)
-        if any(symbol.endswith(sep + suf) for sep in ['-', '.']
-               for suf in ['W', 'WS', 'WT', 'U', 'UN', 'UU', 'R', 'RT']):
-            is_excluded = True
-
-        # Pattern 2: Ends with U (units) - ARBGU, ARCKU, ARGUU
-        elif len(symbol) >= 5 and symbol.endswith('U') and symbol[-2].isalpha():
-            if symbol.endswith('UU') or (symbol.endswith('U') and not symbol.endswith('RU')):
-                is_excluded = True
-
-        # Pattern 3: Ends with W (warrants) - ARCKW, ARGUW, ASPSW
-        elif len(symbol) >= 5 and symbol.endswith('W') and symbol[-2].isalpha():
-            is_excluded = True
-
-        # Pattern 4: Money market funds (XX, FX suffix)
-        elif symbol.endswith('XX') or symbol.endswith('FX'):
-            is_excluded = True
-
-        # Pattern 5: Foreign exchanges (.V, .TO)
-        elif '.V' in symbol or '.TO' in symbol:
-            is_excluded = True
-
-        if is_excluded:
-            excluded.append(symbol)
-        else:
-            regular.append(symbol)
-
-    return regular, excluded
+    return split_special_securities(symbols)
 
 
 def run_batch_mode(args):
@@ -141,16 +114,17 @@ def run_aggressive_mode(args):
 
     # Get symbols
     logger.info("📊 Fetching symbols from database...")
-    db_symbols = supabase_select('raw_stocks', 'symbol', limit=None)
-    all_symbols = [s['symbol'] for s in db_symbols] if db_symbols else []
+    categories = load_classified_symbols()
+    all_symbols = list(categories)
 
-    # Filter out special securities
+    # Filter out special securities (categories cached in raw_stocks)
     logger.info("🔍 Filtering out warrants, units, and special securities...")
-    symbols, excluded = filter_special_securities(all_symbols)
+    symbols, excluded = split_special_securities(all_symbols, categories)
 
     logger.info(f"✅ Found {len(all_symbols):,} total symbols")
     if excluded:
         logger.info(f"🚫 Excluded {len(excluded):,} warrants/units/rights from price updates")
+        logger.info(f"   ({summarize_exclusions(excluded, categories)})")
         logger.info(f"📊 Processing {len(symbols):,} regular securities")
 
     if args.test:
@@ -178,7 +152,9 @@ def run_aggressive_mode(args):
     logger.info("=" * 70)
     logger.info("")
 
-    summary = processor.process_batch_aggressive(symbols)
+    if args.resume:
+        logger.info("📂 Resuming from checkpoint journal (finished symbols are skipped)")
+    summary = processor.process_batch_aggressive(symbols, resume=args.resume)
 
     logger.info("")
     logger.info("=" * 70)
@@ -193,6 +169,27 @@ def run_aggressive_mode(args):
     logger.info("=" * 70)
 
 
+def run_schedule_mode(args):
+    """Run the calendar/freshness/priority-aware ingest scheduler."""
+    from lib.pipelines.ingest_scheduler import IngestScheduler
+
+    # Test Supabase connection
+    logger.info("🔌 Testing Supabase connection...")
+    if not test_supabase_connection():
+        logger.error("❌ Supabase connection failed - exiting")
+        sys.exit(1)
+    logger.info("✅ Supabase connection successful")
+
+    scheduler = IngestScheduler(max_workers=args.workers)
+
+    if args.daemon:
+        scheduler.run_forever()
+        return
+
+    results = scheduler.run_once(dry_run=args.dry_run)
+    logger.info(f"📊 Schedule Results: {results}")
+
+
 def run_discovery_mode(args):
     """Run symbol discovery and validation mode."""
     from lib.pipelines.stock_data_pipeline import StockDataPipeline
@@ -258,6 +255,13 @@ Examples:
   # Aggressive mode (fallback if batch has issues)
   python3 update.py --mode aggressive --workers 200
   python3 update.py --mode aggressive --test
+  python3 update.py --mode aggressive --resume     # Continue a killed run
+  python3 update.py --mode aggressive --metrics-port 9108   # Live metrics at /metrics
+
+  # Scheduled incremental ingest (stale symbols only, by priority tier)
+  python3 update.py --mode schedule --dry-run     # Show the plan
+  python3 update.py --mode schedule               # Run the current plan
+  python3 update.py --mode schedule --daemon      # Re-plan every SCHEDULER_POLL_MINUTES
 
   # Weekly symbol discovery
   python3 update.py --mode discover --limit 1000
@@ -271,6 +275,7 @@ Examples:
 Modes:
   batch        Ultra-fast batch price updates (1-5 min, recommended for daily)
   aggressive   High-throughput mode with workers (5-10 min, fallback)
+  schedule     Stale symbols only, in priority tiers and rate-budgeted waves
   discover     Find and validate new symbols (weekly task)
   refresh      Refresh company data, dividends, ETF classifications
         """
@@ -280,7 +285,7 @@ Modes:
         '--mode',
         type=str,
         required=True,
-        choices=['batch', 'aggressive', 'discover', 'refresh'],
+        choices=['batch', 'aggressive', 'schedule', 'discover', 'refresh'],
         help='Operation mode'
     )
 
@@ -306,6 +311,25 @@ Modes:
         help='Number of concurrent workers for aggressive mode (default: 200)'
     )
 
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Resume an interrupted aggressive run, skipping symbols it already finished'
+    )
+
+    # Schedule mode options
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Keep planning and running scheduled ingest (schedule mode)'
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Log the work plan without fetching anything (schedule mode)'
+    )
+
     # Common options
     parser.add_argument(
         '--limit',
@@ -327,6 +351,13 @@ Modes:
         help='Validate discovered symbols (discovery mode)'
     )
 
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=Config.LOGGING.METRICS_PORT,
+        help='Serve live Prometheus metrics on this port at /metrics (default: METRICS_PORT env, 0 = off)'
+    )
+
     # Refresh mode options
     parser.add_argument(
         '--days-ahead',
@@ -341,11 +372,16 @@ Modes:
     if args.mode == 'refresh' and not args.submode:
         parser.error("--mode refresh requires --submode (companies|dividends|etfs)")
 
+    # Live metrics for long runs (scrape or curl http://127.0.0.1:<port>/metrics)
+    start_metrics_server(args.metrics_port)
+
     try:
         if args.mode == 'batch':
             run_batch_mode(args)
         elif args.mode == 'aggressive':
             run_aggressive_mode(args)
+        elif args.mode == 'schedule':
+            run_schedule_mode(args)
         elif args.mode == 'discover':
             run_discovery_mode(args)
         elif args.mode == 'refresh':